@@ -7,18 +7,23 @@ URL: https://m.a-bly.com/
 스크롤 시 발생하는 백그라운드 API (Server-Driven UI JSON) 응답을 가로채어 파싱.
 """
 import asyncio
+import gzip
 import json
 import time
 import re
 import os
-import requests
+import sys
 from bs4 import BeautifulSoup
 from playwright.async_api import async_playwright
 from playwright_stealth import Stealth
 from datetime import datetime
 from urllib.parse import urlparse, parse_qs
-from translate_helper import get_english_brand
+from translate_helper import get_english_brand, translate_brands, print_cache_stats
 from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.supabase_client import sb, stats as sb_stats, print_stats
+from generic_crawler.bulk_writer import RankingWriter
+from generic_crawler.parsers import iter_ably_items
 
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
 
@@ -26,6 +31,12 @@ SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 SOURCE = "ably"
 
+MAX_RANK = 200  # 카테고리당 저장할 랭킹 깊이 (이만큼 모이면 스크롤 중단)
+ABLY_MAX_SCROLLS = int(os.getenv("ABLY_MAX_SCROLLS", "10"))
+ABLY_SCROLL_WAIT = float(os.getenv("ABLY_SCROLL_WAIT", "2"))  # 스크롤 후 새 상품 응답을 기다리는 최대 시간 (초)
+# 설정 시 응답 원본을 <dir>/ably_api_dump_<code>.jsonl.gz 로 저장 (parser_bench.py --fixture 로 재생)
+ABLY_DUMP_DIR = os.getenv("ABLY_DUMP_DIR", "")
+
 if not SUPABASE_URL or not SUPABASE_KEY:
     print("Error: SUPABASE_URL or SUPABASE_KEY not found.")
     exit(1)
@@ -54,13 +65,13 @@ def log_crawl(status, metadata=None):
             "finished_at": datetime.now().isoformat() if status in ("completed", "failed") else None,
             "metadata_json": metadata or {}
         }
-        requests.post(f"{SUPABASE_URL}/rest/v1/crawl_logs", headers=HEADERS, json=log_data, timeout=10)
+        sb.post(f"{SUPABASE_URL}/rest/v1/crawl_logs", headers=HEADERS, json=log_data, timeout=10)
     except Exception as e:
         print(f"Warning: Could not log crawl status: {e}")
 
-def save_product_and_rank(item, rank, category_code, category_name):
+def save_product_and_rank(writer, item, rank, category_code, category_name):
     """
-    Supabase에 상품 및 랭킹 정보 저장 (Upsert)
+    상품 및 랭킹 레코드를 writer 버퍼에 적재 (flush 시 products_master / daily_rankings_v2 일괄 Upsert)
     """
     try:
         product_id = item['id']
@@ -73,7 +84,6 @@ def save_product_and_rank(item, rank, category_code, category_name):
         # Translate brand
         brand_en = get_english_brand(brand) if brand else ""
 
-        # 1. products_master 테이블에 상품 정보 저장 (Upsert)
         product_record = {
             "product_id": str(product_id),
             "source": SOURCE,
@@ -94,44 +104,7 @@ def save_product_and_rank(item, rank, category_code, category_name):
         if item.get('review_rating') and float(item['review_rating']) > 0:
             product_record['review_rating'] = float(item['review_rating'])
 
-        res = requests.post(
-            f"{SUPABASE_URL}/rest/v1/products_master",
-            headers=HEADERS,
-            params={"on_conflict": "source,product_id"},
-            json=product_record,
-            timeout=10
-        )
-
-        if res.status_code not in [200, 201]:
-            print(f"  ⚠️ Product upsert error for {product_id}: {res.text[:100]}")
-            return False
-
-        # 2. 내부 ID 가져오기
-        db_items = res.json()
-        if not db_items:
-            return False
-        internal_id = db_items[0].get("id")
-
-        # 3. daily_rankings_v2 테이블에 랭킹 저장
-        ranking_record = {
-            "product_id": internal_id,
-            "rank": rank,
-            "date": datetime.now().date().isoformat(),
-            "category_code": category_code,
-            "source": SOURCE
-        }
-
-        rank_res = requests.post(
-            f"{SUPABASE_URL}/rest/v1/daily_rankings_v2",
-            headers=HEADERS,
-            params={"on_conflict": "product_id,date,category_code"},
-            json=ranking_record,
-            timeout=10
-        )
-
-        if rank_res.status_code not in [200, 201]:
-             print(f"  ⚠️ Rank upsert error for {product_id}: {rank_res.text[:100]}")
-        
+        writer.add(product_record, rank, category_code)
         return True
 
     except Exception as e:
@@ -145,6 +118,7 @@ async def ably_crawl():
     log_crawl("running", {"message": "Started Ably crawl with Playwright Interceptor"})
     
     total_saved = 0
+    writer = RankingWriter(SOURCE)
     
     async with async_playwright() as p:
         # Headless=False 와 Persistent Context 를 사용하여 실제 유저의 브라우저 상태를 유지 (Cloudflare 우회 핵심)
@@ -184,8 +158,14 @@ async def ably_crawl():
         for category in TARGET_CATEGORIES:
             print(f"\\n--- [{category['name']}] 탭 클릭 및 데이터 수집 시작 ---")
             
-            # API 응답을 동적으로 모으는 큐
-            api_responses = []
+            # 응답이 올 때마다 컴포넌트 walk → id 기준 map 에 바로 합침 (처음 나온 순서 = 랭킹)
+            products = {}
+            progress = asyncio.Event()  # 새 상품이 들어올 때마다 set
+            stats = {"responses": 0, "items": 0}
+            dump = None
+            if ABLY_DUMP_DIR:
+                os.makedirs(ABLY_DUMP_DIR, exist_ok=True)
+                dump = gzip.open(os.path.join(ABLY_DUMP_DIR, f"ably_api_dump_{category['code']}.jsonl.gz"), "wt", encoding="utf-8")
 
             async def handle_response(response):
                 if "api/" in response.url or "v2/screens" in response.url:
@@ -194,7 +174,15 @@ async def ably_crawl():
                             content_type = response.headers.get("content-type", "")
                             if "json" in content_type:
                                 data = await response.json()
-                                api_responses.append(data)
+                                stats["responses"] += 1
+                                if dump and not dump.closed:
+                                    dump.write(json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n")
+                                before = len(products)
+                                for item in iter_ably_items(data):
+                                    stats["items"] += 1
+                                    products[item['id']] = item
+                                if len(products) > before:
+                                    progress.set()
                     except:
                         pass
 
@@ -203,6 +191,7 @@ async def ably_crawl():
             # 홈(메인)으로 다시 강제 회귀
             await page.goto("https://m.a-bly.com/", wait_until="domcontentloaded", timeout=15000)
             await asyncio.sleep(3)
+            progress.clear()  # 탭 클릭 후 들어오는 상품을 기다리기 위해
 
             # 카테고리 탭 (의류, 뷰티, 신발, 등)을 클릭
             tab_name = category['tab_name']
@@ -214,100 +203,44 @@ async def ably_crawl():
             except Exception as e:
                 print(f"  ❌ '{tab_name}' 탭을 클릭할 수 없습니다: {e}")
                 page.remove_listener("response", handle_response)
+                if dump:
+                    dump.close()
                 continue
 
-            await asyncio.sleep(5)
+            # 첫 상품 목록 응답까지 대기 (최대 5초)
+            try:
+                await asyncio.wait_for(progress.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                pass
             
-            # 상품 로드 유도를 위해 페이지 스크롤 (랭킹 데이터 수집)
+            # 상품 로드 유도를 위해 페이지 스크롤 - MAX_RANK 개가 모이거나 새 상품이 더 안 나오면 중단
             print(f"  👇 스크롤하여 {tab_name} 데이터 API 수집...")
-            for scroll_idx in range(5):
+            scrolls, stalls = 0, 0
+            while len(products) < MAX_RANK and scrolls < ABLY_MAX_SCROLLS and stalls < 2:
+                before = len(products)
+                progress.clear()
                 await page.mouse.wheel(0, 1500)
-                await asyncio.sleep(2)
-
-            page.remove_listener("response", handle_response)
-            
-            with open(f"/tmp/ably_api_dump_{category['code']}.json", "w") as f:
-                json.dump(api_responses, f, ensure_ascii=False, indent=2)
-
-            print(f"  🔍 캡처된 Server-Driven JSON Payload: {len(api_responses)}개")
-            
-            captured_products = []
-            
-            for res_data in api_responses:
+                scrolls += 1
                 try:
-                    # 응답 데이터 내 컴포넌트 검사
-                    components = res_data.get('components', [])
-                    for comp in components:
-                        item_list_type = comp.get('type', {}).get('item_list', '')
-                        if not isinstance(item_list_type, str):
-                            continue
-                            
-                        # 상품들을 담고 있는 리스트 추출
-                        goods_list = comp.get('entity', {}).get('item_list', [])
-                        if not isinstance(goods_list, list):
-                            continue
-                        
-                        for p_node in goods_list:
-                            # 1. 일반적인 구조 (바로 item 이 있음)
-                            item_node = p_node.get('item', {})
-                            log_node = p_node.get('logging', {})
-                            
-                            # 2. TWO_COL_CARD_LIST 구조 (item_entity 래퍼 존재)
-                            if not item_node and 'item_entity' in p_node:
-                                item_node = p_node['item_entity'].get('item', {})
-                                log_node = p_node['item_entity'].get('logging', {})
-                                
-                            if not item_node:
-                                continue
-                                
-                            p_id = item_node.get('sno')
-                            p_name = item_node.get('name')
-                            
-                            # 가격: price 우선, sale_price 보조
-                            p_price = item_node.get('price', 0)
-                            if not p_price and 'sale_price' in item_node:
-                                p_price = item_node['sale_price']
-                                
-                            p_image = item_node.get('image', '')
-                            p_market_name = item_node.get('market_name', 'Ably')
-                            
-                            # 리뷰, 만족도 추출
-                            analytics = log_node.get('analytics', {})
-                            review_count = analytics.get('REVIEW_COUNT', 0)
-                            review_rating_raw = analytics.get('REVIEW_RATING', 0)
-                            p_review_rating = 0.0
-                            if review_rating_raw and int(review_rating_raw) > 0:
-                                p_review_rating = round(int(review_rating_raw) / 20.0, 1) # 100점 만점을 5.0 만점으로
-
-                            if p_id and p_name:
-                                item_data = {
-                                    'id': str(p_id),
-                                    'name': p_name,
-                                    'brand_name': p_market_name,
-                                    'price': p_price,
-                                    'image': p_image,
-                                    'url': f"https://m.a-bly.com/goods/{p_id}"
-                                }
-                                if review_count and int(review_count) > 0:
-                                    item_data['review_count'] = int(review_count)
-                                if p_review_rating > 0:
-                                    item_data['review_rating'] = p_review_rating
-                                    
-                                captured_products.append(item_data)
-                except Exception as e:
+                    await asyncio.wait_for(progress.wait(), timeout=ABLY_SCROLL_WAIT)
+                    await asyncio.sleep(0.3)  # 같은 스크롤에서 이어지는 응답
+                except asyncio.TimeoutError:
                     pass
+                stalls = stalls + 1 if len(products) == before else 0
 
-            # 중복 제거 (상품 id 기준)
-            unique_products = {p['id']: p for p in captured_products}.values()
-            unique_products = list(unique_products)
+            page.remove_listener("response", handle_response)
+            if dump:
+                dump.close()
+
+            unique_products = list(products.values())
+            print(f"  🔍 캡처된 Server-Driven JSON Payload: {stats['responses']}개 (상품 노드 {stats['items']}개, 스크롤 {scrolls}회)")
             print(f"  ✅ API 파싱 결과: 총 {len(unique_products)}개 정상 상품 발견")
 
-            saved_count = 0
-            for rank, item in enumerate(unique_products, start=1):
-                if rank > 200: break # 최대 200개까지
-                if save_product_and_rank(item, rank, category["code"], category["name"]):
-                    saved_count += 1
-                    
+            translate_brands([item.get('brand_name', '') for item in unique_products[:MAX_RANK]])
+            for rank, item in enumerate(unique_products[:MAX_RANK], start=1):
+                save_product_and_rank(writer, item, rank, category["code"], category["name"])
+
+            saved_count = writer.flush()
             print(f"  💾 '{category['name']}' 저장 완료: {saved_count}개")
             total_saved += saved_count
                 
@@ -317,8 +250,12 @@ async def ably_crawl():
     print(f"[{datetime.now()}] 크롤링 종료. 총 {total_saved}개 저장. 소요시간: {duration}")
     log_crawl("completed", {
         "total_saved": total_saved, 
-        "duration": duration
+        "duration": duration,
+        "writer": writer.stats(),
+        "http": sb_stats()
     })
+    print_stats()
+    print_cache_stats()
 
 if __name__ == "__main__":
     asyncio.run(ably_crawl())
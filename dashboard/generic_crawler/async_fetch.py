@@ -0,0 +1,202 @@
+"""
+Async HTTP Fetch Engine
+
+API 기반 크롤러(무신사, 네이버 베스트)가 카테고리 × 기간 조합을 하나씩
+requests.get + time.sleep 으로 돌던 것을, 호스트별 동시성 제한 + token bucket 속도 제한
+아래에서 동시에 요청하고 결과를 하나의 stream 으로 돌려줍니다.
+- HOST_LIMITS: 호스트별 concurrency / rate (초당 요청) / burst
+- aiohttp 가 있으면 사용, 없으면 requests 를 asyncio.to_thread 로 실행 (동작 동일)
+- 429/5xx/네트워크 오류는 지수 백오프로 retries 회 재시도
+- 호스트별 요청 수 / 오류 / 대기 시간 / 지연 시간 통계
+
+사용법:
+    jobs = [FetchJob(key=(gender, cat), url=..., params=...) for ...]
+    async with AsyncFetcher(headers=REQUEST_HEADERS) as fetcher:
+        async for job, data, error in fetcher.stream(jobs):
+            ...                                  # 완료된 순서대로 (ordered=True 면 jobs 순서)
+    fetcher.print_stats()
+"""
+import os
+import time
+import random
+import asyncio
+from dataclasses import dataclass, field
+from urllib.parse import urlparse
+
+try:
+    import aiohttp
+except ImportError:  # requests + to_thread 로 대체
+    aiohttp = None
+import requests
+
+# concurrency: 동시 요청 수 / rate: 초당 평균 요청 수 / burst: 한 번에 몰아 보낼 수 있는 요청 수
+HOST_LIMITS = {
+    "api.musinsa.com": {"concurrency": 4, "rate": 2.0, "burst": 4},
+    "snxbest.naver.com": {"concurrency": 4, "rate": 3.0, "burst": 5},
+    "default": {"concurrency": 2, "rate": 1.0, "burst": 2},
+}
+
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "2"))
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+
+class FetchError(Exception):
+    def __init__(self, status, message=""):
+        super().__init__(f"HTTP {status} {message}".strip())
+        self.status = status
+
+
+@dataclass
+class FetchJob:
+    key: object
+    url: str
+    params: dict = None
+    headers: dict = None
+    meta: dict = field(default_factory=dict)
+
+
+class TokenBucket:
+    """rate 개/초로 채워지고 최대 burst 개까지 쌓이는 token bucket"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """token 1개를 얻을 때까지 대기하고 대기한 시간(초)을 반환"""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = (1 - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+class _Host:
+    def __init__(self, limits: dict):
+        self.semaphore = asyncio.Semaphore(limits["concurrency"])
+        self.bucket = TokenBucket(limits["rate"], limits["burst"])
+        self.stats = {"requests": 0, "errors": 0, "retries": 0, "wait_s": 0.0, "total_ms": 0.0, "max_ms": 0.0}
+
+
+class AsyncFetcher:
+    """호스트별 동시성 / 속도 제한을 지키는 비동기 JSON fetcher"""
+
+    def __init__(self, headers: dict = None, timeout: float = 30, retries: int = FETCH_RETRIES, limits: dict = None):
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.retries = retries
+        self.limits = limits or HOST_LIMITS
+        self._hosts = {}
+        self._session = None
+        self.started = None
+
+    async def __aenter__(self):
+        self.started = time.perf_counter()
+        if aiohttp is not None:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+        else:
+            self._session = requests.Session()
+        return self
+
+    async def __aexit__(self, *exc):
+        if aiohttp is not None:
+            await self._session.close()
+        else:
+            self._session.close()
+
+    def _host(self, url: str) -> _Host:
+        host = urlparse(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = _Host(self.limits.get(host, self.limits["default"]))
+        return self._hosts[host]
+
+    async def _request(self, url, params, headers):
+        if aiohttp is not None:
+            async with self._session.get(url, params=params, headers=headers) as res:
+                if res.status != 200:
+                    raise FetchError(res.status, (await res.text())[:200])
+                return await res.json(content_type=None)
+
+        def blocking():
+            res = self._session.get(url, params=params, headers=headers, timeout=self.timeout)
+            if res.status_code != 200:
+                raise FetchError(res.status_code, res.text[:200])
+            return res.json()
+        return await asyncio.to_thread(blocking)
+
+    async def fetch_json(self, url: str, params: dict = None, headers: dict = None):
+        """GET → JSON. 재시도 후에도 실패하면 예외"""
+        host = self._host(url)
+        merged = {**self.headers, **(headers or {})}
+        async with host.semaphore:
+            for attempt in range(self.retries + 1):
+                host.stats["wait_s"] += await host.bucket.acquire()
+                t0 = time.perf_counter()
+                try:
+                    return await self._request(url, params, merged)
+                except Exception as e:
+                    retryable = not isinstance(e, FetchError) or e.status in RETRY_STATUS
+                    if not retryable or attempt == self.retries:
+                        host.stats["errors"] += 1
+                        raise
+                    host.stats["retries"] += 1
+                    await asyncio.sleep(0.5 * (2 ** attempt) + random.uniform(0, 0.5))
+                finally:
+                    elapsed_ms = (time.perf_counter() - t0) * 1000
+                    host.stats["requests"] += 1
+                    host.stats["total_ms"] += elapsed_ms
+                    host.stats["max_ms"] = max(host.stats["max_ms"], elapsed_ms)
+
+    async def _run(self, job: FetchJob):
+        try:
+            return job, await self.fetch_json(job.url, job.params, job.headers), None
+        except Exception as e:
+            return job, None, e
+
+    async def stream(self, jobs: list, ordered: bool = False):
+        """모든 job 을 동시에 시작하고 (job, data, error) 를 완료 순서대로 yield.
+        ordered=True 면 fetch 는 동시에 하되 jobs 순서대로 yield (뒤 결과가 앞 결과를 덮어써야 할 때)"""
+        tasks = [asyncio.create_task(self._run(job)) for job in jobs]
+        try:
+            if ordered:
+                for task in tasks:
+                    yield await task
+            else:
+                for next_done in asyncio.as_completed(tasks):
+                    yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> dict:
+        """log_crawl metadata 용 호스트별 요약"""
+        elapsed = time.perf_counter() - self.started if self.started else 0
+        hosts = {}
+        for name, h in self._hosts.items():
+            s = h.stats
+            hosts[name] = {
+                "requests": s["requests"],
+                "errors": s["errors"],
+                "retries": s["retries"],
+                "wait_s": round(s["wait_s"], 2),
+                "avg_ms": round(s["total_ms"] / s["requests"], 1) if s["requests"] else 0,
+                "max_ms": round(s["max_ms"], 1),
+            }
+        return {"engine": "aiohttp" if aiohttp is not None else "requests", "elapsed_s": round(elapsed, 2), "hosts": hosts}
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"\n  🛰️ Async fetch ({s['engine']}) {s['elapsed_s']:.1f}s")
+        for name, h in s["hosts"].items():
+            print(f"    - {name:<20} 요청 {h['requests']:>4}회  오류 {h['errors']}  재시도 {h['retries']}"
+                  f"  pacing 대기 {h['wait_s']:.1f}s  avg {h['avg_ms']:.0f}ms  max {h['max_ms']:.0f}ms")
@@ -1,8 +1,10 @@
 import os
-import requests
+import sys
 import json
 from dotenv import load_dotenv
-from translate_helper import get_english_brand
+from translate_helper import get_english_brand, translate_brands, print_cache_stats
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.supabase_client import sb
 
 # Load config
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
@@ -35,7 +37,7 @@ def backfill_brands():
         url = f"{SUPABASE_URL}/rest/v1/products_master?select=id,brand,brand_en&brand=not.is.null&brand=neq.&brand_en=is.null&limit={limit}&offset={offset}"
         
         try:
-            res = requests.get(url, headers=HEADERS, timeout=30)
+            res = sb.get(url, headers=HEADERS, timeout=30)
             res.raise_for_status()
             products = res.json()
             
@@ -48,8 +50,8 @@ def backfill_brands():
             # 2. Extract unique Korean brands to translate in bulk safely
             unique_brands = list(set([p['brand'] for p in products if p['brand']]))
             
-            # This relies on the _brand_cache population logic in translate_helper
-            # For efficiency, we just call get_english_brand on each which internally caches
+            # Batch-translate once (persistent cache first, API only for misses)
+            translate_brands(unique_brands)
             
             updates = []
             for p in products:
@@ -78,7 +80,7 @@ def backfill_brands():
                 
                 for update in updates:
                     patch_url = f"{SUPABASE_URL}/rest/v1/products_master?id=eq.{update['id']}"
-                    patch_res = requests.patch(
+                    patch_res = sb.patch(
                         patch_url, 
                         headers=HEADERS, 
                         json={"brand_en": update['brand_en']},
@@ -97,6 +99,7 @@ def backfill_brands():
             break
             
     print(f"Backfill complete. Total rows updated: {total_updated}")
+    print_cache_stats()
 
 if __name__ == "__main__":
     backfill_brands()
@@ -0,0 +1,269 @@
+"""
+Shared Playwright Browser Pool
+
+크롤러마다 async_playwright().chromium.launch() 를 따로 하던 것을
+하나의 warm Chromium + 사이트별 BrowserContext 로 통합합니다.
+- SITE_PROFILES: 사이트별 user agent / viewport / 모바일 여부 / stealth / 쿠키 / 워밍업 URL
+- pool.page(site) 로 page 를 빌려 쓰고, context 는 N 페이지마다 재생성 (메모리 증가 억제)
+- BROWSER_CDP_URL 이 있으면 launch 대신 이미 떠 있는 Chromium 에 연결 (프로세스 간 공유)
+
+사용법:
+    from generic_crawler.browser_pool import BrowserPool
+
+    async with BrowserPool() as pool:
+        async with pool.page("oliveyoung") as page:
+            await page.goto(url)
+
+    # 상시 실행 Chromium (다른 크롤러는 BROWSER_CDP_URL=http://127.0.0.1:9222 로 연결)
+    python generic_crawler/browser_pool.py serve --port 9222
+"""
+import os
+import sys
+import asyncio
+import argparse
+from contextlib import asynccontextmanager
+from datetime import datetime
+from playwright.async_api import async_playwright
+
+BROWSER_CDP_URL = os.getenv("BROWSER_CDP_URL", "")
+BROWSER_RECYCLE_PAGES = int(os.getenv("BROWSER_RECYCLE_PAGES", "50"))
+
+LAUNCH_ARGS = ['--disable-blink-features=AutomationControlled', '--no-sandbox']
+
+DESKTOP_UA = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+MAC_UA = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+IPHONE_UA = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1"
+
+# context 옵션은 browser.new_context() 인자 그대로. 그 외 key:
+#   device      : Playwright 내장 디바이스 프리셋 이름 (예: "iPhone 13")
+#   stealth     : page 마다 playwright_stealth 적용
+#   cookies     : context 생성 직후 add_cookies
+#   warmup_url  : context 생성 직후 1회 방문 (Cloudflare 세션 확립 등, pool lock 밖에서 - 다른 사이트는 기다리지 않음)
+SITE_PROFILES = {
+    "default": {
+        "context": {"user_agent": DESKTOP_UA, "viewport": {"width": 1280, "height": 1024}},
+    },
+    "oliveyoung": {
+        "context": {"user_agent": DESKTOP_UA, "viewport": {"width": 1920, "height": 1080}},
+    },
+    "oliveyoung_hotdeal": {
+        "context": {"user_agent": DESKTOP_UA, "viewport": {"width": 1280, "height": 1024}},
+    },
+    "oliveyoung_review": {
+        "context": {
+            "user_agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+            "viewport": {"width": 1280, "height": 900},
+            "locale": "ko-KR",
+        },
+        "warmup_url": "https://www.oliveyoung.co.kr/store/main/getBestList.do",
+    },
+    "ssg": {
+        "context": {"user_agent": DESKTOP_UA, "viewport": {"width": 1920, "height": 1080}},
+    },
+    "ably_mobile": {
+        "context": {
+            "user_agent": "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4_1 like Mac OS X) AppleWebKit/605.1.15",
+            "viewport": {"width": 390, "height": 844},
+            "is_mobile": True,
+            "has_touch": True,
+        },
+    },
+    "zigzag": {
+        "device": "iPhone 13",
+    },
+    "news": {
+        "context": {"user_agent": DESKTOP_UA},
+    },
+    # review_collector (AI Vision 스크린샷)
+    "review_desktop": {
+        "context": {"user_agent": MAC_UA, "locale": "ko-KR", "viewport": {"width": 1280, "height": 900}},
+        "stealth": True,
+    },
+    "review_ably": {
+        "context": {"user_agent": IPHONE_UA, "locale": "ko-KR", "viewport": {"width": 375, "height": 812}},
+        "stealth": True,
+    },
+}
+
+
+class BrowserPool:
+    """warm Chromium 1개 + 사이트별 BrowserContext 를 관리하는 pool"""
+
+    def __init__(self, headless: bool = True, recycle_after: int = BROWSER_RECYCLE_PAGES,
+                 cdp_url: str = BROWSER_CDP_URL, launch_args: list = None):
+        self.headless = headless
+        self.recycle_after = recycle_after
+        self.cdp_url = cdp_url
+        self.launch_args = launch_args or LAUNCH_ARGS
+        self._pw = None
+        self._browser = None
+        self._contexts = {}   # site -> {"context", "used", "open"}
+        self._retired = []    # 재생성 대상이지만 아직 열린 page 가 있는 context
+        self._lock = asyncio.Lock()
+        self._stats = {"contexts": 0, "recycled": 0, "leases": 0}
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        if self._browser:
+            return
+        self._pw = await async_playwright().start()
+        if self.cdp_url:
+            self._browser = await self._pw.chromium.connect_over_cdp(self.cdp_url)
+            print(f"  🌐 Browser pool: connected to {self.cdp_url}")
+        else:
+            self._browser = await self._pw.chromium.launch(headless=self.headless, args=self.launch_args)
+
+    async def close(self):
+        for entry in list(self._contexts.values()) + self._retired:
+            try:
+                await entry["context"].close()
+            except Exception:
+                pass
+        self._contexts.clear()
+        self._retired.clear()
+        if self._browser:
+            # CDP 연결인 경우 close() 는 연결만 끊고 공유 Chromium 은 유지됨
+            await self._browser.close()
+            self._browser = None
+        if self._pw:
+            await self._pw.stop()
+            self._pw = None
+
+    async def _new_context(self, site: str):
+        profile = SITE_PROFILES.get(site, SITE_PROFILES["default"])
+        options = dict(self._pw.devices[profile["device"]]) if profile.get("device") else {}
+        options.update(profile.get("context", {}))
+
+        context = await self._browser.new_context(**options)
+        if profile.get("cookies"):
+            await context.add_cookies(profile["cookies"])
+        self._stats["contexts"] += 1
+        return context
+
+    async def _warmup(self, site: str, context):
+        page = await context.new_page()
+        try:
+            await page.goto(SITE_PROFILES[site]["warmup_url"], wait_until="domcontentloaded", timeout=60000)
+            await asyncio.sleep(5)
+        except Exception as e:
+            print(f"  ⚠️ [{site}] 워밍업 실패: {e}")
+        finally:
+            await page.close()
+
+    async def _acquire(self, site: str) -> dict:
+        warming = False
+        async with self._lock:
+            entry = self._contexts.get(site)
+            if entry is None:
+                # context 생성만 lock 안에서. 워밍업(최대 60초)은 lock 밖에서 하고,
+                # 같은 사이트의 다른 lease 는 ready future 를 기다림 (다른 사이트는 막지 않음)
+                ready = asyncio.get_running_loop().create_future()
+                entry = {"context": await self._new_context(site), "used": 0, "open": 0, "retired": False,
+                         "ready": ready}
+                self._contexts[site] = entry
+                warming = bool(SITE_PROFILES.get(site, {}).get("warmup_url"))
+                if not warming:
+                    ready.set_result(None)
+            entry["used"] += 1
+            entry["open"] += 1
+            if entry["used"] >= self.recycle_after:
+                # 새 lease 는 새 context 로, 이 context 는 열린 page 가 모두 닫히면 정리
+                self._retire(site)
+            self._stats["leases"] += 1
+
+        try:
+            if warming:
+                try:
+                    await self._warmup(site, entry["context"])
+                finally:
+                    entry["ready"].set_result(None)
+            else:
+                await asyncio.shield(entry["ready"])
+        except BaseException:
+            await self._release(entry)  # 취소된 lease 는 page() 까지 가지 못하므로 여기서 반납
+            raise
+        return entry
+
+    def _retire(self, site: str):
+        entry = self._contexts.pop(site, None)
+        if entry:
+            entry["retired"] = True
+            self._retired.append(entry)
+            self._stats["recycled"] += 1
+        return entry
+
+    async def _release(self, entry: dict):
+        entry["open"] -= 1
+        if entry["retired"] and entry["open"] == 0:
+            self._retired = [e for e in self._retired if e is not entry]
+            try:
+                await entry["context"].close()
+            except Exception:
+                pass
+
+    @asynccontextmanager
+    async def page(self, site: str = "default"):
+        """사이트 context 에서 새 page 를 빌려줌. 블록을 벗어나면 page 를 닫음"""
+        await self.start()
+        entry = await self._acquire(site)
+        page = await entry["context"].new_page()
+        try:
+            if SITE_PROFILES.get(site, {}).get("stealth"):
+                from playwright_stealth import Stealth
+                await Stealth().apply_stealth_async(page)
+            yield page
+        finally:
+            try:
+                await page.close()
+            except Exception:
+                pass
+            await self._release(entry)
+
+    async def recycle(self, site: str):
+        """사이트 context 를 즉시 폐기 (봇 차단 / 재시도 시 새 세션으로 시작)"""
+        async with self._lock:
+            entry = self._retire(site)
+        if entry and entry["open"] == 0:
+            entry["open"] = 1
+            await self._release(entry)
+
+    def stats(self) -> dict:
+        return dict(self._stats, open_contexts=len(self._contexts) + len(self._retired))
+
+
+async def serve(port: int, headless: bool):
+    """원격 디버깅 포트로 Chromium 을 띄워 두고 유지 (BROWSER_CDP_URL 로 연결)"""
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(
+            headless=headless,
+            args=LAUNCH_ARGS + [f"--remote-debugging-port={port}"]
+        )
+        print(f"[{datetime.now()}] 🌐 Browser pool 서버 시작: BROWSER_CDP_URL=http://127.0.0.1:{port}")
+        try:
+            while browser.is_connected():
+                await asyncio.sleep(30)
+        finally:
+            await browser.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared Chromium for crawlers")
+    sub = parser.add_subparsers(dest="command")
+    serve_p = sub.add_parser("serve", help="원격 디버깅 포트로 Chromium 상시 실행")
+    serve_p.add_argument("--port", type=int, default=9222)
+    serve_p.add_argument("--headful", action="store_true")
+    args = parser.parse_args()
+
+    if args.command != "serve":
+        parser.print_help()
+        sys.exit(1)
+    try:
+        asyncio.run(serve(args.port, not args.headful))
+    except KeyboardInterrupt:
+        print("\n  ⏹ Browser pool 서버 종료.")
@@ -0,0 +1,253 @@
+"""
+Batched products_master + daily_rankings_v2 Writer
+
+크롤러가 상품마다 보내던 POST 2회(products_master upsert → daily_rankings_v2 upsert)를
+버퍼에 모았다가 배열 upsert 2회로 처리합니다.
+
+사용법:
+    writer = RankingWriter(SOURCE)
+    for rank, item in enumerate(items, start=1):
+        writer.add(product_record, rank, category_code)
+    saved = writer.flush()            # 카테고리 단위로 호출 (max_batch 초과 시 자동 flush)
+    log_crawl("completed", {"writer": writer.stats()})
+
+내용(content_hash)이 바뀌지 않은 상품은 products_master upsert 를 건너뛰고 캐시된 id 로
+랭킹만 저장합니다 (product_hashes.py, PRODUCT_CHANGE_DETECTION=off 로 끄기).
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.config import SUPABASE_URL, HEADERS
+from generic_crawler.supabase_client import sb
+from generic_crawler.product_hashes import ProductHashCache, content_hash
+
+PRODUCT_CONFLICT = "source,product_id"
+RANKING_CONFLICT = "product_id,date,category_code"
+
+
+def _missing_column(error) -> bool:
+    """PostgREST 'Could not find the ... column' 에러 (해당 컬럼 migration 이 아직 적용되지 않은 DB)"""
+    text = error.response.text if getattr(error, "response", None) is not None else ""
+    return "Could not find the" in text and "column" in text
+
+
+def upsert_rows(table: str, rows: list, on_conflict: str = None, timeout: int = 30,
+                returning: bool = True, optional_columns: tuple = ()) -> list:
+    """배열 upsert. 저장된 row 목록을 반환 (실패 시 빈 리스트).
+
+    PostgREST 의 bulk insert 는 모든 객체의 key 가 같아야 하므로
+    (예: review_count 가 있는 상품/없는 상품) key 구성별로 나눠서 전송합니다.
+    returning=False 면 return=minimal 로 보내고 성공한 입력 row 를 그대로 반환합니다 (임베딩처럼 큰 컬럼용).
+    optional_columns: 컬럼이 없다는 에러면 이 컬럼들을 빼고 한 번 더 전송 (migration 누락 대비)
+    """
+    if not rows:
+        return []
+
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row.keys())), []).append(row)
+
+    headers = {**HEADERS, "Prefer": f"return={'representation' if returning else 'minimal'},resolution=merge-duplicates"}
+    params = {"on_conflict": on_conflict} if on_conflict else {}
+
+    saved = []
+    for group in groups.values():
+        try:
+            try:
+                r = sb.post(
+                    f"{SUPABASE_URL}/rest/v1/{table}",
+                    headers=headers,
+                    params=params,
+                    json=group,
+                    timeout=timeout,
+                    idempotent_upsert=True  # on_conflict 가 있을 때만 재시도 (supabase_client)
+                )
+                r.raise_for_status()
+            except Exception as e:
+                drop = [c for c in optional_columns if c in group[0]]
+                if not drop or not _missing_column(e):
+                    raise
+                # If failed, retry without optional columns (in case migration missing)
+                print(f"  ⚠️ {table}: {', '.join(drop)} 컬럼 없음 - 제외하고 재시도")
+                group = [{k: v for k, v in row.items() if k not in drop} for row in group]
+                r = sb.post(
+                    f"{SUPABASE_URL}/rest/v1/{table}",
+                    headers=headers,
+                    params=params,
+                    json=group,
+                    timeout=timeout,
+                    idempotent_upsert=True
+                )
+                r.raise_for_status()
+            saved.extend(r.json() if returning else group)
+        except Exception as e:
+            print(f"  ❌ {table} 일괄 저장 실패 ({len(group)}건): {e}")
+            if hasattr(e, 'response') and e.response is not None:
+                print(f"  ❌ 상세 에러: {e.response.text[:300]}")
+    return saved
+
+
+class RankingWriter:
+    """products_master / daily_rankings_v2 배치 writer (source 단위)"""
+
+    def __init__(self, source: str, max_batch: int = 500, verbose: bool = True, optional_columns: tuple = ()):
+        self.source = source
+        self.max_batch = max_batch
+        self.verbose = verbose
+        self.optional_columns = optional_columns  # products_master 에 없을 수 있는 컬럼 (upsert_rows 참고)
+        self._pending = []  # (product_record, rank, category_code, date)
+        self._flushes = []
+        self._auto_saved = 0  # max_batch 자동 flush 로 저장된 수 (다음 flush() 반환값에 합산)
+        self.total_saved = 0
+        self.total_errors = 0
+        self._hashes = {}  # record source → ProductHashCache (naver_best 는 weekly source 도 같은 writer 사용)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def add(self, product_record: dict, rank: int, category_code: str) -> None:
+        """상품 1건 + 랭킹 1건을 버퍼에 적재합니다."""
+        record = dict(product_record)
+        record.setdefault("source", self.source)
+        record.setdefault("updated_at", datetime.now().isoformat())
+        self._pending.append((record, rank, category_code, datetime.now().date().isoformat()))
+
+        if len(self._pending) >= self.max_batch:
+            self._auto_saved += self._flush()
+
+    def hashes(self, source: str) -> ProductHashCache:
+        if source not in self._hashes:
+            self._hashes[source] = ProductHashCache(source)
+        return self._hashes[source]
+
+    def _upsert_products(self, records: list) -> dict:
+        """products_master upsert 후 (source, product_id) → id. 저장된 상품은 hash 캐시에 기록"""
+        saved = upsert_rows("products_master", records, on_conflict=PRODUCT_CONFLICT,
+                            optional_columns=self.optional_columns)
+        written = {}
+        for r in saved:
+            if r.get("id") and r.get("product_id") and r.get("source"):
+                written.setdefault(r["source"], []).append((r["product_id"], r["id"], r.get("content_hash") or content_hash(r)))
+        for source, rows in written.items():
+            self.hashes(source).remember(rows)
+        return {(r.get("source"), r.get("product_id")): r.get("id") for r in saved if "id" in r}
+
+    @staticmethod
+    def _rankings(pending: list, id_map: dict):
+        rankings = {}
+        for record, rank, category_code, date in pending:
+            internal_id = id_map.get((record["source"], record["product_id"]))
+            if not internal_id:
+                continue
+            rankings[(internal_id, date, category_code)] = {
+                "product_id": internal_id,
+                "rank": rank,
+                "date": date,
+                "category_code": category_code,
+                "source": record["source"]
+            }
+        return rankings
+
+    def flush(self) -> int:
+        """버퍼를 비우고 랭킹이 저장된 상품 수를 반환합니다 (직전 flush() 이후 자동 flush 분 포함)."""
+        saved, self._auto_saved = self._flush() + self._auto_saved, 0
+        return saved
+
+    def _flush(self) -> int:
+        if not self._pending:
+            return 0
+
+        pending, self._pending = self._pending, []
+
+        # 같은 배치 안에서 동일 상품이 여러 번 나오면(예: 전체 + 하위 카테고리)
+        # ON CONFLICT 가 한 row 를 두 번 갱신하게 되므로 마지막 값만 남깁니다.
+        products = {}
+        for record, _, _, _ in pending:
+            products[(record["source"], record["product_id"])] = record
+
+        # 내용이 그대로인 상품은 products_master 를 건너뛰고 캐시된 id 로 랭킹만 저장
+        changed, unchanged = [], {}
+        for key, record in products.items():
+            digest = content_hash(record)
+            cache = self.hashes(record["source"])
+            internal_id = cache.unchanged_id(record["product_id"], digest)
+            if internal_id:
+                unchanged[key] = internal_id
+            else:
+                changed.append({**record, "content_hash": digest} if cache.enabled else record)
+
+        t0 = time.perf_counter()
+        id_map = self._upsert_products(changed)
+        id_map.update(unchanged)
+        product_ms = (time.perf_counter() - t0) * 1000
+
+        rankings = self._rankings(pending, id_map)
+
+        t1 = time.perf_counter()
+        saved_ranks = upsert_rows("daily_rankings_v2", list(rankings.values()), on_conflict=RANKING_CONFLICT)
+        if rankings and not saved_ranks and unchanged:
+            # 캐시된 id 가 DB 와 어긋난 경우 (상품 삭제 등): 캐시를 버리고 전체 upsert 로 한 번 재시도
+            print(f"  ⚠️ 랭킹 저장 실패 - hash 캐시 {len(unchanged)}건 무효화 후 재시도")
+            stale = {}
+            for source, product_id in unchanged:
+                stale.setdefault(source, []).append(product_id)
+            for source, product_ids in stale.items():
+                self.hashes(source).forget(product_ids)
+            resaved = self._upsert_products([
+                {**products[key], "content_hash": content_hash(products[key])} for key in unchanged
+            ])
+            for key in unchanged:
+                if key in resaved:
+                    id_map[key] = resaved[key]
+                else:
+                    id_map.pop(key, None)  # 재저장되지 않은 상품만 누락 처리
+            rankings = self._rankings(pending, id_map)
+            saved_ranks = upsert_rows("daily_rankings_v2", list(rankings.values()), on_conflict=RANKING_CONFLICT)
+            changed, unchanged = list(products.values()), {}
+        ranking_ms = (time.perf_counter() - t1) * 1000
+
+        # 실제로 저장된 랭킹 row 기준 (key 구성별 그룹 중 일부만 실패할 수 있음)
+        saved_keys = {(r.get("product_id"), r.get("date"), r.get("category_code")) for r in saved_ranks}
+        ok = sum(1 for record, _, category_code, date in pending
+                 if (id_map.get((record["source"], record["product_id"])), date, category_code) in saved_keys)
+        errors = len(pending) - ok
+
+        self.total_saved += ok
+        self.total_errors += errors
+        self._flushes.append({
+            "items": len(pending),
+            "products": len(products),
+            "changed": len(changed),
+            "unchanged": len(unchanged),
+            "rankings": len(rankings),
+            "product_ms": round(product_ms, 1),
+            "ranking_ms": round(ranking_ms, 1),
+        })
+
+        if self.verbose:
+            print(f"  📦 flush #{len(self._flushes)}: products {len(changed)}/{len(products)}건 ({product_ms:.0f}ms"
+                  + (f", 변경 없음 {len(unchanged)}건 skip" if unchanged else "") + ")"
+                  f" / rankings {len(rankings)}건 ({ranking_ms:.0f}ms)"
+                  + (f" / 실패 {errors}건" if errors else ""))
+        return ok
+
+    def stats(self) -> dict:
+        """log_crawl metadata 용 요약 (flush 횟수, row 수, 변경/동일 상품 비율, 지연 시간)"""
+        total_ms = sum(f["product_ms"] + f["ranking_ms"] for f in self._flushes)
+        changed = sum(f["changed"] for f in self._flushes)
+        unchanged = sum(f["unchanged"] for f in self._flushes)
+        return {
+            "flushes": len(self._flushes),
+            "saved": self.total_saved,
+            "errors": self.total_errors,
+            "products_rows": sum(f["products"] for f in self._flushes),
+            "products_changed": changed,
+            "products_unchanged": unchanged,
+            "unchanged_ratio": round(unchanged / (changed + unchanged), 3) if changed + unchanged else 0,
+            "rankings_rows": sum(f["rankings"] for f in self._flushes),
+            "write_ms": round(total_ms, 1),
+            "max_flush_ms": max((f["product_ms"] + f["ranking_ms"] for f in self._flushes), default=0),
+        }
@@ -18,3 +18,8 @@ HEADERS = {
     "Content-Type": "application/json",
     "Prefer": "return=representation,resolution=merge-duplicates"
 }
+
+# Supabase REST 커넥션 풀 / 재시도 설정 (supabase_client.py)
+SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "10"))
+SUPABASE_MAX_RETRIES = int(os.getenv("SUPABASE_MAX_RETRIES", "3"))
+SUPABASE_BACKOFF = float(os.getenv("SUPABASE_BACKOFF", "0.5"))
@@ -0,0 +1,259 @@
+"""
+Article Content Extraction Benchmark
+
+fixtures/articles/ 에 저장된 뉴스 기사 HTML 로 본문 추출 방식을 비교합니다 (라이브 사이트 없이 실행).
+- legacy    : 기존 fetch_article_content (BeautifulSoup, 모든 <p>/<div> get_text() 중 가장 긴 것)
+- extractor : content_extractor.extract_main_block (lxml, 한 번의 bottom-up 패스)
+방식별로 파싱 포함 median ms, 정답 본문(fixtures/expected/article__<fixture>.txt) 대비 token precision / recall / F1 출력.
+--nest N 은 <body> 안쪽을 div N 겹으로 더 감싸 문서 깊이에 따른 시간 증가를 봅니다 (기본 0,300:
+libxml2 기본 깊이 제한 256 을 넘는 wrapper 중첩). 깊이를 더해도 extractor 출력(F1)은 nest 0 과 같아야 합니다.
+
+fixture 는 WEB_SOURCES 매체별로 <source_id>__<key>.html.
+- 실제 기사: --capture 로 저장한 페이지. 정답 초안은 article__<fixture>.txt.draft (extractor 출력)로 저장되므로
+  기사 본문과 대조해 고친 뒤 .txt 로 이름을 바꿔야 품질 검사에 들어갑니다.
+- <source_id>__synthetic.html: 매체별 레이아웃(wrapper 중첩, 사이드바, 관련기사 목록)을 흉내 낸 합성 템플릿.
+  속도 / 깊이(--nest) 비교용으로만 출력하고 품질 검사(--min-f1)와 매체 coverage 에는 넣지 않습니다.
+SOURCE_IDS 의 매체 중 정답이 있는 실제 기사 fixture 가 없는 매체는 경고로 출력하고,
+--require-real 이면 exit 1 (실제 기사를 캡처해 정답을 검토한 뒤 쓰는 검사).
+
+사용법:
+    python content_bench.py                          # 전체 fixture (실제 기사 F1 < --min-f1 또는 깊이에 따라 F1 하락 시 exit 1)
+    python content_bench.py --require-real           # + 실제 기사 fixture 가 없는 매체가 있으면 exit 1
+    python content_bench.py --only wkorea,hwahae --repeat 200
+    python content_bench.py --nest 0,50,200,500      # 깊이별 시간
+    python content_bench.py --capture --per-source 3 # 실제 기사 페이지 저장 (브라우저)
+    python content_bench.py --out content_bench.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import argparse
+from glob import glob
+from collections import Counter
+from datetime import datetime
+from statistics import median
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.content_extractor import extract_main_block
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "articles")
+EXPECTED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "expected")
+
+MAX_CHARS = 3000  # fetch_article_content 의 LLM 컨텍스트 제한 (품질은 제한 전 전체 텍스트로 비교)
+
+# news_trend_crawler.WEB_SOURCES 의 id (그 모듈은 import 시 Supabase env 를 요구하므로 여기 따로 둠)
+SOURCE_IDS = ("apparelnews", "cosinkorea", "beautynury", "fashionbiz", "wkorea", "hwahae")
+
+
+def legacy_longest_block(html: str) -> str:
+    """기존 fetch_article_content 의 추출부 그대로 (비교 기준)"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for script in soup(["script", "style", "nav", "header", "footer"]):
+        script.decompose()
+    longest_text = ""
+    for p in soup.find_all(['p', 'div']):
+        text = p.get_text(separator=" ", strip=True)
+        if len(text) > len(longest_text):
+            longest_text = text
+    return longest_text
+
+
+METHODS = {
+    "legacy": legacy_longest_block,
+    "extractor": lambda html: extract_main_block(html)["text"],
+}
+
+
+def expected_path(fixture: str) -> str:
+    return os.path.join(EXPECTED_DIR, f"article__{os.path.splitext(os.path.basename(fixture))[0]}.txt")
+
+
+def fixture_source(fixture: str) -> str:
+    return os.path.splitext(os.path.basename(fixture))[0].split("__")[0]
+
+
+def is_synthetic(fixture: str) -> bool:
+    return os.path.splitext(os.path.basename(fixture))[0].endswith("__synthetic")
+
+
+def tokens(text: str) -> Counter:
+    return Counter(re.findall(r"\w+", text.lower()))
+
+
+def token_f1(actual: str, expected: str) -> dict:
+    """bag-of-tokens precision / recall / F1 (본문 밖 텍스트가 섞이면 precision, 본문이 빠지면 recall 하락)"""
+    got, want = tokens(actual), tokens(expected)
+    overlap = sum((got & want).values())
+    precision = overlap / sum(got.values()) if got else 0.0
+    recall = overlap / sum(want.values()) if want else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {"precision": round(precision, 3), "recall": round(recall, 3), "f1": round(f1, 3)}
+
+
+def nest_body(html: str, depth: int) -> str:
+    if depth <= 0:
+        return html
+    html = re.sub(r"(<body[^>]*>)", r"\1" + '<div class="wrap">' * depth, html, count=1, flags=re.I)
+    return re.sub(r"(</body>)", "</div>" * depth + r"\1", html, count=1, flags=re.I)
+
+
+def run_method(func, html: str, repeat: int):
+    text = func(html)
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func(html)
+        timings.append(time.perf_counter() - t0)
+    return text, median(timings) * 1000
+
+
+def bench(only=None, methods=None, repeat: int = 20, depths=(0,)) -> list:
+    results = []
+    for path in sorted(glob(os.path.join(FIXTURE_DIR, "*.html"))):
+        if only and fixture_source(path) not in only:
+            continue
+        with open(path, encoding="utf-8", errors="replace") as f:
+            html = f.read()
+        expected = None
+        if os.path.exists(expected_path(path)):
+            with open(expected_path(path), encoding="utf-8") as f:
+                expected = f.read()
+        for depth in depths:
+            doc = nest_body(html, depth)
+            for method in methods or METHODS:
+                text, ms = run_method(METHODS[method], doc, repeat)
+                results.append({
+                    "fixture": os.path.basename(path),
+                    "source": fixture_source(path),
+                    "synthetic": is_synthetic(path),
+                    "method": method,
+                    "nest": depth,
+                    "kb": round(len(doc.encode("utf-8")) / 1024, 1),
+                    "ms": round(ms, 3),
+                    "chars": len(text),
+                    **(token_f1(text, expected) if expected is not None else {"precision": None, "recall": None, "f1": None}),
+                })
+    return results
+
+
+def missing_sources(results: list, only=None) -> list:
+    """정답이 있는 실제 기사 fixture 가 하나도 없는 매체"""
+    covered = {r["source"] for r in results if not r["synthetic"] and r["f1"] is not None}
+    return [s for s in SOURCE_IDS if (not only or s in only) and s not in covered]
+
+
+def depth_regressions(results: list) -> list:
+    """nest 를 더했을 때 extractor F1 이 nest 0 보다 떨어진 (fixture, nest) — 합성 fixture 포함"""
+    base = {r["fixture"]: r["f1"] for r in results
+            if r["method"] == "extractor" and r["nest"] == 0 and r["f1"] is not None}
+    return [(r["fixture"], r["nest"]) for r in results
+            if r["method"] == "extractor" and r["nest"] and r["fixture"] in base
+            and r["f1"] is not None and r["f1"] < base[r["fixture"]] - 0.001]
+
+
+def print_results(results: list):
+    print(f"\n  {'fixture':<30} {'method':<10} {'nest':>4} {'KB':>6} {'ms':>8} {'chars':>6} {'prec':>6} {'recall':>6} {'F1':>6}")
+    for r in results:
+        quality = (f"{r['precision']:>6.3f} {r['recall']:>6.3f} {r['f1']:>6.3f}" if r["f1"] is not None
+                   else f"{'-':>6} {'-':>6} {'- (정답 없음)':>6}")
+        print(f"  {r['fixture']:<30} {r['method']:<10} {r['nest']:>4} {r['kb']:>6.1f} {r['ms']:>8.3f} {r['chars']:>6} {quality}")
+
+    print(f"\n  {'method':<10} {'nest':>4} {'total ms':>9} {'mean F1':>8}  (F1 은 실제 기사만)")
+    for key in sorted({(r["method"], r["nest"]) for r in results}, key=lambda k: (k[1], k[0])):
+        rows = [r for r in results if (r["method"], r["nest"]) == key]
+        scored = [r["f1"] for r in rows if r["f1"] is not None and not r["synthetic"]]
+        mean_f1 = f"{sum(scored) / len(scored):>8.3f}" if scored else f"{'-':>8}"
+        print(f"  {key[0]:<10} {key[1]:>4} {sum(r['ms'] for r in rows):>9.2f} {mean_f1}")
+
+
+async def capture(per_source: int = 3, only=None):
+    """WEB_SOURCES 목록 페이지에서 기사 per_source 개를 열어 HTML 저장 (정답 초안 = extractor 출력)"""
+    import urllib.parse
+    from bs4 import BeautifulSoup
+    from generic_crawler.browser_pool import BrowserPool
+    from generic_crawler.news_trend_crawler import WEB_SOURCES, news_product_id
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    os.makedirs(EXPECTED_DIR, exist_ok=True)
+    async with BrowserPool() as pool:
+        for source in WEB_SOURCES:
+            if only and source["id"] not in only:
+                continue
+            try:
+                async with pool.page("news") as page:
+                    await page.goto(source["url"], wait_until="domcontentloaded", timeout=60000)
+                    await asyncio.sleep(2)
+                    soup = BeautifulSoup(await page.content(), "html.parser")
+                    links = []
+                    for a in soup.find_all("a"):
+                        href = a.get("href", "")
+                        if source["link_keyword"] in href and len(a.get_text(strip=True)) > 10:
+                            url = urllib.parse.urljoin(source["base_url"], href)
+                            if url not in links:
+                                links.append(url)
+                    for url in links[:per_source]:
+                        await page.goto(url, wait_until="domcontentloaded", timeout=30000)
+                        await asyncio.sleep(1)
+                        html = await page.content()
+                        key = re.sub(r"\W+", "_", news_product_id(source["id"], url).split("_", 2)[-1])
+                        path = os.path.join(FIXTURE_DIR, f"{source['id']}__{key}.html")
+                        with open(path, "w", encoding="utf-8") as f:
+                            f.write(html)
+                        if not os.path.exists(expected_path(path)):
+                            with open(expected_path(path) + ".draft", "w", encoding="utf-8") as f:
+                                f.write(extract_main_block(html)["text"] + "\n")
+                        print(f"  💾 {os.path.basename(path)} ({len(html) // 1024}KB) ← {url}")
+            except Exception as e:
+                print(f"  ❌ {source['id']} 캡처 실패: {e}")
+    print("  ⚠️ 정답 초안(article__*.txt.draft)은 extractor 출력입니다. 기사 본문과 대조해 고친 뒤 .txt 로 바꾸세요.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline article content extraction benchmark")
+    parser.add_argument("--only", help="쉼표로 구분한 매체 id (WEB_SOURCES)")
+    parser.add_argument("--method", help="쉼표로 구분한 방식 (" + ", ".join(METHODS) + ")")
+    parser.add_argument("--repeat", type=int, default=20, help="fixture 당 반복 실행 횟수")
+    parser.add_argument("--nest", default="0,300", help="body 를 추가로 감쌀 div 깊이 (쉼표로 여러 개)")
+    parser.add_argument("--min-f1", type=float, default=0.9, help="extractor F1 이 이보다 낮은 fixture 가 있으면 exit 1")
+    parser.add_argument("--require-real", action="store_true", help="정답이 있는 실제 기사 fixture 가 없는 매체가 있으면 exit 1")
+    parser.add_argument("--capture", action="store_true", help="실제 기사 페이지를 fixture 로 저장")
+    parser.add_argument("--per-source", type=int, default=3)
+    parser.add_argument("--out", help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    only = [s.strip() for s in args.only.split(",")] if args.only else None
+    if args.capture:
+        asyncio.run(capture(args.per_source, only))
+        sys.exit(0)
+
+    methods = [s.strip() for s in args.method.split(",")] if args.method else None
+    if methods and any(m not in METHODS for m in methods):
+        parser.error(f"--method: {', '.join(METHODS)}")
+    depths = [int(d) for d in args.nest.split(",")]
+
+    print(f"🧪 Content extraction bench (repeat {args.repeat})")
+    results = bench(only, methods, args.repeat, depths)
+    print_results(results)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"ran_at": datetime.now().isoformat(), "repeat": args.repeat, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n  💾 결과 저장: {args.out}")
+    failed = False
+    missing = missing_sources(results, only)
+    if missing:
+        print(f"\n  {'❌' if args.require_real else '⚠️'} 정답이 있는 실제 기사 fixture 없음: {', '.join(missing)}"
+              " (--capture 후 정답 검토, 합성 fixture 는 속도 / 깊이만 검사)")
+        failed = args.require_real
+    regressions = depth_regressions(results)
+    for fixture, depth in regressions:
+        print(f"  ❌ {fixture}: nest {depth} 에서 extractor F1 하락")
+    low = [r["fixture"] for r in results if r["method"] == "extractor" and not r["synthetic"]
+           and r["f1"] is not None and r["f1"] < args.min_f1]
+    if failed or regressions or low:
+        sys.exit(1)
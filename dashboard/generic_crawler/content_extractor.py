@@ -0,0 +1,192 @@
+"""
+Article Main-Content Extractor (lxml, single bottom-up pass)
+
+뉴스 상세 페이지에서 본문 블록을 찾습니다. 기존 방식(모든 <p>/<div> 에 get_text() 후 가장 긴 것)은
+중첩 div 마다 같은 하위 트리를 다시 직렬화해 깊이에 대해 O(n²) 이었고, 사이드바 / 관련기사 목록까지
+감싼 페이지 전체 wrapper 를 본문으로 고르는 경우가 많았습니다.
+- lxml 트리를 한 번만 역순(자식 → 부모)으로 훑으며 노드별 글자 수 / 링크 글자 수 / 태그 수 / 문단 점수 누적
+- 문단(p, 또는 <br> 로 줄바꿈한 직접 텍스트)의 비링크 글자 수를 부모(1.0) / 조부모(0.5) 블록 점수로 올림
+- 블록 점수 = 문단 점수 × (1 - link density) × text density 보정 × class/id 힌트
+- 최고 점수 블록 안에서 링크 위주 하위 블록(관련기사, 태그 목록)은 빼고 문단 단위 텍스트 반환
+
+news_trend_crawler.fetch_article_content 가 사용하고, content_bench.py 가 저장된 기사 fixture 로
+속도와 정답 본문 대비 품질(token F1)을 측정합니다. 이 모듈은 import 시 부수 효과가 없어야 합니다.
+
+사용법:
+    from generic_crawler.content_extractor import extract_main_content
+    text = extract_main_content(html)            # 본문 (문단은 줄바꿈), 못 찾으면 ""
+    result = extract_main_block(html)            # {"text", "path", "score", "link_density", "nodes"}
+"""
+import re
+
+import lxml.html
+from lxml import etree
+
+# 본문 후보에서 통째로 제거 (tail 텍스트는 유지)
+SKIP_TAGS = ("script", "style", "noscript", "iframe", "nav", "header", "footer", "aside", "form",
+             "button", "select", "textarea", "svg", "template")
+
+# 점수를 받을 수 있는 블록 (본문 후보)
+BLOCK_TAGS = {"div", "article", "section", "main", "td", "body", "blockquote", "center"}
+
+# 그 자체로 문단인 태그
+PARAGRAPH_TAGS = {"p", "pre", "h2", "h3", "h4", "li", "dd", "figcaption"}
+
+# 부모의 직접 텍스트로 취급하는 inline 태그 (<div>텍스트<br><b>강조</b>텍스트</div> 형식 본문)
+INLINE_TAGS = {"a", "span", "b", "strong", "em", "i", "u", "font", "br", "sup", "sub", "mark", "small", "img"}
+
+# 추출 텍스트에서 줄바꿈을 넣는 태그
+BREAK_TAGS = ("p", "div", "br", "li", "h1", "h2", "h3", "h4", "tr", "blockquote", "pre", "figcaption", "section", "article")
+
+MIN_PARAGRAPH_CHARS = 25   # 이보다 짧은 직접 텍스트는 문단으로 치지 않음 (버튼, 날짜, 기자명)
+DENSITY_NORM = 20          # 태그당 비링크 글자 수가 이 이상이면 density 보정 없음
+MAX_INNER_LINK_DENSITY = 0.5
+
+POSITIVE_HINT = re.compile(r"article|content|body|entry|post|view|news_?txt|text|story", re.I)
+NEGATIVE_HINT = re.compile(r"comment|sidebar|side|related|relation|recommend|popular|rank|banner|\bad[-_]|share|sns|footer|menu|copyright|tag", re.I)
+
+_WS = re.compile(r"[ \t\r\f\v\u00a0\u200b]+")
+
+
+def _len(text) -> int:
+    return len(_WS.sub(" ", text).strip()) if text else 0
+
+
+def _hint(el) -> float:
+    attrs = f"{el.get('class', '')} {el.get('id', '')}"
+    if not attrs.strip():
+        return 1.0
+    weight = 1.0
+    if NEGATIVE_HINT.search(attrs):
+        weight *= 0.5
+    if POSITIVE_HINT.search(attrs):
+        weight *= 1.25
+    return weight
+
+
+def parse_html(html):
+    """str / bytes → lxml root (XML 선언이 있는 str 도 허용)"""
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    parser = lxml.html.HTMLParser(encoding="utf-8", remove_comments=True, huge_tree=True)  # libxml2 기본 깊이 제한(256) 해제
+    return lxml.html.document_fromstring(html, parser=parser)
+
+
+def score_tree(root) -> dict:
+    """
+    자식 → 부모 한 번의 패스로 노드별 통계 계산.
+    lxml 의 iter() 는 문서 순서(부모가 자손보다 먼저)이므로 역순으로 돌면 자손이 항상 먼저 처리됨.
+    반환: element → [text, link, tags, content_score]
+    """
+    etree.strip_elements(root, *SKIP_TAGS, with_tail=False)
+    nodes = list(root.iter(etree.Element))
+    stats = {}
+    for el in reversed(nodes):
+        tag = el.tag if isinstance(el.tag, str) else ""
+        own = _len(el.text)
+        text, link, tags, inline = own, 0, 1, own
+        for child in el:
+            tail = _len(child.tail)
+            text += tail
+            inline += tail
+            c = stats.get(child)
+            if c is None:
+                continue
+            text += c[0]
+            link += c[1]
+            tags += c[2]
+            if child.tag in INLINE_TAGS:
+                inline += c[0] - c[1]
+        if tag == "a":
+            link = text
+        entry = [text, link, tags, stats.get(el, [0, 0, 0, 0.0])[3]]
+        stats[el] = entry
+
+        # 문단 점수: 문단 태그는 비링크 전체, 블록은 직접(inline) 텍스트만
+        if tag in PARAGRAPH_TAGS:
+            para = text - link
+        elif tag in BLOCK_TAGS:
+            para = inline
+        else:
+            continue
+        if para < MIN_PARAGRAPH_CHARS:
+            continue
+        if tag in BLOCK_TAGS:
+            entry[3] += para  # <br> 형식 본문은 블록 자신이 문단 묶음
+        parent = el.getparent()
+        if parent is not None:
+            stats.setdefault(parent, [0, 0, 0, 0.0])[3] += para
+            grand = parent.getparent()
+            if grand is not None:
+                stats.setdefault(grand, [0, 0, 0, 0.0])[3] += para / 2
+    return stats
+
+
+def _block_score(el, entry) -> float:
+    text, link, tags, content = entry
+    if not content or not text:
+        return 0.0
+    link_density = link / text
+    density = min(1.0, (text - link) / tags / DENSITY_NORM)
+    return content * (1 - link_density) * density * _hint(el)
+
+
+def _clean_block(block, stats: dict):
+    """본문 블록 안의 링크 위주 하위 블록(관련기사, 태그, 공유 버튼 목록) 제거"""
+    drop = []
+    for el in block.iter(etree.Element):
+        if el is block or el.tag not in BLOCK_TAGS | {"ul", "ol", "dl", "table", "p"}:
+            continue
+        text, link, _, _ = stats.get(el, (0, 0, 0, 0))
+        if text and link / text > MAX_INNER_LINK_DENSITY:
+            drop.append(el)
+        elif el.tag in BLOCK_TAGS and _hint(el) < 1 and text < 200:
+            drop.append(el)
+    for el in drop:
+        if el.getparent() is not None:
+            el.drop_tree()
+
+
+def block_text(block) -> str:
+    """블록 텍스트 (문단 / <br> 단위 줄바꿈, 공백 정리)"""
+    for el in block.iter(*BREAK_TAGS):
+        el.tail = "\n" + (el.tail or "")
+        if el.tag != "br":
+            el.text = "\n" + (el.text or "")
+    lines = (_WS.sub(" ", line).strip() for line in "".join(block.itertext()).split("\n"))
+    return "\n".join(line for line in lines if line)
+
+
+def extract_main_block(html) -> dict:
+    """본문 블록 찾기. {"text", "path", "score", "link_density", "nodes"} (못 찾으면 text "")"""
+    root = parse_html(html)
+    stats = score_tree(root)
+    best, best_score = None, 0.0
+    for el, entry in stats.items():
+        if el.tag not in BLOCK_TAGS:
+            continue
+        score = _block_score(el, entry)
+        if score > best_score:
+            best, best_score = el, score
+    if best is None:
+        return {"text": "", "path": None, "score": 0.0, "link_density": 0.0, "nodes": len(stats)}
+
+    text, link = stats[best][0], stats[best][1]
+    path = root.getroottree().getpath(best)
+    _clean_block(best, stats)
+    return {
+        "text": block_text(best),
+        "path": path,
+        "score": round(best_score, 1),
+        "link_density": round(link / text, 3) if text else 0.0,
+        "nodes": len(stats),
+    }
+
+
+def extract_main_content(html, max_chars: int = None) -> str:
+    """본문 텍스트만 (파싱 실패 시 "")"""
+    try:
+        text = extract_main_block(html)["text"]
+    except (etree.ParserError, ValueError):
+        return ""
+    return text[:max_chars] if max_chars else text
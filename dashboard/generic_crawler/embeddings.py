@@ -0,0 +1,252 @@
+"""
+Product Embedding Pipeline (products_master.embedding_local)
+
+migration 023 의 embedding_local vector(768) 컬럼 / HNSW 인덱스 / match_products_local RPC 를 채우는 배치 작업입니다.
+로컬 Ollama 임베딩 모델(기본 nomic-embed-text, 768차원)을 쓰므로 외부 API 없이 오프라인으로 돌아갑니다.
+대시보드 검색이 쓰는 embedding 컬럼(Gemini text-embedding-004, generate-embeddings edge function)과는
+벡터 공간이 달라 섞어 비교하면 안 되므로 건드리지 않습니다.
+- 임베딩 입력은 brand / name / category 뿐 → embedding_hash(sha1) 로 변경 감지
+- embedding_model 스탬프("<모델>:<EMBED_VERSION>")가 다르거나 hash 가 바뀐 상품, 임베딩이 없는 상품만 계산
+- EMBED_BATCH_SIZE 개씩 /api/embed 한 번에 보내고, 결과는 id 기준 배열 upsert (return=minimal)
+- 검색 쪽은 embed_query() 로 같은 모델의 query 임베딩을 만들고 (llm_cache 캐시) match_products_local 호출
+
+설정 (env):
+    EMBED_MODEL=nomic-embed-text
+    EMBED_VERSION=v1             product_text() 형식을 바꾸면 올려서 전체 재계산
+    EMBED_BATCH_SIZE=64
+
+사용법:
+    python embeddings.py run [--source musinsa] [--limit 5000] [--dry-run]
+    python embeddings.py query "비건 선크림" [--count 10]
+
+    from generic_crawler.embeddings import embed_query, search_products
+"""
+import os
+import sys
+import time
+import hashlib
+import argparse
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.config import SUPABASE_URL, HEADERS
+from generic_crawler.supabase_client import sb, print_stats
+from generic_crawler.bulk_writer import upsert_rows
+from generic_crawler.ollama_client import get_client
+from generic_crawler.llm_cache import cached_call, print_cache_stats
+
+EMBED_MODEL = os.getenv("EMBED_MODEL", "nomic-embed-text")
+EMBED_VERSION = os.getenv("EMBED_VERSION", "v1")
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_DIM = 768  # products_master.embedding_local vector(768)
+EMBED_COLUMN = "embedding_local"
+MATCH_RPC = "match_products_local"
+
+# nomic-embed-text 는 문서/검색어 task prefix 를 붙여야 검색 품질이 나옴
+DOC_PREFIX = os.getenv("EMBED_DOC_PREFIX", "search_document: " if "nomic" in EMBED_MODEL else "")
+QUERY_PREFIX = os.getenv("EMBED_QUERY_PREFIX", "search_query: " if "nomic" in EMBED_MODEL else "")
+
+# products_master 에 같이 저장되지만 상품이 아닌 row (뉴스 / 트렌드 키워드)
+NON_PRODUCT_CATEGORIES = {"News", "Daily Insight"}
+NON_PRODUCT_SOURCES = {"google_trends", "naver_datalab"}
+
+SAVE_CHUNK = 200
+
+
+def embedding_stamp() -> str:
+    return f"{EMBED_MODEL}:{EMBED_VERSION}"
+
+
+def product_text(product: dict) -> str:
+    """임베딩 입력 문장 (brand / name / category)"""
+    parts = [str(product.get(k) or "").strip() for k in ("brand", "name", "category")]
+    return " / ".join(p for p in parts if p)
+
+
+def text_hash(product: dict) -> str:
+    return hashlib.sha1(product_text(product).encode("utf-8")).hexdigest()
+
+
+def to_pgvector(vector) -> str:
+    """PostgREST 로 보낼 pgvector 리터럴"""
+    return "[" + ",".join(f"{float(x):.6g}" for x in vector) + "]"
+
+
+def is_product(row: dict) -> bool:
+    return (row.get("category") not in NON_PRODUCT_CATEGORIES
+            and row.get("source") not in NON_PRODUCT_SOURCES
+            and not str(row.get("product_id", "")).startswith("news_"))
+
+
+def needs_embedding(row: dict, stamp: str = None) -> str:
+    """다시 임베딩해야 하는 이유 ("new" / "model" / "changed") 또는 "" """
+    if not row.get("embedding_model"):
+        return "new"
+    if row["embedding_model"] != (stamp or embedding_stamp()):
+        return "model"
+    if row.get("embedding_hash") != text_hash(row):
+        return "changed"
+    return ""
+
+
+def scan_products(source: str = None, page_size: int = 1000):
+    """products_master 를 id 순으로 훑으며 임베딩 판단에 필요한 가벼운 컬럼만 가져옴 (벡터 자체는 제외)"""
+    last_id = 0
+    while True:
+        params = {
+            "select": "id,source,product_id,name,brand,category,embedding_model,embedding_hash",
+            "id": f"gt.{last_id}",
+            "order": "id",
+            "limit": page_size,
+        }
+        if source:
+            params["source"] = f"eq.{source}"
+        res = sb.get(f"{SUPABASE_URL}/rest/v1/products_master", headers=HEADERS, params=params, timeout=60)
+        res.raise_for_status()
+        page = res.json()
+        yield from page
+        if len(page) < page_size:
+            return
+        last_id = page[-1]["id"]
+
+
+def embed_documents(texts: list) -> list:
+    """EMBED_BATCH_SIZE 개씩 나눠 동시에 (OLLAMA_NUM_PARALLEL 슬롯) 임베딩. 실패한 batch 는 None"""
+    client = get_client()
+    chunks = [texts[i:i + EMBED_BATCH_SIZE] for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+    futures = [client.submit_embed([DOC_PREFIX + t for t in chunk], EMBED_MODEL) for chunk in chunks]
+    vectors = []
+    for chunk, future in zip(chunks, futures):
+        result = future.result()
+        vectors.extend(result if result else [None] * len(chunk))
+    return vectors
+
+
+def save_embeddings(rows: list, vectors: list) -> int:
+    """id 기준 배열 upsert. NOT NULL 컬럼(source, product_id, name)은 기존 값을 그대로 같이 보냄"""
+    stamp = embedding_stamp()
+    now = datetime.now(timezone.utc).isoformat()
+    records = [
+        {
+            "id": row["id"],
+            "source": row["source"],
+            "product_id": row["product_id"],
+            "name": row["name"],
+            EMBED_COLUMN: to_pgvector(vector),
+            "embedding_model": stamp,
+            "embedding_hash": text_hash(row),
+            "embedded_at": now,
+        }
+        for row, vector in zip(rows, vectors)
+        if vector is not None
+    ]
+    saved = 0
+    for i in range(0, len(records), SAVE_CHUNK):
+        saved += len(upsert_rows("products_master", records[i:i + SAVE_CHUNK], on_conflict="id",
+                                 timeout=60, returning=False))
+    return saved
+
+
+def run(source: str = None, limit: int = None, dry_run: bool = False, page_size: int = 1000) -> dict:
+    stamp = embedding_stamp()
+    print(f"🧬 상품 임베딩 ({stamp}, batch {EMBED_BATCH_SIZE}){' [dry-run]' if dry_run else ''}")
+
+    t0 = time.perf_counter()
+    counts = {"scanned": 0, "up_to_date": 0, "new": 0, "model": 0, "changed": 0, "skipped": 0}
+    pending = []
+    for row in scan_products(source):
+        counts["scanned"] += 1
+        if not is_product(row) or not product_text(row):
+            counts["skipped"] += 1
+            continue
+        reason = needs_embedding(row, stamp)
+        if not reason:
+            counts["up_to_date"] += 1
+            continue
+        counts[reason] += 1
+        pending.append(row)
+    if limit:
+        pending = pending[:limit]
+    print(f"  📋 {counts['scanned']}개 확인: 최신 {counts['up_to_date']} / 신규 {counts['new']}"
+          f" / 모델 변경 {counts['model']} / 내용 변경 {counts['changed']} / 제외 {counts['skipped']}"
+          f" → 이번 실행 {len(pending)}개 ({time.perf_counter() - t0:.1f}s)")
+
+    stats = dict(counts, embedded=0, saved=0, failed=0)
+    if dry_run or not pending:
+        return stats
+
+    t1 = time.perf_counter()
+    for i in range(0, len(pending), page_size):
+        rows = pending[i:i + page_size]
+        vectors = embed_documents([product_text(r) for r in rows])
+        bad = [v for v in vectors if v is not None and len(v) != EMBED_DIM]
+        if bad:
+            print(f"  ❌ {EMBED_MODEL} 임베딩 차원 {len(bad[0])} ≠ {EMBED_DIM} (products_master.{EMBED_COLUMN}) - 중단")
+            break
+        embedded = sum(v is not None for v in vectors)
+        saved = save_embeddings(rows, vectors)
+        stats["embedded"] += embedded
+        stats["saved"] += saved
+        stats["failed"] += len(rows) - saved
+        elapsed = time.perf_counter() - t1
+        print(f"  ✅ {i + len(rows)}/{len(pending)} 임베딩 {embedded} / 저장 {saved}"
+              f" ({stats['embedded'] / elapsed:.1f}개/s)")
+
+    get_client().print_stats()
+    print_stats()
+    return stats
+
+
+def embed_query(text: str):
+    """검색어 임베딩 (상품과 같은 모델, query prefix). 실패 시 None"""
+    text = (text or "").strip()
+    if not text:
+        return None
+    return cached_call(
+        "embed_query", lambda: (get_client().embed([QUERY_PREFIX + text], EMBED_MODEL) or [None])[0],
+        model=EMBED_MODEL, version=EMBED_VERSION, inputs={"text": text},
+    )
+
+
+def search_products(text: str = None, count: int = 20, threshold: float = 0.3, embedding=None) -> list:
+    """match_products_local RPC (HNSW 인덱스) 로 의미상 가까운 상품 검색. 임베딩 실패 / RPC 오류 시 빈 리스트"""
+    embedding = embedding if embedding is not None else embed_query(text)
+    if embedding is None:
+        return []
+    try:
+        res = sb.post(
+            f"{SUPABASE_URL}/rest/v1/rpc/{MATCH_RPC}",
+            headers=HEADERS,
+            json={"query_embedding": to_pgvector(embedding), "match_threshold": threshold, "match_count": count},
+            timeout=30,
+        )
+        res.raise_for_status()
+        return res.json()
+    except Exception as e:
+        print(f"  ⚠️ {MATCH_RPC} 호출 실패: {e}")
+        return []
+
+
+def main():
+    parser = argparse.ArgumentParser(description="products_master 임베딩 생성 / 검색")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run_parser = sub.add_parser("run")
+    run_parser.add_argument("--source")
+    run_parser.add_argument("--limit", type=int)
+    run_parser.add_argument("--dry-run", action="store_true")
+    query_parser = sub.add_parser("query")
+    query_parser.add_argument("text")
+    query_parser.add_argument("--count", type=int, default=10)
+    query_parser.add_argument("--threshold", type=float, default=0.3)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        run(args.source, args.limit, args.dry_run)
+    else:
+        for p in search_products(args.text, args.count, args.threshold):
+            print(f"  {p.get('similarity', 0):.3f}  [{p.get('source', '')}] {p.get('brand') or ''} {p.get('name')}")
+        print_cache_stats()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,14 @@
 import os
+import sys
 import time
 import pandas as pd
-import requests
 from datetime import datetime
 from dotenv import load_dotenv
 from pytrends.request import TrendReq
 import local_ai_helper as ai
 from config import SUPABASE_URL, HEADERS
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.supabase_client import sb
 
 # ENV Setup
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
@@ -35,34 +37,48 @@ def log_crawl(status, metadata=None):
             "finished_at": datetime.now().isoformat() if status in ("completed", "failed") else None,
             "metadata_json": metadata or {}
         }
-        requests.post(f"{SUPABASE_URL}/rest/v1/crawl_logs", headers=HEADERS, json=log_data, timeout=10)
+        sb.post(f"{SUPABASE_URL}/rest/v1/crawl_logs", headers=HEADERS, json=log_data, timeout=10)
     except Exception as e:
         print(f"Warning: Could not log crawl status: {e}")
 
-def save_keyword_trend(keyword, rank, spike_value):
-    try:
-        product_id = f"kw_gt_{keyword}"
+def get_cached_analysis(product_id):
+    """이미 AI 분석된 (tags, ai_summary) 가 있으면 반환, 없으면 None"""
+    existing_res = sb.get(
+        f"{SUPABASE_URL}/rest/v1/products_master",
+        headers=HEADERS,
+        params={"product_id": f"eq.{product_id}", "select": "id,tags,ai_summary"},
+        timeout=10
+    )
+    existing = existing_res.json() if existing_res.status_code == 200 else []
+    if existing and existing[0].get("ai_summary") and existing[0].get("tags"):
+        return existing[0].get("tags", {}), existing[0].get("ai_summary", {})
+    return None
 
-        # 1. 기존 데이터 먼저 조회 (AI 분석 여부 확인)
-        existing_res = requests.get(
-            f"{SUPABASE_URL}/rest/v1/products_master",
-            headers=HEADERS,
-            params={"product_id": f"eq.{product_id}", "select": "id,tags,ai_summary"},
-            timeout=10
-        )
-        existing = existing_res.json() if existing_res.status_code == 200 else []
-        already_analyzed = existing and existing[0].get("ai_summary") and existing[0].get("tags")
+def analyze_trends(keywords):
+    """키워드별 (tags, insight). AI 분석은 최초 1회만 실행하고, 새 키워드는 한 번에 묶어서 요청"""
+    analyses = {}
+    for keyword in keywords:
+        try:
+            cached = get_cached_analysis(f"kw_gt_{keyword}")
+        except Exception as e:
+            print(f"  ⚠️ 캐시 조회 실패 ({keyword}): {e}")
+            cached = None
+        if cached:
+            analyses[keyword] = cached
+    if analyses:
+        print(f"  ⚡ AI 분석 캐시 사용: {len(analyses)}개 (API 절약)")
+
+    todo = [kw for kw in keywords if kw not in analyses]
+    if todo:
+        print(f"  🤖 최초 AI 분석 실행: {len(todo)}개 (태그 배치 + 인사이트 동시 요청)")
+        analyses.update(ai.analyze_keywords(todo, SOURCE))
+        print("  ✨ 분석 완료. DB 저장 준비...")
+    return analyses
 
-        # 2. AI 분석은 최초 1회만 실행 (이미 있으면 스킵)
-        if already_analyzed:
-            tags = existing[0].get("tags", {})
-            insight = existing[0].get("ai_summary", {})
-            print(f"  ⚡ AI 분석 캐시 사용: {keyword} (API 절약)")
-        else:
-            print(f"  🤖 최초 AI 분석 실행: {keyword}")
-            tags = ai.extract_tags(keyword)
-            insight = ai.generate_insight(keyword, SOURCE)
-            print("  ✨ 분석 완료. DB 저장 준비...")
+def save_keyword_trend(keyword, rank, spike_value, analysis):
+    try:
+        product_id = f"kw_gt_{keyword}"
+        tags, insight = analysis
 
         product_record = {
             "product_id": product_id,
@@ -77,7 +93,7 @@ def save_keyword_trend(keyword, rank, spike_value):
             "ai_summary": insight,
             "updated_at": datetime.now().isoformat()
         }
-        res = requests.post(
+        res = sb.post(
             f"{SUPABASE_URL}/rest/v1/products_master",
             headers=HEADERS,
             params={"on_conflict": "source,product_id"},
@@ -97,7 +113,7 @@ def save_keyword_trend(keyword, rank, spike_value):
                     "category_code": "google",
                     "source": SOURCE
                 }
-                requests.post(
+                sb.post(
                     f"{SUPABASE_URL}/rest/v1/daily_rankings_v2",
                     headers=HEADERS,
                     params={"on_conflict": "product_id,date,category_code"},
@@ -152,13 +168,16 @@ def google_trends_crawl():
         trends = get_rising_trends()
         print(f"  ✅ {len(trends)}개 주요 쇼핑 급상승 키워드 발견")
         
+        analyses = analyze_trends([query_str for query_str, _ in trends])
+        
         saved_count = 0
         for rank, (query_str, val) in enumerate(trends, start=1):
-            if save_keyword_trend(query_str, rank, val):
+            if save_keyword_trend(query_str, rank, val, analyses.get(query_str, ({}, {}))):
                 saved_count += 1
                 
         print(f"  💾 저장 완료: {saved_count}개")
-        log_crawl("completed", {"total_saved": saved_count, "duration": str(datetime.now() - start_time)})
+        log_crawl("completed", {"total_saved": saved_count, "duration": str(datetime.now() - start_time), "llm": ai.llm_stats()})
+        ai.print_llm_stats()
 
     except Exception as e:
         print(f"  ❌ 구글 트렌드 크롤링 실패: {e}")
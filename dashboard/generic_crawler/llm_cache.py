@@ -0,0 +1,216 @@
+"""
+Content-addressed LLM Response Cache
+
+같은 프롬프트를 다시 보내지 않도록 LLM 응답을 SQLite 파일에 저장합니다.
+key = sha256(namespace, 모델, 프롬프트 템플릿 버전 + 템플릿 본문 hash, 정규화된 입력값, temperature)
+- 템플릿 문구를 고치거나 version 을 올리면 자동으로 새 key (이전 응답은 TTL 후 정리)
+- 실패 응답(None, 빈 dict, 실패 안내 문구)은 저장하지 않음 → 재실행 시 다시 시도
+- namespace 별 hit / miss / 절약 시간 통계
+
+설정 (env):
+    LLM_CACHE=on|off           off 면 항상 miss (저장도 안 함)
+    LLM_CACHE_PATH             기본 generic_crawler/llm_cache.sqlite
+    LLM_CACHE_TTL_DAYS=30
+
+사용법:
+    from generic_crawler.llm_cache import cached_call
+
+    insight = cached_call(
+        "keyword_insight", lambda: _call_ollama_json(prompt, model, ...),
+        model=model, template=PROMPT_INSIGHT, version="v1",
+        inputs={"keyword": keyword, "source": source}, temperature=0.1,
+    )
+
+    python llm_cache.py stats | purge
+"""
+import os
+import re
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "on") != "off"
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "llm_cache.sqlite"))
+LLM_CACHE_TTL_DAYS = float(os.getenv("LLM_CACHE_TTL_DAYS", "30"))
+
+MISS = object()
+
+
+def normalize(value):
+    """key 계산용 정규화: 유니코드 NFC, 공백 압축, dict key 정렬"""
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", unicodedata.normalize("NFC", value)).strip()
+    if isinstance(value, dict):
+        return {str(k): normalize(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [normalize(v) for v in value]
+    return value
+
+
+def cache_key(namespace: str, model: str, template: str, version: str, inputs, temperature) -> str:
+    template_hash = hashlib.sha256(normalize(template or "").encode("utf-8")).hexdigest()[:12]
+    material = json.dumps(
+        [namespace, model, version, template_hash, normalize(inputs), temperature],
+        ensure_ascii=False, sort_keys=True, default=str,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(value) -> bool:
+    """실패 응답은 저장하지 않음 (다음 실행에서 다시 시도)"""
+    if value is None or value == {} or value == [] or value == "":
+        return False
+    return not (isinstance(value, str) and "실패" in value[:40] and len(value) < 80)
+
+
+class LLMCache:
+    """SQLite 기반 LLM 응답 캐시 (여러 프로세스 공유, thread-safe)"""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_days: float = LLM_CACHE_TTL_DAYS, enabled: bool = LLM_CACHE_ENABLED):
+        self.path = path
+        self.ttl_days = ttl_days
+        self.enabled = enabled
+        self._db = None
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _conn(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key        TEXT PRIMARY KEY,
+                    namespace  TEXT NOT NULL,
+                    model      TEXT,
+                    value      TEXT NOT NULL,
+                    compute_s  REAL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    hits       INTEGER DEFAULT 0
+                )
+            """)
+            self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_expires ON llm_responses (expires_at)")
+            self._db.commit()
+        return self._db
+
+    def _record(self, namespace, **values):
+        s = self._stats.setdefault(namespace, {"hits": 0, "misses": 0, "stored": 0, "saved_s": 0.0, "compute_s": 0.0})
+        for k, v in values.items():
+            s[k] += v
+
+    def get(self, key: str, namespace: str = "default"):
+        if not self.enabled:
+            return MISS
+        with self._lock:
+            db = self._conn()
+            row = db.execute(
+                "SELECT value, compute_s FROM llm_responses WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+            if row is None:
+                self._record(namespace, misses=1)
+                return MISS
+            db.execute("UPDATE llm_responses SET hits = hits + 1 WHERE key = ?", (key,))
+            db.commit()
+            self._record(namespace, hits=1, saved_s=row[1] or 0.0)
+            return json.loads(row[0])
+
+    def set(self, key: str, value, namespace: str = "default", model: str = None,
+            compute_s: float = None, ttl_days: float = None):
+        if not self.enabled:
+            return
+        now = time.time()
+        ttl = self.ttl_days if ttl_days is None else ttl_days
+        with self._lock:
+            db = self._conn()
+            db.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, namespace, model, value, compute_s, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, namespace, model, json.dumps(value, ensure_ascii=False), compute_s, now, now + ttl * 86400),
+            )
+            db.commit()
+            self._record(namespace, stored=1)
+
+    def call(self, namespace: str, compute, *, model: str, inputs, template: str = "", version: str = "v1",
+             temperature=None, ttl_days: float = None, cacheable=is_cacheable):
+        """캐시에 있으면 반환, 없으면 compute() 실행 후 (성공 응답만) 저장"""
+        key = cache_key(namespace, model, template, version, inputs, temperature)
+        value = self.get(key, namespace)
+        if value is not MISS:
+            return value
+
+        t0 = time.perf_counter()
+        value = compute()
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            self._record(namespace, compute_s=elapsed)
+        if cacheable(value):
+            self.set(key, value, namespace, model, elapsed, ttl_days)
+        return value
+
+    def purge(self) -> int:
+        with self._lock:
+            db = self._conn()
+            deleted = db.execute("DELETE FROM llm_responses WHERE expires_at <= ?", (time.time(),)).rowcount
+            db.commit()
+            return deleted
+
+    def stats(self) -> dict:
+        """log_crawl metadata 용 namespace 별 hit / miss"""
+        with self._lock:
+            return {
+                ns: dict(s, saved_s=round(s["saved_s"], 1), compute_s=round(s["compute_s"], 1),
+                         hit_rate=round(s["hits"] / (s["hits"] + s["misses"]), 3) if s["hits"] + s["misses"] else 0)
+                for ns, s in self._stats.items()
+            }
+
+    def print_stats(self):
+        data = self.stats()
+        if not data:
+            return
+        print(f"\n  🗃️ LLM 캐시 ({'on' if self.enabled else 'off'})")
+        for ns, s in data.items():
+            print(f"    - {ns:<22} hit {s['hits']:>4}  miss {s['misses']:>4}  ({s['hit_rate']:.0%})"
+                  f"  저장 {s['stored']:>4}  절약 ~{s['saved_s']:.0f}s  계산 {s['compute_s']:.0f}s")
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> LLMCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+        return _cache
+
+
+def cached_call(namespace: str, compute, **kwargs):
+    """get_cache().call() 단축형"""
+    return get_cache().call(namespace, compute, **kwargs)
+
+
+def print_cache_stats():
+    get_cache().print_stats()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    cache = get_cache()
+    if command == "purge":
+        print(f"  🧹 만료 항목 {cache.purge()}개 삭제")
+    elif command == "stats":
+        rows = cache._conn().execute(
+            "SELECT namespace, COUNT(*), SUM(hits), SUM(expires_at > ?), SUM(compute_s) FROM llm_responses GROUP BY namespace",
+            (time.time(),),
+        ).fetchall()
+        for ns, total, hits, live, compute_s in rows:
+            print(f"  - {ns:<22} {total:>6}개 (유효 {live})  누적 hit {hits or 0}  원래 계산 {compute_s or 0:.0f}s")
+    else:
+        print("usage: python llm_cache.py [stats|purge]")
+        sys.exit(1)
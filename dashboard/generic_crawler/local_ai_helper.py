@@ -1,21 +1,25 @@
 import os
-import json
+import sys
 import time
-import requests
-import re
 from datetime import datetime
 import google.generativeai as genai
 from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.ollama_client import get_client
+from generic_crawler.llm_cache import MISS, cache_key, cached_call, get_cache, is_cacheable
 
 # 환경변수 로드
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "deepseek-r1:8b")
-OLLAMA_URL = "http://localhost:11434/api/generate"
 
 # 기존 모델 파라미터 호환성을 위해 이름 유지하되 환경 변수 연동
 MISTRAL_MODEL = OLLAMA_MODEL
 QWEN_MODEL = OLLAMA_MODEL
 
+# LLM 캐시 key 구성요소 (프롬프트 의미를 바꾸면 PROMPT_VERSION 을 올릴 것)
+PROMPT_VERSION = "v1"
+TEMPERATURE = 0.1
+
 PROMPT_TAGS = """
 아래는 한국 이커머스 쇼핑 트렌드 검색어 하나입니다.
 검색어를 분석해서 다음 JSON 형태로 정확하게 반환해주세요.
@@ -49,6 +53,34 @@ Provide a trend insight in JSON format with exactly these fields:
 Be concise and use Korean for the content. Do not include markdown or extra text.
 """
 
+PROMPT_TAGS_BATCH = """
+아래는 한국 이커머스 쇼핑 트렌드 검색어 목록입니다.
+각 검색어를 분석해서 다음 JSON 형태로 정확하게 반환해주세요.
+반드시 입력된 검색어 순서와 개수(총 {count}개)를 그대로 유지하고, keyword 에는 원본 검색어를 그대로 쓰세요.
+
+출력 형식:
+{{
+  "results": [
+    {{
+      "keyword": "원본 검색어",
+      "brand": "브랜드명 (없으면 null)",
+      "ingredient": "화장품 성분명 (없으면 null, 예: 히알루론산, 콜라겐, 레티놀, 나이아신아마이드, 세라마이드, 비타민C, PDRN)",
+      "fashion_style": "패션 스타일/트렌드 (없으면 null, 예: 오버핏, 미니멀, 스트릿, 아이비룩, 카고룩, 테크웨어)",
+      "product_type": "상품 분류 (예: 립스틱, 크림, 청바지, 스니커즈 등, 없으면 null)",
+      "trend_type": "beauty | fashion | brand | other 중 하나"
+    }}
+  ]
+}}
+
+검색어 목록:
+{keywords}
+
+JSON만 반환하고 다른 설명은 하지 마세요.
+"""
+
+# 단건 / 배치 태깅은 같은 캐시 항목을 공유 (두 템플릿 중 하나라도 바뀌면 새 key)
+TAGS_TEMPLATE = PROMPT_TAGS + PROMPT_TAGS_BATCH
+
 PROMPT_ARTICLE_TAGS = """
 아래는 화장품/패션 관련 뉴스 기사 본문입니다.
 이 기사에서 언급된 핵심 브랜드, 성분, 특성을 분석해서 다음 JSON 형태로 정확하게 반환해주세요.
@@ -75,72 +107,105 @@ PROMPT_ARTICLE_SUMMARY = """
 기사 내용: {content}
 """
 
-def _call_ollama_json(prompt: str, model: str, timeout: int, is_json: bool = True, max_retries: int = 2):
-    """Ollama API 통신, JSON 파싱 방어, 및 재시도(Retry) 함수"""
-    for attempt in range(max_retries):
-        try:
-            payload = {
-                "model": model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.1
-                }
-            }
-            if is_json:
-                payload["format"] = "json"
-
-            res = requests.post(OLLAMA_URL, json=payload, timeout=timeout)
-            res.raise_for_status()
-            text = res.json().get("response", "").strip()
-            
-            # Clean up <think> tags if present
-            text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL).strip()
-            
-            # 일반 텍스트 요약인 경우 그대로 반환
-            if not is_json:
-                return text
-                
-            # JSON 포맷 방어 (백틱 떼어내기)
-            if text.startswith("```json"):
-                text = text.split("```json")[1].split("```")[0].strip()
-            elif text.startswith("```"):
-                text = text.split("```")[1].split("```")[0].strip()
-                
-            # 쓰레기 문자 필터링
-            text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
-                
-            return json.loads(text, strict=False)
-            
-        except Exception as e:
-            print(f"  ⚠️ Ollama API 통신/파싱 에러 (재시도 {attempt + 1}/{max_retries}): {e}")
-            time.sleep(2)
-            
-    # 전체 실패 시 기본값 빈 객체/문자열 반환
-    return {} if is_json else "분석에 실패했습니다."
+def _call_ollama_json(prompt: str, model: str, timeout: int, is_json: bool = True):
+    """Ollama 호출 (ollama_client 공용 client - 동시 요청 수 제한, JSON 파싱 방어, 재시도는 client 의 max_retries)"""
+    result = get_client().generate(prompt, model=model, is_json=is_json, timeout=timeout)
+    if result is None:
+        # 전체 실패 시 기본값 빈 객체/문자열 반환
+        return {} if is_json else "분석에 실패했습니다."
+    return result
+
+def _cache_lookup(namespace: str, template: str, model: str, inputs: dict):
+    """(key, 캐시값 또는 MISS)"""
+    key = cache_key(namespace, model, template, PROMPT_VERSION, inputs, TEMPERATURE)
+    return key, get_cache().get(key, namespace)
+
+def _cache_store(namespace: str, key: str, model: str, value, compute_s: float = None):
+    if is_cacheable(value):
+        get_cache().set(key, value, namespace, model, compute_s)
+
+def _cached_ollama(namespace: str, template: str, model: str, inputs: dict, prompt: str, timeout: int, is_json: bool = True):
+    return cached_call(
+        namespace, lambda: _call_ollama_json(prompt, model, timeout=timeout, is_json=is_json),
+        model=model, template=template, version=PROMPT_VERSION, inputs=inputs, temperature=TEMPERATURE,
+    )
+
+def _clean_tags(parsed: dict) -> dict:
+    # 널(null) 필터링 추가
+    if not isinstance(parsed, dict) or not parsed:
+        return {}
+    tags = {k: v for k, v in parsed.items() if v is not None and k != "keyword"}
+    tags["enriched_at"] = datetime.now().isoformat()
+    return tags
 
 def extract_tags(keyword: str) -> dict:
     """Mistral 7B를 사용하여 키워드 단건 태깅"""
     prompt = PROMPT_TAGS.format(keyword=keyword)
-    parsed = _call_ollama_json(prompt, MISTRAL_MODEL, timeout=60, is_json=True)
-    
-    # 널(null) 필터링 추가
-    if parsed:
-        tags = {k: v for k, v in parsed.items() if v is not None and k != "keyword"}
-        tags["enriched_at"] = datetime.now().isoformat()
-        return tags
-    return {}
+    parsed = _cached_ollama("keyword_tags", TAGS_TEMPLATE, MISTRAL_MODEL, {"keyword": keyword}, prompt, timeout=60)
+    return _clean_tags(parsed)
+
+def extract_tags_batch(keywords: list) -> dict:
+    """키워드 여러 개를 OLLAMA_BATCH_SIZE 개씩 한 프롬프트로 태깅. 매칭 안 된 키워드만 단건 재시도.
+    단건 extract_tags 와 같은 캐시(keyword_tags)를 공유"""
+    def build(chunk):
+        kw_text = "\n".join(f"{i+1}. {kw}" for i, kw in enumerate(chunk))
+        return PROMPT_TAGS_BATCH.format(count=len(chunk), keywords=kw_text)
+
+    raw, keys = {}, {}
+    for kw in keywords:
+        keys[kw], value = _cache_lookup("keyword_tags", TAGS_TEMPLATE, MISTRAL_MODEL, {"keyword": kw})
+        if value is not MISS:
+            raw[kw] = value
+
+    client = get_client()
+    todo = [kw for kw in keywords if kw not in raw]
+    if todo:
+        t0 = time.perf_counter()
+        results = client.generate_items(todo, build, key="keyword", model=MISTRAL_MODEL, timeout=300)
+        per_item = (time.perf_counter() - t0) / len(todo)
+        for kw, r in zip(todo, results):
+            if r:
+                raw[kw] = r
+                _cache_store("keyword_tags", keys[kw], MISTRAL_MODEL, r, per_item)
+
+    missing = [kw for kw in keywords if kw not in raw]
+    if missing:
+        print(f"  ↪️ 배치 태깅 누락 {len(missing)}개 단건 재시도")
+        futures = {kw: client.submit(PROMPT_TAGS.format(keyword=kw), model=MISTRAL_MODEL, timeout=60) for kw in missing}
+        for kw, future in futures.items():
+            raw[kw] = future.result()
+            _cache_store("keyword_tags", keys[kw], MISTRAL_MODEL, raw[kw])
+    return {kw: _clean_tags(raw.get(kw)) for kw in keywords}
 
 def generate_insight(keyword: str, source: str) -> dict:
     """Qwen2.5 7B를 사용하여 키워드 트렌드 통찰력 요약"""
     prompt = PROMPT_INSIGHT.format(keyword=keyword, source=source)
-    return _call_ollama_json(prompt, QWEN_MODEL, timeout=120, is_json=True)
+    return _cached_ollama("keyword_insight", PROMPT_INSIGHT, QWEN_MODEL, {"keyword": keyword, "source": source}, prompt, timeout=120)
+
+def analyze_keywords(keywords: list, source: str) -> dict:
+    """키워드별 (tags, insight). insight 는 키워드마다 동시에 요청하고, 그동안 태그는 배치로 처리"""
+    client = get_client()
+    insights, insight_futures = {}, {}
+    for kw in keywords:
+        key, value = _cache_lookup("keyword_insight", PROMPT_INSIGHT, QWEN_MODEL, {"keyword": kw, "source": source})
+        if value is not MISS:
+            insights[kw] = value
+        else:
+            future = client.submit(PROMPT_INSIGHT.format(keyword=kw, source=source), model=QWEN_MODEL, timeout=120)
+            insight_futures[kw] = (key, future)
+
+    tags = extract_tags_batch(keywords) if keywords else {}
+    for kw, (key, future) in insight_futures.items():
+        insights[kw] = future.result() or {}
+        _cache_store("keyword_insight", key, QWEN_MODEL, insights[kw])
+    return {kw: (tags.get(kw, {}), insights.get(kw, {})) for kw in keywords}
 
 def extract_article_tags(title: str, content: str) -> dict:
     """Mistral 7B를 사용하여 뉴스 기사 본문에서 태그(브랜드/성분) 추출"""
     short_content = content[:1500] if content else ""
     prompt = PROMPT_ARTICLE_TAGS.format(title=title, content=short_content)
-    parsed = _call_ollama_json(prompt, MISTRAL_MODEL, timeout=90, is_json=True)
+    parsed = _cached_ollama("article_tags", PROMPT_ARTICLE_TAGS, MISTRAL_MODEL,
+                            {"title": title, "content": short_content}, prompt, timeout=90)
     
     if parsed:
         return {k: v for k, v in parsed.items() if v is not None}
@@ -150,4 +215,39 @@ def summarize_article(title: str, content: str) -> str:
     """Qwen2.5 7B를 사용하여 뉴스 기사를 3줄 요약"""
     short_content = content[:2000] if content else ""
     prompt = PROMPT_ARTICLE_SUMMARY.format(title=title, content=short_content)
-    return _call_ollama_json(prompt, QWEN_MODEL, timeout=120, is_json=False)
+    return _cached_ollama("article_summary", PROMPT_ARTICLE_SUMMARY, QWEN_MODEL,
+                          {"title": title, "content": short_content}, prompt, timeout=120, is_json=False)
+
+def analyze_article(title: str, content: str) -> tuple:
+    """기사 태그 추출 + 3줄 요약을 동시에 요청 (tags, summary). 캐시 hit 인 쪽은 요청하지 않음"""
+    tags_content = content[:1500] if content else ""
+    summary_content = content[:2000] if content else ""
+    tags_key, parsed = _cache_lookup("article_tags", PROMPT_ARTICLE_TAGS, MISTRAL_MODEL,
+                                     {"title": title, "content": tags_content})
+    summary_key, summary = _cache_lookup("article_summary", PROMPT_ARTICLE_SUMMARY, QWEN_MODEL,
+                                         {"title": title, "content": summary_content})
+
+    client = get_client()
+    tags_future = summary_future = None
+    if parsed is MISS:
+        tags_future = client.submit(PROMPT_ARTICLE_TAGS.format(title=title, content=tags_content),
+                                    model=MISTRAL_MODEL, timeout=90)
+    if summary is MISS:
+        summary_future = client.submit(PROMPT_ARTICLE_SUMMARY.format(title=title, content=summary_content),
+                                       model=QWEN_MODEL, timeout=120, is_json=False)
+    if tags_future:
+        parsed = tags_future.result() or {}
+        _cache_store("article_tags", tags_key, MISTRAL_MODEL, parsed)
+    if summary_future:
+        summary = summary_future.result() or "분석에 실패했습니다."
+        _cache_store("article_summary", summary_key, QWEN_MODEL, summary)
+
+    tags = {k: v for k, v in parsed.items() if v is not None} if isinstance(parsed, dict) else {}
+    return tags, summary
+
+def print_llm_stats():
+    get_client().print_stats()
+    get_cache().print_stats()
+
+def llm_stats() -> dict:
+    return {"ollama": get_client().stats(), "cache": get_cache().stats()}
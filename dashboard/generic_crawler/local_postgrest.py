@@ -0,0 +1,690 @@
+"""
+Local PostgREST Stand-in (SQLite)
+
+운영 Supabase 프로젝트 없이 크롤러 / writer 를 끝까지 돌리거나 쓰기 경로를 벤치마크하기 위한
+로컬 /rest/v1 서버입니다. 이 코드베이스가 쓰는 PostgREST 기능만 구현합니다 (표준 라이브러리만 사용).
+- 테이블: schema.json (Supabase OpenAPI 문서) 의 definitions 로 생성 (schema_dump.sql 은 비어 있음)
+  view(ranking_products_v2, v_* 등)도 일반 테이블로 만듭니다.
+- GET / HEAD / POST / PATCH / DELETE, /rest/v1/rpc/<fn> (register_rpc 로 등록한 Python 함수, match_products / match_products_local 포함)
+- 필터: eq, neq, gt, gte, lt, lte, like, ilike, in, is, not.<op>, or=(...), and=(...)
+- select (컬럼 목록, alias:col), order (asc/desc, nullsfirst/nullslast), limit / offset, Range 헤더
+- Prefer: return=representation|minimal, resolution=merge-duplicates|ignore-duplicates, count=exact
+- on_conflict upsert (필요한 unique index 는 처음 쓰일 때 생성), bulk insert 의 key 불일치는 PGRST102
+- 요청마다 지연 시간 / row 수 / byte 수 / 값이 그대로인 upsert row(no-op) 수를 기록 → 쓰기 증폭 분석
+
+기본(lenient) 모드에서는 schema.json 에 없는 테이블·컬럼(최근 migration 으로 추가된 것)을
+쓰기 요청 시 자동으로 만듭니다. --strict 면 PostgREST 처럼 에러를 반환합니다.
+
+사용법:
+    python local_postgrest.py serve --port 54321 --log pgrst_requests.jsonl
+    SUPABASE_URL=http://127.0.0.1:54321 SUPABASE_KEY=local python musinsa_crawler.py
+    curl http://127.0.0.1:54321/_local/stats        # 테이블/요청 종류별 지연 시간, 쓰기 증폭
+    python local_postgrest.py stats pgrst_requests.jsonl
+
+    # 벤치마크 / 스크립트 안에서 (config import 전에 env 설정)
+    from generic_crawler.local_postgrest import start_background
+    server, url = start_background()
+    os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"] = url, "local"
+"""
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import sqlite3
+import argparse
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qsl
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "schema.json")
+LOCAL_PGRST_PORT = int(os.getenv("LOCAL_PGRST_PORT", "54321"))
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+JSON_FORMATS = {"json", "jsonb"}
+INT_FORMATS = {"bigint", "integer", "smallint"}
+REAL_FORMATS = {"numeric", "real", "double precision"}
+# no-op upsert 판정에서 제외 (매 크롤마다 새 값이 들어오는 컬럼)
+VOLATILE_COLUMNS = {"updated_at"}
+
+OPERATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+RPC_FUNCTIONS = {}
+
+
+def register_rpc(name: str):
+    """/rest/v1/rpc/<name> 구현 등록: fn(store, args: dict) → JSON 직렬화 가능한 값"""
+    def decorator(fn):
+        RPC_FUNCTIONS[name] = fn
+        return fn
+    return decorator
+
+
+class PgrstError(Exception):
+    """PostgREST 형식 에러 응답 ({code, message, details, hint})"""
+
+    def __init__(self, status: int, code: str, message: str, details: str = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+        self.details = details
+
+    def body(self) -> dict:
+        return {"code": self.code, "message": self.message, "details": self.details, "hint": None}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _default_factory(default, kind: str):
+    """swagger default 문자열 → 값 생성 함수 (DB 쪽 기본값 흉내)"""
+    if default is None or default == "":
+        return None
+    if isinstance(default, str):
+        if "now()" in default:
+            return _now
+        if default == "CURRENT_DATE":
+            return lambda: datetime.now(timezone.utc).date().isoformat()
+        if "uuid" in default:
+            return lambda: str(uuid.uuid4())
+        if "(" in default:
+            return None  # 그 밖의 SQL 함수는 지원하지 않음
+    if kind == "bool" and isinstance(default, str):
+        default = default == "True"
+    return lambda: default
+
+
+def _split_top(text: str) -> list:
+    """괄호 / 큰따옴표 밖의 쉼표로 분리: 'a.eq.1,and(b.gt.1,c.lt.2)' → ['a.eq.1', 'and(b.gt.1,c.lt.2)']"""
+    parts, depth, quoted, buf = [], 0, False, ""
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0 and not quoted:
+            parts.append(buf)
+            buf = ""
+        else:
+            buf += ch
+    if buf:
+        parts.append(buf)
+    return [p.strip() for p in parts]
+
+
+def _unquote(value: str) -> str:
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+class LocalStore:
+    """SQLite 위에 PostgREST 의미(필터, upsert, Prefer)를 구현한 저장소"""
+
+    def __init__(self, path: str = ":memory:", schema_path: str = SCHEMA_PATH, strict: bool = False,
+                 log_path: str = None):
+        self.path = path
+        self.strict = strict
+        self.log_path = log_path
+        self.columns = {}   # table → {column: kind}  (kind: int, real, text, bool, json, vector)
+        self.defaults = {}  # table → {column: factory}
+        self.pks = {}       # table → [pk columns]
+        self.entries = []   # 요청 로그 (stats / JSONL)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.row_factory = sqlite3.Row
+        if schema_path and os.path.exists(schema_path):
+            self.load_schema(schema_path)
+
+    # --- schema -------------------------------------------------------------
+
+    def load_schema(self, schema_path: str):
+        with open(schema_path, encoding="utf-8") as f:
+            definitions = json.load(f).get("definitions", {})
+        for table, spec in definitions.items():
+            columns, pks = {}, []
+            for column, prop in spec.get("properties", {}).items():
+                fmt = prop.get("format", "text")
+                kind = ("int" if fmt in INT_FORMATS else "real" if fmt in REAL_FORMATS
+                        else "bool" if fmt == "boolean" else "json" if fmt in JSON_FORMATS or fmt.endswith("[]")
+                        else "vector" if fmt.startswith("public.vector") else "text")
+                columns[column] = kind
+                if "<pk/>" in prop.get("description", ""):
+                    pks.append(column)
+                factory = _default_factory(prop.get("default"), kind)
+                if factory:
+                    self.defaults.setdefault(table, {})[column] = factory
+            self._create_table(table, columns, pks)
+
+    def _create_table(self, table: str, columns: dict, pks: list):
+        ddl = []
+        for column, kind in columns.items():
+            sql_type = {"int": "INTEGER", "real": "REAL", "bool": "INTEGER"}.get(kind, "TEXT")
+            if pks == [column] and kind == "int":
+                ddl.append(f'"{column}" INTEGER PRIMARY KEY')  # rowid → bigint identity 처럼 자동 증가
+            else:
+                ddl.append(f'"{column}" {sql_type}')
+        if pks and not (len(pks) == 1 and columns[pks[0]] == "int"):
+            ddl.append("PRIMARY KEY (" + ", ".join(f'"{c}"' for c in pks) + ")")
+        self._db.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({", ".join(ddl)})')
+        self.columns[table] = dict(columns)
+        self.pks[table] = pks
+
+    def _ensure_columns(self, table: str, keys, sample: dict = None):
+        """schema.json 에 없는 테이블 / 컬럼 (lenient 모드에서 자동 추가)"""
+        if table not in self.columns:
+            if self.strict:
+                raise PgrstError(404, "42P01", f'relation "public.{table}" does not exist')
+            self._create_table(table, {"id": "int"}, ["id"])
+            self.defaults.setdefault(table, {})["created_at"] = _now
+        missing = [k for k in keys if k not in self.columns[table]]
+        if missing and self.strict:
+            raise PgrstError(400, "PGRST204", f"Could not find the '{missing[0]}' column of '{table}' in the schema cache")
+        for column in missing:
+            value = (sample or {}).get(column)
+            kind = ("bool" if isinstance(value, bool) else "int" if isinstance(value, int)
+                    else "real" if isinstance(value, float) else "json" if isinstance(value, (dict, list)) else "text")
+            sql_type = {"int": "INTEGER", "real": "REAL", "bool": "INTEGER"}.get(kind, "TEXT")
+            self._db.execute(f'ALTER TABLE "{table}" ADD COLUMN "{column}" {sql_type}')
+            self.columns[table][column] = kind
+
+    def _ensure_unique(self, table: str, columns: list):
+        """on_conflict 대상 unique index (운영 DB 의 unique constraint 대응)"""
+        if columns == self.pks.get(table):
+            return
+        name = f"uq_{table}_{'_'.join(columns)}"
+        try:
+            self._db.execute(f'CREATE UNIQUE INDEX IF NOT EXISTS "{name}" ON "{table}" ('
+                             + ", ".join(f'"{c}"' for c in columns) + ")")
+        except sqlite3.IntegrityError as e:
+            raise PgrstError(400, "42P10", "there is no unique or exclusion constraint matching the ON CONFLICT specification", str(e))
+
+    def _column(self, table: str, column: str) -> str:
+        column = column.split("::")[0].split("->")[0].strip()
+        if column not in self.columns.get(table, {}):
+            raise PgrstError(400, "42703", f"column {table}.{column} does not exist")
+        return column
+
+    # --- value conversion ---------------------------------------------------
+
+    def _to_db(self, table: str, column: str, value):
+        kind = self.columns[table].get(column, "text")
+        if value is None:
+            return None
+        if kind in ("json", "vector") or isinstance(value, (dict, list)):
+            return value if isinstance(value, str) and kind == "vector" else json.dumps(value, ensure_ascii=False)
+        if kind == "bool" or isinstance(value, bool):
+            return 1 if value in (True, "true", "t", 1) else 0
+        return value
+
+    def _from_db(self, table: str, row: sqlite3.Row, columns=None) -> dict:
+        out = {}
+        for key in (columns or row.keys()):
+            alias, column = key if isinstance(key, tuple) else (key, key)
+            value = row[column]
+            kind = self.columns[table].get(column, "text")
+            if value is not None and kind == "json":
+                value = json.loads(value)
+            elif value is not None and kind == "bool":
+                value = bool(value)
+            out[alias] = value
+        return out
+
+    def _filter_value(self, table: str, column: str, value: str):
+        kind = self.columns[table].get(column, "text")
+        if kind == "bool":
+            return 1 if value in ("true", "t", "1") else 0
+        return value  # INTEGER / REAL 컬럼과의 비교는 SQLite affinity 가 숫자로 변환
+
+    # --- filters ------------------------------------------------------------
+
+    def _condition(self, table: str, column: str, expr: str):
+        negate = expr.startswith("not.")
+        if negate:
+            expr = expr[4:]
+        op, _, value = expr.partition(".")
+        column = self._column(table, column)
+        ref = f'"{column}"'
+        if op in OPERATORS:
+            sql, args = f"{ref} {OPERATORS[op]} ?", [self._filter_value(table, column, _unquote(value))]
+        elif op in ("like", "ilike"):
+            pattern = _unquote(value).replace("*", "%")
+            sql = f"{ref} LIKE ?" if op == "ilike" else f"{ref} GLOB ?"
+            args = [pattern if op == "ilike" else pattern.replace("%", "*")]
+        elif op == "in":
+            items = [_unquote(v) for v in _split_top(value.strip("()"))] if value.strip("()") else []
+            sql = f"{ref} IN ({', '.join('?' * len(items))})" if items else "0"
+            args = [self._filter_value(table, column, v) for v in items]
+        elif op == "is":
+            mapping = {"null": "IS NULL", "not_null": "IS NOT NULL", "true": "= 1", "false": "= 0", "unknown": "IS NULL"}
+            if value not in mapping:
+                raise PgrstError(400, "PGRST100", f'"failed to parse filter (is.{value})"')
+            sql, args = f"{ref} {mapping[value]}", []
+        else:
+            raise PgrstError(400, "PGRST100", f"unsupported operator '{op}' (local stand-in)")
+        return (f"NOT ({sql})" if negate else sql), args
+
+    def _logic(self, table: str, op: str, body: str):
+        """or=(a.eq.1,and(b.gt.1,c.is.null)) 형식"""
+        parts, args = [], []
+        for item in _split_top(body.strip()[1:-1]):
+            negate = item.startswith("not.")
+            inner = item[4:] if negate else item
+            if re.match(r"^(and|or)\(", inner):
+                name = inner[:inner.index("(")]
+                sql, sub_args = self._logic(table, name, inner[len(name):])
+            else:
+                column, _, expr = inner.partition(".")
+                sql, sub_args = self._condition(table, column, expr)
+            parts.append(f"NOT ({sql})" if negate else sql)
+            args += sub_args
+        return "(" + f" {op.upper()} ".join(parts or ["1"]) + ")", args
+
+    def _where(self, table: str, params: list):
+        clauses, args = [], []
+        for key, value in params:
+            if key in RESERVED_PARAMS:
+                continue
+            negate = key.startswith("not.") and key[4:] in ("or", "and")
+            name = key[4:] if negate else key
+            if name in ("or", "and"):
+                sql, sub_args = self._logic(table, name, value)
+                sql = f"NOT {sql}" if negate else sql
+            else:
+                sql, sub_args = self._condition(table, key, value)
+            clauses.append(sql)
+            args += sub_args
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+    def _select(self, table: str, select: str):
+        if not select or select.strip() == "*":
+            return "*", None
+        columns = []
+        for item in _split_top(select):
+            if "(" in item:
+                raise PgrstError(400, "PGRST100", f"resource embedding '{item}' is not supported by the local stand-in")
+            alias, _, column = item.rpartition(":") if ":" in item.replace("::", "") else ("", "", item)
+            column = self._column(table, column)
+            columns.append((alias or column, column))
+        return ", ".join(f'"{c}"' for _, c in columns), columns
+
+    def _order(self, table: str, order: str) -> str:
+        terms = []
+        for item in _split_top(order or ""):
+            column, *modifiers = item.split(".")
+            direction = "DESC" if "desc" in modifiers else "ASC"
+            nulls = ("NULLS FIRST" if "nullsfirst" in modifiers else "NULLS LAST" if "nullslast" in modifiers
+                     else "NULLS FIRST" if direction == "DESC" else "NULLS LAST")
+            terms.append(f'"{self._column(table, column)}" {direction} {nulls}')
+        return (" ORDER BY " + ", ".join(terms)) if terms else ""
+
+    # --- operations ---------------------------------------------------------
+
+    def select(self, table: str, params: list, limit: int = None, offset: int = 0, count: bool = False):
+        if table not in self.columns:
+            if self.strict:
+                raise PgrstError(404, "42P01", f'relation "public.{table}" does not exist')
+            return [], 0  # lenient: 아직 한 번도 쓰지 않은 테이블
+        query = dict(params)
+        select_sql, columns = self._select(table, query.get("select"))
+        where, args = self._where(table, params)
+        limit = int(query["limit"]) if "limit" in query else limit
+        offset = int(query.get("offset", offset or 0))
+        sql = f'SELECT {select_sql} FROM "{table}"{where}{self._order(table, query.get("order"))}'
+        if limit is not None or offset:
+            sql += f" LIMIT {limit if limit is not None else -1} OFFSET {offset}"
+        with self._lock:
+            rows = [self._from_db(table, r, columns) for r in self._db.execute(sql, args)]
+            total = self._db.execute(f'SELECT COUNT(*) FROM "{table}"{where}', args).fetchone()[0] if count else None
+        return rows, total
+
+    def _noop_rows(self, table: str, rows: list, conflict: list) -> int:
+        """upsert 대상 중 이미 같은 값으로 저장된 row 수 (VOLATILE_COLUMNS 제외) - 쓰기 증폭 지표"""
+        noop = 0
+        keyed = {tuple(r.get(c) for c in conflict): r for r in rows}
+        keys = list(keyed)
+        for i in range(0, len(keys), 200):
+            chunk = keys[i:i + 200]
+            placeholders = ", ".join("(" + ", ".join("?" * len(conflict)) + ")" for _ in chunk)
+            sql = (f'SELECT * FROM "{table}" WHERE (' + ", ".join(f'"{c}"' for c in conflict)
+                   + f") IN (VALUES {placeholders})")
+            for existing in self._db.execute(sql, [v for key in chunk for v in key]):
+                row = keyed.get(tuple(existing[c] for c in conflict))
+                if row is not None and all(
+                    existing[c] == v or (existing[c] is not None and v is not None and str(existing[c]) == str(v))
+                    for c, v in row.items() if c not in VOLATILE_COLUMNS
+                ):
+                    noop += 1
+        return noop
+
+    def insert(self, table: str, payload, on_conflict: str = None, resolution: str = None, returning: bool = True):
+        """POST: insert / upsert. (저장된 row 목록, no-op row 수) 반환"""
+        rows = payload if isinstance(payload, list) else [payload]
+        if not rows:
+            return [], 0
+        keys = list(rows[0].keys())
+        if any(set(r.keys()) != set(keys) for r in rows):
+            raise PgrstError(400, "PGRST102", "All object keys must match")
+
+        with self._lock:
+            self._ensure_columns(table, keys, rows[0])
+            defaults = {c: f for c, f in self.defaults.get(table, {}).items() if c not in keys}
+            columns = keys + list(defaults)
+            conflict = [c.strip() for c in on_conflict.split(",")] if on_conflict else (self.pks[table] if resolution else [])
+            for column in conflict:
+                self._column(table, column)
+
+            db_rows = [[self._to_db(table, k, r.get(k)) for k in keys] + [f() for f in defaults.values()] for r in rows]
+            noop = 0
+            sql = (f'INSERT INTO "{table}" (' + ", ".join(f'"{c}"' for c in columns) + ") VALUES ("
+                   + ", ".join("?" * len(columns)) + ")")
+            if conflict and resolution:
+                self._ensure_unique(table, conflict)
+                if resolution == "merge-duplicates":
+                    noop = self._noop_rows(table, [dict(zip(keys, r[:len(keys)])) for r in db_rows], conflict)
+                    updates = [c for c in keys if c not in conflict]
+                    sql += (" ON CONFLICT (" + ", ".join(f'"{c}"' for c in conflict) + ") DO "
+                            + ("UPDATE SET " + ", ".join(f'"{c}" = excluded."{c}"' for c in updates) if updates else "NOTHING"))
+                else:
+                    sql += " ON CONFLICT (" + ", ".join(f'"{c}"' for c in conflict) + ") DO NOTHING"
+            sql += " RETURNING *"
+
+            saved = []
+            try:
+                # 운영 DB 처럼 요청 하나가 하나의 트랜잭션 (중간 실패 시 전체 롤백)
+                for values in db_rows:
+                    saved += [self._from_db(table, r) for r in self._db.execute(sql, values).fetchall()]
+                if table == "daily_rankings_v2":
+                    self._touch_last_seen(saved)
+                self._db.commit()
+            except sqlite3.IntegrityError as e:
+                self._db.rollback()
+                raise PgrstError(409, "23505", f"duplicate key value violates unique constraint ({e})")
+        return (saved if returning else []), noop
+
+    def _touch_last_seen(self, rankings: list):
+        """migration 026 의 tr_touch_product_last_seen 대응: 랭킹이 저장된 상품의 last_seen_at 갱신"""
+        if "products_master" not in self.columns or (self.strict and "last_seen_at" not in self.columns["products_master"]):
+            return
+        self._ensure_columns("products_master", ["last_seen_at"])
+        now = _now()
+        self._db.executemany('UPDATE "products_master" SET "last_seen_at" = ? WHERE "id" = ?',
+                             [(now, pid) for pid in {r.get("product_id") for r in rankings}])
+
+    def update(self, table: str, params: list, patch: dict):
+        with self._lock:
+            self._ensure_columns(table, patch.keys(), patch)
+            where, args = self._where(table, params)
+            if not patch:
+                return []
+            sets = ", ".join(f'"{c}" = ?' for c in patch)
+            values = [self._to_db(table, c, v) for c, v in patch.items()]
+            rows = self._db.execute(f'UPDATE "{table}" SET {sets}{where} RETURNING *', values + args).fetchall()
+            self._db.commit()
+            return [self._from_db(table, r) for r in rows]
+
+    def delete(self, table: str, params: list):
+        if table not in self.columns:
+            return []
+        with self._lock:
+            where, args = self._where(table, params)
+            rows = self._db.execute(f'DELETE FROM "{table}"{where} RETURNING *', args).fetchall()
+            self._db.commit()
+            return [self._from_db(table, r) for r in rows]
+
+    # --- request log --------------------------------------------------------
+
+    def record(self, entry: dict):
+        with self._lock:
+            self.entries.append(entry)
+            if self.log_path:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return summarize(self.entries)
+
+
+def summarize(entries: list) -> dict:
+    """요청 로그 → (테이블, 요청 종류)별 호출 수 / row 수 / 지연 시간 / no-op 비율"""
+    groups = {}
+    for e in entries:
+        groups.setdefault(f"{e['table']} {e['kind']}", []).append(e)
+    out = {}
+    for key, items in sorted(groups.items()):
+        ms = sorted(e["ms"] for e in items)
+        rows_in = sum(e["rows_in"] for e in items)
+        noop = sum(e.get("noop_rows", 0) for e in items)
+        out[key] = {
+            "calls": len(items),
+            "errors": sum(1 for e in items if e["status"] >= 400),
+            "rows_in": rows_in,
+            "rows_out": sum(e["rows_out"] for e in items),
+            "rows_per_call": round(rows_in / len(items), 1),
+            "noop_rows": noop,
+            "noop_ratio": round(noop / rows_in, 3) if rows_in else 0,
+            "bytes_in": sum(e["bytes_in"] for e in items),
+            "bytes_out": sum(e["bytes_out"] for e in items),
+            "avg_ms": round(sum(ms) / len(ms), 2),
+            "p95_ms": round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 2),
+            "max_ms": round(ms[-1], 2),
+        }
+    return out
+
+
+def print_summary(summary: dict):
+    if not summary:
+        print("  (요청 없음)")
+        return
+    print(f"  {'table / kind':<36} {'calls':>6} {'rows_in':>8} {'rows/call':>9} {'no-op':>7} {'avg_ms':>8} {'p95_ms':>8} {'KB_in':>8}")
+    for key, s in summary.items():
+        print(f"  {key:<36} {s['calls']:>6} {s['rows_in']:>8} {s['rows_per_call']:>9} {s['noop_ratio']:>7.0%}"
+              f" {s['avg_ms']:>8.2f} {s['p95_ms']:>8.2f} {s['bytes_in'] / 1024:>8.1f}"
+              + (f"  errors {s['errors']}" if s["errors"] else ""))
+
+
+def _match_products(store: LocalStore, args: dict, column: str = "embedding") -> list:
+    """migration 023 의 match_products(_local) 와 같은 결과 (HNSW 대신 전체 코사인 유사도 계산)"""
+    def parse(value):
+        return [float(x) for x in (json.loads(value) if isinstance(value, str) else value)]
+
+    query = parse(args["query_embedding"])
+    query_norm = sum(x * x for x in query) ** 0.5 or 1.0
+    rows, _ = store.select("products_master", [(column, "not.is.null")])
+    matches = []
+    for row in rows:
+        vector = parse(row[column])
+        norm = sum(x * x for x in vector) ** 0.5 or 1.0
+        similarity = sum(a * b for a, b in zip(query, vector)) / (query_norm * norm)
+        if similarity > float(args.get("match_threshold", 0)):
+            matches.append({
+                "id": row["id"], "source": row.get("source"), "name": row.get("name"), "brand": row.get("brand"),
+                "category": row.get("category"), "price": row.get("price"), "image_url": row.get("image_url"),
+                "product_url": row.get("url"), "vi_name": row.get("vi_name"), "ai_summary": row.get("ai_summary"),
+                "similarity": similarity,
+            })
+    matches.sort(key=lambda m: -m["similarity"])
+    return matches[:int(args.get("match_count", 10))]
+
+
+register_rpc("match_products")(_match_products)
+register_rpc("match_products_local")(lambda store, args: _match_products(store, args, "embedding_local"))
+
+
+# --- HTTP ---------------------------------------------------------------------
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # requests.Session keep-alive 유지
+    store: LocalStore = None
+    verbose = False
+
+    def log_message(self, fmt, *args):
+        if self.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, status: int, body=None, headers: dict = None):
+        data = b"" if body is None else json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(data)
+        return len(data)
+
+    def _prefer(self) -> dict:
+        prefer = {}
+        for item in self.headers.get("Prefer", "").split(","):
+            k, _, v = item.strip().partition("=")
+            if k:
+                prefer[k] = v
+        return prefer
+
+    def _handle(self):
+        t0 = time.perf_counter()
+        parsed = urlparse(self.path)
+        params = parse_qsl(parsed.query, keep_blank_values=True)
+        parts = [p for p in parsed.path.split("/") if p]
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        entry = {"ts": time.time(), "method": self.command, "table": "?", "kind": "?",
+                 "rows_in": 0, "rows_out": 0, "noop_rows": 0, "bytes_in": len(raw)}
+        status, bytes_out = 500, 0
+        try:
+            if parts[:2] == ["_local", "stats"]:
+                status, bytes_out = 200, self._send(200, self.store.stats())
+                return
+            if len(parts) < 3 or parts[:2] != ["rest", "v1"]:
+                raise PgrstError(404, "PGRST000", f"not found: {parsed.path}")
+            status, body, headers = self._dispatch(parts[2:], params, raw, entry)
+            bytes_out = self._send(status, body, headers)
+        except PgrstError as e:
+            status, bytes_out = e.status, self._send(e.status, e.body())
+        except (ValueError, sqlite3.Error) as e:
+            status, bytes_out = 400, self._send(400, PgrstError(400, "PGRST100", str(e)).body())
+        finally:
+            if entry["table"] != "?":
+                entry.update(status=status, bytes_out=bytes_out, ms=round((time.perf_counter() - t0) * 1000, 3))
+                self.store.record(entry)
+
+    def _dispatch(self, path: list, params: list, raw: bytes, entry: dict):
+        store, prefer, method = self.store, self._prefer(), self.command
+        payload = json.loads(raw) if raw else None
+
+        if path[0] == "rpc":
+            entry.update(table=f"rpc/{path[1]}", kind="rpc")
+            fn = RPC_FUNCTIONS.get(path[1])
+            if fn is None:
+                raise PgrstError(404, "PGRST202", f"Could not find the function public.{path[1]} in the schema cache")
+            result = fn(store, payload or dict(params))
+            entry["rows_out"] = len(result) if isinstance(result, list) else 1
+            return 200, result, {}
+
+        table = path[0]
+        entry["table"] = table
+        representation = prefer.get("return") == "representation"
+
+        if method in ("GET", "HEAD"):
+            entry["kind"] = "select"
+            limit, offset = None, 0
+            if re.match(r"^\d+-\d+$", self.headers.get("Range", "")):
+                start, end = map(int, self.headers["Range"].split("-"))
+                limit, offset = end - start + 1, start
+            rows, total = store.select(table, params, limit, offset, count=prefer.get("count") == "exact")
+            entry["rows_out"] = len(rows)
+            offset = int(dict(params).get("offset", offset))
+            content_range = (f"{offset}-{offset + len(rows) - 1}" if rows else "*") + f"/{total if total is not None else '*'}"
+            if "vnd.pgrst.object" in self.headers.get("Accept", ""):
+                if len(rows) != 1:
+                    raise PgrstError(406, "PGRST116", "JSON object requested, multiple (or no) rows returned",
+                                     f"The result contains {len(rows)} rows")
+                return 200, rows[0], {"Content-Range": content_range}
+            return (206 if total is not None and len(rows) < total else 200), rows, {"Content-Range": content_range}
+
+        if method == "POST":
+            rows = payload if isinstance(payload, list) else [payload]
+            query = dict(params)
+            resolution = prefer.get("resolution")
+            entry.update(kind="upsert" if resolution else "insert", rows_in=len(rows))
+            saved, noop = store.insert(table, payload, query.get("on_conflict"), resolution, returning=representation)
+            entry.update(rows_out=len(saved), noop_rows=noop)
+            return (201, saved, {}) if representation else (201, None, {})
+
+        if method == "PATCH":
+            entry.update(kind="update")
+            saved = store.update(table, params, payload or {})
+            entry.update(rows_in=len(saved), rows_out=len(saved) if representation else 0)
+            return (200, saved, {}) if representation else (204, None, {})
+
+        if method == "DELETE":
+            entry.update(kind="delete")
+            saved = store.delete(table, params)
+            entry.update(rows_in=len(saved), rows_out=len(saved) if representation else 0)
+            return (200, saved, {}) if representation else (204, None, {})
+
+        raise PgrstError(405, "PGRST117", f"Unsupported HTTP method: {method}")
+
+    do_GET = do_HEAD = do_POST = do_PATCH = do_DELETE = _handle
+
+
+def make_server(store: LocalStore, host: str = "127.0.0.1", port: int = LOCAL_PGRST_PORT, verbose: bool = False):
+    handler = type("Handler", (_Handler,), {"store": store, "verbose": verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_background(port: int = 0, **store_kwargs):
+    """백그라운드 thread 로 서버 시작 (port=0 이면 빈 포트). (server, base_url) 반환, 끝나면 server.shutdown()"""
+    store = LocalStore(**store_kwargs)
+    server = make_server(store, port=port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local PostgREST stand-in (SQLite)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=LOCAL_PGRST_PORT)
+    serve.add_argument("--db", default=":memory:", help="SQLite 파일 경로 (기본 메모리)")
+    serve.add_argument("--schema", default=SCHEMA_PATH)
+    serve.add_argument("--strict", action="store_true", help="schema 에 없는 테이블/컬럼은 에러")
+    serve.add_argument("--log", help="요청 로그 JSONL 경로")
+    serve.add_argument("--verbose", action="store_true")
+    report = sub.add_parser("stats")
+    report.add_argument("log")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        with open(args.log, encoding="utf-8") as f:
+            print_summary(summarize([json.loads(line) for line in f if line.strip()]))
+        return
+
+    store = LocalStore(args.db, args.schema, strict=args.strict, log_path=args.log)
+    server = make_server(store, args.host, args.port, args.verbose)
+    print(f"🧪 Local PostgREST: http://{args.host}:{args.port}/rest/v1  (테이블 {len(store.columns)}개, "
+          f"{'strict' if args.strict else 'lenient'}, db={args.db})")
+    print(f"   SUPABASE_URL=http://{args.host}:{args.port} SUPABASE_KEY=local python <crawler>.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("\n📊 요청 요약")
+        print_summary(store.stats())
+
+
+if __name__ == "__main__":
+    main()
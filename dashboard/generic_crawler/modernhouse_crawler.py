@@ -16,6 +16,7 @@ from bs4 import BeautifulSoup
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from generic_crawler.config import SUPABASE_URL, SUPABASE_KEY, HEADERS
+from generic_crawler.supabase_client import sb
 
 MH_BASE_URL = "https://www.mhmall.co.kr"
 MH_HEADERS = {
@@ -47,7 +48,7 @@ def upsert(table: str, records: list, on_conflict: str = None) -> list:
     if on_conflict:
         params["on_conflict"] = on_conflict
     try:
-        r = requests.post(url, headers=headers, params=params, json=records, timeout=30)
+        r = sb.post(url, headers=headers, params=params, json=records, timeout=30)
         r.raise_for_status()
         print(f"  ✅ {table}: {len(records)}개 저장")
         return r.json()
@@ -1,17 +1,23 @@
 import os
-import time
+import sys
 import json
-import requests
+import asyncio
 from datetime import datetime
 from dotenv import load_dotenv
 import urllib.parse
-from translate_helper import get_english_brand
+from translate_helper import get_english_brand, translate_brands, print_cache_stats
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.supabase_client import sb, stats as sb_stats, print_stats
+from generic_crawler.bulk_writer import RankingWriter
+from generic_crawler.async_fetch import AsyncFetcher, FetchJob
+from generic_crawler.parsers import parse_ranking_items, musinsa_item_fields
 
 # ENV Setup
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+MUSINSA_DUMP_DIR = os.getenv("MUSINSA_DUMP_DIR", "")  # 랭킹 API 응답 원본 저장 (parser_bench fixture 용)
 
 if not SUPABASE_URL or not SUPABASE_KEY:
     print("Error: SUPABASE_URL or SUPABASE_KEY not found in environment variables.")
@@ -35,11 +41,56 @@ def log_crawl(status, metadata=None):
             "finished_at": datetime.now().isoformat() if status == "completed" or status == "failed" else None,
             "metadata_json": metadata or {}
         }
-        requests.post(log_url, headers=headers, json=log_data, timeout=10)
+        sb.post(log_url, headers=headers, json=log_data, timeout=10)
     except Exception as e:
         print(f"Warning: Could not log crawl status: {e}")
 
-def musinsa_crawl():
+CATEGORY_MAP = {
+    '000': '전체', '001': '상의', '002': '아우터', '003': '바지',
+    '020': '원피스', '022': '스커트', '018': '스니커즈', '005': '신발',
+    '004': '가방', '054': '여성 가방'
+}
+
+
+def add_products(writer: RankingWriter, items_to_process: list, gender: str, cat: str) -> int:
+    """gender × category 응답 1개 → writer 적재 (max_batch 를 넘으면 writer 가 동기 HTTP 로 flush → to_thread 에서 호출)"""
+    translate_brands([item.get("info", {}).get("brandName") or "" for item in items_to_process])
+    for idx, item in enumerate(items_to_process):
+        fields = musinsa_item_fields(item)
+        product_id = fields["id"]
+        title = fields["name"]
+        brand = fields["brand"]
+        price = fields["price"]
+
+        image_url = fields["image_url"]
+        link_url = f"https://www.musinsa.com/products/{product_id}"
+        rank = idx + 1
+
+        if title and product_id:
+            brand_en = get_english_brand(brand) if brand else ""
+            product_record = {
+                "product_id": product_id,
+                "source": "musinsa",
+                "name": title,
+                "brand": brand,
+                "brand_ko": brand,
+                "brand_en": brand_en,
+                "price": price,
+                "image_url": image_url,
+                "url": link_url,
+                "tags": {"gender": "male" if gender == 'M' else "female"},
+                "updated_at": datetime.now().isoformat()
+            }
+            # Review data is now collected by review_collector.py (AI Vision)
+            if cat != '000' and cat in CATEGORY_MAP:
+                product_record["category"] = CATEGORY_MAP[cat]
+
+            # max_batch 마다 자동 flush (카테고리별 flush 대신 응답 stream 전체를 배치로)
+            writer.add(product_record, rank, cat)
+    return len(items_to_process)
+
+
+async def musinsa_crawl_async():
     start_time = datetime.now()
     print(f"[{start_time}] Starting Musinsa Ranking Crawl (API)...")
     log_crawl("running", {"message": "Started ranking crawl via API"})
@@ -57,116 +108,67 @@ def musinsa_crawl():
     }
     
     processed_count = 0
-    error_count = 0
+    fetch_errors = 0
+    writer = RankingWriter("musinsa")
 
-    category_map = {
-        '000': '전체', '001': '상의', '002': '아우터', '003': '바지',
-        '020': '원피스', '022': '스커트', '018': '스니커즈', '005': '신발',
-        '004': '가방', '054': '여성 가방'
-    }
+    # gender × category 20개 요청을 async_fetch 로 동시에 (api.musinsa.com 동시성/속도 제한은 HOST_LIMITS)
+    jobs = [
+        FetchJob(
+            key=(gender, cat),
+            url="https://api.musinsa.com/api2/hm/web/v5/pans/ranking/sections/200",
+            params={"storeCode": "musinsa", "categoryCode": cat, "gf": gender},
+        )
+        for gender in genders for cat in categories
+    ]
 
     try:
-        for gender in genders:
-            for cat in categories:
-                list_url = f"https://api.musinsa.com/api2/hm/web/v5/pans/ranking/sections/200?storeCode=musinsa&categoryCode={cat}&gf={gender}"
+        async with AsyncFetcher(headers=request_headers, timeout=10) as fetcher:
+            # 요청은 동시에, 처리는 jobs 순서대로: 같은 카테고리의 M / F 가 같은 상품·랭킹 row 를 쓰므로
+            # 예전처럼 F 가 항상 마지막에 덮어쓰도록 (완료 순서대로면 실행마다 gender / rank 가 바뀜)
+            async for job, data, error in fetcher.stream(jobs, ordered=True):
+                gender, cat = job.key
+                if error:
+                    print(f"Error fetching {cat} / {gender}: {error}")
+                    fetch_errors += 1
+                    continue
+                
+                if MUSINSA_DUMP_DIR:
+                    os.makedirs(MUSINSA_DUMP_DIR, exist_ok=True)
+                    with open(os.path.join(MUSINSA_DUMP_DIR, f"musinsa_ranking_{gender}_{cat}.json"), "w", encoding="utf-8") as f:
+                        json.dump(data, f, ensure_ascii=False)
                 
-                print(f"Fetching: {list_url}")
                 try:
-                    response = requests.get(list_url, headers=request_headers, timeout=10)
-                    if response.status_code != 200:
-                        print(f"Skip {cat} / {gender}: status {response.status_code}")
-                        continue
-                        
-                    data = response.json()
-                    
-                    modules = data.get("data", {}).get("modules", [])
-                    items_to_process = []
-                    for module in modules:
-                        items = module.get("items", [])
-                        for item in items:
-                            if item.get("type") == "PRODUCT_COLUMN":
-                                items_to_process.append(item)
-                    
-                    items_to_process = items_to_process[:50]
+                    items_to_process = parse_ranking_items(data)
                     print(f"Found {len(items_to_process)} items for {cat} ({gender})")
-                    
-                    for idx, item in enumerate(items_to_process):
-                        processed_count += 1
-                        product_id = str(item.get("id"))
-                        info = item.get("info", {})
-                        title = info.get("productName")
-                        brand = info.get("brandName")
-                        price = info.get("finalPrice")
-                        
-                        image_url = item.get("image", {}).get("url")
-                        link_url = f"https://www.musinsa.com/products/{product_id}"
-                        rank = idx + 1
-                        
-                        if title and product_id:
-                            brand_en = get_english_brand(brand) if brand else ""
-                            product_record = {
-                                "product_id": product_id,
-                                "source": "musinsa",
-                                "name": title,
-                                "brand": brand,
-                                "brand_ko": brand,
-                                "brand_en": brand_en,
-                                "price": price,
-                                "image_url": image_url,
-                                "url": link_url,
-                                "tags": {"gender": "male" if gender == 'M' else "female"},
-                                "updated_at": datetime.now().isoformat()
-                            }
-                            # Review data is now collected by review_collector.py (AI Vision)
-                            if cat != '000' and cat in category_map:
-                                product_record["category"] = category_map[cat]
-                            
-                            upsert_url = f"{SUPABASE_URL}/rest/v1/products_master"
-                            upsert_params = {"on_conflict": "source,product_id"}
-                            
-                            res = requests.post(upsert_url, headers=headers, params=upsert_params, json=product_record, timeout=10)
-                            
-                            if res.status_code in [200, 201]:
-                                db_items = res.json()
-                                if db_items:
-                                    internal_id = db_items[0].get("id")
-                                    
-                                    # 2. Upsert Ranking to daily_rankings_v2
-                                    ranking_date = datetime.now().date().isoformat()
-                                    ranking_record = {
-                                        "product_id": internal_id,
-                                        "rank": rank,
-                                        "date": ranking_date,
-                                        "category_code": cat,
-                                        "source": f"musinsa"
-                                    }
-                                    
-                                    rank_upsert_url = f"{SUPABASE_URL}/rest/v1/daily_rankings_v2"
-                                    rank_params = {"on_conflict": "product_id,date,category_code"}
-                                    
-                                    rank_res = requests.post(rank_upsert_url, headers=headers, params=rank_params, json=ranking_record, timeout=10)
-                                    if rank_res.status_code not in [200, 201]:
-                                        error_count += 1
-                                else:
-                                    error_count += 1
-                            else:
-                                error_count += 1
+                    # 브랜드 번역 / 자동 flush 는 동기 HTTP → worker thread 에서 (다른 응답 수신이 멈추지 않음)
+                    processed_count += await asyncio.to_thread(add_products, writer, items_to_process, gender, cat)
                 except Exception as e:
-                    print(f"Error fetching {cat} / {gender}: {e}")
-                    error_count += 1
-
-                time.sleep(1) # Prevent rate limiting
+                    print(f"Error parsing {cat} / {gender}: {e}")
+                    fetch_errors += 1
 
+        await asyncio.to_thread(writer.flush)
+        error_count = writer.total_errors + fetch_errors
         print(f"[{datetime.now()}] Crawl complete. Processed {processed_count} items with {error_count} errors.")
         log_crawl("completed", {
             "processed_count": processed_count,
             "error_count": error_count,
-            "duration": str(datetime.now() - start_time)
+            "duration": str(datetime.now() - start_time),
+            "writer": writer.stats(),
+            "fetch": fetcher.stats(),
+            "http": sb_stats()
         })
+        fetcher.print_stats()
+        print_stats()
+        print_cache_stats()
         
     except Exception as e:
         print(f"Fatal error during crawl: {e}")
         log_crawl("failed", {"error": str(e)})
 
+
+def musinsa_crawl():
+    asyncio.run(musinsa_crawl_async())
+
+
 if __name__ == "__main__":
     musinsa_crawl()
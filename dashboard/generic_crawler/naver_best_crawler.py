@@ -11,11 +11,14 @@ Run: python3 generic_crawler/naver_best_crawler.py
 import os
 import sys
 import json
+import asyncio
 import datetime
-import requests
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from generic_crawler.config import SUPABASE_URL, SUPABASE_KEY, HEADERS
+from generic_crawler.config import SUPABASE_URL, SUPABASE_KEY
+from generic_crawler.supabase_client import sb, print_stats
+from generic_crawler.bulk_writer import RankingWriter, upsert_rows
+from generic_crawler.async_fetch import AsyncFetcher, FetchJob
 
 NAVER_BASE = "https://snxbest.naver.com/api/v1/snxbest"
 
@@ -43,36 +46,12 @@ CATEGORIES = [
 BRAND_PERIODS = ["WEEKLY", "MONTHLY"]
 
 
-def naver_get(path: str, params: dict = None) -> any:
-    url = f"{NAVER_BASE}/{path}"
-    try:
-        r = requests.get(url, headers=NAVER_HEADERS, params=params, timeout=30)
-        r.raise_for_status()
-        return r.json()
-    except Exception as e:
-        print(f"  ⚠️  API Error ({url} {params}): {e}")
-        return []
-
-
-def upsert(table: str, records: list, on_conflict: str = None) -> list:
-    if not records:
-        return []
-    url = f"{SUPABASE_URL}/rest/v1/{table}"
-    headers = {**HEADERS, "Prefer": "return=representation,resolution=merge-duplicates"}
-    params = {}
-    if on_conflict:
-        params["on_conflict"] = on_conflict
-    try:
-        r = requests.post(url, headers=headers, params=params, json=records, timeout=30)
-        r.raise_for_status()
-        print(f"  ✅ {table}: {len(records)}개 저장")
-        return r.json()
-    except Exception as e:
-        print(f"  ❌ {table} 저장 실패: {e}")
-        # Print actual error body if available
-        if hasattr(e, 'response') and e.response is not None:
-            print(f"  ❌ 상세 에러: {e.response.text}")
-        return []
+def naver_job(path: str, params: dict, key) -> FetchJob:
+    return FetchJob(key=key, url=f"{NAVER_BASE}/{path}", params=params)
+
+
+def naver_items(data, list_key: str) -> list:
+    return data if isinstance(data, list) else (data.get(list_key) or [])
 
 
 def delete_today_brands(category_id: str, period_type: str) -> None:
@@ -86,141 +65,153 @@ def delete_today_brands(category_id: str, period_type: str) -> None:
     }
     params = f"category_id=eq.{category_id}&period_type=eq.{period_type}&created_at=gte.{today}"
     try:
-        requests.delete(f"{url}?{params}", headers=svc_headers, timeout=10)
+        sb.delete(f"{url}?{params}", headers=svc_headers, timeout=10)
     except Exception:
         pass
 
 
-def fetch_products_by_category() -> int:
+def add_products(writer: RankingWriter, items: list, period: str, cat: dict, seen_ids: set, today: str) -> int:
+    """카테고리 1개 응답 → writer 적재 (max_batch 를 넘으면 writer 가 동기 HTTP 로 flush → to_thread 에서 호출)"""
+    source_name = "naver_best" if period == "DAILY" else "naver_best_weekly"
+    count = 0
+    for rank, item in enumerate(items[:50], 1):
+        pid = str(item.get("productId") or item.get("nvMid") or "")
+        key = f"{period}_{cat['id']}_{pid}"
+        if not pid or key in seen_ids or item.get("isAd"):
+            continue
+        seen_ids.add(key)
+
+        price_raw = item.get("salePrice") or item.get("price") or 0
+        try:
+            price = int(str(price_raw).replace(",", ""))
+        except ValueError:
+            price = 0
+
+        # products_master + daily_rankings_v2 는 RankingWriter 가 배치로 저장
+        writer.add({
+            "product_id": f"naver_{pid}",
+            "source": source_name,
+            "name": item.get("title") or item.get("productName") or "",
+            "brand": item.get("mallName") or item.get("brandName") or "",
+            "price": price,
+            "image_url": item.get("imageUrl") or "",
+            "url": item.get("linkUrl") or item.get("productUrl") or f"https://smartstore.naver.com/products/{pid}",
+            "category": cat["ko"],
+            "naver_category_id": cat["id"],
+            "current_rank": rank,
+            "rank_change": int(item.get("rankChange") or 0),
+            "created_at": today,
+            "tags": {"sort_type": "PRODUCT_BUY", "period": period},
+        }, rank, cat["id"])
+        count += 1
+    return count
+
+
+async def fetch_products_by_category(fetcher: AsyncFetcher) -> int:
     today = datetime.datetime.now(datetime.timezone.utc).isoformat()
-    date_str = today[0:10]
     total = 0
     seen_ids = set()
+    writer = RankingWriter("naver_best")
     
     PRODUCT_PERIODS = ["DAILY", "WEEKLY"]
 
-    for period in PRODUCT_PERIODS:
-        source_name = "naver_best" if period == "DAILY" else "naver_best_weekly"
-        
-        for cat in CATEGORIES:
-            data = naver_get("product/rank", {
-                "sortType": "PRODUCT_BUY",
-                "periodType": period,
-                "ageType": "ALL",
-                "categoryId": cat["id"],
-            })
-            items = data if isinstance(data, list) else (data.get("products") or [])
-            records = []
-            for rank, item in enumerate(items[:50], 1):
-                pid = str(item.get("productId") or item.get("nvMid") or "")
-                key = f"{period}_{cat['id']}_{pid}"
-                if not pid or key in seen_ids or item.get("isAd"):
-                    continue
-                seen_ids.add(key)
-    
-                price_raw = item.get("salePrice") or item.get("price") or 0
-                try:
-                    price = int(str(price_raw).replace(",", ""))
-                except ValueError:
-                    price = 0
-    
-                records.append({
-                    "product_id": f"naver_{pid}",
-                    "source": source_name,
-                    "name": item.get("title") or item.get("productName") or "",
-                    "brand": item.get("mallName") or item.get("brandName") or "",
-                    "price": price,
-                    "image_url": item.get("imageUrl") or "",
-                    "url": item.get("linkUrl") or item.get("productUrl") or f"https://smartstore.naver.com/products/{pid}",
-                    "category": cat["ko"],
-                    "naver_category_id": cat["id"],
-                    "current_rank": rank,
-                    "rank_change": int(item.get("rankChange") or 0),
-                    "created_at": today,
-                    "tags": {"sort_type": "PRODUCT_BUY", "period": period},
-                })
-    
-            saved_items = upsert("products_master", records, on_conflict="source,product_id")
-            
-            if saved_items:
-                # Create a lookup for internal ID by string product_id
-                pid_to_id = {item["product_id"]: item["id"] for item in saved_items if "id" in item}
-                
-                # Upsert into daily_rankings_v2
-                ranking_records = []
-                for item in records:
-                    internal_id = pid_to_id.get(item["product_id"])
-                    if internal_id:
-                        ranking_records.append({
-                            "product_id": internal_id,
-                            "rank": item["current_rank"],
-                            "date": date_str,
-                            "category_code": cat["id"],
-                            "source": source_name
-                        })
-                
-                if ranking_records:
-                    upsert("daily_rankings_v2", ranking_records, on_conflict="product_id,date,category_code")
-                    
-            print(f"  📦 [{period}][{cat['ko']}] {len(records)}개 상품")
-            total += len(records)
-
+    jobs = [
+        naver_job("product/rank", {
+            "sortType": "PRODUCT_BUY",
+            "periodType": period,
+            "ageType": "ALL",
+            "categoryId": cat["id"],
+        }, (period, cat))
+        for period in PRODUCT_PERIODS for cat in CATEGORIES
+    ]
+
+    # 요청은 동시에, 처리는 CATEGORIES 순서대로 ("전체" 다음 하위 카테고리가 category 를 덮어쓰도록)
+    async for job, data, error in fetcher.stream(jobs, ordered=True):
+        period, cat = job.key
+        if error:
+            print(f"  ⚠️  API Error ({job.url} {job.params}): {error}")
+            continue
+
+        # 동기 HTTP(자동 flush)는 worker thread 에서 → 브랜드 요청 / 다른 응답 처리가 멈추지 않음
+        count = await asyncio.to_thread(add_products, writer, naver_items(data, "products"), period, cat, seen_ids, today)
+        print(f"  📦 [{period}][{cat['ko']}] {count}개 상품")
+        total += count
+
+    await asyncio.to_thread(writer.flush)
     return total
 
 
-def fetch_brands_by_category() -> int:
+async def fetch_brands_by_category(fetcher: AsyncFetcher) -> int:
     today = datetime.datetime.now(datetime.timezone.utc).isoformat()
     total = 0
-
-    for period in BRAND_PERIODS:
-        for cat in CATEGORIES:
-            delete_today_brands(cat["id"], period)
-
-            data = naver_get("brand/rank", {
-                "sortType": "BRAND_POPULAR",
-                "periodType": period,
-                "ageType": "ALL",
-                "categoryId": cat["id"],
+    records = []
+    fetched = []  # 응답을 받은 (category_id, period) → 저장 직전에 오늘 저장분 교체
+
+    jobs = [
+        naver_job("brand/rank", {
+            "sortType": "BRAND_POPULAR",
+            "periodType": period,
+            "ageType": "ALL",
+            "categoryId": cat["id"],
+        }, (period, cat))
+        for period in BRAND_PERIODS for cat in CATEGORIES
+    ]
+
+    async for job, data, error in fetcher.stream(jobs):
+        period, cat = job.key
+        if error:
+            # 응답이 없으면 오늘 저장분을 지우지 않음
+            print(f"  ⚠️  API Error ({job.url} {job.params}): {error}")
+            continue
+        fetched.append((cat["id"], period))
+
+        count = 0
+        for rank, item in enumerate(naver_items(data, "brands")[:30], 1):
+            brand_name = (
+                item.get("brandNm") or item.get("title") or
+                item.get("brandName") or item.get("name") or ""
+            )
+            if not brand_name:
+                continue
+
+            tags_raw = item.get("tags") or []
+            hashtags = [f"#{t}" for t in tags_raw[:3]] if tags_raw else []
+
+            records.append({
+                "brand_name": brand_name,
+                "category": cat["ko"],
+                "category_id": cat["id"],
+                "period_type": period,
+                "rank": rank,
+                "rank_change": 0,
+                "logo_url": item.get("brandLogo") or item.get("logoUrl") or "",
+                "store_url": item.get("brandUrl") or item.get("storeUrl") or "",
+                "hashtags": hashtags,
+                "created_at": today,
             })
-            items = data if isinstance(data, list) else (data.get("brands") or [])
-
-            records = []
-            for rank, item in enumerate(items[:30], 1):
-                brand_name = (
-                    item.get("brandNm") or item.get("title") or
-                    item.get("brandName") or item.get("name") or ""
-                )
-                if not brand_name:
-                    continue
-
-                tags_raw = item.get("tags") or []
-                hashtags = [f"#{t}" for t in tags_raw[:3]] if tags_raw else []
-
-                records.append({
-                    "brand_name": brand_name,
-                    "category": cat["ko"],
-                    "category_id": cat["id"],
-                    "period_type": period,
-                    "rank": rank,
-                    "rank_change": 0,
-                    "logo_url": item.get("brandLogo") or item.get("logoUrl") or "",
-                    "store_url": item.get("brandUrl") or item.get("storeUrl") or "",
-                    "hashtags": hashtags,
-                    "created_at": today,
-                })
-
-            upsert("trend_brands", records)
-            print(f"  🏢 [{period}][{cat['ko']}] {len(records)}개 브랜드")
-            total += len(records)
+            count += 1
+
+        print(f"  🏢 [{period}][{cat['ko']}] {count}개 브랜드")
+        total += count
 
+    # 삭제는 일괄 저장 바로 앞에서 (중간에 실패해도 오늘 저장분이 비어 있는 구간을 최소화)
+    await asyncio.gather(*(asyncio.to_thread(delete_today_brands, category_id, period) for category_id, period in fetched))
+    saved = await asyncio.to_thread(upsert_rows, "trend_brands", records)
+    print(f"  ✅ trend_brands: {len(saved)}개 저장")
     return total
 
 
-def crawl():
+async def crawl_async():
     print(f"[{datetime.datetime.now()}] 네이버 쇼핑 베스트 크롤링 시작 (v2)...")
-    p = fetch_products_by_category()
-    b = fetch_brands_by_category()
+    async with AsyncFetcher(headers=NAVER_HEADERS) as fetcher:
+        p, b = await asyncio.gather(fetch_products_by_category(fetcher), fetch_brands_by_category(fetcher))
     print(f"\n✅ 완료! 상품 {p}개 / 브랜드 {b}개 저장")
+    fetcher.print_stats()
+    print_stats()
+
+
+def crawl():
+    asyncio.run(crawl_async())
 
 
 if __name__ == "__main__":
@@ -1,12 +1,14 @@
 import os
+import sys
 import json
 import asyncio
-import requests
 from datetime import datetime
 from dotenv import load_dotenv
 from playwright.async_api import async_playwright
 import local_ai_helper as ai
 from config import SUPABASE_URL, HEADERS
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.supabase_client import sb
 
 # ENV Setup
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
@@ -29,34 +31,48 @@ def log_crawl(status, metadata=None):
             "finished_at": datetime.now().isoformat() if status in ("completed", "failed") else None,
             "metadata_json": metadata or {}
         }
-        requests.post(f"{SUPABASE_URL}/rest/v1/crawl_logs", headers=HEADERS, json=log_data, timeout=10)
+        sb.post(f"{SUPABASE_URL}/rest/v1/crawl_logs", headers=HEADERS, json=log_data, timeout=10)
     except Exception as e:
         print(f"Warning: Could not log crawl status: {e}")
 
-def save_keyword_trend(keyword, rank, category_code):
-    try:
-        product_id = f"kw_{category_code}_{keyword}"
+def get_cached_analysis(product_id):
+    """이미 AI 분석된 (tags, ai_summary) 가 있으면 반환, 없으면 None"""
+    existing_res = sb.get(
+        f"{SUPABASE_URL}/rest/v1/products_master",
+        headers=HEADERS,
+        params={"product_id": f"eq.{product_id}", "select": "id,tags,ai_summary"},
+        timeout=10
+    )
+    existing = existing_res.json() if existing_res.status_code == 200 else []
+    if existing and existing[0].get("ai_summary") and existing[0].get("tags"):
+        return existing[0].get("tags", {}), existing[0].get("ai_summary", {})
+    return None
 
-        # 1. 기존 데이터 먼저 조회 (AI 분석 여부 확인)
-        existing_res = requests.get(
-            f"{SUPABASE_URL}/rest/v1/products_master",
-            headers=HEADERS,
-            params={"product_id": f"eq.{product_id}", "select": "id,tags,ai_summary"},
-            timeout=10
-        )
-        existing = existing_res.json() if existing_res.status_code == 200 else []
-        already_analyzed = existing and existing[0].get("ai_summary") and existing[0].get("tags")
+def analyze_trends(keywords, category_code):
+    """키워드별 (tags, insight). AI 분석은 최초 1회만 실행하고, 새 키워드는 한 번에 묶어서 요청"""
+    analyses = {}
+    for keyword in keywords:
+        try:
+            cached = get_cached_analysis(f"kw_{category_code}_{keyword}")
+        except Exception as e:
+            print(f"  ⚠️ 캐시 조회 실패 ({keyword}): {e}")
+            cached = None
+        if cached:
+            analyses[keyword] = cached
+    if analyses:
+        print(f"  ⚡ AI 분석 캐시 사용: {len(analyses)}개 (API 절약)")
 
-        # 2. AI 분석은 최초 1회만 실행 (이미 있으면 스킵)
-        if already_analyzed:
-            tags = existing[0].get("tags", {})
-            insight = existing[0].get("ai_summary", {})
-            print(f"  ⚡ AI 분석 캐시 사용: {keyword} (API 절약)")
-        else:
-            print(f"  🤖 최초 AI 분석 실행: {keyword}")
-            tags = ai.extract_tags(keyword)
-            insight = ai.generate_insight(keyword, SOURCE)
-            print("  ✨ 분석 완료. DB 저장 준비...")
+    todo = [kw for kw in keywords if kw not in analyses]
+    if todo:
+        print(f"  🤖 최초 AI 분석 실행: {len(todo)}개 (태그 배치 + 인사이트 동시 요청)")
+        analyses.update(ai.analyze_keywords(todo, SOURCE))
+        print("  ✨ 분석 완료. DB 저장 준비...")
+    return analyses
+
+def save_keyword_trend(keyword, rank, category_code, analysis):
+    try:
+        product_id = f"kw_{category_code}_{keyword}"
+        tags, insight = analysis
 
         product_record = {
             "product_id": product_id,
@@ -70,7 +86,7 @@ def save_keyword_trend(keyword, rank, category_code):
             "ai_summary": insight,
             "updated_at": datetime.now().isoformat()
         }
-        res = requests.post(
+        res = sb.post(
             f"{SUPABASE_URL}/rest/v1/products_master",
             headers=HEADERS,
             params={"on_conflict": "source,product_id"},
@@ -90,7 +106,7 @@ def save_keyword_trend(keyword, rank, category_code):
                     "category_code": category_code,
                     "source": SOURCE
                 }
-                requests.post(
+                sb.post(
                     f"{SUPABASE_URL}/rest/v1/daily_rankings_v2",
                     headers=HEADERS,
                     params={"on_conflict": "product_id,date,category_code"},
@@ -144,9 +160,12 @@ async def crawl_category_keywords(page, category):
 
         print(f"  ✅ {len(keywords)}개 키워드 발견")
         
+        # AI 분석은 blocking 이므로 이벤트 루프 밖에서 (카테고리 키워드 전체를 한 번에)
+        analyses = await asyncio.to_thread(analyze_trends, [item['keyword'] for item in keywords], category['code'])
+        
         saved = 0
         for item in keywords:
-            if save_keyword_trend(item['keyword'], item['rank'], category['code']):
+            if save_keyword_trend(item['keyword'], item['rank'], category['code'], analyses.get(item['keyword'], ({}, {}))):
                 saved += 1
         
         print(f"  💾 저장 완료: {saved}개")
@@ -182,7 +201,8 @@ async def naver_datalab_crawl():
         
     duration = str(datetime.now() - start_time)
     print(f"\n[{datetime.now()}] 크롤링 종료. 총 {total_saved}개 저장. 소요시간: {duration}")
-    log_crawl("completed", {"total_saved": total_saved, "duration": duration})
+    log_crawl("completed", {"total_saved": total_saved, "duration": duration, "llm": ai.llm_stats()})
+    ai.print_llm_stats()
 
 if __name__ == "__main__":
     asyncio.run(naver_datalab_crawl())
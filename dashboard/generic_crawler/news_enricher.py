@@ -0,0 +1,201 @@
+"""
+News Enrichment Worker (products_master 작업 큐)
+
+news_trend_crawler.py 는 기사 원문을 enrichment_status = 'pending' 으로 바로 저장만 하고,
+LLM 분석(태그 추출 + 3줄 요약, local_ai_helper.analyze_article)은 이 worker 가 따로 처리합니다.
+브라우저는 Ollama 응답을 기다리지 않고, 스크래핑과 LLM 처리량을 따로 늘리고 줄일 수 있습니다.
+- claim: pending / 재시도 대상 failed / 오래 멈춘 processing row 를 오래된 순으로 NEWS_ENRICH_BATCH 개 골라
+  조건부 PATCH(→ 'processing')로 가져감. 여러 worker 를 동시에 띄워도 같은 기사를 두 번 분석하지 않음
+- 기사 NEWS_ENRICH_CONCURRENCY 개를 동시에 분석 (기사당 요청 2개, 실제 Ollama 동시 요청 수는 ollama_client 가 제한)
+- 결과는 batch 단위 id 기준 배열 upsert → 'done', 요약 실패는 'failed' (NEWS_ENRICH_MAX_ATTEMPTS 까지 재시도)
+
+설정 (env):
+    NEWS_ENRICH_BATCH=8              한 번에 claim 할 기사 수
+    NEWS_ENRICH_CONCURRENCY          동시에 분석할 기사 수 (기본 OLLAMA_NUM_PARALLEL)
+    NEWS_ENRICH_MAX_ATTEMPTS=3
+    NEWS_ENRICH_RETRY_MINUTES=10     failed row 는 이 시간이 지난 뒤 다시 claim (Ollama 장애 시 바로 재시도하지 않음)
+    NEWS_ENRICH_STALE_MINUTES=30     이 시간 넘게 'processing' 인 row 는 worker 가 죽은 것으로 보고 다시 claim
+
+사용법:
+    python news_enricher.py                      # 대기 중인 기사를 모두 처리하고 종료
+    python news_enricher.py --limit 20 --concurrency 2
+    python news_enricher.py --watch 60           # 큐가 비면 60초마다 다시 확인 (상주 worker)
+    python news_enricher.py --status             # 상태별 기사 수
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timezone, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.config import SUPABASE_URL, HEADERS
+from generic_crawler.supabase_client import sb, print_stats
+from generic_crawler.bulk_writer import upsert_rows
+from generic_crawler.ollama_client import OLLAMA_NUM_PARALLEL
+from generic_crawler.llm_cache import is_cacheable
+from generic_crawler import local_ai_helper as ai
+
+NEWS_ENRICH_BATCH = int(os.getenv("NEWS_ENRICH_BATCH", "8"))
+NEWS_ENRICH_CONCURRENCY = int(os.getenv("NEWS_ENRICH_CONCURRENCY", str(max(OLLAMA_NUM_PARALLEL, 1))))
+NEWS_ENRICH_MAX_ATTEMPTS = int(os.getenv("NEWS_ENRICH_MAX_ATTEMPTS", "3"))
+NEWS_ENRICH_RETRY_MINUTES = float(os.getenv("NEWS_ENRICH_RETRY_MINUTES", "10"))
+NEWS_ENRICH_STALE_MINUTES = float(os.getenv("NEWS_ENRICH_STALE_MINUTES", "30"))
+
+STATUSES = ("pending", "processing", "done", "failed")
+CLAIM_COLUMNS = "id,source,product_id,name,brand,article_content,enrichment_attempts"
+FAILED_SUMMARY = "분석에 실패했습니다."
+
+
+def _now(minutes_ago: float = 0) -> str:
+    return (datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def queue_filter() -> str:
+    """claim 대상: pending, 재시도 남은 failed (RETRY 경과), 오래 멈춘 processing"""
+    return (f"(enrichment_status.eq.pending,"
+            f"and(enrichment_status.eq.failed,enrichment_attempts.lt.{NEWS_ENRICH_MAX_ATTEMPTS},"
+            f"enrichment_updated_at.lt.{_now(NEWS_ENRICH_RETRY_MINUTES)}),"
+            f"and(enrichment_status.eq.processing,enrichment_updated_at.lt.{_now(NEWS_ENRICH_STALE_MINUTES)}))")
+
+
+def claim(batch: int = NEWS_ENRICH_BATCH, retries: int = 3) -> list:
+    """오래된 순으로 batch 개를 골라 'processing' 으로 표시하고, 실제로 가져온 row 만 반환"""
+    for _ in range(retries):
+        params = {"select": "id", "or": queue_filter(), "order": "created_at.asc,id.asc", "limit": batch}
+        res = sb.get(f"{SUPABASE_URL}/rest/v1/products_master", headers=HEADERS, params=params, timeout=30)
+        res.raise_for_status()
+        ids = [r["id"] for r in res.json()]
+        if not ids:
+            return []
+
+        # 같은 조건을 다시 걸어 PATCH → 그 사이 다른 worker 가 가져간 row 는 빠짐
+        res = sb.patch(
+            f"{SUPABASE_URL}/rest/v1/products_master",
+            headers={**HEADERS, "Prefer": "return=representation"},
+            params={"id": f"in.({','.join(map(str, ids))})", "or": queue_filter(), "select": CLAIM_COLUMNS},
+            json={"enrichment_status": "processing", "enrichment_updated_at": _now()},
+            timeout=30,
+        )
+        res.raise_for_status()
+        rows = res.json()
+        if rows:
+            return rows
+        # 고른 row 를 전부 다른 worker 가 먼저 가져감 → 큐가 빈 것은 아니므로 다시 조회
+    return []
+
+
+def enrich_row(row: dict) -> dict:
+    """기사 1개 분석 → products_master upsert record"""
+    attempts = (row.get("enrichment_attempts") or 0) + 1
+    record = {
+        "id": row["id"],
+        "source": row["source"],
+        "product_id": row["product_id"],
+        "name": row["name"],
+        "enrichment_attempts": attempts,
+    }
+    title = row["name"]
+    content = row.get("article_content") or title
+    source_name = row.get("brand") or row["source"]  # 저장 시 brand 는 매체명
+
+    try:
+        tags, summary = ai.analyze_article(title, content)
+    except Exception as e:
+        tags, summary, error = {}, FAILED_SUMMARY, str(e)[:300]
+    else:
+        error = None if is_cacheable(summary) else "summary failed"
+
+    if error and attempts < NEWS_ENRICH_MAX_ATTEMPTS:
+        return {**record, "enrichment_status": "failed", "enrichment_error": error}
+
+    extracted_brand = tags.get("brand", source_name)
+    if not isinstance(extracted_brand, str) or not extracted_brand or extracted_brand.lower() == "null":
+        extracted_brand = source_name
+    # 마지막 시도까지 실패하면 기존처럼 받은 만큼 저장하고 failed 로 남김
+    return {
+        **record,
+        "brand": extracted_brand,
+        "tags": tags,
+        "ai_summary": {"insight": summary, "reason": f"수집: {source_name}"},
+        "enrichment_status": "failed" if error else "done",
+        "enrichment_error": error,
+        "updated_at": datetime.now().isoformat(),
+    }
+
+
+def run(limit: int = None, batch: int = NEWS_ENRICH_BATCH, concurrency: int = NEWS_ENRICH_CONCURRENCY,
+        watch: float = 0) -> dict:
+    print(f"🧠 뉴스 LLM 분석 worker (batch {batch}, 동시 {concurrency}{f', watch {watch:g}s' if watch else ''})")
+    stats = {"claimed": 0, "done": 0, "failed": 0, "saved": 0}
+    t0 = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="enrich") as pool:
+        while limit is None or stats["claimed"] < limit:
+            size = batch if limit is None else min(batch, limit - stats["claimed"])
+            try:
+                rows = claim(size)
+            except Exception as e:
+                print(f"  ❌ 큐 조회 실패: {e}")
+                rows = []
+            if not rows:
+                if not watch:
+                    break
+                time.sleep(watch)
+                continue
+
+            stats["claimed"] += len(rows)
+            records = list(pool.map(enrich_row, rows))
+            saved_at = _now()  # batch 전체 분석이 끝난 시각 (trend_aggregator 는 이 값 이후 완료된 기사를 읽음)
+            for r in records:
+                r["enrichment_updated_at"] = saved_at
+                stats[r["enrichment_status"]] += 1
+            stats["saved"] += len(upsert_rows("products_master", records, on_conflict="id", returning=False))
+
+            elapsed = time.perf_counter() - t0
+            print(f"  ✅ {stats['claimed']}개 처리: 완료 {stats['done']} / 실패 {stats['failed']}"
+                  f" ({stats['claimed'] / elapsed * 60:.1f}개/분)")
+            for r in records:
+                if r["enrichment_status"] == "failed":
+                    print(f"    ⚠️ {r['name'][:30]} ({r['enrichment_attempts']}회차): {r['enrichment_error']}")
+
+    if stats["claimed"]:
+        ai.print_llm_stats()
+        print_stats()
+    else:
+        print("  ℹ️ 분석 대기 중인 기사 없음")
+    return stats
+
+
+def queue_status() -> dict:
+    counts = {}
+    for status in STATUSES:
+        res = sb.get(
+            f"{SUPABASE_URL}/rest/v1/products_master",
+            headers={**HEADERS, "Prefer": "count=exact"},
+            params={"select": "id", "enrichment_status": f"eq.{status}", "limit": 1},
+            timeout=30,
+        )
+        res.raise_for_status()
+        counts[status] = int(res.headers.get("Content-Range", "*/0").split("/")[-1] or 0)
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="뉴스 기사 LLM 분석 (enrichment 큐 처리)")
+    parser.add_argument("--limit", type=int, help="이번 실행에서 처리할 최대 기사 수")
+    parser.add_argument("--batch", type=int, default=NEWS_ENRICH_BATCH)
+    parser.add_argument("--concurrency", type=int, default=NEWS_ENRICH_CONCURRENCY)
+    parser.add_argument("--watch", type=float, default=0, help="큐가 비면 N초 후 다시 확인 (0 = 비면 종료)")
+    parser.add_argument("--status", action="store_true", help="상태별 기사 수만 출력")
+    args = parser.parse_args()
+
+    if args.status:
+        for status, count in queue_status().items():
+            print(f"  - {status:<11} {count:>6}개")
+    else:
+        try:
+            run(args.limit, args.batch, args.concurrency, args.watch)
+        except KeyboardInterrupt:
+            print("\n  ⏹️ 중단 (처리 중이던 기사는 NEWS_ENRICH_STALE_MINUTES 후 다시 claim 됨)")
@@ -5,15 +5,21 @@ URL: https://www.oliveyoung.co.kr/store/main/getBestList.do
 방식: Playwright를 사용해 랭킹 페이지 접근 후 상품 정보 수집
 """
 import os
+import sys
 import json
 import time
 import asyncio
-import requests
 import random
 from datetime import datetime
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright
-from translate_helper import get_english_brand
+from translate_helper import get_english_brand, translate_brands, print_cache_stats
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.supabase_client import sb, async_sb, stats as sb_stats, print_stats
+from generic_crawler.browser_pool import BrowserPool
+from generic_crawler.route_filter import RouteFilter
+from generic_crawler.page_ready import wait_ready, ready_stats, print_ready_stats
+from generic_crawler.bulk_writer import RankingWriter
+from generic_crawler.parsers import OY_LIST_PARSE_JS
 
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
 
@@ -60,12 +66,12 @@ def log_crawl(status, metadata=None):
             "finished_at": datetime.now().isoformat() if status in ("completed", "failed") else None,
             "metadata_json": metadata or {}
         }
-        requests.post(f"{SUPABASE_URL}/rest/v1/crawl_logs", headers=HEADERS, json=log_data, timeout=10)
+        sb.post(f"{SUPABASE_URL}/rest/v1/crawl_logs", headers=HEADERS, json=log_data, timeout=10)
     except Exception as e:
         print(f"Warning: Could not log crawl status: {e}")
 
-def save_product_and_rank(item, rank, category_code):
-    """Supabase 저장 로직 (Adaptive)"""
+def save_product_and_rank(writer, item, rank, category_code):
+    """상품/랭킹 레코드를 writer 버퍼에 적재 (flush 시 일괄 저장)"""
     try:
         product_id = item['id']
         name = item['name']
@@ -77,7 +83,6 @@ def save_product_and_rank(item, rank, category_code):
         # Translate brand
         brand_en = get_english_brand(brand) if brand else ""
 
-        # Try with review data first (Only if > 0)
         product_record = {
             "product_id": str(product_id),
             "source": SOURCE,
@@ -91,58 +96,13 @@ def save_product_and_rank(item, rank, category_code):
             "updated_at": datetime.now().isoformat()
         }
 
-        res = requests.post(
-            f"{SUPABASE_URL}/rest/v1/products_master",
-            headers=HEADERS,
-            params={"on_conflict": "source,product_id"},
-            json=product_record,
-            timeout=10
-        )
-
-        # If failed, retry without review columns (in case migration missing)
-        if res.status_code not in [200, 201]:
-            if "Could not find the" in res.text and "column" in res.text:
-                if 'review_count' in product_record: del product_record['review_count']
-                if 'review_rating' in product_record: del product_record['review_rating']
-                
-                res = requests.post(
-                    f"{SUPABASE_URL}/rest/v1/products_master",
-                    headers=HEADERS,
-                    params={"on_conflict": "source,product_id"},
-                    json=product_record,
-                    timeout=10
-                )
-            
-            if res.status_code not in [200, 201]:
-                print(f"  ⚠️ Product upsert error for {product_id}: {res.text[:100]}")
-                return False
-
-        db_items = res.json()
-        if not db_items: return False
-        internal_id = db_items[0].get("id")
-
-        # 2. daily_rankings_v2 Upsert
-        ranking_record = {
-            "product_id": internal_id,
-            "rank": rank,
-            "date": datetime.now().date().isoformat(),
-            "category_code": category_code,
-            "source": SOURCE
-        }
-
-        rank_res = requests.post(
-            f"{SUPABASE_URL}/rest/v1/daily_rankings_v2",
-            headers=HEADERS,
-            params={"on_conflict": "product_id,date,category_code"},
-            json=ranking_record,
-            timeout=10
-        )
+        writer.add(product_record, rank, category_code)
         return True
     except Exception as e:
         print(f"  ❌ Save error: {e}")
         return False
 
-async def crawl_oliveyoung_categories(page, categories_list):
+async def crawl_oliveyoung_categories(page, categories_list, writer, route_filter):
     base_url = "https://www.oliveyoung.co.kr/store/main/getBestList.do"
     total_saved_items = 0
         
@@ -155,114 +115,25 @@ async def crawl_oliveyoung_categories(page, categories_list):
             
         try:
             print(f"  🚀 {category['name']} URL 이동 중...")
-            await page.goto(target_url, wait_until="domcontentloaded", timeout=60000)
-            await asyncio.sleep(4) # DOM 이 완전히 그려질 수 있도록 대기
+            with route_filter.scope(category['name']):
+                await page.goto(target_url, wait_until="domcontentloaded", timeout=60000)
+                await wait_ready(page, "oliveyoung_list") # 랭킹 목록이 그려질 때까지 (최대 10초)
         except Exception as e:
             print(f"  ❌ 페이지 로드 실패: {e}")
             continue
-
-        await asyncio.sleep(2)
         
-        # DOM 파싱
-        parse_script = r"""
-            () => {
-                const results = [];
-                
-                // 랭킹 상품 컨테이너 선택
-                const items = document.querySelectorAll('.cate_prd_list li, .best-list li');
-                
-                items.forEach((li, index) => {
-                    const info = li.querySelector('.prd_info') || li.querySelector('.prd_name')?.parentElement || li;
-                    if (!info || !li.querySelector('.tx_name') || !li.querySelector('img')) return;
-                    
-                    // 브랜드
-                    const brandEl = info.querySelector('.tx_brand');
-                    const brand = brandEl ? brandEl.innerText.trim() : '';
-                    
-                    // 상품명
-                    const nameEl = info.querySelector('.tx_name');
-                    const name = nameEl ? nameEl.innerText.trim() : '';
-                    
-                    // 가격
-                    const priceEl = info.querySelector('.tx_cur .tx_num');
-                    const price = priceEl ? priceEl.innerText.replace(/[^0-9]/g, '') : '0';
-                    
-                    // 이미지
-                    const imgEl = li.querySelector('img');
-                    const imgUrl = imgEl ? (imgEl.src || imgEl.dataset.original) : '';
-                    
-                    // 리뷰 & 평점 (리스트 페이지용)
-                    const pointEl = info.querySelector('.point');
-                    const reviewEl = info.querySelector('.review');
-                    
-                    let rating = 0.0;
-                    let reviewCount = 0;
-                    
-                    if (pointEl) {
-                        const pointText = pointEl.innerText.trim();
-                        // 매칭: "10점만점에 4.9점" 등
-                        const ratingMatch = pointText.match(/에\s*([0-9.]+)\s*점/);
-                        if (ratingMatch) {
-                            const rawScore = parseFloat(ratingMatch[1]);
-                            // 5.5 is Olive Young's default template placeholder (10점만점에 5.5점). Ignore it.
-                            if (rawScore !== 5.5) {
-                                rating = Math.round((rawScore / 2) * 10) / 10;
-                            }
-                        }
-                    }
-                    
-                    if (reviewEl) {
-                        const reviewText = reviewEl.innerText.replace(/[^0-9]/g, '');
-                        reviewCount = parseInt(reviewText) || 0;
-                    }
-                    
-                    // 상품 ID & 링크
-                    const linkEl = info.querySelector('a');
-                    let link = linkEl ? linkEl.href : '';
-                    
-                    let goodsNo = '';
-                    if (link.includes('goodsNo=')) {
-                        goodsNo = link.split('goodsNo=')[1].split('&')[0];
-                    } else if (li.dataset.goodsNo) {
-                        goodsNo = li.dataset.goodsNo;
-                    } else {
-                        const onClick = linkEl && linkEl.getAttribute('onclick');
-                        if (onClick && onClick.includes('goods.detail')) {
-                            const match = onClick.match(/detail\('([^']+)'\)/);
-                            if (match) goodsNo = match[1];
-                        }
-                    }
-                    
-                    if (!link.startsWith('http')) {
-                        link = 'https://www.oliveyoung.co.kr/store/goods/getGoodsDetail.do?goodsNo=' + goodsNo;
-                    }
-
-                    if (goodsNo && name) {
-                        results.push({
-                            id: goodsNo,
-                            name: name,
-                            brand_name: brand,
-                            price: parseInt(price),
-                            image: imgUrl,
-                            url: link,
-                            review_count: reviewCount,
-                            review_rating: rating
-                        });
-                    }
-                });
-                return results;
-            }
-        """
-        captured_items = await page.evaluate(parse_script)
+        # DOM 파싱 (generic_crawler/parsers.py - parser_bench.py 로 fixture 검증)
+        captured_items = await page.evaluate(OY_LIST_PARSE_JS)
         
         print(f"  ✅ {len(captured_items)}개 상품 발견 (DOM)")
         
-        saved_count = 0
+        # 카테고리 브랜드를 한 번에 번역 (캐시 미스만 API 호출)
+        translate_brands([item.get('brand_name', '') for item in captured_items[:100]])
         for rank, item in enumerate(captured_items, start=1):
             if rank > 100: break
-            if save_product_and_rank(item, rank, category["code"]):
-                saved_count += 1
-                
+            save_product_and_rank(writer, item, rank, category["code"])
+
+        saved_count = writer.flush()
         print(f"  💾 저장 완료: {saved_count}개")
         total_saved_items += saved_count
         
@@ -277,12 +148,12 @@ async def scrape_product_reviews(page, goods_no):
     
     try:
         await page.goto(detail_url, wait_until="domcontentloaded", timeout=30000)
-        await asyncio.sleep(3)
+        await wait_ready(page, "oliveyoung_detail")
         
         # Check if page loaded (not Cloudflare challenge)
         title = await page.title()
         if "잠시만 기다려" in title:
-            await asyncio.sleep(5)
+            await wait_ready(page, "oliveyoung_detail", ceiling=10)
         
         parse_script = """
         () => {
@@ -339,7 +210,7 @@ async def update_reviews_for_products(page, limit=50):
     
     # Get products with review_count=0 from the database
     try:
-        res = requests.get(
+        res = await async_sb.get(
             f"{SUPABASE_URL}/rest/v1/products_master",
             headers=HEADERS,
             params={
@@ -347,7 +218,7 @@ async def update_reviews_for_products(page, limit=50):
                 "review_count": "eq.0",
                 "select": "id,product_id",
                 "limit": str(limit),
-                "order": "updated_at.desc"
+                "order": "last_seen_at.desc.nullslast",  # 최근 랭킹에 나온 상품부터 (migration 026)
             },
             timeout=10
         )
@@ -385,7 +256,7 @@ async def update_reviews_for_products(page, limit=50):
                 update_record["review_rating"] = rating
             
             try:
-                res = requests.patch(
+                res = await async_sb.patch(
                     f"{SUPABASE_URL}/rest/v1/products_master?id=eq.{db_id}",
                     headers=HEADERS,
                     json=update_record,
@@ -412,35 +283,33 @@ async def oliveyoung_crawl():
     
     total_saved = 0
     reviews_updated = 0
+    # review_count / review_rating migration 이 없는 DB 면 두 컬럼을 빼고 재시도
+    writer = RankingWriter(SOURCE, optional_columns=("review_count", "review_rating"))
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=[
-                '--disable-blink-features=AutomationControlled'
-            ]
-        )
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1920, "height": 1080}
-        )
-        page = await context.new_page()
-        
+    route_filter = RouteFilter(SOURCE)
+    async with BrowserPool() as pool, pool.page("oliveyoung") as page:
+        await route_filter.attach(page)
         try:
-            total_saved = await crawl_oliveyoung_categories(page, TARGET_CATEGORIES)
+            total_saved = await crawl_oliveyoung_categories(page, TARGET_CATEGORIES, writer, route_filter)
         except Exception as e:
             print(f"  ❌ Error processing categories: {e}")
         
         # Review data is now collected separately by review_collector.py (AI Vision)
-            
-        await browser.close()
         
     duration = str(datetime.now() - start_time)
     print(f"[{datetime.now()}] 크롤링 종료. 총 {total_saved}개 저장. 소요시간: {duration}")
     log_crawl("completed", {
         "total_saved": total_saved, 
-        "duration": duration
+        "duration": duration,
+        "writer": writer.stats(),
+        "http": sb_stats(),
+        "routes": route_filter.stats(),
+        "ready": ready_stats()
     })
+    route_filter.print_stats()
+    print_ready_stats()
+    print_stats()
+    print_cache_stats()
 
 if __name__ == "__main__":
     asyncio.run(oliveyoung_crawl())
@@ -6,17 +6,18 @@ import os
 import json
 import time
 import asyncio
-import requests
 import random
 from datetime import datetime
 import sys
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright
-from translate_helper import get_english_brand
+from translate_helper import get_english_brand, translate_brands
 
 # Add parent directory to path to import notifier
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(parent_dir)
+from generic_crawler.supabase_client import sb
+from generic_crawler.bulk_writer import upsert_rows, PRODUCT_CONFLICT
+from generic_crawler.browser_pool import BrowserPool
 from notifier import send_error_notification
 
 load_dotenv(os.path.join(parent_dir, ".env"))
@@ -45,149 +46,88 @@ def log_crawl(status, metadata=None):
             "finished_at": datetime.now().isoformat() if status in ("completed", "failed") else None,
             "metadata_json": metadata or {}
         }
-        requests.post(f"{SUPABASE_URL}/rest/v1/crawl_logs", headers=HEADERS, json=log_data, timeout=10)
+        sb.post(f"{SUPABASE_URL}/rest/v1/crawl_logs", headers=HEADERS, json=log_data, timeout=10)
     except Exception as e:
         print(f"Warning: Could not log crawl status: {e}")
 
-def save_hotdeal(item):
-    """Save to products_master and daily_specials_v2"""
-    try:
-        product_id = item['id']
-        name = item['name']
-        brand = item.get('brand_name', '')
-        price_org = item.get('price_org', 0)
-        price_cur = item.get('price_cur', 0)
-        special_price = price_cur # explicitly define special_price as price_cur
-        discount_rate = item.get('discount_rate', 0)
-        image_url = item['image']
-        url = item['url']
-        review_count = item.get('review_count', 0)
-        review_rating = item.get('review_rating', 0.0)
+def hotdeal_records(item, iso_date):
+    """오특 아이템 1개 → (products_master, ranking_products_v2, daily_specials_v2) record"""
+    product_id = str(item['id'])
+    name = item['name']
+    brand = item.get('brand_name', '')
+    price_org = item.get('price_org', 0)
+    price_cur = item.get('price_cur', 0)
+    image_url = item['image']
+    review_count = item.get('review_count', 0)
+    review_rating = item.get('review_rating', 0.0)
 
-        # Translate brand
-        brand_en = get_english_brand(brand) if brand else ""
+    # Translate brand
+    brand_en = get_english_brand(brand) if brand else ""
 
-        # 1. Update Products Master
-        product_record = {
-            "product_id": str(product_id),
-            "source": SOURCE,
-            "name": name,
-            "brand": brand,
-            "brand_ko": brand,
-            "brand_en": brand_en,
-            "price": price_org if price_org > 0 else price_cur,  # original price in master; fallback to current
-            "image_url": image_url,
-            "url": url,
-            "updated_at": datetime.now().isoformat()
-        }
-        
-        if review_count > 0:
-            product_record["review_count"] = review_count
-        if review_rating > 0:
-            product_record["review_rating"] = review_rating
+    product_record = {
+        "product_id": product_id,
+        "source": SOURCE,
+        "name": name,
+        "brand": brand,
+        "brand_ko": brand,
+        "brand_en": brand_en,
+        "price": price_org if price_org > 0 else price_cur,  # original price in master; fallback to current
+        "image_url": image_url,
+        "url": item['url'],
+        "updated_at": datetime.now().isoformat()
+    }
 
-        res = requests.post(
-            f"{SUPABASE_URL}/rest/v1/products_master",
-            headers=HEADERS,
-            params={"on_conflict": "source,product_id"},
-            json=product_record,
-            timeout=10
-        )
+    # ranking_products_v2 (Required by FK in daily_specials_v2)
+    ranking_record = {
+        "product_id": product_id,
+        "name": name,
+        "brand": brand,
+        "image_url": image_url
+    }
 
-        if res.status_code not in [200, 201]:
-            print(f"  ⚠️ Product upsert error for {product_id} ({res.status_code}): {res.text}")
-            return False
+    if review_count > 0:
+        product_record["review_count"] = review_count
+        ranking_record["review_count"] = review_count
+    if review_rating > 0:
+        product_record["review_rating"] = review_rating
+        ranking_record["review_rating"] = review_rating
 
-        # 1.5. Update Ranking Products V2 (Required by FK in daily_specials_v2)
-        ranking_record = {
-            "product_id": str(product_id),
-            "name": name,
-            "brand": brand,
-            "image_url": image_url
-        }
-        
-        if review_count > 0:
-            ranking_record["review_count"] = review_count
-        if review_rating > 0:
-            ranking_record["review_rating"] = review_rating
-        
-        # Check if exists in ranking_products_v2
-        rank_check_url = f"{SUPABASE_URL}/rest/v1/ranking_products_v2?product_id=eq.{product_id}"
-        rank_check_res = requests.get(rank_check_url, headers=HEADERS, timeout=10)
-        
-        if rank_check_res.status_code == 200 and rank_check_res.json():
-            # Update existing
-            res_ranking = requests.patch(
-                f"{SUPABASE_URL}/rest/v1/ranking_products_v2?product_id=eq.{product_id}",
-                headers=HEADERS,
-                json=ranking_record,
-                timeout=10
-            )
-        else:
-            # Insert new
-            res_ranking = requests.post(
-                f"{SUPABASE_URL}/rest/v1/ranking_products_v2",
-                headers=HEADERS,
-                json=ranking_record,
-                timeout=10
-            )
-        
-        if res_ranking.status_code not in [200, 201, 204]:
-            print(f"  ⚠️ Ranking product save warning for {product_id} ({res_ranking.status_code}): {res_ranking.text}")
-            # Even if this fails, we try specials, but it will likely fail FK
+    special_record = {
+        "product_id": product_id,
+        "date": iso_date,
+        "special_price": price_cur,
+        "discount_rate": item.get('discount_rate', 0)
+    }
+    return product_record, ranking_record, special_record
 
-        # 2. Update Daily Specials V2
-        iso_date = datetime.now().date().isoformat()
-        special_record = {
-            "product_id": str(product_id),
-            "date": iso_date,
-            "special_price": special_price,
-            "discount_rate": discount_rate
-        }
 
-        # Check if record exists for this product and date
-        check_url = f"{SUPABASE_URL}/rest/v1/daily_specials_v2?product_id=eq.{product_id}&date=eq.{iso_date}"
-        check_res = requests.get(check_url, headers=HEADERS, timeout=10)
-        
-        if check_res.status_code == 200:
-            existing_records = check_res.json()
-            if existing_records:
-                # Update existing (PATCH)
-                record_id = existing_records[0].get('id')
-                if record_id:
-                    res_spec = requests.patch(
-                        f"{SUPABASE_URL}/rest/v1/daily_specials_v2?id=eq.{record_id}",
-                        headers=HEADERS,
-                        json=special_record,
-                        timeout=10
-                    )
-                else:
-                    res_spec = requests.patch(
-                        f"{SUPABASE_URL}/rest/v1/daily_specials_v2?product_id=eq.{product_id}&date=eq.{iso_date}",
-                        headers=HEADERS,
-                        json=special_record,
-                        timeout=10
-                    )
-            else:
-                # Insert new (POST)
-                res_spec = requests.post(
-                    f"{SUPABASE_URL}/rest/v1/daily_specials_v2",
-                    headers=HEADERS,
-                    json=special_record,
-                    timeout=10
-                )
-        else:
-            print(f"  ⚠️ Error checking existence for {product_id}: {check_res.status_code}")
-            return False
+def save_hotdeals(items):
+    """페이지 단위 일괄 저장: 테이블마다 배열 upsert 1회 (products_master → ranking_products_v2 → daily_specials_v2).
+    리뷰 필드 유무로 key 구성이 갈리면 테이블당 1회씩 더 나갈 수 있음 (upsert_rows 참고). 저장된 특가 수 반환"""
+    iso_date = datetime.now().date().isoformat()
 
-        if res_spec.status_code not in [200, 201, 204]:
-            print(f"  ⚠️ Special save error for {product_id} ({res_spec.status_code}): {res_spec.text}")
-            return False
+    # 같은 상품이 한 페이지에 두 번 나오면 ON CONFLICT 가 한 row 를 두 번 갱신하므로 마지막 값만 사용
+    unique = {str(item['id']): item for item in items if item.get('id') and item.get('name')}
+    records = [hotdeal_records(item, iso_date) for item in unique.values()]
+    if not records:
+        return 0
 
-        return True
-    except Exception as e:
-        print(f"  ❌ Save error: {e}")
-        return False
+    products = upsert_rows("products_master", [r[0] for r in records], on_conflict=PRODUCT_CONFLICT)
+    if not products:
+        print(f"  ⚠️ Product upsert failed for {len(records)} hotdeal items")
+        return 0
+
+    saved_ranking = upsert_rows("ranking_products_v2", [r[1] for r in records], on_conflict="product_id")
+    ranked_ids = {str(r.get("product_id")) for r in saved_ranking}
+    if len(ranked_ids) < len(records):
+        print(f"  ⚠️ Ranking product save warning: {len(records) - len(ranked_ids)} items not saved")
+
+    # daily_specials_v2.product_id → ranking_products_v2 FK 이므로 저장된 상품만
+    specials = [r[2] for r in records if r[2]["product_id"] in ranked_ids]
+    saved_specials = upsert_rows("daily_specials_v2", specials, on_conflict="product_id,date")
+    if len(saved_specials) < len(records):
+        print(f"  ⚠️ Special save error: {len(records) - len(saved_specials)} of {len(records)} items not saved")
+    return len(saved_specials)
 
 async def crawl_hotdeals(page):
     target_url = "https://www.oliveyoung.co.kr/store/main/getHotdealList.do?t_page=%EB%9E%AD%ED%82%B9&t_click=GNB&t_gnb_type=%EC%98%A4%ED%8A%B9&t_swiping_type=N"
@@ -300,12 +240,8 @@ async def crawl_hotdeals(page):
     captured_items = await page.evaluate(parse_script)
     print(f"  ✅ {len(captured_items)} Hotdeal items found.")
     
-    saved_count = 0
-    for item in captured_items:
-        if save_hotdeal(item):
-            saved_count += 1
-            
-    return saved_count
+    translate_brands([item.get('brand_name', '') for item in captured_items])
+    return save_hotdeals(captured_items)
 
 async def run_crawler_with_retries(max_retries=3):
     start_time = datetime.now()
@@ -317,40 +253,30 @@ async def run_crawler_with_retries(max_retries=3):
     success = False
     last_error = ""
 
-    while attempt < max_retries and not success:
-        attempt += 1
-        print(f"  \u21bb Attempt {attempt}/{max_retries}")
-        try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=['--disable-blink-features=AutomationControlled']
-                )
-                context = await browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                    viewport={"width": 1280, "height": 1024}
-                )
-                page = await context.new_page()
+    async with BrowserPool() as pool:
+        while attempt < max_retries and not success:
+            attempt += 1
+            print(f"  \u21bb Attempt {attempt}/{max_retries}")
+            try:
+                async with pool.page("oliveyoung_hotdeal") as page:
+                    total_saved = await crawl_hotdeals(page)
                 
-                total_saved = await crawl_hotdeals(page)
-                
-                if total_saved > 0:
-                    success = True
-                else:
-                    raise Exception("Crawl completed but no items were saved.")
+                    if total_saved > 0:
+                        success = True
+                    else:
+                        raise Exception("Crawl completed but no items were saved.")
 
-                # Debugging: Save page content and screenshot
-                content = await page.content()
-                with open("oy_hotdeal_debug.html", "w") as f:
-                    f.write(content)
-                await page.screenshot(path="oy_hotdeal_debug.png")
-                print(f"  \U0001f4f8 Debug files saved: oy_hotdeal_debug.html, oy_hotdeal_debug.png")
-                
-                await browser.close()
-        except Exception as e:
-            last_error = str(e)
-            print(f"  \u274c Error on attempt {attempt}: {e}")
-            await asyncio.sleep(10 * attempt) # Incremental backoff
+                    # Debugging: Save page content and screenshot
+                    content = await page.content()
+                    with open("oy_hotdeal_debug.html", "w") as f:
+                        f.write(content)
+                    await page.screenshot(path="oy_hotdeal_debug.png")
+                    print(f"  \U0001f4f8 Debug files saved: oy_hotdeal_debug.html, oy_hotdeal_debug.png")
+            except Exception as e:
+                last_error = str(e)
+                print(f"  \u274c Error on attempt {attempt}: {e}")
+                await pool.recycle("oliveyoung_hotdeal")  # 다음 시도는 새 세션(context)으로
+                await asyncio.sleep(10 * attempt) # Incremental backoff
 
     duration = str(datetime.now() - start_time)
     
@@ -0,0 +1,263 @@
+"""
+Bounded Ollama Inference Client
+
+local_ai_helper / trend_enricher 가 프롬프트마다 requests.post 를 직접 보내던 것을
+하나의 client 로 모읍니다.
+- 동시에 Ollama 로 나가는 요청 수를 OLLAMA_NUM_PARALLEL 로 제한 (서버 슬롯 수와 맞춤)
+- submit() / map() 으로 여러 프롬프트를 동시에 던지고 Future 로 결과 수신
+- generate_items(): 여러 항목을 한 프롬프트에 묶어 (기본 20개) 보내고 결과를 항목별로 다시 매칭
+- 503 (서버 큐 가득) / 네트워크 오류는 지수 백오프로 재시도
+- embed(): /api/embed 배치 임베딩 (같은 슬롯 / 재시도 / 통계 공유)
+- 모델별 tokens/sec (eval_count / eval_duration), 큐 대기 시간, 지연 시간 통계
+
+사용법:
+    from generic_crawler.ollama_client import get_client
+    client = get_client()
+    data = client.generate(prompt, model="qwen2.5:7b")                 # JSON dict (실패 시 None)
+    futures = [client.submit(p, model=m) for p in prompts]              # 동시 실행
+    results = client.generate_items(keywords, build_prompt, key="keyword", chunk_size=20)
+    vectors = client.embed(texts, model="nomic-embed-text")            # 실패 시 None
+    client.print_stats()
+"""
+import os
+import re
+import json
+import time
+import random
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "http://localhost:11434")
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "deepseek-r1:8b")
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "1"))
+OLLAMA_BATCH_SIZE = int(os.getenv("OLLAMA_BATCH_SIZE", "20"))
+
+RETRY_STATUS = (429, 500, 502, 503)
+LIST_KEYS = ("results", "items", "keywords", "tags", "data")
+
+
+def parse_json_text(text: str):
+    """LLM 응답에서 JSON 추출 (<think> 태그, ```json 블록, 제어 문자 제거)"""
+    text = re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL).strip()
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0].strip()
+    elif text.startswith("```"):
+        text = text.split("```")[1].split("```")[0].strip()
+    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
+    return json.loads(text, strict=False)
+
+
+def unwrap_list(parsed):
+    """{"results": [...]} 처럼 객체로 감싼 배열을 꺼냄"""
+    if isinstance(parsed, dict):
+        for key in LIST_KEYS:
+            if isinstance(parsed.get(key), list):
+                return parsed[key]
+        return [parsed]
+    return parsed if isinstance(parsed, list) else []
+
+
+def _new_model_stats():
+    return {
+        "calls": 0, "errors": 0, "retries": 0,
+        "prompt_tokens": 0, "output_tokens": 0, "eval_s": 0.0,
+        "latency_s": 0.0, "queue_wait_s": 0.0, "max_queue_wait_s": 0.0,
+    }
+
+
+class OllamaClient:
+    """동시 요청 수가 제한된 Ollama /api/generate client (thread-safe)"""
+
+    def __init__(self, host: str = OLLAMA_HOST, max_in_flight: int = OLLAMA_NUM_PARALLEL,
+                 max_retries: int = 2, default_model: str = OLLAMA_MODEL):
+        self.url = f"{host.rstrip('/')}/api/generate"
+        self.embed_url = f"{host.rstrip('/')}/api/embed"
+        self.max_in_flight = max(max_in_flight, 1)
+        self.max_retries = max_retries
+        self.default_model = default_model
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="ollama")
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _record(self, model, **values):
+        with self._lock:
+            s = self._stats.setdefault(model, _new_model_stats())
+            for k, v in values.items():
+                if k == "max_queue_wait_s":
+                    s[k] = max(s[k], v)
+                else:
+                    s[k] += v
+
+    def generate(self, prompt: str, model: str = None, is_json: bool = True, json_format: bool = None,
+                 timeout: int = 120, temperature: float = 0.1, _queued_at: float = None):
+        """프롬프트 1개 실행. is_json 이면 파싱된 JSON, 아니면 텍스트. 재시도 후 실패 시 None"""
+        model = model or self.default_model
+        payload = {
+            "model": model,
+            "prompt": prompt,
+            "stream": False,
+            "options": {"temperature": temperature},
+        }
+        # format=json 은 최상위 객체만 허용 - 배열 응답이 필요한 프롬프트는 json_format=False
+        if is_json if json_format is None else json_format:
+            payload["format"] = "json"
+
+        queued_at = _queued_at or time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            with self._slots:
+                wait = time.perf_counter() - queued_at
+                self._record(model, queue_wait_s=wait, max_queue_wait_s=wait)
+                t0 = time.perf_counter()
+                try:
+                    res = self._session.post(self.url, json=payload, timeout=timeout)
+                    status = res.status_code
+                    res.raise_for_status()
+                    data = res.json()
+                    error = None
+                except Exception as e:
+                    status = getattr(getattr(e, "response", None), "status_code", None)
+                    data, error = None, e
+                latency = time.perf_counter() - t0
+
+            if data is not None:
+                self._record(
+                    model, calls=1, latency_s=latency,
+                    prompt_tokens=data.get("prompt_eval_count", 0),
+                    output_tokens=data.get("eval_count", 0),
+                    eval_s=data.get("eval_duration", 0) / 1e9,
+                )
+                text = data.get("response", "").strip()
+                if not is_json:
+                    return re.sub(r'<think>.*?</think>', '', text, flags=re.DOTALL).strip()
+                try:
+                    return parse_json_text(text)
+                except Exception as e:
+                    error, status = e, None
+
+            retryable = status is None or status in RETRY_STATUS
+            if attempt == self.max_retries or not retryable:
+                self._record(model, errors=1)
+                print(f"  ⚠️ Ollama API 통신/파싱 에러 ({model}): {error}")
+                return None
+            self._record(model, retries=1)
+            print(f"  ⚠️ Ollama 재시도 {attempt + 1}/{self.max_retries} ({model}): {error}")
+            time.sleep(min(2 ** attempt, 8) + random.uniform(0, 0.5))
+            queued_at = time.perf_counter()
+
+    def embed(self, texts: list, model: str, timeout: int = 120):
+        """텍스트 목록을 한 번의 /api/embed 요청으로 임베딩. 입력 순서대로 벡터 목록, 재시도 후 실패 시 None"""
+        if not texts:
+            return []
+        payload = {"model": model, "input": list(texts), "truncate": True}
+
+        queued_at = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            with self._slots:
+                wait = time.perf_counter() - queued_at
+                self._record(model, queue_wait_s=wait, max_queue_wait_s=wait)
+                t0 = time.perf_counter()
+                try:
+                    res = self._session.post(self.embed_url, json=payload, timeout=timeout)
+                    status = res.status_code
+                    res.raise_for_status()
+                    data = res.json()
+                    vectors = data.get("embeddings") or []
+                    error = None if len(vectors) == len(texts) else ValueError(
+                        f"임베딩 개수 불일치 ({len(vectors)}/{len(texts)})")
+                except Exception as e:
+                    status = getattr(getattr(e, "response", None), "status_code", None)
+                    data, vectors, error = None, None, e
+                latency = time.perf_counter() - t0
+
+            if error is None:
+                self._record(model, calls=1, latency_s=latency, prompt_tokens=data.get("prompt_eval_count", 0))
+                return vectors
+
+            retryable = status is None or status in RETRY_STATUS
+            if attempt == self.max_retries or not retryable:
+                self._record(model, errors=1)
+                print(f"  ⚠️ Ollama 임베딩 에러 ({model}, {len(texts)}건): {error}")
+                return None
+            self._record(model, retries=1)
+            print(f"  ⚠️ Ollama 임베딩 재시도 {attempt + 1}/{self.max_retries} ({model}): {error}")
+            time.sleep(min(2 ** attempt, 8) + random.uniform(0, 0.5))
+            queued_at = time.perf_counter()
+
+    def submit_embed(self, texts: list, model: str, **kwargs):
+        """embed() 를 백그라운드로 실행하고 Future 반환"""
+        return self._executor.submit(self.embed, texts, model, **kwargs)
+
+    def submit(self, prompt: str, **kwargs):
+        """generate() 를 백그라운드로 실행하고 Future 반환 (큐 대기 시간은 submit 시점부터)"""
+        return self._executor.submit(self.generate, prompt, _queued_at=time.perf_counter(), **kwargs)
+
+    def map(self, prompts: list, **kwargs) -> list:
+        """여러 프롬프트를 동시에 실행하고 입력 순서대로 결과 반환"""
+        return [f.result() for f in [self.submit(p, **kwargs) for p in prompts]]
+
+    def generate_items(self, items: list, build_prompt, key: str = None, chunk_size: int = OLLAMA_BATCH_SIZE,
+                       **kwargs) -> list:
+        """items 를 chunk_size 개씩 한 프롬프트로 묶어 동시에 실행.
+        build_prompt(chunk) → prompt. 응답 배열은 key 필드(없으면 순서)로 항목에 매칭.
+        반환: items 와 같은 길이의 리스트 (매칭 실패 항목은 None)"""
+        kwargs.setdefault("is_json", True)
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+        futures = [self.submit(build_prompt(chunk), **kwargs) for chunk in chunks]
+
+        results = []
+        for chunk, future in zip(chunks, futures):
+            parsed = [r for r in unwrap_list(future.result()) if isinstance(r, dict)]
+            if key:
+                by_key = {str(r.get(key, "")).strip(): r for r in parsed}
+                matched = [by_key.get(str(item).strip()) for item in chunk]
+                if not any(matched) and len(parsed) == len(chunk):
+                    matched = parsed  # 모델이 key 를 바꿔 쓴 경우 순서로 매칭
+            else:
+                matched = parsed if len(parsed) == len(chunk) else [None] * len(chunk)
+            results.extend(matched)
+        return results
+
+    def stats(self) -> dict:
+        """log_crawl metadata 용 모델별 요약"""
+        with self._lock:
+            result = {}
+            for model, s in self._stats.items():
+                attempts = s["calls"] + s["errors"] + s["retries"]
+                result[model] = {
+                    "calls": s["calls"],
+                    "errors": s["errors"],
+                    "retries": s["retries"],
+                    "prompt_tokens": s["prompt_tokens"],
+                    "output_tokens": s["output_tokens"],
+                    "tokens_per_s": round(s["output_tokens"] / s["eval_s"], 1) if s["eval_s"] else 0,
+                    "avg_latency_s": round(s["latency_s"] / s["calls"], 2) if s["calls"] else 0,
+                    "avg_queue_wait_s": round(s["queue_wait_s"] / attempts, 2) if attempts else 0,
+                    "max_queue_wait_s": round(s["max_queue_wait_s"], 2),
+                }
+            return result
+
+    def print_stats(self):
+        data = self.stats()
+        if not data:
+            return
+        print(f"\n  🧠 Ollama 호출 통계 (동시 {self.max_in_flight})")
+        for model, s in data.items():
+            print(f"    - {model:<18} {s['calls']:>4}회  오류 {s['errors']}  재시도 {s['retries']}"
+                  f"  {s['tokens_per_s']:>6.1f} tok/s  출력 {s['output_tokens']} tok"
+                  f"  지연 avg {s['avg_latency_s']:.1f}s  큐 대기 avg {s['avg_queue_wait_s']:.1f}s / max {s['max_queue_wait_s']:.1f}s")
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> OllamaClient:
+    """프로세스 공용 client (OLLAMA_NUM_PARALLEL 슬롯을 모든 호출자가 공유)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = OllamaClient()
+        return _client
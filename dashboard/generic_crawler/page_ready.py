@@ -0,0 +1,147 @@
+"""
+Event-driven Page Readiness
+
+goto / click 후 고정 asyncio.sleep(3~5) 대신, 사이트별 selector / 본문 텍스트 /
+network-idle 조건이 충족되는 즉시 진행합니다. 조건이 끝내 충족되지 않으면 ceiling 초에서 멈춥니다.
+실제 time-to-ready 는 사이트별 히스토그램으로 기록됩니다.
+
+사용법:
+    from generic_crawler.page_ready import wait_ready, print_ready_stats
+
+    await page.goto(url, wait_until="domcontentloaded")
+    await wait_ready(page, "oliveyoung_detail")       # 준비될 때까지 (최대 ceiling 초)
+    ...
+    print_ready_stats()
+"""
+import time
+import asyncio
+import threading
+
+# 규칙 key:
+#   selector  : 이 CSS selector 가 min_count 개 이상 존재하면 ready
+#   text      : document.body.innerText 가 이 정규식에 매칭되면 ready (selector 와 OR)
+#   network_idle : selector/text 충족 후 남은 시간 안에서 networkidle 까지 추가 대기
+#   settle    : 조건 충족 후 레이아웃 안정용 짧은 대기 (초, 스크린샷용)
+#   ceiling   : 최대 대기 시간 (초) - 기존 고정 sleep 값보다 약간 크게
+READY_RULES = {
+    "oliveyoung_list": {
+        "selector": ".cate_prd_list li .tx_name, .best-list li .tx_name",
+        "min_count": 20,
+        "ceiling": 10,
+    },
+    "oliveyoung_detail": {
+        "text": r"리뷰\s*[0-9,]+\s*건|평점\s*[0-9.]+",
+        "ceiling": 8,
+        "settle": 0.3,
+    },
+    "musinsa_detail": {
+        "text": r"후기\s*[0-9,]+|리뷰\s*[0-9,]+|[0-9.]+\s*\(\s*[0-9,]+\s*\)",
+        "ceiling": 8,
+        "settle": 0.3,
+    },
+    "ably_detail": {
+        "text": r"리뷰\s*[0-9,]+개|만족한 상품|마켓 만족도",
+        "ceiling": 10,
+        "settle": 0.5,
+    },
+    "ssg_detail": {
+        "text": r"고객리뷰|상품평|리뷰\s*[0-9,]+\s*건",
+        "ceiling": 8,
+        "settle": 0.3,
+    },
+    "default": {
+        "network_idle": True,
+        "ceiling": 5,
+    },
+}
+
+# 히스토그램 경계 (초)
+BUCKETS = (0.25, 0.5, 1, 2, 3, 5, 8, 13)
+
+_samples = {}
+_timeouts = {}
+_lock = threading.Lock()
+
+
+READY_PREDICATE_JS = """
+([selector, minCount, text]) => {
+    if (selector && document.querySelectorAll(selector).length >= minCount) return true;
+    if (text && document.body && new RegExp(text).test(document.body.innerText)) return true;
+    return false;
+}
+"""
+
+
+def _record(key: str, seconds: float, timed_out: bool):
+    with _lock:
+        _samples.setdefault(key, []).append(seconds)
+        if timed_out:
+            _timeouts[key] = _timeouts.get(key, 0) + 1
+
+
+async def wait_ready(page, key: str, ceiling: float = None) -> float:
+    """key 규칙이 충족될 때까지 대기하고 걸린 시간(초)을 반환. ceiling 초과 시 그냥 진행"""
+    rule = READY_RULES.get(key, READY_RULES["default"])
+    ceiling = ceiling or rule["ceiling"]
+    t0 = time.perf_counter()
+    timed_out = False
+
+    try:
+        if rule.get("selector") or rule.get("text"):
+            await page.wait_for_function(
+                READY_PREDICATE_JS,
+                arg=[rule.get("selector"), rule.get("min_count", 1), rule.get("text")],
+                timeout=ceiling * 1000,
+                polling=100,
+            )
+        if rule.get("network_idle"):
+            remaining = max(ceiling - (time.perf_counter() - t0), 0.1)
+            await page.wait_for_load_state("networkidle", timeout=remaining * 1000)
+    except Exception:
+        # TimeoutError 또는 navigation 중 context 파괴 - 고정 sleep 과 같은 최악의 경우로 간주
+        timed_out = True
+
+    elapsed = time.perf_counter() - t0
+    _record(key, elapsed, timed_out)
+
+    if rule.get("settle") and not timed_out:
+        await asyncio.sleep(rule["settle"])
+    return elapsed
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def ready_stats() -> dict:
+    """사이트별 time-to-ready 요약 (log_crawl metadata 용)"""
+    with _lock:
+        result = {}
+        for key, values in _samples.items():
+            hist = {}
+            for v in values:
+                label = next((f"<{b}s" for b in BUCKETS if v < b), f">={BUCKETS[-1]}s")
+                hist[label] = hist.get(label, 0) + 1
+            result[key] = {
+                "count": len(values),
+                "timeouts": _timeouts.get(key, 0),
+                "p50_s": round(_percentile(values, 0.5), 2),
+                "p90_s": round(_percentile(values, 0.9), 2),
+                "max_s": round(max(values), 2),
+                "total_s": round(sum(values), 1),
+                "histogram": hist,
+            }
+        return result
+
+
+def print_ready_stats():
+    data = ready_stats()
+    if not data:
+        return
+    print("\n  ⏱️ Page ready 시간 (사이트별)")
+    for key, s in data.items():
+        print(f"    - {key:<18} {s['count']:>5}회  p50 {s['p50_s']:>5.2f}s  p90 {s['p90_s']:>5.2f}s"
+              f"  max {s['max_s']:>5.2f}s  timeout {s['timeouts']}")
+        order = [f"<{b}s" for b in BUCKETS] + [f">={BUCKETS[-1]}s"]
+        print("      " + "  ".join(f"{label}:{s['histogram'][label]}" for label in order if label in s["histogram"]))
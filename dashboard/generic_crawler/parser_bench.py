@@ -0,0 +1,310 @@
+"""
+Offline Parser Benchmark / Regression Harness
+
+dashboard/ 에 저장된 HTML/JSON 캡처(fixture)에 크롤러 파서(generic_crawler/parsers.py)를 돌려
+파서별 items/sec, 메모리 할당, 정답(golden) 대비 차이를 출력합니다. 라이브 사이트 없이 실행됩니다.
+- JSON 파서 (Ably SDUI walk, 무신사 모듈): Python 에서 직접 실행, tracemalloc 으로 할당량 측정
+- DOM 파서 (올리브영 목록, SSG SPA): Playwright 빈 페이지에 fixture 를 set_content (script 제거, 네트워크 차단)
+  후 같은 JS 를 page 안에서 반복 실행, JS heap 증가량 측정
+- golden: fixtures/expected/<parser>__<fixture>.json (없으면 PARSERS 의 golden 캡처)
+  fixture 파일이 없거나, golden 이 없거나 비어 있으면 실패 (exit 1) - 회귀 검사가 조용히 빠지지 않도록
+  golden 은 key 와 golden 에 적힌 필드만 비교 (올리브영 golden 은 id / name / brand_name / price)
+- captures: 아직 저장소에 없는 실제 캡처 경로. 없으면 경고만, --require-real 이면 실패
+  (무신사 랭킹은 실제 API 응답 캡처 전까지 응답 구조를 재현한 __synthetic fixture 로 파서를 검사)
+
+사용법:
+    python parser_bench.py                              # 전체 파서 벤치 + golden 비교 (차이 있으면 exit 1)
+    python parser_bench.py --require-real               # + captures 의 실제 캡처가 없으면 exit 1
+    python parser_bench.py --only ably_components,musinsa_ranking --repeat 200
+    python parser_bench.py --fixture ably_components=/tmp/ably_dumps/ably_api_dump_WOMEN.jsonl.gz   # ABLY_DUMP_DIR 캡처
+    # 무신사 랭킹 fixture: MUSINSA_DUMP_DIR=/tmp/musinsa python musinsa_crawler.py 후
+    #   musinsa_ranking_F_000.json 을 fixtures/ 로 복사 → --only musinsa_ranking --update → golden 검토 후 commit
+    python parser_bench.py --update                     # 현재 출력으로 golden 갱신 (파서 수정을 검토한 뒤)
+    python parser_bench.py --out bench.json
+"""
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import asyncio
+import argparse
+import tracemalloc
+from datetime import datetime
+from statistics import median
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.parsers import OY_LIST_PARSE_JS, SSG_RANKING_PARSE_JS, parse_ably_components, parse_musinsa_products
+
+DASHBOARD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXPECTED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "expected")
+
+# fixture 경로는 dashboard/ 기준. golden: fixture → (캡처 파일, JSON key) - 크롤 당시 저장된 파서 출력
+PARSERS = {
+    "oliveyoung_list": {
+        "kind": "dom", "script": OY_LIST_PARSE_JS, "key": "id",
+        "base_url": "https://www.oliveyoung.co.kr/store/main/getBestList.do",
+        # oy_list_debug.html 은 Cloudflare 확인 페이지라 제외
+        "fixtures": ["oy_best_page.html", "oy_click_result.html"],
+    },
+    "ssg_ranking": {
+        "kind": "dom", "script": SSG_RANKING_PARSE_JS, "key": "itemId",
+        "base_url": "https://department.ssg.com/page/pc/ranking.ssg",
+        "fixtures": ["ssg_debug.html"],
+        "golden": {"ssg_debug.html": ("ssg_spa_results.json", "Beauty")},
+    },
+    "ably_components": {
+        "kind": "json", "func": parse_ably_components, "key": "id",
+        "fixtures": ["ably_apis.json"],
+    },
+    "musinsa_ranking": {
+        "kind": "json", "func": parse_musinsa_products, "key": "id",
+        # musinsa_next_data.json 은 Next.js store 설정이라 랭킹 응답이 아님.
+        # __synthetic: 랭킹 API 응답 구조(data.modules[].items[], PRODUCT_COLUMN 외 배너/텍스트 item, 62개 → 50개 제한)
+        "fixtures": ["generic_crawler/fixtures/musinsa_ranking_F_000__synthetic.json"],
+        "captures": ["generic_crawler/fixtures/musinsa_ranking_F_000.json"],
+    },
+}
+
+DIFF_SAMPLES = 5
+
+
+def fixture_path(name: str) -> str:
+    return name if os.path.isabs(name) else os.path.join(DASHBOARD_DIR, name)
+
+
+def golden_path(parser: str, fixture: str) -> str:
+    stem = os.path.splitext(os.path.basename(fixture))[0]
+    return os.path.join(EXPECTED_DIR, f"{parser}__{stem}.json")
+
+
+def load_golden(parser: str, fixture: str):
+    path = golden_path(parser, fixture)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f), os.path.relpath(path, DASHBOARD_DIR)
+    capture = PARSERS[parser].get("golden", {}).get(os.path.basename(fixture))
+    if capture:
+        with open(fixture_path(capture[0])) as f:
+            return json.load(f)[capture[1]], f"{capture[0]}[{capture[1]}]"
+    return None, None
+
+
+def diff_items(actual: list, expected: list, key: str) -> dict:
+    """key 기준 누락 / 추가 / 필드 변경 / 순서 변경. 필드 비교는 golden 에 있는 필드만"""
+    actual_by = {str(a.get(key)): (i, a) for i, a in enumerate(actual)}
+    expected_by = {str(e.get(key)): (i, e) for i, e in enumerate(expected)}
+    missing = [k for k in expected_by if k not in actual_by]
+    extra = [k for k in actual_by if k not in expected_by]
+    changed, moved = [], 0
+    for k, (i, e) in expected_by.items():
+        if k not in actual_by:
+            continue
+        j, a = actual_by[k]
+        moved += i != j
+        fields = {f: (e[f], a.get(f)) for f in e if str(a.get(f)) != str(e[f])}
+        if fields:
+            changed.append({"key": k, "fields": fields})
+    return {
+        "ok": not (missing or extra or changed or moved),
+        "missing": missing, "extra": extra, "changed": changed, "moved": moved,
+    }
+
+
+def load_json_fixture(path: str):
+    """JSON 파일, 또는 응답 1개당 1줄인 .jsonl(.gz) 덤프 (→ 응답 목록)"""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        if path.endswith((".jsonl", ".jsonl.gz")):
+            return [json.loads(line) for line in f if line.strip()]
+        return json.load(f)
+
+
+def run_json_parser(spec: dict, path: str, repeat: int):
+    t0 = time.perf_counter()
+    payload = load_json_fixture(path)
+    load_ms = (time.perf_counter() - t0) * 1000
+
+    tracemalloc.start()
+    items = spec["func"](payload)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        spec["func"](payload)
+        timings.append(time.perf_counter() - t0)
+    return items, {"load_ms": round(load_ms, 2), "parse_ms": median(timings) * 1000, "alloc_kb": round(peak / 1024, 1)}
+
+
+def prepare_html(html: str, base_url: str) -> str:
+    """fixture 의 script 는 제거 (SPA 가 DOM 을 다시 그리지 않도록), 상대 링크 해석용 <base> 삽입"""
+    html = re.sub(r"<script\b[^>]*>.*?</script>", "", html, flags=re.S | re.I)
+    base = f'<base href="{base_url}">'
+    if re.search(r"<head[^>]*>", html, flags=re.I):
+        return re.sub(r"(<head[^>]*>)", r"\1" + base, html, count=1, flags=re.I)
+    return base + html
+
+
+DOM_BENCH_JS = """
+([src, repeat]) => {
+    const parse = (0, eval)('(' + src + ')');
+    if (window.gc) window.gc();
+    const heap0 = performance.memory ? performance.memory.usedJSHeapSize : 0;
+    const items = parse();
+    const heap1 = performance.memory ? performance.memory.usedJSHeapSize : 0;
+    const timings = [];
+    for (let i = 0; i < repeat; i++) {
+        const t0 = performance.now();
+        parse();
+        timings.push(performance.now() - t0);
+    }
+    timings.sort((a, b) => a - b);
+    return {items, parse_ms: timings[Math.floor(timings.length / 2)] || 0, alloc_kb: (heap1 - heap0) / 1024};
+}
+"""
+
+
+async def run_dom_parsers(jobs: list, repeat: int) -> list:
+    """jobs: (parser, spec, path). 브라우저 1개로 모든 DOM fixture 실행"""
+    from playwright.async_api import async_playwright
+
+    results = []
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=["--enable-precise-memory-info", "--js-flags=--expose-gc"])
+        page = await browser.new_page(viewport={"width": 1280, "height": 3000})
+        await page.route("**/*", lambda route: route.abort())  # fixture 만으로 실행 (이미지/CSS/API 차단)
+        for parser, spec, path in jobs:
+            with open(path, encoding="utf-8", errors="replace") as f:
+                html = prepare_html(f.read(), spec["base_url"])
+            t0 = time.perf_counter()
+            await page.set_content(html, wait_until="domcontentloaded")
+            load_ms = (time.perf_counter() - t0) * 1000
+            out = await page.evaluate(DOM_BENCH_JS, [spec["script"], repeat])
+            results.append((parser, path, out["items"], {
+                "load_ms": round(load_ms, 2), "parse_ms": out["parse_ms"], "alloc_kb": round(out["alloc_kb"], 1),
+            }))
+        await browser.close()
+    return results
+
+
+def pending_captures(only=None) -> list:
+    """captures 중 아직 저장되지 않은 실제 캡처 (parser, path)"""
+    return [(parser, fixture) for parser, spec in PARSERS.items() if not only or parser in only
+            for fixture in spec.get("captures", []) if not os.path.exists(fixture_path(fixture))]
+
+
+def bench(only=None, extra_fixtures=None, repeat: int = 50, update: bool = False) -> list:
+    extra_fixtures = extra_fixtures or {}
+    json_jobs, dom_jobs = [], []
+    results = []
+    for parser, spec in PARSERS.items():
+        if only and parser not in only:
+            continue
+        captured = [f for f in spec.get("captures", []) if os.path.exists(fixture_path(f))]
+        for fixture in spec["fixtures"] + captured + extra_fixtures.get(parser, []):
+            path = fixture_path(fixture)
+            if not os.path.exists(path):
+                results.append({"parser": parser, "fixture": fixture, "items": 0, "items_per_s": 0,
+                                "load_ms": 0, "parse_ms": 0, "alloc_kb": 0, "golden": None, "diff": None,
+                                "error": "fixture 없음"})
+                continue
+            (dom_jobs if spec["kind"] == "dom" else json_jobs).append((parser, spec, path))
+
+    raw = [(parser, path, *run_json_parser(spec, path, repeat)) for parser, spec, path in json_jobs]
+    if dom_jobs:
+        raw += asyncio.run(run_dom_parsers(dom_jobs, repeat))
+
+    for parser, path, items, metrics in raw:
+        key = PARSERS[parser]["key"]
+        row = {
+            "parser": parser,
+            "fixture": os.path.relpath(path, DASHBOARD_DIR),
+            "items": len(items),
+            "items_per_s": round(len(items) / (metrics["parse_ms"] / 1000)) if metrics["parse_ms"] else 0,
+            **{k: round(v, 3) if isinstance(v, float) else v for k, v in metrics.items()},
+            "golden": None, "diff": None, "error": None,
+        }
+        if update and not items:
+            row["error"] = "파서 출력이 비어 있음 (golden 갱신 안 함)"
+        elif update:
+            os.makedirs(EXPECTED_DIR, exist_ok=True)
+            with open(golden_path(parser, path), "w") as f:
+                json.dump(items, f, ensure_ascii=False, indent=2)
+            row["golden"] = os.path.relpath(golden_path(parser, path), DASHBOARD_DIR)
+        else:
+            expected, source = load_golden(parser, path)
+            row["golden"] = source
+            if expected is None:
+                row["error"] = "golden 없음"
+            elif not expected:
+                row["error"] = "golden 이 비어 있음"
+            else:
+                row["diff"] = diff_items(items, expected, key)
+        results.append(row)
+    return results
+
+
+def print_results(results: list, update: bool = False):
+    print(f"\n  {'parser':<17} {'fixture':<24} {'items':>5} {'items/s':>10} {'parse ms':>9} {'load ms':>8} {'alloc KB':>9}  golden")
+    for r in results:
+        if update and not r["error"]:
+            status = "갱신"
+        elif r["error"]:
+            status = f"❌ {r['error']}"
+        elif r["diff"]["ok"]:
+            status = "✅ 일치"
+        else:
+            d = r["diff"]
+            status = f"❌ 누락 {len(d['missing'])} / 추가 {len(d['extra'])} / 변경 {len(d['changed'])} / 순서 {d['moved']}"
+        print(f"  {r['parser']:<17} {os.path.basename(r['fixture']):<24} {r['items']:>5} {r['items_per_s']:>10,}"
+              f" {r['parse_ms']:>9.3f} {r['load_ms']:>8.1f} {r['alloc_kb']:>9.1f}  {status}")
+
+    for r in results:
+        if r["error"] == "fixture 없음":
+            print(f"\n  ❌ {r['parser']}: fixture 없음 ← {r['fixture']}")
+        d = r["diff"]
+        if not d or d["ok"]:
+            continue
+        print(f"\n  ❌ {r['parser']} ← {r['fixture']} (golden: {r['golden']})")
+        if d["missing"]:
+            print(f"    누락: {d['missing'][:DIFF_SAMPLES]}")
+        if d["extra"]:
+            print(f"    추가: {d['extra'][:DIFF_SAMPLES]}")
+        for c in d["changed"][:DIFF_SAMPLES]:
+            print(f"    변경 {c['key']}: " + ", ".join(f"{f}: {e!r} → {a!r}" for f, (e, a) in c["fields"].items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline crawler parser benchmark")
+    parser.add_argument("--only", help="쉼표로 구분한 파서 이름 (" + ", ".join(PARSERS) + ")")
+    parser.add_argument("--fixture", action="append", default=[], help="추가 fixture: parser=path (여러 번 지정 가능)")
+    parser.add_argument("--repeat", type=int, default=50, help="fixture 당 반복 실행 횟수")
+    parser.add_argument("--update", action="store_true", help="현재 출력으로 golden 파일 갱신")
+    parser.add_argument("--require-real", action="store_true", help="captures 의 실제 캡처가 없으면 exit 1")
+    parser.add_argument("--out", help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    extra = {}
+    for spec in args.fixture:
+        name, _, path = spec.partition("=")
+        if name not in PARSERS or not path:
+            parser.error(f"--fixture 형식: parser=path (parser: {', '.join(PARSERS)})")
+        extra.setdefault(name, []).append(path)
+    only = [s.strip() for s in args.only.split(",")] if args.only else None
+
+    print(f"🧪 Parser bench (repeat {args.repeat})")
+    results = bench(only, extra, args.repeat, args.update)
+    print_results(results, args.update)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"ran_at": datetime.now().isoformat(), "repeat": args.repeat, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n  💾 결과 저장: {args.out}")
+    pending = pending_captures(only)
+    for name, fixture in pending:
+        print(f"\n  {'❌' if args.require_real else '⚠️'} {name}: 실제 캡처 없음 ← {fixture} (위 사용법대로 캡처 후 golden 검토)")
+    if any(r["error"] or (r["diff"] and not r["diff"]["ok"]) for r in results) or (pending and args.require_real):
+        sys.exit(1)
@@ -0,0 +1,238 @@
+"""
+Crawler Page / Payload Parsers
+
+크롤러의 추출 로직을 네트워크 / 브라우저 상태와 분리해 모아 둔 모듈입니다.
+크롤러는 여기의 함수·스크립트를 그대로 쓰고, parser_bench.py 는 저장된 HTML/JSON fixture 에
+같은 코드를 돌려 속도와 정답(golden) 차이를 측정합니다.
+- DOM 파서 (page.evaluate 용 JS): OY_LIST_PARSE_JS, SSG_RANKING_PARSE_JS
+- JSON 파서 (Python): parse_ably_components / iter_ably_items, parse_ranking_items / musinsa_item_fields
+
+이 모듈은 import 시 부수 효과(env 검사, DB 연결)가 없어야 합니다.
+"""
+
+# 올리브영 랭킹 목록 DOM → [{id, name, brand_name, price, image, url, review_count, review_rating}]
+OY_LIST_PARSE_JS = r"""
+() => {
+    const results = [];
+
+    // 랭킹 상품 컨테이너 선택
+    const items = document.querySelectorAll('.cate_prd_list li, .best-list li');
+
+    items.forEach((li, index) => {
+        const info = li.querySelector('.prd_info') || li.querySelector('.prd_name')?.parentElement || li;
+        if (!info || !li.querySelector('.tx_name') || !li.querySelector('img')) return;
+
+        // 브랜드
+        const brandEl = info.querySelector('.tx_brand');
+        const brand = brandEl ? brandEl.innerText.trim() : '';
+
+        // 상품명
+        const nameEl = info.querySelector('.tx_name');
+        const name = nameEl ? nameEl.innerText.trim() : '';
+
+        // 가격
+        const priceEl = info.querySelector('.tx_cur .tx_num');
+        const price = priceEl ? priceEl.innerText.replace(/[^0-9]/g, '') : '0';
+
+        // 이미지
+        const imgEl = li.querySelector('img');
+        const imgUrl = imgEl ? (imgEl.src || imgEl.dataset.original) : '';
+
+        // 리뷰 & 평점 (리스트 페이지용)
+        const pointEl = info.querySelector('.point');
+        const reviewEl = info.querySelector('.review');
+
+        let rating = 0.0;
+        let reviewCount = 0;
+
+        if (pointEl) {
+            const pointText = pointEl.innerText.trim();
+            // 매칭: "10점만점에 4.9점" 등
+            const ratingMatch = pointText.match(/에\s*([0-9.]+)\s*점/);
+            if (ratingMatch) {
+                const rawScore = parseFloat(ratingMatch[1]);
+                // 5.5 is Olive Young's default template placeholder (10점만점에 5.5점). Ignore it.
+                if (rawScore !== 5.5) {
+                    rating = Math.round((rawScore / 2) * 10) / 10;
+                }
+            }
+        }
+
+        if (reviewEl) {
+            const reviewText = reviewEl.innerText.replace(/[^0-9]/g, '');
+            reviewCount = parseInt(reviewText) || 0;
+        }
+
+        // 상품 ID & 링크
+        const linkEl = info.querySelector('a');
+        let link = linkEl ? linkEl.href : '';
+
+        let goodsNo = '';
+        if (link.includes('goodsNo=')) {
+            goodsNo = link.split('goodsNo=')[1].split('&')[0];
+        } else if (li.dataset.goodsNo) {
+            goodsNo = li.dataset.goodsNo;
+        } else {
+            const onClick = linkEl && linkEl.getAttribute('onclick');
+            if (onClick && onClick.includes('goods.detail')) {
+                const match = onClick.match(/detail\('([^']+)'\)/);
+                if (match) goodsNo = match[1];
+            }
+        }
+
+        if (!link.startsWith('http')) {
+            link = 'https://www.oliveyoung.co.kr/store/goods/getGoodsDetail.do?goodsNo=' + goodsNo;
+        }
+
+        if (goodsNo && name) {
+            results.push({
+                id: goodsNo,
+                name: name,
+                brand_name: brand,
+                price: parseInt(price),
+                image: imgUrl,
+                url: link,
+                review_count: reviewCount,
+                review_rating: rating
+            });
+        }
+    });
+    return results;
+}
+"""
+
+# SSG(신세계백화점) SPA 랭킹 카드 DOM → [{rank, prdNm, brandNm, price, itemId, imgUrl, prdUrl}]
+SSG_RANKING_PARSE_JS = r"""
+() => {
+    const results = [];
+    const cards = document.querySelectorAll('.template-grid-item');
+
+    cards.forEach(card => {
+        const rankEl = card.querySelector('.css-1k2hnaw');
+        if(!rankEl) return;
+
+        const brandEl = card.querySelector('.css-408eai');
+        const nameEl = card.querySelector('.css-1mrk1dy');
+        const priceEl = card.querySelector('.css-h9py3d');
+        const imgEl = card.querySelector('img.loaded');
+        const linkEl = card.querySelector('a[href*="itemId="]');
+
+        if(nameEl && priceEl) {
+            const href = linkEl ? linkEl.href : '';
+            const itemIdMatch = href.match(/itemId=([^&]+)/);
+
+            results.push({
+                rank: rankEl.innerText.replace(/[^0-9]/g, ''),
+                prdNm: nameEl.innerText.trim(),
+                brandNm: brandEl ? brandEl.innerText.trim() : '',
+                price: priceEl.innerText.replace(/[^0-9]/g, ''),
+                itemId: itemIdMatch ? itemIdMatch[1] : '',
+                imgUrl: imgEl ? imgEl.src : '',
+                prdUrl: href || `https://www.ssg.com/item/itemView.ssg?itemId=${itemIdMatch ? itemIdMatch[1] : ''}`
+            });
+        }
+    });
+    return results;
+}
+"""
+
+
+def iter_ably_items(res_data: dict):
+    """Ably Server-Driven UI 응답 1개에서 item_list 컴포넌트를 훑어 상품 dict 를 하나씩 yield (스크롤 중 응답마다 호출)"""
+    try:
+        # 응답 데이터 내 컴포넌트 검사
+        components = res_data.get('components', [])
+        for comp in components:
+            item_list_type = comp.get('type', {}).get('item_list', '')
+            if not isinstance(item_list_type, str):
+                continue
+
+            # 상품들을 담고 있는 리스트 추출
+            goods_list = comp.get('entity', {}).get('item_list', [])
+            if not isinstance(goods_list, list):
+                continue
+
+            for p_node in goods_list:
+                # 1. 일반적인 구조 (바로 item 이 있음)
+                item_node = p_node.get('item', {})
+                log_node = p_node.get('logging', {})
+
+                # 2. TWO_COL_CARD_LIST 구조 (item_entity 래퍼 존재)
+                if not item_node and 'item_entity' in p_node:
+                    item_node = p_node['item_entity'].get('item', {})
+                    log_node = p_node['item_entity'].get('logging', {})
+
+                if not item_node:
+                    continue
+
+                p_id = item_node.get('sno')
+                p_name = item_node.get('name')
+
+                # 가격: price 우선, sale_price 보조
+                p_price = item_node.get('price', 0)
+                if not p_price and 'sale_price' in item_node:
+                    p_price = item_node['sale_price']
+
+                p_image = item_node.get('image', '')
+                p_market_name = item_node.get('market_name', 'Ably')
+
+                # 리뷰, 만족도 추출
+                analytics = log_node.get('analytics', {})
+                review_count = analytics.get('REVIEW_COUNT', 0)
+                review_rating_raw = analytics.get('REVIEW_RATING', 0)
+                p_review_rating = 0.0
+                if review_rating_raw and int(review_rating_raw) > 0:
+                    p_review_rating = round(int(review_rating_raw) / 20.0, 1) # 100점 만점을 5.0 만점으로
+
+                if p_id and p_name:
+                    item_data = {
+                        'id': str(p_id),
+                        'name': p_name,
+                        'brand_name': p_market_name,
+                        'price': p_price,
+                        'image': p_image,
+                        'url': f"https://m.a-bly.com/goods/{p_id}"
+                    }
+                    if review_count and int(review_count) > 0:
+                        item_data['review_count'] = int(review_count)
+                    if p_review_rating > 0:
+                        item_data['review_rating'] = p_review_rating
+
+                    yield item_data
+    except Exception:
+        pass
+
+
+def parse_ably_components(api_responses: list) -> list:
+    """Ably Server-Driven UI 응답 목록 → 상품 목록 (id 기준 중복 제거, 처음 나온 순서 유지 / 값은 마지막 응답 기준)"""
+    products = {}
+    for res_data in api_responses:
+        for item in iter_ably_items(res_data):
+            products[item['id']] = item
+    return list(products.values())
+
+
+def parse_ranking_items(data: dict) -> list:
+    """무신사 랭킹 API 응답에서 PRODUCT_COLUMN 아이템 (최대 50개)"""
+    items_to_process = []
+    for module in data.get("data", {}).get("modules", []):
+        for item in module.get("items", []):
+            if item.get("type") == "PRODUCT_COLUMN":
+                items_to_process.append(item)
+    return items_to_process[:50]
+
+
+def musinsa_item_fields(item: dict) -> dict:
+    """PRODUCT_COLUMN 아이템 → 저장에 쓰는 필드"""
+    info = item.get("info", {})
+    return {
+        "id": str(item.get("id")),
+        "name": info.get("productName"),
+        "brand": info.get("brandName"),
+        "price": info.get("finalPrice"),
+        "image_url": item.get("image", {}).get("url"),
+    }
+
+
+def parse_musinsa_products(data: dict) -> list:
+    return [musinsa_item_fields(item) for item in parse_ranking_items(data)]
@@ -0,0 +1,191 @@
+"""
+Product Change Detection (content hash cache)
+
+크롤마다 모든 상품을 새 updated_at 으로 다시 upsert 하던 것을, 내용이 바뀐 상품만 보내도록
+(source, product_id) → (products_master.id, content_hash) 를 로컬 SQLite 에 캐시합니다.
+- content_hash: updated_at 등 매번 바뀌는 필드를 제외한 상품 레코드의 sha1
+- 크롤 시작 시 source 단위로 한 번 메모리에 로드 (비어 있으면 products_master.content_hash 로 seed)
+- PRODUCT_HASH_TTL_DAYS 가 지난 항목은 내용이 같아도 다시 upsert (캐시/DB 어긋남 자동 복구)
+
+설정 (env):
+    PRODUCT_CHANGE_DETECTION=on|off
+    PRODUCT_HASH_PATH            기본 generic_crawler/product_hashes.sqlite
+    PRODUCT_HASH_TTL_DAYS=7
+
+사용법 (RankingWriter 가 내부에서 사용):
+    cache = ProductHashCache("musinsa")
+    h = content_hash(record)
+    internal_id = cache.unchanged_id(record["product_id"], h)   # None 이면 upsert 필요
+    cache.remember([(product_id, internal_id, h), ...])
+
+    python product_hashes.py seed musinsa | stats
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PRODUCT_CHANGE_DETECTION = os.getenv("PRODUCT_CHANGE_DETECTION", "on") != "off"
+PRODUCT_HASH_PATH = os.getenv("PRODUCT_HASH_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "product_hashes.sqlite"))
+PRODUCT_HASH_TTL_DAYS = float(os.getenv("PRODUCT_HASH_TTL_DAYS", "7"))
+
+# 매 크롤마다 달라지거나 DB 가 채우는 필드 (hash 에서 제외)
+HASH_EXCLUDE = {"updated_at", "created_at", "id", "content_hash"}
+
+_db = None
+_lock = threading.Lock()
+
+
+def content_hash(record: dict) -> str:
+    material = json.dumps(
+        {k: v for k, v in record.items() if k not in HASH_EXCLUDE},
+        ensure_ascii=False, sort_keys=True, default=str,
+    )
+    return hashlib.sha1(material.encode("utf-8")).hexdigest()
+
+
+def _conn() -> sqlite3.Connection:
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(PRODUCT_HASH_PATH, timeout=30, check_same_thread=False)
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute("""
+            CREATE TABLE IF NOT EXISTS product_hashes (
+                source       TEXT NOT NULL,
+                product_id   TEXT NOT NULL,
+                internal_id  INTEGER NOT NULL,   -- products_master.id
+                content_hash TEXT NOT NULL,
+                written_at   REAL NOT NULL,      -- 마지막으로 products_master 에 쓴 시각
+                PRIMARY KEY (source, product_id)
+            )
+        """)
+        _db.commit()
+    return _db
+
+
+def seed_from_supabase(source: str, page_size: int = 1000) -> int:
+    """products_master 에 저장된 content_hash 로 source 캐시 채우기 (hash 없는 row 는 제외)"""
+    from generic_crawler.config import SUPABASE_URL, HEADERS
+    from generic_crawler.supabase_client import sb
+
+    rows, offset = [], 0
+    while True:
+        res = sb.get(
+            f"{SUPABASE_URL}/rest/v1/products_master",
+            headers=HEADERS,
+            params={
+                "select": "id,product_id,content_hash",
+                "source": f"eq.{source}",
+                "content_hash": "not.is.null",
+                "order": "id",
+                "limit": page_size,
+                "offset": offset,
+            },
+            timeout=30,
+        )
+        res.raise_for_status()
+        page = res.json()
+        rows.extend(page)
+        if len(page) < page_size:
+            break
+        offset += page_size
+
+    # seed 시각은 TTL 의 절반만 남긴 것으로 기록 → DB 값이 맞는지 곧 한 번 다시 씀
+    written_at = time.time() - PRODUCT_HASH_TTL_DAYS * 86400 / 2
+    with _lock:
+        db = _conn()
+        db.executemany(
+            "INSERT OR IGNORE INTO product_hashes VALUES (?, ?, ?, ?, ?)",
+            [(source, str(r["product_id"]), r["id"], r["content_hash"], written_at) for r in rows],
+        )
+        db.commit()
+    print(f"  🌱 상품 hash 캐시 seed ({source}): {len(rows)}개")
+    return len(rows)
+
+
+class ProductHashCache:
+    """source 하나의 hash map (크롤 시작 시 1회 로드)"""
+
+    def __init__(self, source: str, ttl_days: float = PRODUCT_HASH_TTL_DAYS, enabled: bool = PRODUCT_CHANGE_DETECTION):
+        self.source = source
+        self.ttl_days = ttl_days
+        self.enabled = enabled
+        self._map = None  # product_id → (internal_id, content_hash, written_at)
+
+    def _load(self):
+        if self._map is not None:
+            return
+        self._map = {}
+        if not self.enabled:
+            return
+        with _lock:
+            count = _conn().execute("SELECT COUNT(*) FROM product_hashes WHERE source = ?", (self.source,)).fetchone()[0]
+        if count == 0:
+            try:
+                seed_from_supabase(self.source)
+            except Exception as e:
+                print(f"  ⚠️ 상품 hash 캐시 seed 실패 (전체 upsert 로 진행): {e}")
+        with _lock:
+            rows = _conn().execute(
+                "SELECT product_id, internal_id, content_hash, written_at FROM product_hashes WHERE source = ?",
+                (self.source,),
+            ).fetchall()
+        self._map = {pid: (iid, h, w) for pid, iid, h, w in rows}
+
+    def unchanged_id(self, product_id: str, digest: str):
+        """내용이 같고 TTL 안이면 products_master.id, 아니면 None (upsert 필요)"""
+        if not self.enabled:
+            return None
+        self._load()
+        entry = self._map.get(str(product_id))
+        if entry and entry[1] == digest and time.time() - entry[2] < self.ttl_days * 86400:
+            return entry[0]
+        return None
+
+    def remember(self, rows: list):
+        """rows: (product_id, internal_id, content_hash) - products_master 에 방금 쓴 상품"""
+        if not self.enabled or not rows:
+            return
+        self._load()
+        now = time.time()
+        data = [(self.source, str(pid), iid, h, now) for pid, iid, h in rows]
+        for _, pid, iid, h, w in data:
+            self._map[pid] = (iid, h, w)
+        with _lock:
+            db = _conn()
+            db.executemany("INSERT OR REPLACE INTO product_hashes VALUES (?, ?, ?, ?, ?)", data)
+            db.commit()
+
+    def forget(self, product_ids: list):
+        """캐시된 id 로 랭킹 저장이 실패했을 때 (DB 에서 삭제된 상품 등) 다음 번엔 다시 upsert"""
+        if not self.enabled or not product_ids:
+            return
+        self._load()
+        for pid in product_ids:
+            self._map.pop(str(pid), None)
+        with _lock:
+            db = _conn()
+            db.executemany("DELETE FROM product_hashes WHERE source = ? AND product_id = ?",
+                           [(self.source, str(pid)) for pid in product_ids])
+            db.commit()
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "seed" and len(sys.argv) > 2:
+        seed_from_supabase(sys.argv[2])
+    elif command == "stats":
+        now = time.time()
+        for source, total, fresh in _conn().execute(
+            "SELECT source, COUNT(*), SUM(written_at > ?) FROM product_hashes GROUP BY source",
+            (now - PRODUCT_HASH_TTL_DAYS * 86400,),
+        ):
+            print(f"  - {source:<16} {total:>7}개 (TTL 내 {fresh})")
+    else:
+        print("usage: python product_hashes.py [seed <source>|stats]")
+        sys.exit(1)
@@ -0,0 +1,288 @@
+"""
+Rank History Store + Vectorized Movement Analytics
+
+daily_rankings_v2 의 순위를 소스별 NumPy 행렬 (행 = category × product, 열 = 날짜, 값 = rank, 0 = 미등장)
+로 로컬(.npz)에 캐시하고, 전날 대비 변동 / 신규 진입 / 이탈 / 연속 등장일 / 속도(velocity)를
+상품별 쿼리 없이 행렬 연산 한 번으로 계산합니다.
+- sync: 캐시의 마지막 날짜부터만 다시 읽음 (당일 재크롤 반영)
+- 카테고리가 크롤되지 않은 날은 이탈 / 연속 끊김으로 보지 않음 (해당 카테고리의 직전 크롤일과 비교)
+- 결과는 rank_movements 테이블에 upsert → 대시보드 API(fetchTrending) / 리포트에서 조회
+
+의존성: numpy (.github/workflows/daily_crawl.yml 의 pip install 목록)
+
+설정 (env):
+    RANK_HISTORY_DIR         기본 generic_crawler/rank_history/
+    RANK_HISTORY_DAYS=35     캐시에 유지할 날짜 수
+    RANK_VELOCITY_DAYS=7     velocity 계산 구간
+
+사용법:
+    python rank_history.py sync                       # 모든 소스 sync + 최신일 movement 저장
+    python rank_history.py sync --source musinsa --date 2026-10-17
+    python rank_history.py show --source oliveyoung   # 최신일 급상승 / 신규 / 이탈 상위 출력
+"""
+import os
+import sys
+import argparse
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.config import SUPABASE_URL, HEADERS
+from generic_crawler.supabase_client import sb
+from generic_crawler.bulk_writer import upsert_rows
+
+RANK_HISTORY_DIR = os.getenv("RANK_HISTORY_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "rank_history"))
+RANK_HISTORY_DAYS = int(os.getenv("RANK_HISTORY_DAYS", "35"))
+RANK_VELOCITY_DAYS = int(os.getenv("RANK_VELOCITY_DAYS", "7"))
+
+SOURCES = ["oliveyoung", "musinsa", "ably", "ssg", "naver_best", "google_trends", "naver_datalab"]
+MOVEMENT_CONFLICT = "source,category_code,product_id,date"
+PAGE_SIZE = 1000
+
+
+class RankHistory:
+    """한 소스의 순위 행렬. ranks[i, j] = keys[i] 의 dates[j] 순위 (0 = 없음)"""
+
+    def __init__(self, source: str, dates=None, categories=None, items=None, ranks=None):
+        self.source = source
+        self.dates = np.asarray(dates if dates is not None else [], dtype="datetime64[D]")
+        self.categories = np.asarray(categories if categories is not None else [], dtype=str)
+        self.items = np.asarray(items if items is not None else [], dtype=str)
+        self.ranks = np.asarray(ranks, dtype=np.int32) if ranks is not None else np.zeros((0, 0), dtype=np.int32)
+
+    @property
+    def path(self) -> str:
+        return os.path.join(RANK_HISTORY_DIR, f"{self.source}.npz")
+
+    @classmethod
+    def load(cls, source: str) -> "RankHistory":
+        history = cls(source)
+        if os.path.exists(history.path):
+            with np.load(history.path) as data:
+                history = cls(source, data["dates"], data["categories"], data["items"], data["ranks"])
+        return history
+
+    def save(self):
+        os.makedirs(RANK_HISTORY_DIR, exist_ok=True)
+        np.savez_compressed(self.path, dates=self.dates, categories=self.categories, items=self.items, ranks=self.ranks)
+
+    @classmethod
+    def from_rows(cls, source: str, rows) -> "RankHistory":
+        """rows: (date, category_code, item_id, rank) 목록 → 메모리 상의 RankHistory"""
+        history = cls(source)
+        history.merge(rows)
+        return history
+
+    def merge(self, rows, replace_dates=()):
+        """rows 를 행렬에 반영. replace_dates 의 열은 먼저 비움 (재조회한 날짜)"""
+        rows = list(rows)
+        new_dates = np.unique(np.array([r[0] for r in rows] + list(replace_dates), dtype="datetime64[D]"))
+        dates = np.union1d(self.dates, new_dates)
+        keys = {(c, i): n for n, (c, i) in enumerate(zip(self.categories.tolist(), self.items.tolist()))}
+        categories, items = self.categories.tolist(), self.items.tolist()
+        for _, category, item, _ in rows:
+            key = (str(category), str(item))
+            if key not in keys:
+                keys[key] = len(categories)
+                categories.append(key[0])
+                items.append(key[1])
+
+        ranks = np.zeros((len(categories), len(dates)), dtype=np.int32)
+        if self.ranks.size:
+            ranks[:self.ranks.shape[0], np.searchsorted(dates, self.dates)] = self.ranks
+        if len(replace_dates):
+            ranks[:, np.searchsorted(dates, np.array(list(replace_dates), dtype="datetime64[D]"))] = 0
+        if rows:
+            row_idx = np.array([keys[(str(c), str(i))] for _, c, i, _ in rows])
+            col_idx = np.searchsorted(dates, np.array([r[0] for r in rows], dtype="datetime64[D]"))
+            ranks[row_idx, col_idx] = np.array([r[3] for r in rows], dtype=np.int32)
+
+        self.dates, self.categories, self.items, self.ranks = dates, np.array(categories, dtype=str), np.array(items, dtype=str), ranks
+
+    def trim(self, keep_days: int = RANK_HISTORY_DAYS):
+        """오래된 날짜 열과 남은 기간 동안 한 번도 등장하지 않은 행 제거"""
+        if not len(self.dates):
+            return
+        cols = self.dates > self.dates[-1] - np.timedelta64(keep_days, "D")
+        ranks = self.ranks[:, cols]
+        rows = (ranks > 0).any(axis=1)
+        self.dates = self.dates[cols]
+        self.categories, self.items, self.ranks = self.categories[rows], self.items[rows], ranks[rows]
+
+
+def compute_movements(history: RankHistory, target=None, velocity_days: int = RANK_VELOCITY_DAYS) -> dict:
+    """target 날짜 열 기준 movement 를 행 단위 배열로 계산 (모든 행을 한 번에).
+
+    반환 dict (행 = 해당 날짜에 등장했거나 직전 크롤 대비 이탈한 key):
+        categories, items, rank, prev_rank (0 = 없음), rank_change (+ = 상승),
+        status (new | up | down | same | dropped), streak_days, velocity (일 평균 상승 계단)
+    """
+    if not len(history.dates):
+        return None
+    j = len(history.dates) - 1
+    if target is not None:
+        j = int(np.searchsorted(history.dates, np.datetime64(target, "D")))
+        if j >= len(history.dates) or history.dates[j] != np.datetime64(target, "D"):
+            return None
+
+    ranks = history.ranks[:, :j + 1]
+    present = ranks > 0
+    n_rows, n_cols = ranks.shape
+    cat_names, cat_idx = np.unique(history.categories, return_inverse=True)
+
+    # 카테고리별로 그 날 크롤이 있었는지 (한 상품이라도 순위가 있으면 크롤된 날)
+    crawled = np.zeros((len(cat_names), n_cols), dtype=bool)
+    np.logical_or.at(crawled, cat_idx, present)
+    row_crawled = crawled[cat_idx]
+
+    # 직전 비교 열: 같은 카테고리가 크롤된 j 이전의 마지막 날짜
+    cols = np.arange(n_cols)
+    prev_col_cat = np.where(crawled[:, :j], cols[:j], -1).max(axis=1) if j > 0 else np.full(len(cat_names), -1)
+    prev_col = prev_col_cat[cat_idx]
+    has_prev = prev_col >= 0
+    cur = ranks[:, j]
+    prev = np.where(has_prev, ranks[np.arange(n_rows), np.maximum(prev_col, 0)], 0)
+    crawled_today = row_crawled[:, j]
+
+    rank_change = np.where((cur > 0) & (prev > 0), prev - cur, 0)
+    status = np.full(n_rows, "same", dtype="<U7")
+    status[rank_change > 0] = "up"
+    status[rank_change < 0] = "down"
+    status[(cur > 0) & (prev == 0) & has_prev] = "new"
+    status[(cur == 0) & (prev > 0) & crawled_today] = "dropped"
+
+    # 연속 등장일: 카테고리가 크롤됐는데 순위에 없던 마지막 열 이후의 등장 횟수
+    breaks = row_crawled & ~present
+    last_break = np.where(breaks, cols, -1).max(axis=1)
+    appearances = np.concatenate([np.zeros((n_rows, 1), dtype=np.int32), np.cumsum(present, axis=1, dtype=np.int32)], axis=1)
+    streak = np.where(cur > 0, appearances[:, j + 1] - appearances[np.arange(n_rows), last_break + 1], 0)
+
+    # velocity: 최근 velocity_days 일 동안 등장한 날의 rank 에 대한 최소제곱 기울기 (부호 반전 → + = 상승)
+    days = (history.dates[:j + 1] - history.dates[j]).astype(np.int64).astype(np.float64)
+    w = (present & (days > -velocity_days)).astype(np.float64)
+    y = ranks.astype(np.float64)
+    n = w.sum(axis=1)
+    sx, sy = w @ days, (w * y).sum(axis=1)
+    sxx, sxy = w @ (days * days), (w * y) @ days
+    denom = n * sxx - sx * sx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        velocity = np.where((n >= 2) & (denom > 0), -(n * sxy - sx * sy) / denom, 0.0)
+
+    keep = (cur > 0) | (status == "dropped")
+    return {
+        "date": str(history.dates[j]),
+        "categories": history.categories[keep],
+        "items": history.items[keep],
+        "rank": cur[keep],
+        "prev_rank": prev[keep],
+        "rank_change": rank_change[keep],
+        "status": status[keep],
+        "streak_days": streak[keep],
+        "velocity": np.round(velocity[keep], 2),
+    }
+
+
+def movement_rows(source: str, movements: dict) -> list:
+    """compute_movements 결과 → rank_movements upsert rows"""
+    rows = []
+    for n in range(len(movements["items"])):
+        rows.append({
+            "source": source,
+            "category_code": str(movements["categories"][n]),
+            "product_id": int(movements["items"][n]),
+            "date": movements["date"],
+            "rank": int(movements["rank"][n]) or None,
+            "prev_rank": int(movements["prev_rank"][n]) or None,
+            "rank_change": int(movements["rank_change"][n]),
+            "status": str(movements["status"][n]),
+            "streak_days": int(movements["streak_days"][n]),
+            "velocity": float(movements["velocity"][n]) + 0.0,  # -0.0 → 0.0
+        })
+    return rows
+
+
+def fetch_rankings(source: str, since: str) -> list:
+    """daily_rankings_v2 에서 since 이후 (date, category_code, product_id, rank) 조회"""
+    rows, offset = [], 0
+    while True:
+        res = sb.get(
+            f"{SUPABASE_URL}/rest/v1/daily_rankings_v2",
+            headers=HEADERS,
+            params={
+                "select": "date,category_code,product_id,rank",
+                "source": f"eq.{source}",
+                "date": f"gte.{since}",
+                "product_id": "not.is.null",
+                "order": "date.asc,category_code.asc,rank.asc,id.asc",
+                "limit": PAGE_SIZE,
+                "offset": offset,
+            },
+            timeout=30,
+        )
+        res.raise_for_status()
+        page = res.json()
+        rows.extend((r["date"], r["category_code"], r["product_id"], r["rank"]) for r in page)
+        if len(page) < PAGE_SIZE:
+            return rows
+        offset += PAGE_SIZE
+
+
+def sync(source: str, keep_days: int = RANK_HISTORY_DAYS) -> RankHistory:
+    """캐시의 마지막 날짜(재크롤 가능)부터 다시 읽어 행렬 갱신 후 저장"""
+    history = RankHistory.load(source)
+    floor = date.today() - timedelta(days=keep_days)
+    since = max(date.fromisoformat(str(history.dates[-1])), floor) if len(history.dates) else floor
+    rows = fetch_rankings(source, since.isoformat())
+    refetched = [d for d in history.dates.tolist() if d >= since]
+    history.merge(rows, replace_dates=refetched)
+    history.trim(keep_days)
+    history.save()
+    print(f"  📚 {source:<14} {len(rows):>6}행 반영 (since {since}) → {history.ranks.shape[0]}개 key × {len(history.dates)}일")
+    return history
+
+
+def save_movements(source: str, history: RankHistory, target=None) -> int:
+    movements = compute_movements(history, target)
+    if movements is None:
+        return 0
+    rows = movement_rows(source, movements)
+    saved = 0
+    for i in range(0, len(rows), 500):
+        saved += len(upsert_rows("rank_movements", rows[i:i + 500], on_conflict=MOVEMENT_CONFLICT))
+    counts = {s: int((movements["status"] == s).sum()) for s in ("up", "down", "new", "dropped")}
+    print(f"  📈 {source:<14} {movements['date']} movement {saved}건 저장 "
+          f"(상승 {counts['up']} / 하락 {counts['down']} / 신규 {counts['new']} / 이탈 {counts['dropped']})")
+    return saved
+
+
+def print_top(source: str, history: RankHistory, target=None, limit: int = 10):
+    m = compute_movements(history, target)
+    if m is None:
+        print(f"  ⚠️ {source}: 데이터 없음")
+        return
+    print(f"\n  [{source}] {m['date']}")
+    order = np.argsort(-m["rank_change"], kind="stable")[:limit]
+    for n in order:
+        print(f"    ▲{m['rank_change'][n]:>4}  #{m['rank'][n]:<4} {m['categories'][n]}/{m['items'][n]}"
+              f"  연속 {m['streak_days'][n]}일  velocity {m['velocity'][n]:+.2f}")
+    print(f"    신규 {int((m['status'] == 'new').sum())}개 / 이탈 {int((m['status'] == 'dropped').sum())}개")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rank history cache + movement analytics")
+    parser.add_argument("command", choices=["sync", "show"])
+    parser.add_argument("--source", help="기본: 전체 소스")
+    parser.add_argument("--date", help="movement 기준일 (YYYY-MM-DD, 기본: 최신)")
+    args = parser.parse_args()
+
+    sources = [args.source] if args.source else SOURCES
+    print(f"[{datetime.now()}] Rank history {args.command}: {', '.join(sources)}")
+    for source in sources:
+        try:
+            if args.command == "sync":
+                save_movements(source, sync(source), args.date)
+            else:
+                print_top(source, RankHistory.load(source), args.date)
+        except Exception as e:
+            print(f"  ❌ {source} 실패: {e}")
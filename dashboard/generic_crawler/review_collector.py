@@ -1,24 +1,34 @@
 """
 AI Vision Review Collector
-상품 상세 페이지 스크린샷 → 로컬 LLM(Vision) → 리뷰/평점/즐겨찾기 추출 → DB 업데이트
+상품 상세 페이지 → [JSON/JSON-LD → DOM 정규식 → 스크린샷 + 로컬 LLM(Vision)] → 리뷰/평점/즐겨찾기 추출 → DB 업데이트
+(앞 단계에서 찾으면 Vision 호출 생략 - review_extractors.py)
 
 사용법:
   python review_collector.py           # 전체 실행 (각 플랫폼 30개)
   python review_collector.py --test    # 테스트 (각 플랫폼 2개)
+  python review_collector.py --platform oliveyoung --limit 3000 --pipelined --pages 4 --vision-workers 2
+  REVIEW_PIPELINED=1 python review_collector.py --platform ssg    # env 로 pipelined 모드 켜기
+
+pipelined 모드(page N 개 + vision worker M 개 + 일괄 upsert)는 --pipelined 또는 REVIEW_PIPELINED=1 일 때만 사용.
 """
 import os
 import sys
 import json
 import time
-import base64
 import random
 import asyncio
 import argparse
 import requests
 import re
-from playwright_stealth import Stealth
 from datetime import datetime
 from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.supabase_client import sb, print_stats
+from generic_crawler.bulk_writer import upsert_rows
+from generic_crawler.browser_pool import BrowserPool
+from generic_crawler.review_extractors import JsonCapture, TierStats, extract_structured
+from generic_crawler.page_ready import wait_ready, print_ready_stats
+from generic_crawler.vision_preprocess import capture_for_vision, save_corpus_sample
 
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
 
@@ -42,6 +52,18 @@ DETAIL_URL_PATTERNS = {
     "ssg": "https://www.ssg.com/item/itemView.ssg?itemId={product_id}",
 }
 
+# json / dom / vision 중 어느 단계가 답했는지 (실행 전체)
+TIER_STATS = TierStats()
+
+# --save-corpus 로 지정 (None 이면 저장 안 함)
+SAVE_CORPUS_DIR = None
+
+# 같은 도메인 navigation 간 최소 간격 (초, uniform 범위) - Ably 는 rate limit 이 엄격
+PACING = {
+    "ably": (5, 12),
+    "default": (3, 8),
+}
+
 # Vision prompt for each platform
 VISION_PROMPT_BASE = """이 이미지는 한국 이커머스 상품 상세 페이지의 세로로 긴 스크린샷입니다.
 이 페이지 전체(상하)를 살펴보고 아래 정보를 찾아서 JSON으로 정확하게 반환해주세요:
@@ -72,11 +94,11 @@ def get_products_without_reviews(source, limit=30):
         "select": "id,product_id,source,name",
         "source": f"eq.{source}",
         "or": "(review_count.eq.0,review_count.is.null)",
-        "order": "updated_at.desc",
+        "order": "last_seen_at.desc.nullslast",  # 최근 랭킹에 나온 상품부터 (migration 026)
         "limit": str(limit)
     }
     try:
-        res = requests.get(url, headers=HEADERS, params=params, timeout=10)
+        res = sb.get(url, headers=HEADERS, params=params, timeout=10)
         if res.status_code == 200:
             return res.json()
         else:
@@ -87,19 +109,22 @@ def get_products_without_reviews(source, limit=30):
         return []
 
 
-def update_product_reviews(product_internal_id, review_count, review_rating, favorite_count=0):
-    """DB에 리뷰/평점/즐겨찾기 업데이트
+def build_review_update(review_count, review_rating, favorite_count=None):
+    """리뷰/평점/즐겨찾기 → products_master 업데이트 필드
+    
+    favorite_count 가 None 이면 (json/dom tier 에서 못 찾음) 즐겨찾기는 저장하지 않음.
     
     Storage strategy:
     - review_count: 리뷰 수 (그대로 저장)
     - review_rating: 평점이 있으면 평점 (0~5), 없으면 즐겨찾기 수 (값 > 5 = 즐겨찾기)
       프론트엔드에서 review_rating > 5이면 즐겨찾기로 표시
     """
-    url = f"{SUPABASE_URL}/rest/v1/products_master"
     update_data = {
         "updated_at": datetime.now().isoformat()
     }
     
+    favorite_count = favorite_count or 0  # None(모름) → 즐겨찾기 필드는 건드리지 않음
+    
     # review_count 저장 (favorites만 있어도 최소 1로 설정하여 재수집 방지)
     if review_count > 0:
         update_data["review_count"] = review_count
@@ -114,8 +139,16 @@ def update_product_reviews(product_internal_id, review_count, review_rating, fav
         # 즐겨찾기 수를 review_rating에 저장 (값 > 5 → 프론트에서 즐겨찾기로 인식)
         update_data["review_rating"] = favorite_count
     
+    return update_data
+
+
+def update_product_reviews(product_internal_id, review_count, review_rating, favorite_count=None):
+    """DB에 리뷰/평점/즐겨찾기 업데이트 (1건 PATCH)"""
+    url = f"{SUPABASE_URL}/rest/v1/products_master"
+    update_data = build_review_update(review_count, review_rating, favorite_count)
+    
     try:
-        res = requests.patch(
+        res = sb.patch(
             url,
             headers={**HEADERS, "Prefer": "return=representation"},
             params={"id": f"eq.{product_internal_id}"},
@@ -180,8 +213,8 @@ def call_vision_llm(screenshot_base64):
         return None
 
 
-async def take_screenshot(page, url, source, max_retries=3):
-    """상품 페이지 스크린샷 촬영 (봇 탐지 시 재시도)"""
+async def open_product_page(page, url, source, max_retries=3):
+    """상품 페이지 이동 (봇 탐지 시 재시도). 정상 로드되면 True"""
     try:
         # Ably needs mobile viewport. We use a very tall height (3000px) to capture 
         # a "long screenshot" of the entire upper section containing title, price, and reviews
@@ -194,9 +227,8 @@ async def take_screenshot(page, url, source, max_retries=3):
         for attempt in range(max_retries):
             await page.goto(url, wait_until="domcontentloaded", timeout=30000)
             
-            # Wait for content to load (longer for Ably)
-            wait_time = random.uniform(3, 5) if source == "ably" else 3
-            await asyncio.sleep(wait_time)
+            # 리뷰/평점 영역이 그려질 때까지 대기 (고정 3~5초 대신, 사이트별 최대 8~10초)
+            await wait_ready(page, f"{source}_detail")
             
             # (Removed: window.scrollBy(0, 400))
             # The 3000px tall viewport naturally loads and captures the content without scrolling.
@@ -218,21 +250,55 @@ async def take_screenshot(page, url, source, max_retries=3):
                     continue
                 else:
                     log(f"    ❌ Bot detection persisted after {max_retries} retries, skipping")
-                    return None
+                    return False
             
-            # No bot detection, take screenshot
-            break
-        
-        # Take screenshot
-        screenshot_bytes = await page.screenshot(full_page=False)
-        return base64.b64encode(screenshot_bytes).decode("utf-8")
+            # No bot detection
+            return True
         
+    except Exception as e:
+        log(f"    ❌ Page load error: {e}")
+    return False
+
+
+async def take_screenshot(page, source):
+    """현재 페이지 스크린샷 (base64). 기본은 전체 viewport PNG, VISION_* env 로 crop / 축소 / 압축 (vision_preprocess)"""
+    try:
+        screenshot_b64, _ = await capture_for_vision(page, source)
+        return screenshot_b64
     except Exception as e:
         log(f"    ❌ Screenshot error: {e}")
         return None
 
 
-async def process_platform(browser, source, limit):
+async def collect_product(page, source, product, url):
+    """json → dom tier 로 먼저 추출하고, 실패했을 때만 스크린샷을 찍음.
+    (structured_result, screenshot_b64) 반환 - 둘 다 None 이면 페이지 로드 실패"""
+    capture = JsonCapture(source, product["product_id"])
+    capture.attach(page)
+    if not await open_product_page(page, url, source):
+        return None, None
+    
+    structured = await extract_structured(page, source, product["product_id"], capture)
+    if SAVE_CORPUS_DIR:
+        # 벤치마크 / 영역 학습용: 정답(json/dom 결과)이 있으면 label 로 같이 저장
+        await save_corpus_sample(page, SAVE_CORPUS_DIR, source, product["product_id"], structured)
+    if structured:
+        TIER_STATS.record(source, structured["tier"])
+        return structured, None
+    return None, await take_screenshot(page, source)
+
+
+def vision_fallback(source, screenshot_b64):
+    """tier 3: Vision LLM (시간/결과를 TIER_STATS 에 기록)"""
+    t0 = time.perf_counter()
+    result = call_vision_llm(screenshot_b64)
+    TIER_STATS.record(source, "vision" if result else "none", time.perf_counter() - t0)
+    if result:
+        result["tier"] = "vision"
+    return result
+
+
+async def process_platform(pool, source, limit):
     """한 플랫폼의 리뷰 수집"""
     log(f"\n{'='*50}")
     log(f"📦 [{source.upper()}] 리뷰 수집 시작 (최대 {limit}개)")
@@ -250,17 +316,8 @@ async def process_platform(browser, source, limit):
         log(f"  ❌ Unknown source: {source}")
         return 0
     
-    context = await browser.new_context(
-        user_agent="Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1" if source == "ably" else "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        locale="ko-KR",
-        viewport={"width": 375, "height": 812} if source == "ably" else {"width": 1280, "height": 900},
-    )
-    page = await context.new_page()
-    
-    # Apply stealth to avoid bot detection (especially for Ably)
-    stealth = Stealth()
-    await stealth.apply_stealth_async(page)
-    
+    # Ably 는 모바일 프로필, 나머지는 데스크톱 (둘 다 stealth 적용 - browser_pool.SITE_PROFILES)
+    profile = "review_ably" if source == "ably" else "review_desktop"
     success_count = 0
     
     for i, product in enumerate(products):
@@ -270,24 +327,26 @@ async def process_platform(browser, source, limit):
         
         log(f"  [{i+1}/{len(products)}] {name}...")
         
-        # Screenshot
-        screenshot_b64 = await take_screenshot(page, detail_url, source)
-        if not screenshot_b64:
-            continue
+        # 상품마다 page 를 빌리고, context 는 pool 이 N 페이지마다 재생성
+        async with pool.page(profile) as page:
+            result, screenshot_b64 = await collect_product(page, source, product, detail_url)
         
-        # Vision LLM
-        result = call_vision_llm(screenshot_b64)
+        # Vision LLM (json/dom tier 에서 못 찾은 경우만)
         if not result:
-            continue
+            if not screenshot_b64:
+                continue
+            result = vision_fallback(source, screenshot_b64)
+            if not result:
+                continue
         
         rc = result["review_count"]
         rt = result["review_rating"]
         fc = result["favorite_count"]
         
-        log(f"    ✅ reviews={rc}, rating={rt}, favorites={fc}")
+        log(f"    ✅ [{result['tier']}] reviews={rc}, rating={rt}, favorites={fc}")
         
         # Update DB (only if we found something)
-        if rc > 0 or rt > 0 or fc > 0:
+        if rc > 0 or rt > 0 or (fc or 0) > 0:
             if update_product_reviews(product["id"], rc, rt, fc):
                 success_count += 1
                 log(f"    💾 DB 업데이트 완료")
@@ -297,21 +356,159 @@ async def process_platform(browser, source, limit):
             log(f"    ℹ️ 리뷰 데이터 없음 (신규 상품?)")
         
         # Random delay between requests (longer for Ably to avoid rate limits)
-        delay = random.uniform(5, 12) if source == "ably" else random.uniform(3, 8)
+        delay = random.uniform(*PACING.get(source, PACING["default"]))
         await asyncio.sleep(delay)
     
-    await context.close()
     log(f"\n  📊 [{source.upper()}] 완료: {success_count}/{len(products)} 업데이트됨")
     return success_count
 
 
+class DomainPacer:
+    """도메인별 navigation 간격 유지 (page 가 여러 개여도 순차 모드와 같은 anti-bot 간격)"""
+
+    def __init__(self):
+        self._next = {}
+        self._locks = {}
+
+    async def wait(self, source):
+        lock = self._locks.setdefault(source, asyncio.Lock())
+        async with lock:
+            now = time.monotonic()
+            wait_s = max(self._next.get(source, now) - now, 0)
+            if wait_s:
+                await asyncio.sleep(wait_s)
+            lo, hi = PACING.get(source, PACING["default"])
+            self._next[source] = time.monotonic() + random.uniform(lo, hi)
+            return wait_s
+
+
+def _stage(timings, name, seconds):
+    s = timings.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+    s["count"] += 1
+    s["total_s"] += seconds
+    s["max_s"] = max(s["max_s"], seconds)
+
+
+async def process_platform_pipelined(pool, pacer, source, limit, pages, vision_workers):
+    """N 개 page 가 스크린샷을 bounded queue 에 넣고, vision worker 들이 Ollama 로 소비.
+    DB 업데이트는 마지막에 upsert 로 일괄 처리"""
+    log(f"\n{'='*50}")
+    log(f"📦 [{source.upper()}] 리뷰 수집 시작 (최대 {limit}개, page {pages} / vision worker {vision_workers})")
+    log(f"{'='*50}")
+    
+    products = get_products_without_reviews(source, limit)
+    if not products:
+        log(f"  ℹ️ 리뷰 없는 상품이 없습니다.")
+        return 0
+    
+    url_pattern = DETAIL_URL_PATTERNS.get(source)
+    if not url_pattern:
+        log(f"  ❌ Unknown source: {source}")
+        return 0
+    
+    log(f"  📋 {len(products)}개 상품 수집 예정")
+    profile = "review_ably" if source == "ably" else "review_desktop"
+    
+    todo = asyncio.Queue()
+    for i, product in enumerate(products):
+        todo.put_nowait((i, product))
+    # vision worker 가 밀리면 page 들이 여기서 대기 (스크린샷이 메모리에 쌓이지 않도록)
+    shots = asyncio.Queue(maxsize=vision_workers * 2)
+    
+    timings = {}
+    updates = []
+    started = time.perf_counter()
+    
+    def add_update(i, product, result):
+        rc, rt, fc = result["review_count"], result["review_rating"], result["favorite_count"]
+        log(f"  [{i+1}/{len(products)}] {product.get('name', '')[:40]} ✅ [{result['tier']}] reviews={rc}, rating={rt}, favorites={fc}")
+        if rc > 0 or rt > 0 or (fc or 0) > 0:
+            updates.append({
+                "source": source,
+                "product_id": product["product_id"],
+                "name": product.get("name") or product["product_id"],
+                **build_review_update(rc, rt, fc),
+            })
+    
+    async def producer():
+        while True:
+            try:
+                i, product = todo.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            _stage(timings, "pacing", await pacer.wait(source))
+            
+            t0 = time.perf_counter()
+            try:
+                async with pool.page(profile) as page:
+                    structured, screenshot_b64 = await collect_product(
+                        page, source, product, url_pattern.format(product_id=product["product_id"]))
+            except Exception as e:
+                log(f"    ❌ Page error ({product['product_id']}): {e}")
+                structured, screenshot_b64 = None, None
+            _stage(timings, "page", time.perf_counter() - t0)
+            if structured:
+                add_update(i, product, structured)
+                continue
+            if not screenshot_b64:
+                continue
+            
+            t1 = time.perf_counter()
+            await shots.put((i, product, screenshot_b64, time.perf_counter()))
+            _stage(timings, "queue_full", time.perf_counter() - t1)
+    
+    async def consumer():
+        while True:
+            item = await shots.get()
+            if item is None:
+                return
+            i, product, screenshot_b64, queued_at = item
+            _stage(timings, "queue_wait", time.perf_counter() - queued_at)
+            
+            t0 = time.perf_counter()
+            result = await asyncio.to_thread(vision_fallback, source, screenshot_b64)
+            _stage(timings, "vision", time.perf_counter() - t0)
+            if result:
+                add_update(i, product, result)
+    
+    consumers = [asyncio.create_task(consumer()) for _ in range(vision_workers)]
+    await asyncio.gather(*(producer() for _ in range(pages)))
+    for _ in consumers:
+        await shots.put(None)
+    await asyncio.gather(*consumers)
+    
+    t0 = time.perf_counter()
+    saved = upsert_rows("products_master", updates, on_conflict="source,product_id")
+    _stage(timings, "db", time.perf_counter() - t0)
+    
+    elapsed = time.perf_counter() - started
+    processed = timings.get("page", {}).get("count", 0)
+    per_min = processed / (elapsed / 60) if elapsed else 0
+    log(f"\n  📊 [{source.upper()}] 완료: {len(saved)}/{len(products)} 업데이트됨"
+        f" | {per_min:.1f} products/min ({elapsed:.0f}s)")
+    for name in ("pacing", "page", "queue_full", "queue_wait", "vision", "db"):
+        s = timings.get(name)
+        if s:
+            log(f"    - {name:<11} {s['count']:>5}회  avg {s['total_s'] / s['count']:>6.2f}s  max {s['max_s']:>6.2f}s  total {s['total_s']:>7.1f}s")
+    return len(saved)
+
+
 async def main():
     parser = argparse.ArgumentParser(description="AI Vision Review Collector")
     parser.add_argument("--test", action="store_true", help="Test mode (2 products per platform)")
     parser.add_argument("--platform", type=str, help="Single platform only (oliveyoung/musinsa/ably/ssg)")
     parser.add_argument("--limit", type=int, default=200, help="Max products per platform (default: 200)")
+    parser.add_argument("--pipelined", action="store_true", default=os.getenv("REVIEW_PIPELINED", "0") == "1",
+                        help="page / vision worker 병렬 pipelined 모드 (default: REVIEW_PIPELINED=1 이면 켜짐)")
+    parser.add_argument("--pages", type=int, default=1, help="pipelined 모드의 동시 브라우저 page 수")
+    parser.add_argument("--vision-workers", type=int, default=int(os.getenv("OLLAMA_NUM_PARALLEL", "1")),
+                        help="pipelined 모드의 동시 Ollama Vision 요청 수 (default: OLLAMA_NUM_PARALLEL 또는 1)")
+    parser.add_argument("--save-corpus", type=str, help="전체 스크린샷 + 정답 label 저장 폴더 (vision_preprocess 벤치마크용)")
     args = parser.parse_args()
     
+    global SAVE_CORPUS_DIR
+    SAVE_CORPUS_DIR = args.save_corpus
+    
     limit = 2 if args.test else args.limit
     platforms = [args.platform] if args.platform else ["oliveyoung", "musinsa", "ably", "ssg"]
     
@@ -319,6 +516,10 @@ async def main():
     log(f"  모델: {VISION_MODEL}")
     log(f"  모드: {'테스트' if args.test else '전체'}")
     log(f"  대상: {', '.join(platforms)}")
+    if args.pipelined:
+        log(f"  pipelined: page {args.pages} / vision worker {args.vision_workers}")
+    elif args.pages > 1:
+        log("  ⚠️ --pages 는 --pipelined (또는 REVIEW_PIPELINED=1) 와 함께 써야 적용됩니다 - 순차 모드로 실행")
     
     # Check Ollama is running
     try:
@@ -333,22 +534,24 @@ async def main():
         log(f"  ❌ Ollama 연결 실패: {e}")
         return
     
-    from playwright.async_api import async_playwright
-    
-    async with async_playwright() as pw:
-        browser = await pw.chromium.launch(headless=True)
-        
+    pacer = DomainPacer()
+    async with BrowserPool() as pool:
         total_success = 0
         for platform in platforms:
             try:
-                count = await process_platform(browser, platform, limit)
+                if args.pipelined:
+                    count = await process_platform_pipelined(pool, pacer, platform, limit, args.pages, args.vision_workers)
+                else:
+                    count = await process_platform(pool, platform, limit)
                 total_success += count
             except Exception as e:
                 log(f"  ❌ [{platform}] 에러: {e}")
-        
-        await browser.close()
+        log(f"  🌐 Browser pool: {pool.stats()}")
+    TIER_STATS.print_summary(log)
+    print_ready_stats()
     
     log(f"\n🎉 전체 완료: {total_success}개 상품 리뷰 업데이트됨")
+    print_stats()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,268 @@
+"""
+Tiered Review Extractors
+
+상품 상세 페이지에서 리뷰 수 / 평점 / 즐겨찾기(찜, 좋아요) 수를 싼 방법부터 시도합니다.
+  1. json   : 페이지가 받은 API JSON 응답 (Ably logging.analytics) + JSON-LD aggregateRating
+              (API 응답 파서는 Ably 만 있음 - 다른 플랫폼은 JSON-LD 만 봄)
+  2. dom    : document.body.innerText 정규식 (update_*_reviews.py 에서 쓰던 패턴)
+  3. vision : 스크린샷 → Ollama Vision (review_collector.call_vision_llm) - 위 두 단계 실패 시에만
+
+어느 tier 가 답했는지 TierStats 에 기록해서 Vision LLM 시간을 얼마나 아꼈는지 보여줍니다.
+json / dom tier 가 즐겨찾기 수를 찾지 못하면 favorite_count 는 None (0 이 아니라 "모름" → 저장하지 않음).
+
+사용법:
+    capture = JsonCapture(source, product_id)
+    capture.attach(page)                       # goto 전에 등록
+    await page.goto(url)
+    result = await extract_structured(page, source, product_id, capture)
+    if result is None:
+        ...  # vision fallback
+"""
+import json
+import threading
+
+# tier 1: 상세 페이지가 호출하는 API 중 JSON 을 저장해 둘 URL 조각 (extract_json 에 파서가 있는 플랫폼만)
+API_URL_HINTS = {
+    "ably": ["api.a-bly.com"],
+}
+
+# tier 1: API JSON 에서 즐겨찾기 수로 보는 key (item / logging.analytics 안)
+FAVORITE_KEYS = ("LIKE_COUNT", "like_count", "likeCount", "WISH_COUNT", "wish_count", "wishCount",
+                 "interest_count", "interestCount", "favorite_count")
+
+# tier 2: innerText 정규식 (첫 번째로 매칭되는 패턴 사용)
+#   rating_scale: 추출값을 5점 만점으로 환산할 기준 (Ably 만족도 % → /20)
+#   favorite: 상세 페이지에 찜 / 좋아요 수가 숫자로 보이는 플랫폼만 (없으면 favorite_count None)
+DOM_PATTERNS = {
+    "oliveyoung": {
+        "review_count": [r"리뷰\s*([0-9,]+)\s*건"],
+        "rating": [r"평점\s*([0-9]+(?:\.[0-9]+)?)"],
+        "rating_scale": 5,
+        "favorite": [],  # 찜 버튼에 수가 표시되지 않음
+    },
+    "ssg": {
+        "review_count": [
+            r"고객리뷰\s*\(?\s*([0-9,]+)\s*건?\s*\)?",
+            r"리뷰\s*([0-9,]+)\s*건",
+            r"상품평\s*\(?\s*([0-9,]+)",
+            r"총\s*([0-9,]+)\s*건\s*리뷰",
+        ],
+        "rating": [r"별 5개 중\s*([0-9]+(?:\.[0-9]+)?)\s*개", r"평점\s*([0-9]+(?:\.[0-9]+)?)"],
+        "rating_scale": 5,
+        "favorite": [r"좋아요\s*([0-9,]+)"],
+    },
+    "ably": {
+        "review_count": [r"리뷰\s*([0-9,]+)개"],
+        "rating": [r"([0-9]+)%가 만족한 상품", r"마켓 만족도\s*([0-9]+)%"],
+        "rating_scale": 100,
+        "favorite": [r"찜\s*([0-9,]+)", r"([0-9,]+)\s*명이 찜"],
+    },
+    "musinsa": {
+        "review_count": [r"후기\s*([0-9,]+)", r"리뷰\s*([0-9,]+)"],
+        "rating": [r"([0-9]\.[0-9])\s*\(\s*[0-9,]+\s*\)"],
+        "rating_scale": 5,
+        "favorite": [r"좋아요\s*([0-9,]+)", r"관심\s*([0-9,]+)"],
+    },
+}
+
+DOM_EXTRACT_JS = r"""
+([countPatterns, ratingPatterns, favoritePatterns]) => {
+    const text = document.body ? document.body.innerText : '';
+    const first = (patterns) => {
+        for (const p of patterns) {
+            const m = text.match(new RegExp(p));
+            if (m) return m[1].replace(/,/g, '');
+        }
+        return null;
+    };
+    return { count: first(countPatterns), rating: first(ratingPatterns), favorite: first(favoritePatterns) };
+}
+"""
+
+JSON_LD_JS = r"""
+() => [...document.querySelectorAll('script[type="application/ld+json"]')].map(s => s.textContent)
+"""
+
+
+def _result(tier, review_count, review_rating, favorite_count=None):
+    return {
+        "review_count": int(review_count or 0),
+        "review_rating": round(float(review_rating or 0), 1),
+        "favorite_count": int(favorite_count) if favorite_count is not None else None,
+        "tier": tier,
+    }
+
+
+def _favorites(*nodes):
+    """FAVORITE_KEYS 중 처음 찾은 정수 값 (없으면 None)"""
+    for node in nodes:
+        for key in FAVORITE_KEYS:
+            value = node.get(key) if isinstance(node, dict) else None
+            if isinstance(value, (int, float, str)) and str(value).replace(",", "").isdigit():
+                return int(str(value).replace(",", ""))
+    return None
+
+
+def _walk(node):
+    if isinstance(node, dict):
+        yield node
+        for v in node.values():
+            yield from _walk(v)
+    elif isinstance(node, list):
+        for v in node:
+            yield from _walk(v)
+
+
+class JsonCapture:
+    """상세 페이지 로딩 중 API JSON 응답을 모아두는 response listener"""
+
+    def __init__(self, source: str, product_id: str):
+        self.source = source
+        self.product_id = str(product_id)
+        self.hints = API_URL_HINTS.get(source, [])
+        self.payloads = []
+
+    def attach(self, page):
+        if self.hints:
+            page.on("response", self._on_response)
+
+    async def _on_response(self, response):
+        if not any(h in response.url for h in self.hints) or response.status != 200:
+            return
+        if "application/json" not in response.headers.get("content-type", ""):
+            return
+        try:
+            self.payloads.append(await response.json())
+        except Exception:
+            pass
+
+
+def _from_ably_payloads(payloads, product_id):
+    """ably_crawler 와 같은 구조: {item: {sno}, logging: {analytics: {REVIEW_COUNT, REVIEW_RATING}}}
+    → (review_count, rating, favorite_count)"""
+    for node in _walk(payloads):
+        wrapper = node.get("item_entity", node)
+        item = wrapper.get("item")
+        if not isinstance(item, dict) or str(item.get("sno")) != product_id:
+            continue
+        analytics = (wrapper.get("logging") or {}).get("analytics") or {}
+        count = int(analytics.get("REVIEW_COUNT") or 0)
+        rating_raw = int(analytics.get("REVIEW_RATING") or 0)
+        if count > 0:
+            rating = round(rating_raw / 20.0, 1) if rating_raw > 0 else 0.0  # 100점 → 5점
+            return count, rating, _favorites(analytics, item)
+    return None
+
+
+def _json_ld_likes(node):
+    """schema.org interactionStatistic (LikeAction / WantAction) 의 userInteractionCount"""
+    stats = node.get("interactionStatistic")
+    for stat in stats if isinstance(stats, list) else [stats]:
+        if not isinstance(stat, dict):
+            continue
+        kind = stat.get("interactionType")
+        kind = kind.get("@type", "") if isinstance(kind, dict) else str(kind or "")
+        if kind.endswith(("LikeAction", "WantAction")) and str(stat.get("userInteractionCount", "")).isdigit():
+            return int(stat["userInteractionCount"])
+    return None
+
+
+def _from_json_ld(blocks):
+    for raw in blocks:
+        try:
+            data = json.loads(raw)
+        except Exception:
+            continue
+        for node in _walk(data):
+            agg = node.get("aggregateRating")
+            if not isinstance(agg, dict):
+                continue
+            count = int(float(agg.get("reviewCount") or agg.get("ratingCount") or 0))
+            rating = float(agg.get("ratingValue") or 0)
+            best = float(agg.get("bestRating") or 5)
+            if count > 0:
+                return count, rating * 5 / best if best else rating, _json_ld_likes(node)
+    return None
+
+
+async def extract_json(page, source, product_id, capture=None):
+    """tier 1: 캡처된 API JSON → JSON-LD"""
+    found = None
+    if capture and capture.payloads and source == "ably":
+        found = _from_ably_payloads(capture.payloads, str(product_id))
+    if not found:
+        try:
+            found = _from_json_ld(await page.evaluate(JSON_LD_JS))
+        except Exception:
+            found = None
+    return _result("json", *found) if found else None
+
+
+async def extract_dom(page, source):
+    """tier 2: innerText 정규식"""
+    patterns = DOM_PATTERNS.get(source)
+    if not patterns:
+        return None
+    try:
+        data = await page.evaluate(DOM_EXTRACT_JS, [patterns["review_count"], patterns["rating"], patterns["favorite"]])
+    except Exception:
+        return None
+
+    count = int(data["count"]) if data.get("count") else 0
+    if count <= 0:
+        return None
+    try:
+        rating = float(data["rating"]) if data.get("rating") else 0.0
+    except ValueError:
+        rating = 0.0  # 패턴 밖의 문자열은 평점 없음으로 처리
+    if patterns["rating_scale"] != 5:
+        rating = rating * 5 / patterns["rating_scale"]
+    if rating > 5:
+        rating = 0.0  # 오탐 (가격 등) 은 버림
+    favorite = int(data["favorite"]) if data.get("favorite") else None
+    return _result("dom", count, rating, favorite)
+
+
+async def extract_structured(page, source, product_id, capture=None):
+    """json → dom 순서로 시도. 둘 다 실패하면 None (→ vision)"""
+    return await extract_json(page, source, product_id, capture) or await extract_dom(page, source)
+
+
+class TierStats:
+    """플랫폼별로 어느 tier 가 답했는지 + vision 호출 시간"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+        self.vision_s = 0.0
+
+    def record(self, source, tier, vision_seconds=0.0):
+        with self._lock:
+            per = self.counts.setdefault(source, {"json": 0, "dom": 0, "vision": 0, "none": 0})
+            per[tier] += 1
+            self.vision_s += vision_seconds
+
+    def summary(self) -> dict:
+        with self._lock:
+            vision_calls = sum(c["vision"] + c["none"] for c in self.counts.values())
+            avg_vision = self.vision_s / vision_calls if vision_calls else 0
+            avoided = sum(c["json"] + c["dom"] for c in self.counts.values())
+            return {
+                "tiers": {s: dict(c) for s, c in self.counts.items()},
+                "vision_calls": vision_calls,
+                "vision_s": round(self.vision_s, 1),
+                "avg_vision_s": round(avg_vision, 2),
+                "vision_avoided": avoided,
+                "est_saved_s": round(avoided * avg_vision, 1),
+            }
+
+    def print_summary(self, log=print):
+        s = self.summary()
+        if not s["tiers"]:
+            return
+        log("\n  🧭 리뷰 추출 tier 통계")
+        for source, c in s["tiers"].items():
+            total = sum(c.values())
+            log(f"    - {source:<11} json {c['json']:>4}  dom {c['dom']:>4}  vision {c['vision']:>4}  실패 {c['none']:>4}  (총 {total})")
+        log(f"    Vision 호출 {s['vision_calls']}회 (평균 {s['avg_vision_s']}s) / "
+            f"{s['vision_avoided']}건 생략 → 약 {s['est_saved_s']}s 절약")
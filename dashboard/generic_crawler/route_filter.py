@@ -0,0 +1,191 @@
+"""
+Playwright Route Filter
+
+DOM 텍스트 / img 속성만 읽는 크롤러가 상품 이미지, 웹폰트, 분석용 beacon 까지
+내려받지 않도록 page.route() 로 요청을 걸러냅니다.
+- ROUTE_POLICIES: 사이트별 resource type / 도메인 allow·deny 목록
+- 이미지 처리: "block" (abort) 또는 "stub" (1x1 GIF 로 응답 → onload 는 정상 발생)
+- 차단 요청 수 / 실제 전송 bytes / 페이지 로드 시간을 scope(카테고리) 별로 집계
+
+ROUTE_FILTER 환경변수 (opt-in, 사이트별로는 ROUTE_FILTER_<SITE> 가 우선. 예: ROUTE_FILTER_OLIVEYOUNG=block):
+    off     (기본) route 를 걸지 않음
+    measure 아무것도 차단하지 않고, 차단 대상이었을 요청의 bytes 만 집계 (절감량 측정용)
+    block   정책대로 차단
+
+사용법:
+    route_filter = RouteFilter("oliveyoung")
+    await route_filter.attach(page)
+    for category in categories:
+        with route_filter.scope(category["name"]):       # 이동 ~ 목록 준비까지를 load_ms 로
+            await page.goto(url)
+            await wait_ready(page, "oliveyoung_list")
+        with route_filter.scope(tab_name, timed=False):  # 클릭만 하는 SPA 탭은 요청 집계만
+            await tab.click()
+    log_crawl("completed", {"routes": route_filter.stats()})
+"""
+import os
+import time
+import base64
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+ROUTE_FILTER_MODE = os.getenv("ROUTE_FILTER", "off")
+
+# 1x1 투명 GIF - "stub" 이미지 응답용
+TRANSPARENT_GIF = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+
+TRACKER_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com", "googleadservices.com", "doubleclick.net",
+    "facebook.net", "connect.facebook.com", "criteo.com", "criteo.net", "mixpanel.com",
+    "amplitude.com", "hotjar.com", "clarity.ms", "branch.io", "appsflyer.com", "adjust.com",
+    "wcs.naver.net", "wcs.naver.com", "analytics.naver.com", "t1.daumcdn.net/kas",
+    "braze.com", "airbridge.io", "datadoghq.com", "sentry.io", "kakaopixel", "tiktok.com/i18n/pixel",
+]
+
+# block_types  : 차단할 resource_type (image, font, media, stylesheet, ...)
+# stub_types   : 차단 대신 빈 응답으로 대체할 resource_type
+# block_domains: URL 에 포함되면 차단할 도메인/경로 조각
+# allow_domains: 위 규칙보다 우선해서 항상 통과시킬 도메인/경로 조각
+ROUTE_POLICIES = {
+    "default": {
+        "block_types": ["font", "media"],
+        "block_domains": TRACKER_DOMAINS,
+    },
+    "oliveyoung": {
+        # 파서는 img 요소 존재 + src / data-original 속성만 사용
+        "block_types": ["image", "font", "media"],
+        "block_domains": TRACKER_DOMAINS,
+    },
+    "ssg": {
+        # 파서가 img.loaded (onload 시 붙는 class) 를 찾으므로 이미지는 abort 대신 stub
+        "block_types": ["font", "media"],
+        "stub_types": ["image"],
+        "block_domains": TRACKER_DOMAINS,
+    },
+    "zigzag": {
+        # img 의 src / alt 속성만 사용
+        "block_types": ["image", "font", "media"],
+        "block_domains": TRACKER_DOMAINS,
+    },
+}
+
+
+def _new_bucket():
+    return {
+        "requests": 0, "blocked": 0, "stubbed": 0, "bytes": 0,
+        "would_block": 0, "would_block_bytes": 0,
+        "loads": 0, "load_ms": 0.0, "by_type": {},
+    }
+
+
+class RouteFilter:
+    """사이트 정책에 따라 요청을 차단/대체하고 scope 별 통계를 모으는 route handler"""
+
+    def __init__(self, site: str, mode: str = None, policy: dict = None):
+        self.site = site
+        self.mode = mode or os.getenv(f"ROUTE_FILTER_{site.upper()}", ROUTE_FILTER_MODE)
+        policy = policy or ROUTE_POLICIES.get(site, ROUTE_POLICIES["default"])
+        self.block_types = set(policy.get("block_types", []))
+        self.stub_types = set(policy.get("stub_types", []))
+        self.block_domains = list(policy.get("block_domains", []))
+        self.allow_domains = list(policy.get("allow_domains", []))
+        self._scopes = {}
+        self._current = "all"
+        self._measured = set()
+
+    async def attach(self, target):
+        """page 또는 BrowserContext 에 route handler 를 등록"""
+        if self.mode == "off":
+            return
+        await target.route("**/*", self._handle)
+        target.on("requestfinished", self._on_finished)
+
+    @contextmanager
+    def scope(self, name: str, timed: bool = True):
+        """이후 요청들을 name 으로 집계하고, timed 면 블록 실행 시간을 load_ms 에 더함
+        (블록은 이동부터 준비 완료 대기까지 감싸야 load_ms 가 페이지 로드 시간이 됨)"""
+        self._current = name
+        bucket = self._bucket()
+        t0 = time.perf_counter()
+        try:
+            yield bucket
+        finally:
+            if timed:
+                bucket["loads"] += 1
+                bucket["load_ms"] += (time.perf_counter() - t0) * 1000
+
+    def _bucket(self) -> dict:
+        return self._scopes.setdefault(self._current, _new_bucket())
+
+    def _decide(self, request) -> str:
+        url = request.url
+        host_path = urlparse(url).netloc + urlparse(url).path
+        if any(d in host_path for d in self.allow_domains):
+            return "allow"
+        if any(d in host_path for d in self.block_domains):
+            return "block"
+        if request.resource_type in self.stub_types:
+            return "stub"
+        if request.resource_type in self.block_types:
+            return "block"
+        return "allow"
+
+    async def _handle(self, route):
+        request = route.request
+        action = self._decide(request)
+        bucket = self._bucket()
+        bucket["requests"] += 1
+
+        if action == "allow":
+            await route.continue_()
+            return
+
+        bucket["by_type"][request.resource_type] = bucket["by_type"].get(request.resource_type, 0) + 1
+
+        if self.mode == "measure":
+            bucket["would_block"] += 1
+            self._measured.add(request)
+            await route.continue_()
+        elif action == "stub":
+            bucket["stubbed"] += 1
+            await route.fulfill(status=200, content_type="image/gif", body=TRANSPARENT_GIF)
+        else:
+            bucket["blocked"] += 1
+            await route.abort("blockedbyclient")
+
+    async def _on_finished(self, request):
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        size = max(sizes.get("responseBodySize", 0), 0) + max(sizes.get("responseHeadersSize", 0), 0)
+        bucket = self._bucket()
+        bucket["bytes"] += size
+        if request in self._measured:
+            self._measured.discard(request)
+            bucket["would_block_bytes"] += size
+
+    def stats(self) -> dict:
+        """log_crawl metadata 용: scope 별 + 전체 합계"""
+        total = _new_bucket()
+        scopes = {}
+        for name, b in self._scopes.items():
+            scopes[name] = dict(b, load_ms=round(b["load_ms"], 1))
+            for k in ("requests", "blocked", "stubbed", "bytes", "would_block", "would_block_bytes", "loads", "load_ms"):
+                total[k] += b[k]
+            for t, n in b["by_type"].items():
+                total["by_type"][t] = total["by_type"].get(t, 0) + n
+        total["load_ms"] = round(total["load_ms"], 1)
+        return {"site": self.site, "mode": self.mode, "total": total, "scopes": scopes}
+
+    def print_stats(self):
+        if self.mode == "off":
+            return
+        print(f"\n  🚧 Route filter [{self.site}] ({self.mode})")
+        for name, b in self._scopes.items():
+            load = f"{b['load_ms'] / b['loads']:>6.0f}ms" if b["loads"] else f"{'-':>8}"
+            if self.mode == "measure":
+                detail = f"차단 대상 {b['would_block']}건 / {b['would_block_bytes'] / 1024:.0f}KB"
+            else:
+                detail = f"차단 {b['blocked']}건, stub {b['stubbed']}건"
+            print(f"    - {name:<16} 요청 {b['requests']:>5}건  {detail}  전송 {b['bytes'] / 1024:>7.0f}KB  로드 {load}")
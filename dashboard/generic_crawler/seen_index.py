@@ -0,0 +1,217 @@
+"""
+Seen-Article Index (Bloom filter + SQLite)
+
+뉴스 크롤러가 이미 저장한 기사를 상세 페이지 이동 / LLM 분석 전에 걸러내기 위한 source 별 인덱스입니다.
+- 정확한 key 목록은 로컬 SQLite (seen_keys) 에, 메모리에는 Bloom filter 만 유지
+  Bloom 이 "없음" 이면 확실히 새 기사 (SQLite 조회 없음), "있을 수도" 면 SQLite 로 확인
+- 실행마다 source 별로 한 번 products_master 에서 마지막 동기화 이후 저장된 key 를 가져와 합침
+  (다른 서버 / 수동 저장분 반영, watermark = 마지막으로 본 created_at)
+- Bloom filter 는 SQLite 에 blob 으로 저장 → 다음 실행에서 key 전체를 다시 읽지 않음
+
+설정 (env):
+    SEEN_INDEX_PATH              기본 generic_crawler/seen_index.sqlite
+    SEEN_INDEX_CAPACITY=100000   source 당 Bloom 용량 (넘으면 2배로 재생성)
+    SEEN_INDEX_ERROR_RATE=0.01
+
+사용법:
+    index = SeenIndex("cosinkorea", key_prefix="news_cosinkorea_")
+    index.sync()                        # 실행당 1회 (HTTP)
+    if not index.seen(product_id): ...  # 새 기사만 처리
+    index.add(product_id); index.save()
+
+    python seen_index.py stats | sync <source> <key_prefix>
+"""
+import os
+import sys
+import math
+import sqlite3
+import hashlib
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SEEN_INDEX_PATH = os.getenv("SEEN_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "seen_index.sqlite"))
+SEEN_INDEX_CAPACITY = int(os.getenv("SEEN_INDEX_CAPACITY", "100000"))
+SEEN_INDEX_ERROR_RATE = float(os.getenv("SEEN_INDEX_ERROR_RATE", "0.01"))
+
+_db = None
+_lock = threading.Lock()
+
+
+def _conn() -> sqlite3.Connection:
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(SEEN_INDEX_PATH, timeout=30, check_same_thread=False)
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.execute("""
+            CREATE TABLE IF NOT EXISTS seen_keys (
+                source  TEXT NOT NULL,
+                key     TEXT NOT NULL,
+                PRIMARY KEY (source, key)
+            )
+        """)
+        _db.execute("""
+            CREATE TABLE IF NOT EXISTS seen_blooms (
+                source     TEXT PRIMARY KEY,
+                bits       BLOB NOT NULL,
+                num_bits   INTEGER NOT NULL,
+                num_hashes INTEGER NOT NULL,
+                capacity   INTEGER NOT NULL,
+                watermark  TEXT            -- 마지막 동기화 때 본 products_master.created_at
+            )
+        """)
+        _db.commit()
+    return _db
+
+
+class BloomFilter:
+    """고정 크기 Bloom filter (double hashing, blake2b)"""
+
+    def __init__(self, capacity: int = SEEN_INDEX_CAPACITY, error_rate: float = SEEN_INDEX_ERROR_RATE,
+                 bits: bytes = None, num_bits: int = None, num_hashes: int = None):
+        self.capacity = capacity
+        self.num_bits = num_bits or max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = num_hashes or max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray(bits) if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SeenIndex:
+    """source 하나의 본 기사 key 집합"""
+
+    def __init__(self, source: str, key_prefix: str = ""):
+        self.source = source
+        self.key_prefix = key_prefix
+        self.stats = {"checked": 0, "bloom_negative": 0, "known": 0, "added": 0, "synced": 0}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        with _lock:
+            db = _conn()
+            row = db.execute(
+                "SELECT bits, num_bits, num_hashes, capacity, watermark FROM seen_blooms WHERE source = ?", (self.source,)
+            ).fetchone()
+            total = db.execute("SELECT COUNT(*) FROM seen_keys WHERE source = ?", (self.source,)).fetchone()[0]
+        if row:
+            bits, num_bits, num_hashes, capacity, self.watermark = row
+            self.bloom = BloomFilter(capacity, bits=bits, num_bits=num_bits, num_hashes=num_hashes)
+            self.bloom.count = total
+        else:
+            self.watermark = None
+            self._rebuild(max(SEEN_INDEX_CAPACITY, total * 2))
+
+    def _rebuild(self, capacity: int):
+        """SQLite 의 key 전체로 Bloom 재생성 (처음 / 용량 초과 시)"""
+        self.bloom = BloomFilter(capacity)
+        with _lock:
+            keys = _conn().execute("SELECT key FROM seen_keys WHERE source = ?", (self.source,)).fetchall()
+        for (key,) in keys:
+            self.bloom.add(key)
+        self._dirty = True
+
+    def _add_keys(self, keys: list) -> int:
+        with _lock:
+            db = _conn()
+            before = db.total_changes
+            db.executemany("INSERT OR IGNORE INTO seen_keys VALUES (?, ?)", [(self.source, k) for k in keys])
+            db.commit()
+            added = db.total_changes - before
+        for key in keys:
+            self.bloom.add(key)
+        self._dirty = True
+        if self.bloom.count > self.bloom.capacity:
+            self._rebuild(self.bloom.capacity * 2)
+        return added
+
+    def sync(self, page_size: int = 1000) -> int:
+        """products_master 에서 watermark 이후 저장된 key 가져오기 (실행당 1회)"""
+        from generic_crawler.config import SUPABASE_URL, HEADERS
+        from generic_crawler.supabase_client import sb
+
+        fetched, offset, watermark = 0, 0, self.watermark
+        while True:
+            params = {
+                "select": "product_id,created_at",
+                "source": f"eq.{self.source}",
+                "order": "created_at.asc,id.asc",
+                "limit": page_size,
+                "offset": offset,
+            }
+            if self.key_prefix:
+                params["product_id"] = f"like.{self.key_prefix}*"
+            if self.watermark:
+                params["created_at"] = f"gte.{self.watermark}"
+            res = sb.get(f"{SUPABASE_URL}/rest/v1/products_master", headers=HEADERS, params=params, timeout=30)
+            res.raise_for_status()
+            rows = res.json()
+            if rows:
+                self._add_keys([r["product_id"] for r in rows])
+                watermark = rows[-1].get("created_at") or watermark
+            fetched += len(rows)
+            if len(rows) < page_size:
+                break
+            offset += page_size
+
+        self.watermark = watermark
+        self.stats["synced"] += fetched
+        self.save()
+        return fetched
+
+    def seen(self, key: str) -> bool:
+        self.stats["checked"] += 1
+        if key not in self.bloom:
+            self.stats["bloom_negative"] += 1
+            return False
+        with _lock:
+            found = _conn().execute(
+                "SELECT 1 FROM seen_keys WHERE source = ? AND key = ?", (self.source, key)
+            ).fetchone() is not None
+        self.stats["known"] += found
+        return found
+
+    def add(self, key: str):
+        self.stats["added"] += self._add_keys([key])
+
+    def save(self):
+        if not self._dirty:
+            return
+        with _lock:
+            db = _conn()
+            db.execute(
+                "INSERT OR REPLACE INTO seen_blooms VALUES (?, ?, ?, ?, ?, ?)",
+                (self.source, bytes(self.bloom.bits), self.bloom.num_bits, self.bloom.num_hashes,
+                 self.bloom.capacity, self.watermark),
+            )
+            db.commit()
+        self._dirty = False
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "sync" and len(sys.argv) > 2:
+        index = SeenIndex(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else "")
+        print(f"  🔄 {sys.argv[2]}: {index.sync()}개 동기화")
+    elif command == "stats":
+        db = _conn()
+        for source, total in db.execute("SELECT source, COUNT(*) FROM seen_keys GROUP BY source"):
+            bloom = db.execute("SELECT num_bits, capacity, watermark FROM seen_blooms WHERE source = ?", (source,)).fetchone()
+            print(f"  - {source:<16} {total:>7}개"
+                  + (f"  (bloom {bloom[0] // 8 // 1024}KB / 용량 {bloom[1]}, watermark {bloom[2]})" if bloom else ""))
+    else:
+        print("usage: python seen_index.py [stats|sync <source> [key_prefix]]")
+        sys.exit(1)
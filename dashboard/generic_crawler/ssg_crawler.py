@@ -3,14 +3,19 @@ SSG Department Store (신세계백화점) Best Ranking Crawler - SPA Version
 URL: https://department.ssg.com/page/pc/ranking.ssg
 """
 import os
+import sys
 import json
 import time
 import asyncio
-import requests
 from datetime import datetime
-from translate_helper import get_english_brand
+from translate_helper import get_english_brand, translate_brands, print_cache_stats
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.supabase_client import sb, stats as sb_stats, print_stats
+from generic_crawler.browser_pool import BrowserPool
+from generic_crawler.route_filter import RouteFilter
+from generic_crawler.bulk_writer import RankingWriter
+from generic_crawler.parsers import SSG_RANKING_PARSE_JS
 
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
 
@@ -48,12 +53,12 @@ def log_crawl(status, metadata=None):
             "finished_at": datetime.now().isoformat() if status in ("completed", "failed") else None,
             "metadata_json": metadata or {}
         }
-        requests.post(f"{SUPABASE_URL}/rest/v1/crawl_logs", headers=HEADERS, json=log_data, timeout=10)
+        sb.post(f"{SUPABASE_URL}/rest/v1/crawl_logs", headers=HEADERS, json=log_data, timeout=10)
     except Exception as e:
         print(f"Warning: Could not log crawl status: {e}")
 
-def save_product_and_rank(product_id, name, brand, price, image_url, url, rank, category_code, category_name):
-    """products_master에 upsert 후, daily_rankings_v2에 랭킹 저장"""
+def save_product_and_rank(writer, product_id, name, brand, price, image_url, url, rank, category_code, category_name):
+    """products_master / daily_rankings_v2 레코드를 writer 버퍼에 적재 (flush 시 일괄 저장)"""
     # Review data is now collected by review_collector.py (AI Vision)
     brand_en = get_english_brand(brand) if brand else ""
 
@@ -71,74 +76,12 @@ def save_product_and_rank(product_id, name, brand, price, image_url, url, rank,
         "updated_at": datetime.now().isoformat()
     }
 
-    res = requests.post(
-        f"{SUPABASE_URL}/rest/v1/products_master",
-        headers=HEADERS,
-        params={"on_conflict": "source,product_id"},
-        json=product_record,
-        timeout=10
-    )
-
-    if res.status_code in [200, 201]:
-        db_items = res.json()
-        if db_items:
-            internal_id = db_items[0].get("id")
-
-            ranking_record = {
-                "product_id": internal_id,
-                "rank": rank,
-                "date": datetime.now().date().isoformat(),
-                "category_code": category_code,
-                "source": SOURCE
-            }
-
-            rank_res = requests.post(
-                f"{SUPABASE_URL}/rest/v1/daily_rankings_v2",
-                headers=HEADERS,
-                params={"on_conflict": "product_id,date,category_code"},
-                json=ranking_record,
-                timeout=10
-            )
-            if rank_res.status_code not in [200, 201]:
-                print(f"  ⚠️ Rank upsert error for {product_id}: {rank_res.text[:200]}")
-            return True
-    else:
-        print(f"  ⚠️ Product upsert error for {product_id}: {res.text[:200]}")
-    return False
+    writer.add(product_record, rank, category_code)
+    return True
 
 async def parse_products_from_dom(page):
     """SPA 렌더링된 DOM 요소에서 상품 정보 직접 스크래핑"""
-    products = await page.evaluate('''() => {
-        const results = [];
-        const cards = document.querySelectorAll('.template-grid-item');
-        
-        cards.forEach(card => {
-            const rankEl = card.querySelector('.css-1k2hnaw');
-            if(!rankEl) return;
-            
-            const brandEl = card.querySelector('.css-408eai');
-            const nameEl = card.querySelector('.css-1mrk1dy');
-            const priceEl = card.querySelector('.css-h9py3d');
-            const imgEl = card.querySelector('img.loaded');
-            const linkEl = card.querySelector('a[href*="itemId="]');
-            
-            if(nameEl && priceEl) {
-                const href = linkEl ? linkEl.href : '';
-                const itemIdMatch = href.match(/itemId=([^&]+)/);
-                
-                results.push({
-                    rank: rankEl.innerText.replace(/[^0-9]/g, ''),
-                    prdNm: nameEl.innerText.trim(),
-                    brandNm: brandEl ? brandEl.innerText.trim() : '',
-                    price: priceEl.innerText.replace(/[^0-9]/g, ''),
-                    itemId: itemIdMatch ? itemIdMatch[1] : '',
-                    imgUrl: imgEl ? imgEl.src : '',
-                    prdUrl: href || `https://www.ssg.com/item/itemView.ssg?itemId=${itemIdMatch ? itemIdMatch[1] : ''}`
-                });
-            }
-        });
-        return results;
-    }''')
+    products = await page.evaluate(SSG_RANKING_PARSE_JS)
     return products
 
 async def ssg_crawl():
@@ -148,20 +91,14 @@ async def ssg_crawl():
 
     total_saved = 0
     total_errors = 0
+    writer = RankingWriter(SOURCE)
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=['--disable-blink-features=AutomationControlled']
-        )
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1920, "height": 1080}
-        )
-        page = await context.new_page()
-
+    route_filter = RouteFilter(SOURCE)
+    async with BrowserPool() as pool, pool.page("ssg") as page:
+        await route_filter.attach(page)
         print("🔍 랭킹 페이지 진입 중...")
-        await page.goto("https://department.ssg.com/page/pc/ranking.ssg", wait_until="networkidle", timeout=30000)
+        with route_filter.scope("entry"):
+            await page.goto("https://department.ssg.com/page/pc/ranking.ssg", wait_until="networkidle", timeout=30000)
         await asyncio.sleep(4)
 
         buttons = await page.locator('[role="tablist"] button[role="tab"]').all()
@@ -187,18 +124,21 @@ async def ssg_crawl():
                 
                 print(f"\n--- [{cat_name_kr} ({cat_code})] 크롤링 시작 ---")
                 
-                await btn.click()
+                # SPA 탭 클릭은 로드 완료 시점이 없으므로 요청 / bytes 만 카테고리별로 집계
+                with route_filter.scope(cat_name_kr, timed=False):
+                    await btn.click()
                 await asyncio.sleep(4) # SPA 데이터 렌더링 대기
                 
                 products = await parse_products_from_dom(page)
                 print(f"  -> Extracted {len(products)} products")
                 
-                saved_count = 0
+                translate_brands([item['brandNm'] for item in products if item['brandNm']])
                 for item in products:
                     if not item['prdNm'] or not item['itemId']:
                         continue
                         
-                    ok = save_product_and_rank(
+                    save_product_and_rank(
+                        writer,
                         product_id=item['itemId'],
                         name=item['prdNm'],
                         brand=item['brandNm'],
@@ -209,9 +149,8 @@ async def ssg_crawl():
                         category_code=cat_code,
                         category_name=cat_name_kr
                     )
-                    if ok:
-                        saved_count += 1
-                
+
+                saved_count = writer.flush()
                 print(f"  💾 [{cat_name_kr}] 저장 완료: {saved_count}개")
                 total_saved += saved_count
                 
@@ -219,15 +158,19 @@ async def ssg_crawl():
                 print(f"  ❌ [{tab_text}] 크롤링 중 오류: {e}")
                 total_errors += 1
 
-        await browser.close()
-
     duration = str(datetime.now() - start_time)
     print(f"\n[{datetime.now()}] 크롤링 종료. 총 {total_saved}개 저장, {total_errors}개 실패. 소요: {duration}")
     log_crawl("completed", {
         "total_saved": total_saved,
         "total_errors": total_errors,
-        "duration": duration
+        "duration": duration,
+        "writer": writer.stats(),
+        "http": sb_stats(),
+        "routes": route_filter.stats()
     })
+    route_filter.print_stats()
+    print_stats()
+    print_cache_stats()
 
 if __name__ == "__main__":
     asyncio.run(ssg_crawl())
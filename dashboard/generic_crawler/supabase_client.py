@@ -0,0 +1,185 @@
+"""
+Pooled Supabase REST Client
+
+모든 크롤러/스크립트가 공유하는 keep-alive requests.Session.
+- 커넥션 풀 (SUPABASE_POOL_SIZE) 로 TCP+TLS 핸드셰이크 재사용
+- 429/5xx 응답 시 지수 백오프 재시도 (SUPABASE_MAX_RETRIES, SUPABASE_BACKOFF)
+  자동 재시도는 GET/HEAD/PUT/DELETE 만. POST 는 on_conflict + resolution=merge-duplicates upsert 에
+  idempotent_upsert=True 를 넘긴 경우에만 재시도 (일반 insert / rpc 는 재전송하면 중복될 수 있음)
+- 테이블별 호출 수 / 지연 시간 카운터
+
+사용법:
+    from generic_crawler.supabase_client import sb, print_stats
+    res = sb.get(f"{SUPABASE_URL}/rest/v1/products_master", headers=HEADERS, params=..., timeout=10)
+    print_stats()
+
+    # Playwright(asyncio) 크롤러
+    from generic_crawler.supabase_client import async_sb
+    res = await async_sb.post(url, headers=HEADERS, json=record, timeout=10)
+
+    # 재전송해도 결과가 같은 upsert 만 재시도 허용
+    res = sb.post(url, headers=HEADERS, params={"on_conflict": "source,product_id"}, json=rows,
+                  timeout=30, idempotent_upsert=True)
+"""
+import os
+import sys
+import time
+import asyncio
+import threading
+import requests
+from urllib.parse import urlparse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.config import SUPABASE_POOL_SIZE, SUPABASE_MAX_RETRIES, SUPABASE_BACKOFF
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _table_of(url: str) -> str:
+    """/rest/v1/<table> (또는 /rest/v1/rpc/<fn>) 경로에서 통계 key 추출"""
+    parsed = urlparse(url)
+    parts = [p for p in parsed.path.split("/") if p]
+    if len(parts) >= 3 and parts[0] == "rest":
+        return "/".join(parts[2:4]) if parts[2] == "rpc" else parts[2]
+    return parsed.netloc or url
+
+
+def _record(table: str, method: str, elapsed_ms: float, ok: bool) -> None:
+    with _stats_lock:
+        s = _stats.setdefault(table, {"calls": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "methods": {}})
+        s["calls"] += 1
+        s["errors"] += 0 if ok else 1
+        s["total_ms"] += elapsed_ms
+        s["max_ms"] = max(s["max_ms"], elapsed_ms)
+        s["methods"][method] = s["methods"].get(method, 0) + 1
+
+
+def _is_idempotent_upsert(method: str, kwargs: dict) -> bool:
+    """on_conflict 대상이 있는 merge-duplicates upsert POST (같은 요청을 다시 보내도 결과가 같음)"""
+    if method.upper() != "POST":
+        return False
+    params = kwargs.get("params") or {}
+    prefer = (kwargs.get("headers") or {}).get("Prefer", "")
+    return bool(isinstance(params, dict) and params.get("on_conflict")) and "resolution=merge-duplicates" in prefer
+
+
+class TimedSession(requests.Session):
+    """요청마다 테이블별 지연 시간을 기록하는 Session"""
+
+    max_retries = SUPABASE_MAX_RETRIES
+    backoff = SUPABASE_BACKOFF
+
+    def request(self, method, url, *args, idempotent_upsert: bool = False, **kwargs):
+        if not (idempotent_upsert and _is_idempotent_upsert(method, kwargs)):
+            return self._timed_request(method, url, *args, **kwargs)
+
+        # opt-in upsert 재시도 (adapter 의 Retry 는 POST 를 재시도하지 않음)
+        for attempt in range(self.max_retries + 1):
+            last = attempt == self.max_retries
+            try:
+                res = self._timed_request(method, url, *args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if last:
+                    raise
+            else:
+                if res.status_code not in RETRY_STATUS or last:
+                    return res
+                retry_after = res.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    time.sleep(int(retry_after))
+                    continue
+            time.sleep(self.backoff * (2 ** attempt))
+
+    def _timed_request(self, method, url, *args, **kwargs):
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            res = super().request(method, url, *args, **kwargs)
+            ok = res.status_code < 400
+            return res
+        finally:
+            _record(_table_of(url), method.upper(), (time.perf_counter() - t0) * 1000, ok)
+
+
+def make_session(pool_size: int = SUPABASE_POOL_SIZE,
+                 max_retries: int = SUPABASE_MAX_RETRIES,
+                 backoff: float = SUPABASE_BACKOFF) -> TimedSession:
+    # POST(insert / rpc)와 PATCH(증분 갱신 등)는 재전송하면 결과가 달라질 수 있으므로 자동 재시도하지 않음.
+    # merge-duplicates upsert 는 호출하는 쪽에서 idempotent_upsert=True 로 명시 (TimedSession.request)
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(["GET", "HEAD", "PUT", "DELETE"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = TimedSession()
+    session.max_retries, session.backoff = max_retries, backoff
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+sb = make_session()
+
+
+class AsyncSession:
+    """asyncio 크롤러용 래퍼: 풀링된 세션을 worker thread 에서 호출 (이벤트 루프 블로킹 방지)"""
+
+    def __init__(self, session: requests.Session = sb, max_concurrency: int = SUPABASE_POOL_SIZE):
+        self.session = session
+        self.max_concurrency = max_concurrency
+        self._sem = None
+
+    async def request(self, method, url, **kwargs):
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.max_concurrency)
+        async with self._sem:
+            return await asyncio.to_thread(self.session.request, method, url, **kwargs)
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    async def patch(self, url, **kwargs):
+        return await self.request("PATCH", url, **kwargs)
+
+    async def delete(self, url, **kwargs):
+        return await self.request("DELETE", url, **kwargs)
+
+
+async_sb = AsyncSession()
+
+
+def stats() -> dict:
+    """테이블별 호출 통계 (log_crawl metadata 용)"""
+    with _stats_lock:
+        return {
+            table: {
+                "calls": s["calls"],
+                "errors": s["errors"],
+                "avg_ms": round(s["total_ms"] / s["calls"], 1) if s["calls"] else 0,
+                "max_ms": round(s["max_ms"], 1),
+                "total_ms": round(s["total_ms"], 1),
+            }
+            for table, s in _stats.items()
+        }
+
+
+def print_stats() -> None:
+    data = stats()
+    if not data:
+        return
+    print("\n  📡 Supabase REST 호출 통계")
+    for table, s in sorted(data.items(), key=lambda kv: -kv[1]["total_ms"]):
+        print(f"    - {table:<24} {s['calls']:>5}회  avg {s['avg_ms']:>7.1f}ms  max {s['max_ms']:>7.1f}ms"
+              + (f"  errors {s['errors']}" if s["errors"] else ""))
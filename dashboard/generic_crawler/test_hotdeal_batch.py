@@ -0,0 +1,73 @@
+"""
+save_hotdeals 일괄 저장 테스트 (fixture → 로컬 PostgREST stand-in)
+
+기존 save_hotdeal 은 특가 상품마다 products_master upsert + ranking_products_v2 (GET → PATCH/POST)
++ daily_specials_v2 (GET → PATCH/POST) 로 5~6회 호출했습니다 (O(6n)).
+save_hotdeals 는 페이지당 테이블별 배열 upsert 1회 (리뷰 필드 유무로 key 구성이 갈리면 테이블당 최대 2회).
+
+    python test_hotdeal_batch.py
+"""
+import os
+import sys
+import json
+import types
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.local_postgrest import start_background, print_summary
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "oy_hotdeal_items.json")
+
+# 크롤러 모듈이 import 시 SUPABASE_URL 을 읽으므로 서버부터 띄움
+server, base_url = start_background()
+os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"] = base_url, "local"
+
+# notifier(에러 알림 메일)는 저장소에 없는 운영 환경 모듈 → 알림 없이 import 되도록 대체
+sys.modules.setdefault("notifier", types.SimpleNamespace(send_error_notification=lambda *args, **kwargs: None))
+
+import oliveyoung_hotdeal_crawler as crawler  # noqa: E402
+
+crawler.get_english_brand = lambda brand: brand  # 번역 API 호출 없이
+
+
+def table_calls(store, start=0):
+    return [e for e in store.entries[start:] if e["table"] in ("products_master", "ranking_products_v2", "daily_specials_v2")]
+
+
+def check():
+    store = server.RequestHandlerClass.store
+    with open(FIXTURE, encoding="utf-8") as f:
+        items = json.load(f)
+    n = len(items)
+
+    # 1. 첫 저장: 3개 테이블 × key 구성 수 만큼만 호출
+    saved = crawler.save_hotdeals(items + items[:3])  # 페이지 안 중복 상품 포함
+    calls = table_calls(store)
+    shapes = len({tuple(sorted(r.keys())) for r in (crawler.hotdeal_records(i, "x")[0] for i in items)})
+    print(f"  items {n}, saved {saved}, HTTP calls {len(calls)} (기존 방식 ~{5 * n}회)")
+    assert saved == n, saved
+    assert len(calls) <= 3 * shapes, len(calls)
+    assert all(e["status"] < 400 for e in calls), calls
+
+    # 2. 같은 날 재실행: 특가 row 가 중복 생성되지 않고 가격만 갱신
+    items[0]["price_cur"] += 100
+    mark = len(store.entries)
+    assert crawler.save_hotdeals(items) == n
+    assert len(table_calls(store, mark)) <= 3 * shapes
+    specials, _ = store.select("daily_specials_v2", [("select", "product_id,special_price")])
+    assert len(specials) == n, len(specials)
+    updated = next(s for s in specials if s["product_id"] == items[0]["id"])
+    assert updated["special_price"] == items[0]["price_cur"], updated
+
+    # 3. 빈 페이지는 호출 없음
+    mark = len(store.entries)
+    assert crawler.save_hotdeals([]) == 0 and not table_calls(store, mark)
+
+    print_summary(store.stats())
+    print("✅ save_hotdeals OK")
+
+
+if __name__ == "__main__":
+    try:
+        check()
+    finally:
+        server.shutdown()
@@ -0,0 +1,115 @@
+"""
+news_enricher 큐 처리 테스트 (로컬 PostgREST stand-in, LLM 호출은 가짜 함수로 대체)
+
+    python test_news_enricher.py
+"""
+import os
+import sys
+import time
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.local_postgrest import start_background, print_summary
+
+# 모듈이 import 시 SUPABASE_URL 을 읽으므로 서버부터 띄움
+server, base_url = start_background()
+os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"] = base_url, "local"
+
+from generic_crawler import news_enricher as enricher  # noqa: E402
+from generic_crawler.bulk_writer import upsert_rows  # noqa: E402
+
+calls = []
+_calls_lock = threading.Lock()
+
+
+def fake_analyze(title, content):
+    time.sleep(0.02)
+    with _calls_lock:
+        calls.append(title)
+    if "실패" in title:
+        return {}, enricher.FAILED_SUMMARY
+    return {"brand": "브랜드" + title[-1], "product_type": "크림"}, f"{title} 요약"
+
+
+enricher.ai.analyze_article = fake_analyze
+enricher.ai.print_llm_stats = lambda: None
+
+
+def seed(n: int, prefix: str = "기사"):
+    rows = [{
+        "source": "cosinkorea", "product_id": f"news_cosinkorea_{prefix}{i}", "name": f"{prefix} {i}",
+        "brand": "코스인코리아", "category": "News", "article_content": f"{prefix} {i} 본문",
+        "enrichment_status": "pending", "enrichment_attempts": 0,
+        "enrichment_error": None, "enrichment_updated_at": None,  # migration 025 컬럼 (stand-in 은 쓸 때 컬럼 생성)
+    } for i in range(n)]
+    upsert_rows("products_master", rows, on_conflict="source,product_id")
+
+
+def rows_by_status(store):
+    rows, _ = store.select("products_master", [("select", "name,enrichment_status,enrichment_attempts,ai_summary,brand")])
+    out = {}
+    for r in rows:
+        out.setdefault(r["enrichment_status"], []).append(r)
+    return out
+
+
+def check():
+    store = server.RequestHandlerClass.store
+
+    # 1. pending 10개 → 모두 done, 기사당 분석 1회
+    seed(10)
+    stats = enricher.run(batch=4, concurrency=3)
+    by_status = rows_by_status(store)
+    assert stats["done"] == 10 and len(by_status["done"]) == 10, (stats, by_status.keys())
+    assert sorted(calls) == sorted(f"기사 {i}" for i in range(10)), calls
+    done = by_status["done"][0]
+    assert done["ai_summary"]["insight"].endswith("요약") and done["brand"].startswith("브랜드"), done
+
+    # 2. 동시에 claim 해도 같은 기사를 두 번 가져가지 않음
+    seed(12, "동시")
+    claimed = []
+
+    def drain():
+        while True:
+            rows = enricher.claim(5)
+            if not rows:
+                return
+            claimed.extend(rows)
+
+    threads = [threading.Thread(target=drain) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ids = [r["id"] for r in claimed]
+    assert len(ids) == len(set(ids)) == 12, len(ids)
+
+    # 3. 멈춘 processing 은 NEWS_ENRICH_STALE_MINUTES 전이면 그대로, 지나면 다시 claim
+    assert enricher.claim(5) == []
+    enricher.NEWS_ENRICH_STALE_MINUTES = -1
+    assert len(enricher.run()) and len(rows_by_status(store)["done"]) == 22
+    enricher.NEWS_ENRICH_STALE_MINUTES = 30
+
+    # 4. 요약 실패는 failed 로 남고, NEWS_ENRICH_RETRY_MINUTES 뒤 NEWS_ENRICH_MAX_ATTEMPTS 까지 재시도
+    seed(2, "실패")
+    assert enricher.run()["failed"] == 2
+    assert enricher.run()["claimed"] == 0  # 같은 실행 / 바로 다음 실행에서는 재시도하지 않음
+    enricher.NEWS_ENRICH_RETRY_MINUTES = -1
+    for attempt in range(2, enricher.NEWS_ENRICH_MAX_ATTEMPTS + 1):
+        stats = enricher.run(limit=2)  # 재시도 대기 없이 바로 다시 claim 되므로 실행당 1회차만
+        assert stats["claimed"] == stats["failed"] == 2, (attempt, stats)
+    failed = rows_by_status(store)["failed"]
+    assert all(r["enrichment_attempts"] == enricher.NEWS_ENRICH_MAX_ATTEMPTS for r in failed), failed
+    assert all(r["ai_summary"] for r in failed), failed  # 마지막 시도 결과는 저장
+    assert enricher.run()["claimed"] == 0
+
+    print(f"  큐 상태: {enricher.queue_status()}")
+    print_summary(store.stats())
+    print("✅ news_enricher OK")
+
+
+if __name__ == "__main__":
+    try:
+        check()
+    finally:
+        server.shutdown()
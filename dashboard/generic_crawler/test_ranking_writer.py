@@ -0,0 +1,117 @@
+"""
+RankingWriter 테스트 (로컬 PostgREST stand-in, hash 캐시는 임시 파일)
+
+    python test_ranking_writer.py
+"""
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.local_postgrest import start_background
+
+# 모듈이 import 시 SUPABASE_URL / PRODUCT_HASH_PATH 를 읽으므로 먼저 설정
+server, base_url = start_background()
+os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"] = base_url, "local"
+os.environ["PRODUCT_HASH_PATH"] = os.path.join(tempfile.mkdtemp(), "product_hashes.sqlite")
+
+import requests  # noqa: E402
+from generic_crawler import bulk_writer  # noqa: E402
+from generic_crawler.bulk_writer import RankingWriter  # noqa: E402
+
+
+class FailingSession:
+    """bulk_writer.sb 대신: fail(url, payload) 가 True 인 POST 는 PostgREST 에러 응답으로 바꿈"""
+
+    def __init__(self, session, fail, message="simulated failure"):
+        self._session, self.fail, self.message, self.failed = session, fail, message, 0
+
+    def post(self, url, json=None, **kwargs):
+        if self.fail(url, json):
+            self.failed += 1
+            res = requests.Response()
+            res.status_code, res._content, res.url = 400, f'{{"message": "{self.message}"}}'.encode(), url
+            return res
+        return self._session.post(url, json=json, **kwargs)
+
+
+def record(i: int, source: str = "testsrc") -> dict:
+    return {"product_id": f"p{i}", "source": source, "name": f"상품 {i}", "brand": "브랜드", "price": 1000 + i}
+
+
+def saved_ranks(store, source: str) -> list:
+    rows, _ = store.select("daily_rankings_v2", [("select", "product_id,rank,category_code"), ("source", f"eq.{source}")])
+    return rows
+
+
+def check():
+    store = server.RequestHandlerClass.store
+    real_sb = bulk_writer.sb
+
+    # 1. review 컬럼 migration 이 없는 DB: 컬럼 에러면 optional_columns 를 빼고 재시도
+    no_review = FailingSession(
+        real_sb, lambda url, rows: url.endswith("/products_master") and "review_count" in rows[0],
+        "Could not find the 'review_count' column of 'products_master' in the schema cache")
+    bulk_writer.sb = no_review
+    writer = RankingWriter("oytest", optional_columns=("review_count", "review_rating"), verbose=False)
+    for i in range(5):
+        writer.add({**record(i, "oytest"), "review_count": 10 + i, "review_rating": 4.5}, i + 1, "cat1")
+    assert writer.flush() == 5 and no_review.failed == 1, (writer.stats(), no_review.failed)
+    assert len(saved_ranks(store, "oytest")) == 5
+
+    # 2. max_batch 자동 flush 분도 다음 flush() 반환값(카테고리 saved_count)에 포함
+    bulk_writer.sb = real_sb
+    writer = RankingWriter("testsrc", max_batch=4, verbose=False)
+    for i in range(10):
+        writer.add(record(i), i + 1, "cat1")
+    assert len(writer) == 2
+    assert writer.flush() == 10 and writer.total_saved == 10, writer.stats()
+    for i in range(3):
+        writer.add(record(i), i + 1, "cat2")
+    assert writer.flush() == 3 and writer.total_saved == 13
+
+    # 3. 랭킹 저장이 실패하면 실제 저장된 0건으로 집계
+    no_ranks = FailingSession(real_sb, lambda url, rows: url.endswith("/daily_rankings_v2"))
+    bulk_writer.sb = no_ranks
+    writer = RankingWriter("testsrc", verbose=False)
+    for i in range(4):
+        writer.add(record(100 + i), i + 1, "cat3")
+    assert writer.flush() == 0 and writer.stats()["errors"] == 4, writer.stats()
+
+    # 4. 캐시로 건너뛴(unchanged) 상품의 랭킹 저장이 한 번 실패해도 캐시 무효화 후 재시도로 모두 저장
+    bulk_writer.sb = real_sb
+    writer = RankingWriter("retrysrc", verbose=False)
+    for i in range(6):
+        writer.add(record(i, "retrysrc"), i + 1, "cat1")
+    assert writer.flush() == 6
+    fail_once = FailingSession(real_sb, lambda url, rows: url.endswith("/daily_rankings_v2") and not fail_once.failed)
+    bulk_writer.sb = fail_once
+    writer = RankingWriter("retrysrc", verbose=False)
+    for i in range(8):  # 6개는 변경 없음(캐시 id), 2개는 새 상품
+        writer.add(record(i, "retrysrc"), i + 1, "cat2")
+    assert writer.flush() == 8 and fail_once.failed == 1, writer.stats()
+    assert len([r for r in saved_ranks(store, "retrysrc") if r["category_code"] == "cat2"]) == 8
+
+    # 5. 변경 없는 상품은 updated_at 이 그대로지만 랭킹 저장 시 last_seen_at 은 갱신 (리뷰 큐 정렬 기준)
+    bulk_writer.sb = real_sb
+    seen = lambda: {r["product_id"]: r for r in store.select(
+        "products_master", [("select", "product_id,updated_at,last_seen_at"), ("source", "eq.retrysrc")])[0]}
+    before = seen()
+    writer = RankingWriter("retrysrc", verbose=False)
+    for i in range(8):
+        writer.add(record(i, "retrysrc"), i + 1, "cat3")
+    assert writer.flush() == 8 and writer.stats()["products_unchanged"] == 8, writer.stats()
+    after = seen()
+    for pid, row in after.items():
+        assert row["updated_at"] == before[pid]["updated_at"], (pid, row)
+        assert row["last_seen_at"] > before[pid]["last_seen_at"], (pid, row)
+
+    print(f"  writer: {writer.stats()}")
+    print("✅ RankingWriter OK")
+
+
+if __name__ == "__main__":
+    try:
+        check()
+    finally:
+        server.shutdown()
@@ -0,0 +1,99 @@
+"""
+trend_aggregator 증분 집계 테스트 (로컬 PostgREST stand-in, LLM 호출은 가짜 함수, bucket 은 임시 파일)
+pending 으로 먼저 저장된 기사는 news_enricher 가 분석을 끝낸 뒤에 집계되어야 함
+구간 backfill 은 watermark 를 옮기지 않아야 함
+
+    python test_trend_aggregator.py
+"""
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.local_postgrest import start_background
+
+# 모듈이 import 시 SUPABASE_URL / TREND_BUCKET_PATH 를 읽으므로 먼저 설정
+server, base_url = start_background()
+os.environ["SUPABASE_URL"], os.environ["SUPABASE_KEY"] = base_url, "local"
+os.environ["TREND_BUCKET_PATH"] = os.path.join(tempfile.mkdtemp(), "trend_buckets.sqlite")
+
+import trend_aggregator as agg  # noqa: E402
+from generic_crawler import news_enricher as enricher  # noqa: E402
+from generic_crawler.bulk_writer import upsert_rows  # noqa: E402
+
+
+def fake_analyze(title, content):
+    if "실패" in title:
+        return {}, enricher.FAILED_SUMMARY
+    return {"brand": "토리든", "ingredient": "세라마이드, 판테놀", "fashion_style": "null"}, f"{title} 요약"
+
+
+enricher.ai.analyze_article = fake_analyze
+enricher.ai.print_llm_stats = lambda: None
+agg.TREND_SETTLE_SECONDS = -5  # 방금 완료된 기사도 바로 읽음
+
+
+def seed(n: int, prefix: str):
+    """news_trend_crawler 처럼 태그 없이 pending 으로 저장"""
+    rows = [{
+        "source": "cosinkorea", "product_id": f"news_cosinkorea_{prefix}{i}", "name": f"{prefix} {i}",
+        "brand": "코스인코리아", "category": "News", "article_content": f"{prefix} {i} 본문",
+        "enrichment_status": "pending", "enrichment_attempts": 0,
+        "enrichment_error": None, "enrichment_updated_at": None,
+    } for i in range(n)]
+    upsert_rows("products_master", rows, on_conflict="source,product_id")
+
+
+def counts(window: str = "48h"):
+    brands, ingredients, _, docs = agg.window_counters(window)
+    return docs, dict(brands), dict(ingredients)
+
+
+def check():
+    # 1. 분석 전(pending)인 기사는 집계하지 않음
+    seed(3, "기사")
+    assert agg.update()["bootstrap"]
+    assert counts() == (0, {}, {}), counts()
+
+    # 2. 분석이 끝나면 다음 실행에서 태그까지 집계
+    assert enricher.run()["done"] == 3
+    result = agg.update()
+    assert result["new_records"] == 3, result  # 완료된 기사가 없었으므로 이번에도 bootstrap
+    assert counts() == (3, {"토리든": 3}, {"세라마이드": 3, "판테놀": 3}), counts()
+
+    # 3. 다시 실행해도 중복 집계 없음
+    assert agg.update()["new_records"] == 0
+    assert counts()[0] == 3
+
+    # 4. 요약 실패(failed)는 빼고, 나중에 추가된 기사는 완료된 것만 더함
+    seed(2, "추가")
+    seed(1, "실패")
+    assert agg.update()["new_records"] == 0
+    stats = enricher.run()
+    assert stats["done"] == 2 and stats["failed"] == 1, stats
+    assert agg.update()["new_records"] == 2
+    assert counts() == (5, {"토리든": 5}, {"세라마이드": 5, "판테놀": 5}), counts()
+    assert counts("7d") == counts("24h") == counts()
+
+    # 5. 구간 backfill 은 watermark 를 옮기지 않음 - 그 뒤에 완료된 기사는 다음 증분 실행이 한 번만 셈
+    seed(2, "구간")
+    assert enricher.run()["done"] == 2
+    state = lambda: (agg._get_state(agg._conn(), "enriched_watermark"),
+                     agg._get_state(agg._conn(), "enriched_watermark_ids"))
+    before = state()
+    now = agg.datetime.now(agg.timezone.utc)
+    assert agg.backfill(now - agg.timedelta(days=1), now + agg.timedelta(hours=1)) == 5
+    assert state() == before
+    assert counts()[0] == 5, counts()
+    assert agg.update()["new_records"] == 2
+    assert counts() == (7, {"토리든": 7}, {"세라마이드": 7, "판테놀": 7}), counts()
+
+    agg.print_windows()
+    print("✅ trend_aggregator OK")
+
+
+if __name__ == "__main__":
+    try:
+        check()
+    finally:
+        server.shutdown()
@@ -1,55 +1,248 @@
+"""
+Brand Translation (Korean → English) with persistent cache
+
+브랜드명 번역 결과를 프로세스 간에 공유되는 SQLite 파일에 저장합니다.
+- 메모리 dict → SQLite → Google Translate 순서로 조회
+- TTL: 성공한 번역은 BRAND_CACHE_TTL_DAYS, 실패/무의미한 번역(negative)은 BRAND_CACHE_NEGATIVE_TTL_DAYS
+- 캐시 파일이 비어 있으면 products_master.brand_en 으로 1회 seed
+- translate_brands(brands) 로 카테고리 전체 브랜드를 한 번에 번역 (요청당 최대 TRANSLATE_BATCH_SIZE 개)
+
+사용법:
+    brands = [item["brand_name"] for item in captured_items]
+    translate_brands(brands)            # 저장 루프 전에 한 번 (미스만 API 호출)
+    for item in captured_items:
+        brand_en = get_english_brand(item["brand_name"])   # 캐시 hit
+
+    python translate_helper.py seed     # products_master.brand_en 으로 캐시 채우기
+    python translate_helper.py stats
+"""
 import os
+import sys
+import time
+import sqlite3
+import threading
 import requests
 from typing import Dict, List, Optional
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 load_dotenv(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".env"))
 API_KEY = os.getenv("GOOGLE_TRANSLATE_API_KEY") or os.getenv("VITE_GOOGLE_TRANSLATE_API_KEY")
 
+BRAND_CACHE_PATH = os.getenv("BRAND_CACHE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "brand_cache.sqlite"))
+BRAND_CACHE_TTL_DAYS = float(os.getenv("BRAND_CACHE_TTL_DAYS", "180"))
+BRAND_CACHE_NEGATIVE_TTL_DAYS = float(os.getenv("BRAND_CACHE_NEGATIVE_TTL_DAYS", "7"))
+TRANSLATE_BATCH_SIZE = 100  # Google Translate v2: 요청당 q 최대 128개
+
 _brand_cache: Dict[str, str] = {}
+_failed: set = set()   # 이번 프로세스에서 API 오류가 난 브랜드 (재시도 안 함)
+_lock = threading.Lock()
+_db: Optional[sqlite3.Connection] = None
+_warned_no_key = False
+_stats = {"memory_hits": 0, "db_hits": 0, "negative_hits": 0, "api_calls": 0, "api_items": 0, "api_errors": 0}
 
-def translate_brands(brands: List[str]) -> Dict[str, str]:
-    """Translate a list of Korean brands to English using Google Translate API."""
-    if not API_KEY:
-        print("Warning: GOOGLE_TRANSLATE_API_KEY not found. Brand translation skipped.")
-        return {b: b for b in brands}
-
-    to_translate = [b for b in set(brands) if b and b not in _brand_cache and not b.isascii()]
-    if not to_translate:
-        return {b: _brand_cache.get(b, b) for b in brands}
-
-    try:
-        url = f"https://translation.googleapis.com/language/translate/v2?key={API_KEY}"
-        payload = {
-            "q": to_translate,
-            "target": "en",
-            "source": "ko",
-            "format": "text"
-        }
-        res = requests.post(url, json=payload, timeout=10)
+
+def _needs_translation(brand: str) -> bool:
+    return bool(brand) and not brand.isascii()
+
+
+def _conn() -> sqlite3.Connection:
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(BRAND_CACHE_PATH, timeout=30, check_same_thread=False)
+        _db.execute("PRAGMA journal_mode=WAL")  # 여러 크롤러 프로세스가 동시에 읽고 씀
+        _db.execute("""
+            CREATE TABLE IF NOT EXISTS brand_translations (
+                brand_ko   TEXT PRIMARY KEY,
+                brand_en   TEXT,            -- NULL = negative (번역 불가)
+                origin     TEXT NOT NULL,   -- api | supabase | negative
+                expires_at REAL NOT NULL
+            )
+        """)
+        _db.commit()
+        if _db.execute("SELECT COUNT(*) FROM brand_translations").fetchone()[0] == 0:
+            try:
+                seed_from_supabase()
+            except Exception as e:
+                print(f"  ⚠️ 브랜드 캐시 seed 실패 (무시): {e}")
+    return _db
+
+
+def _store(rows: List[tuple]):
+    """rows: (brand_ko, brand_en or None, origin)"""
+    now = time.time()
+    data = []
+    for brand_ko, brand_en, origin in rows:
+        ttl = BRAND_CACHE_TTL_DAYS if brand_en else BRAND_CACHE_NEGATIVE_TTL_DAYS
+        data.append((brand_ko, brand_en, origin, now + ttl * 86400))
+    with _lock:
+        db = _conn()
+        db.executemany("INSERT OR REPLACE INTO brand_translations VALUES (?, ?, ?, ?)", data)
+        db.commit()
+
+
+def _lookup(brands: List[str]) -> Dict[str, Optional[str]]:
+    """SQLite 에서 만료되지 않은 항목 조회. negative 는 None 값으로 반환"""
+    found = {}
+    with _lock:
+        db = _conn()
+        now = time.time()
+        for i in range(0, len(brands), 500):
+            chunk = brands[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = db.execute(
+                f"SELECT brand_ko, brand_en FROM brand_translations WHERE expires_at > ? AND brand_ko IN ({placeholders})",
+                [now, *chunk],
+            ).fetchall()
+            found.update(dict(rows))
+    return found
+
+
+def seed_from_supabase(page_size: int = 1000) -> int:
+    """products_master 에 이미 저장된 brand → brand_en 으로 캐시 채우기"""
+    from generic_crawler.config import SUPABASE_URL, HEADERS
+    from generic_crawler.supabase_client import sb
+
+    pairs = {}
+    offset = 0
+    while True:
+        res = sb.get(
+            f"{SUPABASE_URL}/rest/v1/products_master",
+            headers=HEADERS,
+            params={
+                "select": "brand,brand_en",
+                "brand_en": "not.is.null",
+                "brand": "not.is.null",
+                "order": "id",
+                "limit": page_size,
+                "offset": offset,
+            },
+            timeout=30,
+        )
         res.raise_for_status()
-        data = res.json()
-        
-        translations = data.get("data", {}).get("translations", [])
-        for i, original in enumerate(to_translate):
-            if i < len(translations):
-                translated = translations[i].get("translatedText", original)
-                _brand_cache[original] = translated
-                
-    except Exception as e:
-        print(f"Error translating brands: {e}")
-        
+        rows = res.json()
+        for r in rows:
+            if _needs_translation(r["brand"]) and r["brand_en"] and r["brand_en"] != r["brand"]:
+                pairs[r["brand"]] = r["brand_en"]
+        if len(rows) < page_size:
+            break
+        offset += page_size
+
+    if pairs:
+        now = time.time()
+        expires = now + BRAND_CACHE_TTL_DAYS * 86400
+        # _conn() 안에서 호출될 수 있으므로 _store 대신 직접 기록 (lock 재진입 방지)
+        _db.executemany(
+            "INSERT OR IGNORE INTO brand_translations VALUES (?, ?, 'supabase', ?)",
+            [(ko, en, expires) for ko, en in pairs.items()],
+        )
+        _db.commit()
+    print(f"  🌱 브랜드 캐시 seed: products_master 에서 {len(pairs)}개")
+    return len(pairs)
+
+
+def _call_api(brands: List[str]) -> Dict[str, str]:
+    url = f"https://translation.googleapis.com/language/translate/v2?key={API_KEY}"
+    payload = {
+        "q": brands,
+        "target": "en",
+        "source": "ko",
+        "format": "text"
+    }
+    res = requests.post(url, json=payload, timeout=10)
+    res.raise_for_status()
+    translations = res.json().get("data", {}).get("translations", [])
+    _stats["api_calls"] += 1
+    _stats["api_items"] += len(brands)
+    return {original: t.get("translatedText") for original, t in zip(brands, translations)}
+
+
+def translate_brands(brands: List[str]) -> Dict[str, str]:
+    """Translate a list of Korean brands to English (memory → SQLite → Google Translate)."""
+    global _warned_no_key
+    wanted = {b for b in brands if _needs_translation(b)}
+
+    misses = [b for b in wanted if b not in _brand_cache and b not in _failed]
+    _stats["memory_hits"] += len(wanted) - len(misses)
+
+    if misses:
+        for brand_ko, brand_en in _lookup(misses).items():
+            if brand_en:
+                _stats["db_hits"] += 1
+                _brand_cache[brand_ko] = brand_en
+            else:
+                _stats["negative_hits"] += 1
+                _brand_cache[brand_ko] = brand_ko
+        misses = [b for b in misses if b not in _brand_cache]
+
+    if misses and not API_KEY:
+        if not _warned_no_key:
+            print("Warning: GOOGLE_TRANSLATE_API_KEY not found. Brand translation skipped.")
+            _warned_no_key = True
+        misses = []
+
+    for i in range(0, len(misses), TRANSLATE_BATCH_SIZE):
+        chunk = misses[i:i + TRANSLATE_BATCH_SIZE]
+        try:
+            translated = _call_api(chunk)
+        except Exception as e:
+            print(f"Error translating brands: {e}")
+            _stats["api_errors"] += 1
+            _failed.update(chunk)
+            continue
+
+        rows = []
+        for original in chunk:
+            result = (translated.get(original) or "").strip()
+            if result and result != original:
+                _brand_cache[original] = result
+                rows.append((original, result, "api"))
+            else:
+                # 번역 결과 없음 / 원문 그대로 → negative 로 저장해서 한동안 재요청하지 않음
+                _brand_cache[original] = original
+                rows.append((original, None, "negative"))
+        _store(rows)
+
     return {b: _brand_cache.get(b, b) for b in brands}
 
+
 def get_english_brand(brand_ko: str) -> str:
     """Translate a single Korean brand to English."""
     if not brand_ko:
         return ""
-        
+
     # If the brand consists mostly of English characters, assume it's already English.
     # Otherwise, translate it and return.
     if brand_ko.isascii() and any(c.isalpha() for c in brand_ko):
         return brand_ko
-        
+
     res = translate_brands([brand_ko])
     return res.get(brand_ko, brand_ko)
+
+
+def cache_stats() -> dict:
+    return dict(_stats)
+
+
+def print_cache_stats():
+    s = _stats
+    print(f"  🈯 브랜드 번역 캐시: memory {s['memory_hits']} / sqlite {s['db_hits']} / negative {s['negative_hits']}"
+          f" | API {s['api_calls']}회 ({s['api_items']}개, 오류 {s['api_errors']})")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "seed":
+        _conn()
+        seed_from_supabase()
+    elif command == "stats":
+        db = _conn()
+        now = time.time()
+        for origin, total, live in db.execute(
+            "SELECT origin, COUNT(*), SUM(expires_at > ?) FROM brand_translations GROUP BY origin", [now]
+        ):
+            print(f"  - {origin:<9} {total:>6}개 (유효 {live})")
+    else:
+        print("usage: python translate_helper.py [seed|stats]")
+        sys.exit(1)
@@ -3,15 +3,16 @@ import sys
 import json
 import asyncio
 import random
-import requests
 import re
 from datetime import datetime
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright
 from bs4 import BeautifulSoup
 
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(parent_dir)
+from generic_crawler.supabase_client import async_sb
+from generic_crawler.browser_pool import BrowserPool
+from generic_crawler.page_ready import wait_ready, print_ready_stats
 load_dotenv(os.path.join(parent_dir, ".env"))
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -37,15 +38,12 @@ async def scrape_single_product(page, goods_no):
     
     try:
         await page.goto(detail_url, wait_until="domcontentloaded", timeout=60000)
-        await asyncio.sleep(4)
+        await wait_ready(page, "ably_detail")
         
         # Check for Cloudflare challenge
         title = await page.title()
         if "보안 확인 중" in title or "Just a moment" in title:
-            await asyncio.sleep(8)
-            title = await page.title()
-            if "보안 확인 중" in title or "Just a moment" in title:
-                await asyncio.sleep(10)
+            await wait_ready(page, "ably_detail", ceiling=18)
                 
         html_content = await page.content()
         soup = BeautifulSoup(html_content, 'html.parser')
@@ -83,23 +81,14 @@ async def scrape_single_product(page, goods_no):
     return result
 
 async def run_single(goods_no):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True, args=['--disable-blink-features=AutomationControlled', '--disable-web-security', '--no-sandbox'])
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (iPhone; CPU iPhone OS 17_4_1 like Mac OS X) AppleWebKit/605.1.15",
-            viewport={"width": 390, "height": 844},
-            is_mobile=True, has_touch=True
-        )
-        page = await context.new_page()
-        
+    async with BrowserPool() as pool, pool.page("ably_mobile") as page:
         result = await scrape_single_product(page, goods_no)
         print(json.dumps(result, ensure_ascii=False, indent=2))
-        await browser.close()
 
 async def run_batch(limit=50):
     print(f"[{datetime.now()}] 에이블리 리뷰 일괄 업데이트 시작 (최대 {limit}개)")
     
-    res = requests.get(
+    res = await async_sb.get(
         f"{SUPABASE_URL}/rest/v1/products_master",
         headers=HEADERS,
         params={
@@ -107,7 +96,7 @@ async def run_batch(limit=50):
             "review_count": "eq.0",
             "select": "id,product_id",
             "limit": str(limit),
-            "order": "updated_at.desc"
+            "order": "last_seen_at.desc.nullslast",  # 최근 랭킹에 나온 상품부터 (migration 026)
         }
     )
     products = res.json() if res.status_code == 200 else []
@@ -118,22 +107,15 @@ async def run_batch(limit=50):
         
     print(f"{len(products)}개 제품 처리 예정")
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True, args=['--disable-blink-features=AutomationControlled', '--disable-web-security', '--no-sandbox'])
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (iPhone; CPU iPhone OS 17_4_1 like Mac OS X) AppleWebKit/605.1.15",
-            viewport={"width": 390, "height": 844},
-            is_mobile=True, has_touch=True
-        )
-        page = await context.new_page()
-        
+    async with BrowserPool() as pool:
         updated = 0
         for prod in products:
             goods_no = prod.get("product_id")
             db_id = prod.get("id")
             if not goods_no: continue
             
-            data = await scrape_single_product(page, goods_no)
+            async with pool.page("ably_mobile") as page:
+                data = await scrape_single_product(page, goods_no)
             rc = data.get("reviewCount", 0)
             rt = data.get("rating", 0.0)
             
@@ -143,7 +125,7 @@ async def run_batch(limit=50):
                 if rt > 0 and rt <= 5: update_record["review_rating"] = rt
                 
                 try:
-                    r = requests.patch(
+                    r = await async_sb.patch(
                         f"{SUPABASE_URL}/rest/v1/products_master?id=eq.{db_id}",
                         headers=HEADERS, json=update_record, timeout=10
                     )
@@ -156,10 +138,9 @@ async def run_batch(limit=50):
                 print(f"  ℹ️ {goods_no}: 리뷰가 아직 없거나 가져올 수 없음")
             
             await asyncio.sleep(random.uniform(2, 4))
-            
-        await browser.close()
     
     print(f"[{datetime.now()}] 완료. {updated}/{len(products)} 업데이트됨")
+    print_ready_stats()
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
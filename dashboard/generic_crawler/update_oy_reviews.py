@@ -12,13 +12,14 @@ import sys
 import json
 import asyncio
 import random
-import requests
 from datetime import datetime
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright
 
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(parent_dir)
+from generic_crawler.supabase_client import async_sb
+from generic_crawler.browser_pool import BrowserPool
+from generic_crawler.page_ready import wait_ready, print_ready_stats
 load_dotenv(os.path.join(parent_dir, ".env"))
 
 SUPABASE_URL = os.getenv("SUPABASE_URL", "https://hgxblbbjlnsfkffwvfao.supabase.co")
@@ -45,15 +46,12 @@ async def scrape_single_product(page, goods_no):
     
     try:
         await page.goto(detail_url, wait_until="domcontentloaded", timeout=60000)
-        await asyncio.sleep(4)
+        await wait_ready(page, "oliveyoung_detail")
         
         # Check for Cloudflare challenge
         title = await page.title()
         if "잠시만 기다려" in title or "잠시만" in title:
-            await asyncio.sleep(8)
-            title = await page.title()
-            if "잠시만" in title:
-                await asyncio.sleep(10)
+            await wait_ready(page, "oliveyoung_detail", ceiling=18)
         
         parse_script = """
         () => {
@@ -110,17 +108,7 @@ async def scrape_single_product(page, goods_no):
 
 async def run_single(goods_no):
     """Fetch reviews for a single product and output JSON"""
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=['--disable-blink-features=AutomationControlled']
-        )
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1280, "height": 1024}
-        )
-        page = await context.new_page()
-        
+    async with BrowserPool() as pool, pool.page("default") as page:
         result = await scrape_single_product(page, goods_no)
         
         # Update DB if we got valid data
@@ -133,7 +121,7 @@ async def run_single(goods_no):
             
             if update_data:
                 try:
-                    res = requests.patch(
+                    res = await async_sb.patch(
                         f"{SUPABASE_URL}/rest/v1/products_master?product_id=eq.{goods_no}&source=eq.oliveyoung",
                         headers=HEADERS,
                         json=update_data,
@@ -142,8 +130,6 @@ async def run_single(goods_no):
                     result["dbUpdated"] = res.status_code in [200, 204]
                 except Exception as e:
                     result["dbError"] = str(e)
-        
-        await browser.close()
     
     print(json.dumps(result, ensure_ascii=False))
 
@@ -152,7 +138,7 @@ async def run_batch(limit=50):
     """Update reviews for products with missing data"""
     print(f"[{datetime.now()}] 올리브영 리뷰 일괄 업데이트 시작 (최대 {limit}개)")
     
-    res = requests.get(
+    res = await async_sb.get(
         f"{SUPABASE_URL}/rest/v1/products_master",
         headers=HEADERS,
         params={
@@ -160,7 +146,7 @@ async def run_batch(limit=50):
             "review_count": "eq.0",
             "select": "id,product_id",
             "limit": str(limit),
-            "order": "updated_at.desc"
+            "order": "last_seen_at.desc.nullslast",  # 최근 랭킹에 나온 상품부터 (migration 026)
         },
         timeout=10
     )
@@ -172,28 +158,8 @@ async def run_batch(limit=50):
     
     print(f"{len(products)}개 제품 처리 예정")
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=False,
-            args=['--disable-blink-features=AutomationControlled']
-        )
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
-            viewport={"width": 1280, "height": 900},
-            locale="ko-KR"
-        )
-        page = await context.new_page()
-        
-        # Warmup: visit list page first to establish valid Cloudflare session
-        print("  🔄 세션 워밍업 중 (리스트 페이지 방문)...")
-        try:
-            await page.goto("https://www.oliveyoung.co.kr/store/main/getBestList.do",
-                          wait_until="domcontentloaded", timeout=60000)
-            await asyncio.sleep(5)
-            print(f"  ✅ 세션 확립: {await page.title()}")
-        except Exception as e:
-            print(f"  ⚠️ 워밍업 실패: {e}")
-        
+    # headful: Cloudflare 통과용. 리스트 페이지 워밍업은 "oliveyoung_review" context 생성 시 pool 이 수행
+    async with BrowserPool(headless=False) as pool:
         updated = 0
         for prod in products:
             goods_no = prod.get("product_id")
@@ -201,7 +167,8 @@ async def run_batch(limit=50):
             if not goods_no:
                 continue
             
-            data = await scrape_single_product(page, goods_no)
+            async with pool.page("oliveyoung_review") as page:
+                data = await scrape_single_product(page, goods_no)
             rc = data.get("reviewCount", 0)
             rt = data.get("rating", 0.0)
             
@@ -211,7 +178,7 @@ async def run_batch(limit=50):
                 if rt > 0 and rt <= 5: update_record["review_rating"] = rt
                 
                 try:
-                    r = requests.patch(
+                    r = await async_sb.patch(
                         f"{SUPABASE_URL}/rest/v1/products_master?id=eq.{db_id}",
                         headers=HEADERS,
                         json=update_record,
@@ -224,10 +191,9 @@ async def run_batch(limit=50):
                     print(f"  ❌ {goods_no}: {e}")
             
             await asyncio.sleep(random.uniform(2, 4))
-        
-        await browser.close()
     
     print(f"[{datetime.now()}] 완료. {updated}/{len(products)} 업데이트됨")
+    print_ready_stats()
 
 
 if __name__ == "__main__":
@@ -3,15 +3,16 @@ import sys
 import json
 import asyncio
 import random
-import requests
 import re
 from datetime import datetime
 from dotenv import load_dotenv
-from playwright.async_api import async_playwright
 from bs4 import BeautifulSoup
 
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(parent_dir)
+from generic_crawler.supabase_client import async_sb
+from generic_crawler.browser_pool import BrowserPool
+from generic_crawler.page_ready import wait_ready, print_ready_stats
 load_dotenv(os.path.join(parent_dir, ".env"))
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -37,7 +38,7 @@ async def scrape_single_product(page, product_id):
     
     try:
         await page.goto(detail_url, wait_until="domcontentloaded", timeout=60000)
-        await asyncio.sleep(5)
+        await wait_ready(page, "ssg_detail")
         
         # Use page.evaluate for resilient text-based extraction
         data = await page.evaluate(r"""
@@ -89,25 +90,14 @@ async def scrape_single_product(page, product_id):
     return result
 
 async def run_single(product_id):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True, 
-            args=['--disable-blink-features=AutomationControlled', '--no-sandbox', '--disable-setuid-sandbox']
-        )
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1920, "height": 1080}
-        )
-        page = await context.new_page()
-        
+    async with BrowserPool() as pool, pool.page("ssg") as page:
         result = await scrape_single_product(page, product_id)
         print(json.dumps(result, ensure_ascii=False, indent=2))
-        await browser.close()
 
 async def run_batch(limit=50):
     print(f"[{datetime.now()}] SSG 리뷰 일괄 업데이트 시작 (최대 {limit}개)")
     
-    res = requests.get(
+    res = await async_sb.get(
         f"{SUPABASE_URL}/rest/v1/products_master",
         headers=HEADERS,
         params={
@@ -115,7 +105,7 @@ async def run_batch(limit=50):
             "review_count": "eq.0",
             "select": "id,product_id",
             "limit": str(limit),
-            "order": "updated_at.desc"
+            "order": "last_seen_at.desc.nullslast",  # 최근 랭킹에 나온 상품부터 (migration 026)
         }
     )
     products = res.json() if res.status_code == 200 else []
@@ -126,24 +116,15 @@ async def run_batch(limit=50):
         
     print(f"{len(products)}개 제품 처리 예정")
     
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True, 
-            args=['--disable-blink-features=AutomationControlled', '--no-sandbox']
-        )
-        context = await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1920, "height": 1080}
-        )
-        page = await context.new_page()
-        
+    async with BrowserPool() as pool:
         updated = 0
         for prod in products:
             p_id = prod.get("product_id")
             db_id = prod.get("id")
             if not p_id: continue
             
-            data = await scrape_single_product(page, p_id)
+            async with pool.page("ssg") as page:
+                data = await scrape_single_product(page, p_id)
             rc = data.get("reviewCount", 0)
             rt = data.get("rating", 0.0)
             
@@ -153,7 +134,7 @@ async def run_batch(limit=50):
                 if rt > 0 and rt <= 5: update_record["review_rating"] = rt
                 
                 try:
-                    r = requests.patch(
+                    r = await async_sb.patch(
                         f"{SUPABASE_URL}/rest/v1/products_master?id=eq.{db_id}",
                         headers=HEADERS, json=update_record, timeout=10
                     )
@@ -166,10 +147,9 @@ async def run_batch(limit=50):
                 print(f"  ℹ️ {p_id}: 리뷰가 아직 없거나 가져올 수 없음")
             
             await asyncio.sleep(random.uniform(2, 4))
-            
-        await browser.close()
     
     print(f"[{datetime.now()}] 완료. {updated}/{len(products)} 업데이트됨")
+    print_ready_stats()
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
@@ -0,0 +1,289 @@
+"""
+Vision Screenshot Preprocessing
+
+review_collector 가 Ollama Vision 에 보내는 스크린샷을 줄입니다.
+- 플랫폼별로 학습한 리뷰/평점/찜 위젯 영역(vision_regions.json)만 clip
+- 최대 폭(max_width)으로 축소, JPEG / WebP 품질 조절 (축소·WebP 는 Pillow 가 있을 때만)
+- 저장된 스크린샷 corpus 로 설정별 정확도 vs 지연 시간 벤치마크
+
+설정 (env): 기본값은 기존과 같은 전체 viewport PNG (운영 Vision 입력 그대로).
+vision-only 페이지(json/dom tier 실패)를 포함한 corpus 로 bench 결과를 확인한 설정만 env 로 켜세요.
+    VISION_CROP=0            1 이면 학습된 영역으로 crop (영역 없으면 전체)
+    VISION_FORMAT=png        png | jpeg | webp
+    VISION_QUALITY=80        jpeg/webp 품질
+    VISION_MAX_WIDTH=0       이 폭보다 크면 축소 (0 = 축소 안 함)
+
+사용법:
+    # 1) corpus 수집: 정답(json/dom tier 결과)이 있는 상품도 전체 스크린샷 저장
+    python review_collector.py --platform oliveyoung --limit 100 --save-corpus corpus/
+    # 2) 위젯 영역 학습 (corpus 메타의 bounding box → vision_regions.json)
+    python vision_preprocess.py learn --corpus corpus/
+    # 3) 설정별 벤치마크
+    python vision_preprocess.py bench --corpus corpus/ --settings full:png crop:jpeg:70:800 crop:webp:60:600
+"""
+import os
+import io
+import sys
+import json
+import time
+import base64
+import argparse
+from datetime import datetime
+
+try:
+    from PIL import Image
+except ImportError:  # 축소 / WebP / 벤치마크만 Pillow 필요
+    Image = None
+
+REGIONS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vision_regions.json")
+
+REGION_PADDING = 40  # 학습된 box 주변 여유 (px)
+
+# 리뷰 / 평점 / 찜 위젯으로 볼 텍스트 (bounding box 수집용)
+WIDGET_TEXT_RE = r"리뷰|후기|상품평|평점|별점|만족|찜|좋아요|[0-9]\.[0-9]\s*\("
+
+WIDGET_BOXES_JS = r"""
+(pattern) => {
+    const re = new RegExp(pattern);
+    const boxes = [];
+    for (const el of document.querySelectorAll('body *')) {
+        if (el.children.length > 2) continue;
+        const text = (el.innerText || '').trim();
+        if (!text || text.length > 40 || !re.test(text) || !/[0-9]/.test(text)) continue;
+        const r = el.getBoundingClientRect();
+        if (r.width < 4 || r.height < 4 || r.bottom < 0) continue;
+        boxes.push({x: r.left + window.scrollX, y: r.top + window.scrollY, width: r.width, height: r.height});
+    }
+    return boxes;
+}
+"""
+
+
+def settings_from_env() -> dict:
+    return {
+        "crop": os.getenv("VISION_CROP", "0") == "1",
+        "format": os.getenv("VISION_FORMAT", "png"),
+        "quality": int(os.getenv("VISION_QUALITY", "80")),
+        "max_width": int(os.getenv("VISION_MAX_WIDTH", "0")),
+    }
+
+
+def parse_setting(spec: str) -> dict:
+    """'crop:jpeg:70:800' / 'full:png' → settings dict"""
+    parts = spec.split(":")
+    return {
+        "name": spec,
+        "crop": parts[0] == "crop",
+        "format": parts[1] if len(parts) > 1 else "png",
+        "quality": int(parts[2]) if len(parts) > 2 else 80,
+        "max_width": int(parts[3]) if len(parts) > 3 else 0,
+    }
+
+
+def load_regions() -> dict:
+    try:
+        with open(REGIONS_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+_regions = None
+
+
+def region_for(source: str):
+    global _regions
+    if _regions is None:
+        _regions = load_regions()
+    return _regions.get(source)
+
+
+def union_box(boxes, padding=0, max_width=None, max_height=None):
+    if not boxes:
+        return None
+    x0 = max(min(b["x"] for b in boxes) - padding, 0)
+    y0 = max(min(b["y"] for b in boxes) - padding, 0)
+    x1 = max(b["x"] + b["width"] for b in boxes) + padding
+    y1 = max(b["y"] + b["height"] for b in boxes) + padding
+    if max_width:
+        x1 = min(x1, max_width)
+    if max_height:
+        y1 = min(y1, max_height)
+    return {"x": int(x0), "y": int(y0), "width": int(x1 - x0), "height": int(y1 - y0)}
+
+
+async def widget_boxes(page) -> list:
+    """현재 페이지에서 리뷰/평점/찜 위젯으로 보이는 요소의 bounding box 목록"""
+    try:
+        return await page.evaluate(WIDGET_BOXES_JS, WIDGET_TEXT_RE)
+    except Exception:
+        return []
+
+
+def encode_image(png_bytes: bytes, settings: dict, clip: dict = None) -> bytes:
+    """PNG → (crop) → (축소) → png/jpeg/webp. Pillow 필요"""
+    img = Image.open(io.BytesIO(png_bytes))
+    if clip:
+        img = img.crop((clip["x"], clip["y"], clip["x"] + clip["width"], clip["y"] + clip["height"]))
+    if settings.get("max_width") and img.width > settings["max_width"]:
+        ratio = settings["max_width"] / img.width
+        img = img.resize((settings["max_width"], int(img.height * ratio)), Image.LANCZOS)
+
+    out = io.BytesIO()
+    fmt = settings.get("format", "png")
+    if fmt == "png":
+        img.save(out, format="PNG", optimize=True)
+    else:
+        img.convert("RGB").save(out, format="JPEG" if fmt == "jpeg" else "WEBP", quality=settings.get("quality", 80))
+    return out.getvalue()
+
+
+async def capture_for_vision(page, source: str, settings: dict = None):
+    """Vision 입력용 스크린샷 (base64, meta). Pillow 가 없으면 Playwright clip + JPEG 품질만 적용"""
+    settings = settings or settings_from_env()
+    viewport = page.viewport_size or {"width": 1280, "height": 3000}
+    clip = region_for(source) if settings["crop"] else None
+    if clip:
+        clip = union_box([clip], max_width=viewport["width"], max_height=viewport["height"])
+
+    if Image is not None and (settings.get("max_width") or settings["format"] == "webp"):
+        data = encode_image(await page.screenshot(full_page=False), settings, clip)
+    elif settings["format"] in ("jpeg", "webp"):
+        data = await page.screenshot(full_page=False, clip=clip, type="jpeg", quality=settings["quality"])
+    else:
+        data = await page.screenshot(full_page=False, clip=clip)
+
+    meta = {"bytes": len(data), "clip": clip, "format": settings["format"]}
+    return base64.b64encode(data).decode("utf-8"), meta
+
+
+async def save_corpus_sample(page, corpus_dir: str, source: str, product_id: str, label: dict = None):
+    """전체 스크린샷 PNG + 메타(정답 label, 위젯 bounding box) 저장"""
+    os.makedirs(os.path.join(corpus_dir, source), exist_ok=True)
+    base = os.path.join(corpus_dir, source, str(product_id))
+    await page.screenshot(path=f"{base}.png", full_page=False)
+    meta = {
+        "source": source,
+        "product_id": str(product_id),
+        "url": page.url,
+        "viewport": page.viewport_size,
+        "label": {k: label[k] for k in ("review_count", "review_rating", "tier") if k in label} if label else None,
+        "boxes": await widget_boxes(page),
+        "saved_at": datetime.now().isoformat(),
+    }
+    with open(f"{base}.json", "w") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+
+def iter_corpus(corpus_dir: str):
+    for source in sorted(os.listdir(corpus_dir)):
+        folder = os.path.join(corpus_dir, source)
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(folder, name)) as f:
+                meta = json.load(f)
+            png_path = os.path.join(folder, name[:-5] + ".png")
+            if os.path.exists(png_path):
+                yield meta, png_path
+
+
+def learn_regions(corpus_dir: str, padding: int = REGION_PADDING) -> dict:
+    """corpus 메타의 위젯 box 를 플랫폼별로 합쳐 crop 영역 학습"""
+    per_source = {}
+    for meta, _ in iter_corpus(corpus_dir):
+        box = union_box(meta.get("boxes") or [])
+        if box:
+            per_source.setdefault(meta["source"], {"boxes": [], "viewport": meta.get("viewport") or {}})
+            per_source[meta["source"]]["boxes"].append(box)
+
+    regions = {}
+    for source, data in per_source.items():
+        vp = data["viewport"]
+        region = union_box(data["boxes"], padding, vp.get("width"), vp.get("height"))
+        region["samples"] = len(data["boxes"])
+        regions[source] = region
+        print(f"  📐 {source:<11} x={region['x']} y={region['y']} {region['width']}x{region['height']} (샘플 {region['samples']}개)")
+
+    with open(REGIONS_PATH, "w") as f:
+        json.dump(regions, f, indent=2)
+    print(f"  💾 저장: {REGIONS_PATH}")
+    return regions
+
+
+def _correct(pred, label):
+    if not pred or not label:
+        return False
+    return (int(pred["review_count"]) == int(label.get("review_count", 0))
+            and abs(float(pred["review_rating"]) - float(label.get("review_rating", 0))) <= 0.1)
+
+
+def bench(corpus_dir: str, specs: list, out_path: str = None) -> list:
+    """설정별로 corpus 전체를 Vision 에 보내 정확도 / 지연 / 크기 비교"""
+    if Image is None:
+        print("❌ 벤치마크에는 Pillow 가 필요합니다 (pip install pillow)")
+        return []
+    from review_collector import call_vision_llm
+
+    samples = [(m, p) for m, p in iter_corpus(corpus_dir) if m.get("label")]
+    regions = load_regions()
+    print(f"🧪 Vision 벤치마크: 샘플 {len(samples)}개 × 설정 {len(specs)}개")
+
+    results = []
+    for spec in specs:
+        settings = parse_setting(spec)
+        sizes, latencies, correct = [], [], 0
+        for meta, png_path in samples:
+            with open(png_path, "rb") as f:
+                png = f.read()
+            clip = regions.get(meta["source"]) if settings["crop"] else None
+            data = encode_image(png, settings, clip)
+            sizes.append(len(data))
+
+            t0 = time.perf_counter()
+            pred = call_vision_llm(base64.b64encode(data).decode("utf-8"))
+            latencies.append(time.perf_counter() - t0)
+            correct += _correct(pred, meta["label"])
+
+        n = len(samples) or 1
+        row = {
+            "setting": spec,
+            "samples": len(samples),
+            "accuracy": round(correct / n, 3),
+            "avg_kb": round(sum(sizes) / n / 1024, 1),
+            "avg_latency_s": round(sum(latencies) / n, 2),
+            "p90_latency_s": round(sorted(latencies)[int(len(latencies) * 0.9)] if latencies else 0, 2),
+        }
+        results.append(row)
+        print(f"  - {spec:<22} 정확도 {row['accuracy']:.1%}  평균 {row['avg_kb']:>7.1f}KB  "
+              f"지연 avg {row['avg_latency_s']:.2f}s / p90 {row['p90_latency_s']:.2f}s")
+
+    if out_path:
+        with open(out_path, "w") as f:
+            json.dump({"corpus": corpus_dir, "ran_at": datetime.now().isoformat(), "results": results}, f, indent=2)
+        print(f"  💾 결과 저장: {out_path}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vision screenshot preprocessing tools")
+    sub = parser.add_subparsers(dest="command")
+    learn_p = sub.add_parser("learn", help="corpus 에서 플랫폼별 위젯 영역 학습")
+    learn_p.add_argument("--corpus", required=True)
+    learn_p.add_argument("--padding", type=int, default=REGION_PADDING)
+    bench_p = sub.add_parser("bench", help="설정별 정확도 vs 지연 벤치마크")
+    bench_p.add_argument("--corpus", required=True)
+    bench_p.add_argument("--settings", nargs="+", default=["full:png", "crop:png", "crop:jpeg:70:800", "crop:webp:60:600"],
+                         help="full|crop:png|jpeg|webp[:quality[:max_width]]")
+    bench_p.add_argument("--out", help="결과 JSON 경로")
+    args = parser.parse_args()
+
+    if args.command == "learn":
+        learn_regions(args.corpus, args.padding)
+    elif args.command == "bench":
+        bench(args.corpus, args.settings, args.out)
+    else:
+        parser.print_help()
+        sys.exit(1)
@@ -12,12 +12,13 @@ import os
 import sys
 import asyncio
 import datetime
-import requests
 import re
-from playwright.async_api import async_playwright
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from generic_crawler.config import SUPABASE_URL, SUPABASE_KEY, HEADERS
+from generic_crawler.supabase_client import sb
+from generic_crawler.browser_pool import BrowserPool
+from generic_crawler.route_filter import RouteFilter
 
 ZIGZAG_BASE = "https://zigzag.kr"
 
@@ -30,7 +31,7 @@ def upsert(table: str, records: list, on_conflict: str = None) -> list:
     if on_conflict:
         params["on_conflict"] = on_conflict
     try:
-        r = requests.post(url, headers=headers, params=params, json=records, timeout=30)
+        r = sb.post(url, headers=headers, params=params, json=records, timeout=30)
         r.raise_for_status()
         print(f"  ✅ {table}: {len(records)}개 저장")
         return r.json()
@@ -48,16 +49,14 @@ async def crawl_zigzag():
     today_str = today_utc.isoformat()
     date_only_str = today_str[0:10]
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        # Use Mobile Profile
-        iphone = p.devices['iPhone 13']
-        context = await browser.new_context(**iphone)
-        page = await context.new_page()
-
+    # Use Mobile Profile (iPhone 13)
+    route_filter = RouteFilter("zigzag")
+    async with BrowserPool() as pool, pool.page("zigzag") as page:
+        await route_filter.attach(page)
         try:
             print("  🔗 지그재그 홈 접속...")
-            await page.goto(ZIGZAG_BASE, wait_until="load", timeout=60000)
+            with route_filter.scope("home"):
+                await page.goto(ZIGZAG_BASE, wait_until="load", timeout=60000)
             await asyncio.sleep(2)
             
             # Navigate to Category tab (Usually bottom nav or menu)
@@ -67,21 +66,23 @@ async def crawl_zigzag():
             await asyncio.sleep(2)
             
             print("  👉 베스트 항목 클릭...")
-            await page.click("text=베스트")
-            await asyncio.sleep(5)
+            # 베스트 클릭 ~ 상품 카드 표시까지를 load_ms 로 (클릭만 재면 로드 시간이 아님)
+            with route_filter.scope("best"):
+                await page.click("text=베스트")
+                await asyncio.sleep(5)
             
-            # Check if we are on best page
-            if "best" not in page.url:
-                 print(f"  ⚠️  현재 URL: {page.url} (베스트 유도 실패, 직접 이동 시도)")
-                 await page.goto(f"{ZIGZAG_BASE}/best", wait_until="load", timeout=60000)
+                # Check if we are on best page
+                if "best" not in page.url:
+                     print(f"  ⚠️  현재 URL: {page.url} (베스트 유도 실패, 직접 이동 시도)")
+                     await page.goto(f"{ZIGZAG_BASE}/best", wait_until="load", timeout=60000)
             
-            # Wait for product cards
-            print("  🔍 상품 목록 대기...")
-            try:
-                await page.wait_for_selector("a.product-card-link", timeout=45000)
-            except:
-                print("  ⚠️  a.product-card-link 찾기 실패. 대안 셀렉터 시도...")
-                await page.wait_for_selector("article", timeout=15000)
+                # Wait for product cards
+                print("  🔍 상품 목록 대기...")
+                try:
+                    await page.wait_for_selector("a.product-card-link", timeout=45000)
+                except:
+                    print("  ⚠️  a.product-card-link 찾기 실패. 대안 셀렉터 시도...")
+                    await page.wait_for_selector("article", timeout=15000)
             
             # Scroll to load ~50 items
             await page.mouse.wheel(0, 4000)
@@ -182,8 +183,8 @@ async def crawl_zigzag():
 
         except Exception as e:
             print(f"  ❌ 크롤링 에러: {e}")
-        finally:
-            await browser.close()
+
+    route_filter.print_stats()
 
 
 if __name__ == "__main__":
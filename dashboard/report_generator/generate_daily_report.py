@@ -15,6 +15,8 @@ import json
 load_dotenv(os.path.join(dashboard_dir, ".env"))
 
 from generic_crawler.config import SUPABASE_URL, HEADERS
+from generic_crawler.supabase_client import sb
+from generic_crawler.llm_cache import cached_call
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "deepseek-r1:8b")
 OLLAMA_URL = "http://localhost:11434/api/generate"
 
@@ -22,7 +24,7 @@ def get_latest_insight():
     """Fetch the latest Daily Insight from Supabase."""
     print("🔍 Fetching latest Daily Insight...")
     try:
-        res = requests.get(
+        res = sb.get(
             f"{SUPABASE_URL}/rest/v1/products_master",
             headers=HEADERS,
             params={
@@ -40,17 +42,77 @@ def get_latest_insight():
         print(f"❌ Failed to fetch Insight: {e}")
         return None
 
+def get_brand_movements(days=8):
+    """최근 Daily Insight 들의 top_brands 순위로 브랜드 키워드 순위 변동 계산 (rank_history 와 같은 연산)
+    numpy 가 없는 환경이면 최근 2개 Insight 만 비교하는 기존 방식으로 계산"""
+    try:
+        res = sb.get(
+            f"{SUPABASE_URL}/rest/v1/products_master",
+            headers=HEADERS,
+            params={
+                "category": "eq.Daily Insight",
+                "select": "product_id,tags",
+                "order": "created_at.desc",
+                "limit": days
+            }
+        )
+        res.raise_for_status()
+        insights = res.json()
+    except Exception as e:
+        print(f"❌ Failed to fetch Insight history: {e}")
+        return {}
+
+    try:
+        from generic_crawler.rank_history import RankHistory, compute_movements  # numpy 필요
+    except ImportError as e:
+        print(f"⚠️ rank_history 사용 불가 ({e}) - 최근 2일 비교로 계산")
+        return brand_movements_fallback(insights)
+
+    rows = []
+    for insight in insights:
+        day = insight["product_id"].replace("daily_insight_", "")
+        for rank, brand in enumerate(ranked_brands(insight.get("tags") or {}), start=1):
+            rows.append((day, "all", brand, rank))
+    movements = compute_movements(RankHistory.from_rows("news_brand", rows)) if rows else None
+    if movements is None:
+        return {}
+    return {
+        str(brand): {"rank_change": int(change), "status": str(status)}
+        for brand, change, status in zip(movements["items"], movements["rank_change"], movements["status"])
+    }
+
+def brand_movements_fallback(insights):
+    """최신 Insight 와 직전 Insight 의 브랜드 순위 비교 (created_at desc 순서)"""
+    if len(insights) < 2:
+        return {}
+    current = ranked_brands(insights[0].get("tags") or {})
+    previous = {brand: rank for rank, brand in enumerate(ranked_brands(insights[1].get("tags") or {}), start=1)}
+    movements = {}
+    for rank, brand in enumerate(current, start=1):
+        if brand not in previous:
+            movements[brand] = {"rank_change": 0, "status": "new"}
+            continue
+        change = previous[brand] - rank
+        movements[brand] = {"rank_change": change, "status": "up" if change > 0 else "down" if change < 0 else "same"}
+    return movements
+
+def ranked_brands(tags):
+    """top_brands {brand: count} → 빈도순 브랜드 목록 (jsonb 는 key 순서를 보존하지 않음)"""
+    top_brands = tags.get("top_brands") or {}
+    return [k for k, _ in sorted(top_brands.items(), key=lambda kv: -kv[1])]
+
 def get_recent_news():
     """Fetch recent news articles from Supabase."""
     print("📰 Fetching recent News...")
     two_days_ago = (datetime.now() - timedelta(days=2)).isoformat()
     try:
-        res = requests.get(
+        res = sb.get(
             f"{SUPABASE_URL}/rest/v1/products_master",
             headers=HEADERS,
             params={
                 "category": "eq.News",
                 "created_at": f"gte.{two_days_ago}",
+                "ai_summary": "not.is.null",  # LLM 분석 대기 중인 기사 제외
                 "order": "created_at.desc",
                 "limit": 5
             }
@@ -89,7 +151,7 @@ def generate_ai_editorial(insight_data, news_data):
 [수집된 데이터 전문]
 {context}
 """
-    try:
+    def call():
         payload = {
             "model": OLLAMA_MODEL,
             "prompt": prompt,
@@ -104,14 +166,17 @@ def generate_ai_editorial(insight_data, news_data):
         
         # Clean up <think> tags if present in deepseek output
         import re
-        editorial = re.sub(r'<think>.*?</think>', '', editorial, flags=re.DOTALL).strip()
-        
-        return editorial
+        return re.sub(r'<think>.*?</think>', '', editorial, flags=re.DOTALL).strip()
+
+    try:
+        # 같은 날 같은 데이터로 다시 만들면 캐시 사용 (리포트 재생성 / 재시도)
+        return cached_call("daily_editorial", call, model=OLLAMA_MODEL, inputs={"prompt": prompt},
+                           temperature=0.4, ttl_days=2)
     except Exception as e:
         print(f"⚠️ Ollama AI Generation Failed: {e}")
         return "AI 분석을 로드하는 중 일시적인 오류가 발생했습니다. 나중에 다시 시도해 주세요."
 
-def render_html(ai_insight, keywords_data, news_data):
+def render_html(ai_insight, keywords_data, news_data, brand_movements=None):
     """Render the Jinja2 HTML template."""
     print("🎨 Rendering HTML template...")
     env = Environment(loader=FileSystemLoader(os.path.dirname(__file__)))
@@ -120,13 +185,14 @@ def render_html(ai_insight, keywords_data, news_data):
     # Format Keywords
     formatted_keywords = []
     if keywords_data and "tags" in keywords_data:
-        top_brands = keywords_data["tags"].get("top_brands", {})
-        top_ingredients = keywords_data["tags"].get("top_ingredients", {})
+        brand_movements = brand_movements or {}
         
-        for k, v in top_brands.items():
+        for k in ranked_brands(keywords_data["tags"]):
+            movement = brand_movements.get(k, {})
             formatted_keywords.append({
                 "name": f"{k.upper()}",
-                "rank_change": 0 # TODO: Calculate rank change in future phases
+                "rank_change": movement.get("rank_change", 0),
+                "status": movement.get("status", "same")
             })
             if len(formatted_keywords) >= 4: break
             
@@ -197,7 +263,9 @@ def main():
     
     ai_editorial = generate_ai_editorial(insight_data, news_data)
     
-    html_path = render_html(ai_editorial, insight_data, news_data)
+    brand_movements = get_brand_movements()
+    
+    html_path = render_html(ai_editorial, insight_data, news_data, brand_movements)
     pdf_path = generate_pdf(html_path)
     
     print("\n🎉 Report Generation Complete!")
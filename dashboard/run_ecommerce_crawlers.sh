@@ -1,39 +1,20 @@
 #!/bin/bash
-# run_ecommerce_crawlers.sh - Sequential runner for all 4 e-commerce platforms
+# run_ecommerce_crawlers.sh - Parallel runner for all 4 e-commerce platforms
+# (의존성 그래프는 scripts/crawl_orchestrator.py 의 PIPELINES["ecommerce"] 참고)
+#   - 올리브영/무신사/에이블리/SSG 랭킹 크롤러는 동시에 실행 (CRAWL_MAX_PARALLEL, 기본 3)
+#   - 각 플랫폼 크롤이 끝나는 즉시 review_collector --platform <플랫폼> 시작 (Ollama 는 1개씩)
 
 LOG_FILE="/Users/jungdookim/NAS/datapool-test/dashboard/cron_ecommerce.log"
 export PYTHONPATH=$PYTHONPATH:/Users/jungdookim/NAS/datapool-test/dashboard
 VENV_PYTHON="/Users/jungdookim/NAS/datapool-test/dashboard/venv/bin/python3"
-CRAWLER_DIR="/Users/jungdookim/NAS/datapool-test/dashboard/generic_crawler"
+DASHBOARD_DIR="/Users/jungdookim/NAS/datapool-test/dashboard"
 
 echo "========================================================" >> $LOG_FILE
 echo "🏁 [$(date)] Starting Daily E-commerce Crawling Pipeline..." >> $LOG_FILE
 echo "========================================================" >> $LOG_FILE
 
-# 1. OliveYoung Crawler
-echo "➡️ [$(date)] Starting OliveYoung Crawler..." >> $LOG_FILE
-$VENV_PYTHON -u $CRAWLER_DIR/oliveyoung_crawler.py >> $LOG_FILE 2>&1
-echo "✅ [$(date)] OliveYoung Crawler Finished." >> $LOG_FILE
-
-# 2. Musinsa Crawler
-echo "➡️ [$(date)] Starting Musinsa Crawler..." >> $LOG_FILE
-$VENV_PYTHON -u $CRAWLER_DIR/musinsa_crawler.py >> $LOG_FILE 2>&1
-echo "✅ [$(date)] Musinsa Crawler Finished." >> $LOG_FILE
-
-# 3. Ably Crawler
-echo "➡️ [$(date)] Starting Ably Crawler..." >> $LOG_FILE
-$VENV_PYTHON -u $CRAWLER_DIR/ably_crawler.py >> $LOG_FILE 2>&1
-echo "✅ [$(date)] Ably Crawler Finished." >> $LOG_FILE
-
-# 4. SSG Crawler
-echo "➡️ [$(date)] Starting SSG Crawler..." >> $LOG_FILE
-$VENV_PYTHON -u $CRAWLER_DIR/ssg_crawler.py >> $LOG_FILE 2>&1
-echo "✅ [$(date)] SSG Crawler Finished." >> $LOG_FILE
-
-# 5. AI Vision Review Collector (runs after all crawlers)
-echo "➡️ [$(date)] Starting AI Vision Review Collector..." >> $LOG_FILE
-$VENV_PYTHON -u $CRAWLER_DIR/review_collector.py >> $LOG_FILE 2>&1
-echo "✅ [$(date)] AI Vision Review Collector Finished." >> $LOG_FILE
+# 오케스트레이터가 job 마다 [job] prefix 를 붙여 출력하고 crawl_logs 에 job 별 시간을 기록
+$VENV_PYTHON -u $DASHBOARD_DIR/scripts/crawl_orchestrator.py ecommerce >> $LOG_FILE 2>&1
 
 echo "========================================================" >> $LOG_FILE
 echo "🎉 [$(date)] Daily E-commerce Crawling Pipeline Completed!" >> $LOG_FILE
@@ -11,5 +11,8 @@ echo "=========================================="
 /Users/jungdookim/NAS/datapool-test/dashboard/venv/bin/python3 -u \
     /Users/jungdookim/NAS/datapool-test/dashboard/generic_crawler/naver_best_crawler.py
 
+/Users/jungdookim/NAS/datapool-test/dashboard/venv/bin/python3 -u \
+    /Users/jungdookim/NAS/datapool-test/dashboard/generic_crawler/rank_history.py sync --source naver_best
+
 echo "[$(date '+%Y-%m-%d %H:%M:%S')] 네이버 베스트 크롤러 완료"
 echo ""
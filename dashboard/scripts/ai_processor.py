@@ -1,9 +1,13 @@
 import os
+import sys
 import json
 import asyncio
 import requests
 from datetime import datetime
 from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.supabase_client import sb, print_stats
+from generic_crawler.llm_cache import cached_call, print_cache_stats
 # Native Python Packages Only
 
 # Load environment variables
@@ -24,6 +28,22 @@ HEADERS = {
     "Content-Type": "application/json",
 }
 
+def call_ollama(prompt):
+    """Ollama 호출 → JSON (실패 시 예외 - 캐시에 저장되지 않음)"""
+    payload = {
+        "model": OLLAMA_MODEL,
+        "prompt": prompt,
+        "stream": False
+    }
+    res = requests.post(OLLAMA_URL, json=payload, timeout=300)
+    res.raise_for_status()
+    text = res.json().get("response", "").strip()
+    if text.startswith("```json"):
+        text = text.split("```json")[1].split("```")[0].strip()
+    elif text.startswith("```"):
+        text = text.split("```")[1].split("```")[0].strip()
+    return json.loads(text)
+
 async def analyze_product(product):
     """Analyze a standard product for pros/cons."""
     name = product.get("name", "Unknown Product")
@@ -46,19 +66,7 @@ async def analyze_product(product):
     """
     
     try:
-        payload = {
-            "model": OLLAMA_MODEL,
-            "prompt": prompt,
-            "stream": False
-        }
-        res = requests.post(OLLAMA_URL, json=payload, timeout=300)
-        res.raise_for_status()
-        text = res.json().get("response", "").strip()
-        if text.startswith("```json"):
-            text = text.split("```json")[1].split("```")[0].strip()
-        elif text.startswith("```"):
-            text = text.split("```")[1].split("```")[0].strip()
-        return json.loads(text)
+        return cached_call("ai_processor_product", lambda: call_ollama(prompt), model=OLLAMA_MODEL, inputs={"prompt": prompt})
     except Exception as e:
         print(f"  ❌ AI Analysis failed for {name}: {e}")
         return None
@@ -83,19 +91,7 @@ async def analyze_trend(keyword_item):
     """
     
     try:
-        payload = {
-            "model": OLLAMA_MODEL,
-            "prompt": prompt,
-            "stream": False
-        }
-        res = requests.post(OLLAMA_URL, json=payload, timeout=300)
-        res.raise_for_status()
-        text = res.json().get("response", "").strip()
-        if text.startswith("```json"):
-            text = text.split("```json")[1].split("```")[0].strip()
-        elif text.startswith("```"):
-            text = text.split("```")[1].split("```")[0].strip()
-        return json.loads(text)
+        return cached_call("ai_processor_trend", lambda: call_ollama(prompt), model=OLLAMA_MODEL, inputs={"prompt": prompt})
     except Exception as e:
         print(f"  ❌ AI Analysis failed for trend {keyword}: {e}")
         return None
@@ -106,11 +102,12 @@ async def process_batch():
     # ai_summary가 없는 최신 50개 상품 가져오기
     # source가 google_trends, naver_datalab인 것과 일반 상품 구분 필요
     try:
-        res = requests.get(
+        res = sb.get(
             f"{SUPABASE_URL}/rest/v1/products_master",
             headers=HEADERS,
             params={
                 "ai_summary": "is.null",
+                "enrichment_status": "is.null",  # 뉴스 기사는 news_enricher.py 가 처리
                 "order": "created_at.desc",
                 "limit": "50"
             },
@@ -129,7 +126,7 @@ async def process_batch():
                 summary = await analyze_product(p)
             
             if summary:
-                update_res = requests.patch(
+                update_res = sb.patch(
                     f"{SUPABASE_URL}/rest/v1/products_master",
                     headers=HEADERS,
                     params={"id": "eq." + str(p["id"])},
@@ -146,6 +143,8 @@ async def process_batch():
             await asyncio.sleep(1)
             
         print(f"[{datetime.now()}] AI 분석 완료 (총 {processed}건)")
+        print_stats()
+        print_cache_stats()
         
     except Exception as e:
         print(f"  ❌ 프로세스 예외 발생: {e}")
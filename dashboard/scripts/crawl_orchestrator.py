@@ -0,0 +1,312 @@
+"""
+crawl_orchestrator.py
+──────────────────────────────────────────────────────────────
+크롤러들을 의존성 그래프(job → deps)로 선언하고 병렬 실행합니다.
+
+- 서로 독립인 소스(올리브영/무신사/에이블리/SSG …)는 동시에 실행 (전역 동시 실행 상한)
+- review_collector 는 해당 플랫폼 랭킹 크롤이 끝나는 즉시 시작
+- rank_history (순위 변동 계산) 도 플랫폼별 랭킹 크롤 직후 실행
+- 같은 자원을 쓰는 job 은 resource group 으로 직렬화 (예: Ollama Vision 모델은 1개씩)
+- deps 는 선행 job 이 성공해야 실행, after 는 성공/실패와 관계없이 끝나기만 하면 실행 (soft dependency)
+- job 별 대기/실행 시간을 crawl_logs 에 구조화해서 기록
+
+사용법:
+  python scripts/crawl_orchestrator.py ecommerce              # 이커머스 4사 + 리뷰 수집
+  python scripts/crawl_orchestrator.py trends                 # 구글 트렌드 + 데이터랩 → Gemini 태깅
+  python scripts/crawl_orchestrator.py news                   # 뉴스 원문 수집 → LLM 태그/요약 (큐 처리)
+  python scripts/crawl_orchestrator.py ecommerce --max-parallel 2
+  python scripts/crawl_orchestrator.py ecommerce --only ssg,reviews_ssg
+  python scripts/crawl_orchestrator.py ecommerce --dry-run    # 실행 순서만 출력
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+from datetime import datetime
+
+# 루트 디렉토리 (scripts 폴더의 상위)
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+from generic_crawler.config import SUPABASE_URL, HEADERS
+from generic_crawler.supabase_client import async_sb
+
+MAX_PARALLEL = int(os.getenv("CRAWL_MAX_PARALLEL", "3"))
+JOB_TIMEOUT = int(os.getenv("CRAWL_JOB_TIMEOUT", str(3 * 60 * 60)))  # job 당 최대 3시간
+
+# resource group 별 동시 실행 수 (전역 상한과 별도로 적용)
+RESOURCE_LIMITS = {
+    "ollama": 1,   # review_collector: 로컬 Vision 모델 하나를 공유
+}
+
+
+def job(name, script, *args, deps=(), after=(), group=None, label=None):
+    return {
+        "name": name,
+        "label": label or name,
+        "cmd": [script, *args],
+        "deps": list(deps),
+        "after": list(after),
+        "group": group,
+    }
+
+
+def review_job(platform):
+    return job(
+        f"reviews_{platform}", "generic_crawler/review_collector.py", "--platform", platform,
+        deps=[platform], group="ollama", label=f"{platform} AI 리뷰 수집",
+    )
+
+
+def rank_job(platform):
+    return job(
+        f"rank_history_{platform}", "generic_crawler/rank_history.py", "sync", "--source", platform,
+        deps=[platform], label=f"{platform} 순위 변동 계산",
+    )
+
+
+PIPELINES = {
+    "ecommerce": [
+        job("oliveyoung", "generic_crawler/oliveyoung_crawler.py", label="올리브영 랭킹"),
+        job("musinsa", "generic_crawler/musinsa_crawler.py", label="무신사 랭킹"),
+        job("ably", "generic_crawler/ably_crawler.py", label="에이블리 랭킹"),
+        job("ssg", "generic_crawler/ssg_crawler.py", label="SSG 랭킹"),
+        review_job("oliveyoung"),
+        review_job("musinsa"),
+        review_job("ably"),
+        review_job("ssg"),
+        rank_job("oliveyoung"),
+        rank_job("musinsa"),
+        rank_job("ably"),
+        rank_job("ssg"),
+        job("embeddings", "generic_crawler/embeddings.py", "run",
+            deps=["oliveyoung", "musinsa", "ably", "ssg"], group="ollama",
+            label="상품 임베딩 (신규/변경분)"),
+    ],
+    "trends": [
+        job("google_trends", "generic_crawler/google_trends_crawler.py", label="구글 트렌드 (쇼핑 특화)"),
+        job("naver_datalab", "generic_crawler/naver_datalab_crawler.py", label="네이버 데이터랩"),
+        # 트렌드 크롤러 하나가 실패해도 다른 쪽이 저장한 키워드는 태깅 (기존 순차 실행과 동일)
+        job("trend_enricher", "scripts/trend_enricher.py",
+            after=["google_trends", "naver_datalab"], label="Gemini 트렌드 태깅 (브랜드/성분/패션)"),
+        rank_job("google_trends"),
+        rank_job("naver_datalab"),
+    ],
+    "news": [
+        job("news", "generic_crawler/news_trend_crawler.py", label="뉴스 기사 원문 수집"),
+        job("news_enricher", "generic_crawler/news_enricher.py",
+            deps=["news"], group="ollama", label="뉴스 LLM 분석 (태그/요약)"),
+    ],
+}
+
+
+def validate(jobs):
+    """알 수 없는 의존성 / 순환 의존성 검사 후 위상 정렬 순서를 반환"""
+    by_name = {j["name"]: j for j in jobs}
+    for j in jobs:
+        for d in j["deps"] + j["after"]:
+            if d not in by_name:
+                raise ValueError(f"{j['name']}: 알 수 없는 의존성 '{d}'")
+
+    order, state = [], {}
+
+    def visit(name, path):
+        if state.get(name) == "done":
+            return
+        if state.get(name) == "visiting":
+            raise ValueError(f"순환 의존성: {' → '.join(path + [name])}")
+        state[name] = "visiting"
+        for d in by_name[name]["deps"] + by_name[name]["after"]:
+            visit(d, path + [name])
+        state[name] = "done"
+        order.append(name)
+
+    for j in jobs:
+        visit(j["name"], [])
+    return order
+
+
+def select_jobs(jobs, only):
+    """--only 로 고른 job 만 남기고, 빠진 의존성은 이미 끝난 것으로 간주"""
+    if not only:
+        return jobs
+    keep = set(only)
+    unknown = keep - {j["name"] for j in jobs}
+    if unknown:
+        raise ValueError(f"알 수 없는 job: {', '.join(sorted(unknown))}")
+    return [dict(j, deps=[d for d in j["deps"] if d in keep], after=[d for d in j["after"] if d in keep])
+            for j in jobs if j["name"] in keep]
+
+
+def ts():
+    return datetime.now().strftime('%H:%M:%S')
+
+
+async def log_job(pipeline, run_id, result):
+    try:
+        await async_sb.post(f"{SUPABASE_URL}/rest/v1/crawl_logs", headers=HEADERS, json={
+            "job_name": f"orchestrator_{pipeline}_{result['name']}",
+            "status": result["status"],
+            "started_at": result["started_at"],
+            "finished_at": result["finished_at"],
+            "error_message": result.get("error"),
+            "metadata_json": {
+                "run_id": run_id,
+                "pipeline": pipeline,
+                "cmd": result["cmd"],
+                "deps": result["deps"],
+                "exit_code": result.get("exit_code"),
+                "wait_s": result.get("wait_s"),
+                "duration_s": result.get("duration_s"),
+            },
+        }, timeout=10)
+    except Exception as e:
+        print(f"Warning: Could not log job timing: {e}")
+
+
+async def run_job(spec, gate, groups, timeout):
+    """subprocess 로 job 실행. 출력은 '[job] ...' prefix 를 붙여 그대로 흘려보냄"""
+    result = {"name": spec["name"], "cmd": spec["cmd"], "deps": spec["deps"], "started_at": None}
+    queued = time.perf_counter()
+    group_sem = groups.get(spec["group"])
+
+    # group 먼저 잡아야 Ollama 대기 중인 job 이 전역 슬롯을 점유하지 않음
+    if group_sem:
+        await group_sem.acquire()
+    try:
+        async with gate:
+            result["wait_s"] = round(time.perf_counter() - queued, 1)
+            result["started_at"] = datetime.now().isoformat()
+            print(f"\n[{ts()}] ▶ {spec['label']} 시작 (대기 {result['wait_s']}s)")
+            t0 = time.perf_counter()
+
+            proc = await asyncio.create_subprocess_exec(
+                sys.executable, "-u", *spec["cmd"],
+                cwd=ROOT,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+
+            async def pump():
+                async for line in proc.stdout:
+                    print(f"[{spec['name']}] {line.decode(errors='replace').rstrip()}", flush=True)
+
+            try:
+                await asyncio.wait_for(asyncio.gather(pump(), proc.wait()), timeout=timeout)
+                result["exit_code"] = proc.returncode
+                result["status"] = "completed" if proc.returncode == 0 else "failed"
+                if proc.returncode != 0:
+                    result["error"] = f"exit code {proc.returncode}"
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                result["exit_code"] = proc.returncode
+                result["status"] = "failed"
+                result["error"] = f"timeout after {timeout}s"
+
+            result["duration_s"] = round(time.perf_counter() - t0, 1)
+    finally:
+        if group_sem:
+            group_sem.release()
+
+    result["finished_at"] = datetime.now().isoformat()
+    mark = "✅" if result["status"] == "completed" else "❌"
+    print(f"  {mark} [{ts()}] {spec['label']} {result['status']} ({result['duration_s']}s)"
+          + (f" - {result['error']}" if result.get("error") else ""))
+    return result
+
+
+async def run_pipeline(pipeline, max_parallel=MAX_PARALLEL, only=None, timeout=JOB_TIMEOUT, dry_run=False):
+    """파이프라인 실행. job 이름 → 결과 dict 를 반환"""
+    jobs = select_jobs(PIPELINES[pipeline], only)
+    order = validate(jobs)
+    by_name = {j["name"]: j for j in jobs}
+
+    print("=" * 60)
+    print(f"  🏁 [{pipeline}] 오케스트레이터 시작 - job {len(jobs)}개, 동시 실행 {max_parallel}")
+    for name in order:
+        deps = by_name[name]["deps"] + [f"{d}(after)" for d in by_name[name]["after"]]
+        print(f"    - {name}" + (f"  ← {', '.join(deps)}" if deps else ""))
+    print("=" * 60)
+    if dry_run:
+        return {}
+
+    run_id = datetime.now().strftime("%Y%m%d%H%M%S")
+    gate = asyncio.Semaphore(max_parallel)
+    groups = {g: asyncio.Semaphore(n) for g, n in RESOURCE_LIMITS.items()}
+    started_at = datetime.now().isoformat()
+    started = time.perf_counter()
+
+    tasks = {}
+    results = {}
+
+    async def start(spec):
+        dep_results = await asyncio.gather(*(tasks[d] for d in spec["deps"]))
+        await asyncio.gather(*(tasks[d] for d in spec["after"]))  # 결과와 무관하게 끝나기만 기다림
+        failed = [r["name"] for r in dep_results if r["status"] != "completed"]
+        if failed:
+            now = datetime.now().isoformat()
+            print(f"  ⏭ [{ts()}] {spec['label']} 건너뜀 (선행 job 실패: {', '.join(failed)})")
+            result = {"name": spec["name"], "cmd": spec["cmd"], "deps": spec["deps"],
+                      "status": "skipped", "error": f"upstream failed: {', '.join(failed)}",
+                      "started_at": now, "finished_at": now}
+        else:
+            result = await run_job(spec, gate, groups, timeout)
+        results[spec["name"]] = result
+        await log_job(pipeline, run_id, result)
+        return result
+
+    # 위상 정렬 순서로 task 를 만들어 두면 deps 의 task 가 항상 먼저 존재함
+    for name in order:
+        tasks[name] = asyncio.create_task(start(by_name[name]))
+    await asyncio.gather(*tasks.values())
+
+    total_s = round(time.perf_counter() - started, 1)
+    serial_s = round(sum(r.get("duration_s") or 0 for r in results.values()), 1)
+
+    print("\n" + "=" * 60)
+    print(f"  🎉 [{pipeline}] 완료 - 총 {total_s}s (순차 실행 시 {serial_s}s)")
+    for name in order:
+        r = results[name]
+        print(f"    - {name:<22} {r['status']:<10} 대기 {r.get('wait_s', 0):>7}s  실행 {r.get('duration_s', 0):>7}s")
+    print("=" * 60)
+
+    statuses = [r["status"] for r in results.values()]
+    try:
+        await async_sb.post(f"{SUPABASE_URL}/rest/v1/crawl_logs", headers=HEADERS, json={
+            "job_name": f"orchestrator_{pipeline}",
+            "status": "completed" if all(s == "completed" for s in statuses) else "failed",
+            "started_at": started_at,
+            "finished_at": datetime.now().isoformat(),
+            "items_count": statuses.count("completed"),
+            "metadata_json": {
+                "run_id": run_id,
+                "max_parallel": max_parallel,
+                "total_s": total_s,
+                "serial_s": serial_s,
+                "jobs": {n: {k: results[n].get(k) for k in ("status", "wait_s", "duration_s")} for n in order},
+            },
+        }, timeout=10)
+    except Exception as e:
+        print(f"Warning: Could not log pipeline summary: {e}")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel crawler orchestrator")
+    parser.add_argument("pipeline", choices=sorted(PIPELINES), help="실행할 파이프라인")
+    parser.add_argument("--max-parallel", type=int, default=MAX_PARALLEL, help=f"전역 동시 실행 수 (default: {MAX_PARALLEL})")
+    parser.add_argument("--only", type=str, help="쉼표로 구분한 job 이름만 실행")
+    parser.add_argument("--timeout", type=int, default=JOB_TIMEOUT, help="job 당 최대 실행 시간(초)")
+    parser.add_argument("--dry-run", action="store_true", help="실행 순서만 출력")
+    args = parser.parse_args()
+
+    only = [s.strip() for s in args.only.split(",") if s.strip()] if args.only else None
+    results = asyncio.run(run_pipeline(args.pipeline, args.max_parallel, only, args.timeout, args.dry_run))
+    if any(r["status"] != "completed" for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
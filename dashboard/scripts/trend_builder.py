@@ -14,6 +14,9 @@ import google.generativeai as genai
 dashboard_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(dashboard_dir)
 from generic_crawler.config import SUPABASE_URL, HEADERS
+from generic_crawler.supabase_client import sb
+from generic_crawler.llm_cache import cached_call, print_cache_stats
+from generic_crawler.embeddings import embed_query, search_products
 
 load_dotenv(os.path.join(dashboard_dir, ".env"))
 
@@ -23,7 +26,13 @@ genai.configure(api_key=GEMINI_API_KEY)
 GEMINI_MODELS = ["gemini-3-flash-preview", "gemini-2.5-flash", "gemini-2.5-flash-lite"]
 
 def gemini_call(prompt, temperature=0.3, retries=2):
-    """Call Gemini API with automatic model fallback and retry."""
+    """Call Gemini API with automatic model fallback and retry (responses cached by prompt, see llm_cache)."""
+    return cached_call(
+        "trend_builder", lambda: _gemini_call(prompt, temperature, retries),
+        model="|".join(GEMINI_MODELS), inputs={"prompt": prompt}, temperature=temperature,
+    )
+
+def _gemini_call(prompt, temperature, retries):
     for model_name in GEMINI_MODELS:
         for attempt in range(retries):
             try:
@@ -91,7 +100,7 @@ def get_trend_signals(sector_key):
     src_filter = ",".join(cfg["trend_sources"])
     seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
     try:
-        res = requests.get(
+        res = sb.get(
             f"{SUPABASE_URL}/rest/v1/products_master", headers=HEADERS,
             params={
                 "source": f"in.({src_filter})",
@@ -125,7 +134,7 @@ def get_top_products(sector_key=None, platform=None, limit=30):
             ssg_cats = SECTORS[sector_key]["ssg_filter"].split(",")
             params["category"] = f"in.({','.join(ssg_cats)})"
         try:
-            res = requests.get(f"{SUPABASE_URL}/rest/v1/products_master",
+            res = sb.get(f"{SUPABASE_URL}/rest/v1/products_master",
                                headers=HEADERS, params=params)
             res.raise_for_status()
             all_products.extend(res.json())
@@ -247,26 +256,71 @@ def extract_sector_trend(sector_key, trend_signals, shop_products):
 
 
 # ── STEP 3: Match Products ──────────────────────────────────────
+# 1) 트렌드 키워드 / key_elements 를 임베딩해 match_products_local (HNSW) 로 전체 카탈로그에서 후보 검색
+# 2) 유사도 + 섹터 소스 / 키워드 포함 보너스로 점수화
+# 3) 상위 RERANK_K 개만 Gemini 가 재정렬 (실패 시 retrieval 점수 그대로 사용)
+RETRIEVAL_K = 40          # query 당 match_products_local 후보 수
+RETRIEVAL_THRESHOLD = 0.3
+RERANK_K = 12             # LLM 에 보내는 후보 수
+SECTOR_BONUS = 0.03       # 섹터의 product_sources 상품
+KEYWORD_BONUS = 0.05      # 상품명/브랜드에 트렌드 키워드가 그대로 들어간 경우
+MIN_RETRIEVAL_SCORE = 0.6 # LLM 재정렬 실패 시 채택 기준 (match_score = score * 100)
+
+
+def retrieve_candidates(sector_key, keyword, elements):
+    """키워드 단독 + 키워드와 key_elements 조합 두 query 로 검색, 상품별 최고 유사도로 합침"""
+    cfg = SECTORS[sector_key]
+    queries = [keyword, f"{keyword} {' '.join(elements)}".strip()]
+    candidates = {}
+    for query in dict.fromkeys(q for q in queries if q):
+        for p in search_products(embedding=embed_query(query), count=RETRIEVAL_K, threshold=RETRIEVAL_THRESHOLD):
+            best = candidates.get(p["id"])
+            if best is None or p.get("similarity", 0) > best.get("similarity", 0):
+                candidates[p["id"]] = p
+
+    key = keyword.replace(" ", "").lower()
+    for p in candidates.values():
+        p.setdefault("url", p.get("product_url"))
+        text = f"{p.get('brand') or ''}{p.get('name') or ''}".replace(" ", "").lower()
+        p["retrieval_score"] = round(
+            p.get("similarity", 0)
+            + (SECTOR_BONUS if p.get("source") in cfg["product_sources"] else 0)
+            + (KEYWORD_BONUS if key and key in text else 0), 4)
+    return sorted(candidates.values(), key=lambda p: p["retrieval_score"], reverse=True)
+
+
 def match_products(sector_key, trend_data, shop_products):
     cfg = SECTORS[sector_key]
     keyword = trend_data.get("trend_keyword", "")
     elements = trend_data.get("key_elements", [])
     print(f"  🔍 Matching products for '{keyword}'...")
 
-    if not shop_products:
+    t0 = time.perf_counter()
+    candidates = retrieve_candidates(sector_key, keyword, elements)
+    if candidates:
+        print(f"  🧭 {len(candidates)} candidates from vector search ({time.perf_counter() - t0:.1f}s),"
+              f" top score {candidates[0]['retrieval_score']:.3f} → re-ranking {min(len(candidates), RERANK_K)}")
+        candidates = candidates[:RERANK_K]
+    else:
+        # 임베딩이 아직 없거나 임베딩 서버가 꺼져 있으면 기존처럼 최근 상품 30개
+        print("  ⚠️ Vector search unavailable — falling back to recent shop products")
+        candidates = shop_products[:30]
+
+    if not candidates:
         return []
 
     product_list = ""
-    for p in shop_products[:30]:
-        price_str = f"₩{int(p.get('price',0)):,}" if p.get('price') else ""
-        product_list += f"- [ID:{p['id']}] {p.get('brand','')} | {p.get('name','')} | {price_str} | {p.get('source','')}\n"
+    for p in candidates:
+        price_str = f"₩{int(p.get('price') or 0):,}" if p.get('price') else ""
+        score_str = f" | 유사도 {p['retrieval_score']:.2f}" if "retrieval_score" in p else ""
+        product_list += f"- [ID:{p['id']}] {p.get('brand','')} | {p.get('name','')} | {price_str} | {p.get('source','')}{score_str}\n"
 
     prompt = f"""당신은 동남아시아(베트남, 태국) B2B 셀러에게 한국 상품을 추천하는 소싱 큐레이터입니다.
 
 [현재 트렌드]: {keyword}
 [트렌드 특성]: {', '.join(elements)}
 
-[후보 상품 리스트]:
+[후보 상품 리스트] (유사도: 벡터 검색 점수, 참고용):
 {product_list}
 
 위 후보 중에서 이 트렌드에 가장 완벽하게 부합하는 상품 최대 **3개**를 선정하세요.
@@ -281,8 +335,8 @@ def match_products(sector_key, trend_data, shop_products):
 ]"""
 
     try:
+        # 429 는 _gemini_call 이 대기 후 재시도하므로 고정 sleep 없음
         scored = gemini_call(prompt, 0.2)
-        time.sleep(3)
 
         if isinstance(scored, dict):
             for v in scored.values():
@@ -294,6 +348,7 @@ def match_products(sector_key, trend_data, shop_products):
         if not isinstance(scored, list):
             scored = []
 
+        by_id = {str(p['id']): p for p in candidates}
         results = []
         for m in scored:
             if not isinstance(m, dict) or 'id' not in m:
@@ -301,14 +356,19 @@ def match_products(sector_key, trend_data, shop_products):
             # 무관한 상품 컷 오프 (예: 매트리스에 잠옷/후라이팬 방지)
             if int(m.get('match_score', 0)) < 60:
                 continue
-            orig = next((p for p in shop_products if str(p['id']) == str(m['id'])), None)
+            orig = by_id.get(str(m['id']))
             if orig:
                 orig.update(m)
                 results.append(orig)
         return sorted(results, key=lambda x: x.get('match_score', 0), reverse=True)[:3]
     except Exception as e:
         print(f"  ❌ Matching failed: {e}")
-        return []
+        # LLM 재정렬 실패 시 retrieval 점수 상위 상품 사용
+        fallback = [p for p in candidates if p.get("retrieval_score", 0) >= MIN_RETRIEVAL_SCORE][:3]
+        for p in fallback:
+            p["match_score"] = min(int(p["retrieval_score"] * 100), 100)
+            p["match_reason"] = f"'{keyword}' 벡터 유사도 {p['similarity']:.2f}"
+        return fallback
 
 
 # ── STEP 4: Marketing Pitch ────────────────────────────────────
@@ -446,6 +506,7 @@ def main():
 
     duration = str(datetime.now() - start).split('.')[0]
     print(f"\n✅ Pipeline complete in {duration}")
+    print_cache_stats()
 
 
 if __name__ == "__main__":
@@ -7,37 +7,16 @@ trend_crawler_hourly.py
 
 종료:  Ctrl+C
 """
-import subprocess
 import time
-import sys
-import os
+import asyncio
 from datetime import datetime
 
-# 루트 디렉토리 (scripts 폴더의 상위)
-ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+from crawl_orchestrator import run_pipeline
 
 INTERVAL_SECONDS = 60 * 60  # 1시간
 
-# ① 크롤러 (데이터 수집)
-CRAWLERS = [
-    ("구글 트렌드 (쇼핑 특화)", "generic_crawler/google_trends_crawler.py"),
-    ("네이버 데이터랩",          "generic_crawler/naver_datalab_crawler.py"),
-]
-
-# ② Gemini 후처리 (태그 추출)
-ENRICHER = ("Gemini 트렌드 태깅 (브랜드/성분/패션)", "scripts/trend_enricher.py")
-
-def run_script(label, script_path):
-    print(f"\n[{datetime.now().strftime('%H:%M:%S')}] ▶ {label} 시작...")
-    result = subprocess.run(
-        [sys.executable, script_path],
-        cwd=ROOT,
-        capture_output=False,
-    )
-    if result.returncode == 0:
-        print(f"  ✅ {label} 완료")
-    else:
-        print(f"  ❌ {label} 실패 (exit code {result.returncode})")
+# 크롤러(구글 트렌드 + 네이버 데이터랩, 병렬) → Gemini 태깅 파이프라인은
+# crawl_orchestrator.PIPELINES["trends"] 에 의존성 그래프로 정의되어 있습니다.
 
 def main():
     print("=" * 60)
@@ -54,20 +33,11 @@ def main():
         print(f"  [사이클 #{run_count}] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print(f"{'=' * 50}")
 
-        # 단계 1: 크롤러 실행
-        print("\n📡 [단계 1/2] 트렌드 데이터 수집")
-        for label, path in CRAWLERS:
-            try:
-                run_script(label, path)
-            except Exception as e:
-                print(f"  ❌ {label} 예외 발생: {e}")
-
-        # 단계 2: Gemini 후처리 (크롤러 완료 후 바로 실행)
-        print("\n🤖 [단계 2/2] Gemini AI 트렌드 태깅")
+        # 크롤러 2종은 동시에, Gemini 후처리는 둘 다 끝난 뒤 실행
         try:
-            run_script(*ENRICHER)
+            asyncio.run(run_pipeline("trends"))
         except Exception as e:
-            print(f"  ❌ Gemini 태깅 예외 발생: {e}")
+            print(f"  ❌ 트렌드 파이프라인 예외 발생: {e}")
 
         next_run = datetime.fromtimestamp(time.time() + INTERVAL_SECONDS)
         print(f"\n  💤 다음 실행: {next_run.strftime('%H:%M:%S')} (1시간 후)")
@@ -13,12 +13,13 @@ products_master.tags JSONB 필드에 자동 태깅합니다.
 """
 import os
 import sys
-import json
 import time
-import requests
 import argparse
 from datetime import datetime
 from dotenv import load_dotenv
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.supabase_client import sb, print_stats
+from generic_crawler.ollama_client import get_client
 
 # ─── 환경 설정 ────────────────────────────────────────────────
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -27,7 +28,6 @@ load_dotenv(os.path.join(ROOT, ".env"))
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "deepseek-r1:8b")
-OLLAMA_URL = "http://localhost:11434/api/generate"
 
 SB_HEADERS = {
     "apikey": SUPABASE_KEY,
@@ -39,13 +39,13 @@ SB_HEADERS = {
 # ─── Supabase 유틸 ────────────────────────────────────────────
 def sb_get(table, params=""):
     url = f"{SUPABASE_URL}/rest/v1/{table}?{params}"
-    r = requests.get(url, headers=SB_HEADERS, timeout=15)
+    r = sb.get(url, headers=SB_HEADERS, timeout=15)
     r.raise_for_status()
     return r.json()
 
 def sb_patch(table, filter_params, body):
     url = f"{SUPABASE_URL}/rest/v1/{table}?{filter_params}"
-    r = requests.patch(url, headers=SB_HEADERS, json=body, timeout=15)
+    r = sb.patch(url, headers=SB_HEADERS, json=body, timeout=15)
     return r.status_code in (200, 204)
 
 # ─── 최신 트렌드 키워드 조회 ──────────────────────────────────
@@ -83,44 +83,9 @@ PROMPT_TEMPLATE = """
 JSON만 반환하고 다른 설명은 하지 마세요.
 """
 
-def call_ollama(keywords: list[str]) -> list[dict]:
-    """Ollama에게 키워드 목록을 전달하고 태그 분석 결과를 받습니다."""
+def build_prompt(keywords: list[str]) -> str:
     kw_text = "\n".join(f"{i+1}. {kw}" for i, kw in enumerate(keywords))
-    prompt = PROMPT_TEMPLATE.format(count=len(keywords), keywords=kw_text)
-
-    payload = {
-        "model": OLLAMA_MODEL,
-        "prompt": prompt,
-        "stream": False,
-        "options": {
-            "temperature": 0.1
-        }
-    }
-
-    try:
-        print("    -> Sending request to Ollama...")
-        r = requests.post(OLLAMA_URL, json=payload, timeout=600)
-        print("    -> Received response. Status:", r.status_code)
-        r.raise_for_status()
-        data = r.json()
-        text = data.get("response", "").strip()
-        # Sometimes mistral wraps json in markdown code blocks
-        if text.startswith("```json"):
-            text = text.split("```json")[1].split("```")[0].strip()
-        elif text.startswith("```"):
-            text = text.split("```")[1].split("```")[0].strip()
-            
-        print("    -> Raw text from Ollama:", repr(text[:100]) + "...")
-        parsed = json.loads(text)
-        if isinstance(parsed, dict):
-            # Extract array if mistral wrapped it in an object
-            for key in ["keywords", "tags", "data", "results", "items"]:
-                if key in parsed and isinstance(parsed[key], list):
-                    return parsed[key]
-        return parsed
-    except Exception as e:
-        print(f"  ❌ Ollama API 오류: {e}")
-        return []
+    return PROMPT_TEMPLATE.format(count=len(keywords), keywords=kw_text)
 
 # ─── 태그 저장 ────────────────────────────────────────────────
 def save_tags(product_id: str, source: str, tags: dict):
@@ -148,18 +113,16 @@ def enrich_once():
     keywords = [r["name"] for r in rows]
     print(f"  📋 키워드 {len(keywords)}개 로드 완료")
 
-    # Ollama 호출 (20개씩 나누어 처리)
-    print(f"  🤖 Ollama ({OLLAMA_MODEL}) 에 분석 요청 중...")
-    results = []
+    # Ollama 호출 (20개씩 묶은 chunk 들을 OLLAMA_NUM_PARALLEL 만큼 동시에)
     chunk_size = 20
-    for i in range(0, len(keywords), chunk_size):
-        chunk = keywords[i:i + chunk_size]
-        print(f"    -> Chunk {i//chunk_size + 1}/{(len(keywords) + chunk_size - 1)//chunk_size} ({len(chunk)}개)...")
-        chunk_res = call_ollama(chunk)
-        if chunk_res:
-            results.extend(chunk_res)
-        else:
-            print(f"    -> ⚠️ Chunk {i//chunk_size + 1} 응답 없음/파싱 실패")
+    print(f"  🤖 Ollama ({OLLAMA_MODEL}) 에 분석 요청 중... ({(len(keywords) + chunk_size - 1)//chunk_size}개 chunk)")
+    # 배열 응답이므로 format=json 강제하지 않음 (파싱/재시도/chunk 매칭은 ollama_client)
+    client = get_client()
+    matched = client.generate_items(keywords, build_prompt, key="keyword", chunk_size=chunk_size,
+                                    model=OLLAMA_MODEL, json_format=False, timeout=600)
+    results = [r for r in matched if r]
+    if len(results) < len(keywords):
+        print(f"    -> ⚠️ {len(keywords) - len(results)}개 키워드 응답 없음/파싱 실패")
 
     if not results:
         print("  ❌ Ollama 응답이 없거나 파싱에 실패했습니다.")
@@ -168,7 +131,7 @@ def enrich_once():
     print(f"  ✅ 분석 완료: {len(results)}개 결과")
 
     # 결과를 원본 rows와 매칭해서 저장
-    result_map = {r.get("keyword"): r for r in results}
+    result_map = {kw: r for kw, r in zip(keywords, matched) if r}
 
     saved = 0
     for row in rows:
@@ -192,6 +155,8 @@ def enrich_once():
             saved += 1
 
     print(f"  💾 태그 저장 완료: {saved}/{len(rows)}개")
+    print_stats()
+    client.print_stats()
 
     # 요약 리포트 출력
     brands         = [r.get("brand")         for r in results if r.get("brand")]
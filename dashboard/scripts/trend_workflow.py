@@ -1,10 +1,14 @@
 import os
+import sys
 import json
 import asyncio
 from typing import List, Dict, Any
 from dotenv import load_dotenv
 from supabase import create_client, Client
 import google.generativeai as genai
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from generic_crawler.llm_cache import cached_call, print_cache_stats
+from generic_crawler.embeddings import search_products
 
 # Load environment variables
 load_dotenv()
@@ -17,7 +21,26 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 # Initialize clients
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-1.5-flash')
+GEMINI_MODEL = 'gemini-1.5-flash'
+model = genai.GenerativeModel(GEMINI_MODEL)
+
+def _is_json_response(text: str) -> bool:
+    try:
+        if "```json" in text:
+            text = text.split("```json")[1].split("```")[0]
+        elif "```" in text:
+            text = text.split("```")[1].split("```")[0]
+        json.loads(text.strip())
+        return True
+    except Exception:
+        return False
+
+def generate_text(stage: str, prompt: str) -> str:
+    """Gemini 호출 (같은 stage + 프롬프트면 llm_cache 에서 재사용, JSON 파싱되는 응답만 저장)"""
+    return cached_call(
+        f"trend_workflow_{stage}", lambda: model.generate_content(prompt).text,
+        model=GEMINI_MODEL, inputs={"prompt": prompt}, cacheable=_is_json_response,
+    )
 
 async def stage_1_extract_trends(input_text: str) -> Dict[str, Any]:
     """
@@ -40,10 +63,10 @@ async def stage_1_extract_trends(input_text: str) -> Dict[str, Any]:
 응답은 반드시 다른 설명 없이 JSON 코드 블록만 출력해줘. JSON 키는 반드시 위에 명시된 영어 이름을 사용해줘.
     """
     
-    response = model.generate_content(prompt)
+    response_text = generate_text("extract", prompt)
     try:
         # Extract JSON from response
-        text = response.text.strip()
+        text = response_text.strip()
         if "```json" in text:
             text = text.split("```json")[1].split("```")[0].strip()
         elif "```" in text:
@@ -63,17 +86,16 @@ async def stage_2_match_products(trends: Dict[str, Any]) -> List[Dict[str, Any]]
     elements = ", ".join(trends.get("Key_Elements", []))
     search_query = f"{keyword} {elements}"
     
-    # Use RPC for semantic search (if available/implemented as per migration 007)
+    # Use RPC for semantic search (match_products_local, migration 023, embedding_local populated by generic_crawler/embeddings.py)
     # Falling back to name-based match if needed
     try:
-        # Match products using vector similarity via RPC
-        # Need to generate embedding first for the search_query
-        # For simplicity in this script, we'll try to use the match_products RPC 
-        # but since generating embeddings requires another call, we'll use a combined approach.
-        
-        # 1. Keyword search as fallback/supplement
-        res = supabase.table("products_master").select("*").or_(f"name.ilike.%{keyword}%,brand.ilike.%{keyword}%").limit(10).execute()
-        potential_products = res.data
+        # 1. Vector search over the whole catalogue (query embedded with the same local model)
+        potential_products = search_products(search_query, count=20)
+
+        # Keyword search as fallback (no embeddings yet / embedding server down)
+        if not potential_products:
+            res = supabase.table("products_master").select("*").or_(f"name.ilike.%{keyword}%,brand.ilike.%{keyword}%").limit(10).execute()
+            potential_products = res.data
         
         # 2. Use LLM to score and select top 5
         product_list_str = "\n".join([f"- ID: {p['id']}, Name: {p['name']}, Brand: {p['brand']}, Price: {p['price']}" for p in potential_products])
@@ -102,8 +124,7 @@ async def stage_2_match_products(trends: Dict[str, Any]) -> List[Dict[str, Any]]
 응답은 다른 메시지 없이 JSON만 출력해줘.
         """
         
-        response = model.generate_content(prompt)
-        text = response.text.strip()
+        text = generate_text("match", prompt).strip()
         if "```json" in text:
             text = text.split("```json")[1].split("```")[0].strip()
         elif "```" in text:
@@ -172,9 +193,9 @@ async def stage_3_generate_marketing(match: Dict[str, Any], trends: Dict[str, An
 응답은 JSON만 출력해줘.
     """
     
-    response = model.generate_content(prompt)
+    response_text = generate_text("marketing", prompt)
     try:
-        text = response.text.strip()
+        text = response_text.strip()
         if "```json" in text:
             text = text.split("```json")[1].split("```")[0].strip()
         elif "```" in text:
@@ -247,6 +268,7 @@ async def run_full_workflow(input_text: str, user_id: str = None):
         # Update status
         supabase.table("trend_analysis_runs").update({"status": "completed"}).eq("id", run_id).execute()
         print(f"✅ Workflow completed successfully! Run ID: {run_id}")
+        print_cache_stats()
         return run_id
         
     except Exception as e:
@@ -155,6 +155,33 @@ export async function fetchNaverBestBrands({ categoryId = 'A', periodType = 'WEE
     return res;
 }
 
+/**
+ * Fetch precomputed rank movements (rank_history.py → rank_movements) for the latest date.
+ * risingOnly: 상승 상품만 rank_change 내림차순. 테이블이 없거나 비어 있으면 null.
+ */
+async function fetchRankMovements(platform, limit = 50, { risingOnly = true, productIds = null } = {}) {
+    try {
+        const dateRes = await query('rank_movements', `select=date&source=eq.${platform}&order=date.desc&limit=1`);
+        const latestDate = dateRes.data?.[0]?.date;
+        if (!latestDate) return null;
+
+        let params = `select=*,products_master(*)&source=eq.${platform}&date=eq.${latestDate}&rank=not.is.null`;
+        if (productIds) params += `&product_id=in.(${productIds.join(',')})`;
+        if (risingOnly) params += `&rank_change=gt.0&order=rank_change.desc&limit=${limit}`;
+        const res = await query('rank_movements', params);
+        return (res.data || []).map(r => ({
+            ...r,
+            ...(r.products_master || {}),
+            id: r.product_id,
+            current_rank: r.rank,
+            rank_change: r.rank_change
+        }));
+    } catch (e) {
+        console.warn('rank_movements unavailable, falling back:', e.message);
+        return null;
+    }
+}
+
 /**
  * Fetch trending products (7-day rank change)
  */
@@ -176,6 +203,21 @@ export async function fetchTrending(limit = 50, platform = 'oliveyoung') {
                 current_rank: r.rank,
                 rank_change: 0
             }));
+            // rank_history.py 가 계산한 전일 대비 변동 병합
+            // rank_movements.product_id 는 products_master.id (BIGINT FK). r.product_id 는 위 spread 로
+            // products_master 의 텍스트 key(kw_gt_…)가 되었으므로 products_master.id 로 조회 / 매칭
+            const productIds = trendRes.data.map(r => r.products_master?.id).filter(id => id);
+            const movements = productIds.length
+                ? await fetchRankMovements(platform, limit, { risingOnly: false, productIds })
+                : null;
+            if (movements) {
+                const moveMap = {};
+                movements.filter(m => m.date === latestDate).forEach(m => moveMap[`${m.category_code}:${m.id}`] = m);
+                trendRes.data = trendRes.data.map(r => {
+                    const m = moveMap[`${r.category_code}:${r.products_master?.id}`];
+                    return m ? { ...r, rank_change: m.rank_change, rank_status: m.status, streak_days: m.streak_days, velocity: m.velocity } : r;
+                });
+            }
         }
     } else {
         // Standard trending
@@ -183,7 +225,16 @@ export async function fetchTrending(limit = 50, platform = 'oliveyoung') {
     }
 
     if (!trendRes.data || trendRes.data.length === 0) {
-        // Fallback: Calculate 1-day trend if v_trending_7d is empty (e.g. less than 7 days of data)
+        // Fallback 1: rank_history.py 가 미리 계산한 최신일 순위 변동
+        const movements = await fetchRankMovements(platform, limit);
+        if (movements && movements.length > 0) {
+            trendRes.data = movements;
+            trendRes.count = movements.length;
+        }
+    }
+
+    if (!trendRes.data || trendRes.data.length === 0) {
+        // Fallback 2: Calculate 1-day trend if v_trending_7d is empty (e.g. less than 7 days of data)
         // [FIX] Two-step date discovery to bypass the 1000-row limit of PostgREST
         const d1Res = await query('daily_rankings_v2', `select=date&source=eq.${platform}&order=date.desc&limit=1`);
         const latestDate = d1Res.data?.[0]?.date;
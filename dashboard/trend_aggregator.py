@@ -1,36 +1,301 @@
+"""
+Incremental News Trend Aggregator
+
+분석이 끝난(enrichment_status = 'done') News 태그(brand / ingredient / fashion_style)를 기사 created_at 의
+시간(UTC hour) 단위 bucket 으로 SQLite 에 저장하고, watermark(마지막으로 읽은 enrichment_updated_at) 이후에
+분석이 끝난 기사만 가져와 bucket 에 더합니다. 기사는 pending 으로 먼저 저장되고 news_enricher 가 나중에
+태그를 채우므로, created_at 기준으로 읽으면 태그 없는 상태로 한 번 읽고 지나가 버립니다.
+24h / 48h / 7d sliding window 합계는 새 bucket 을 더하고 window 밖으로 밀려난 bucket 을 빼서 유지하므로
+몇 분마다 실행해도 window 전체를 다시 조회하지 않습니다.
+
+설정 (env):
+    TREND_BUCKET_PATH                 기본 dashboard/trend_buckets.sqlite
+    TREND_BUCKET_RETENTION_DAYS=90    이보다 오래된 bucket 은 정리
+    TREND_SETTLE_SECONDS=60           이보다 최근에 완료된 기사는 다음 실행에 읽음 (동시에 저장 중인 worker 대비)
+
+사용법:
+    python trend_aggregator.py                                  # 증분 집계 + 48h 일일 인사이트 저장
+    python trend_aggregator.py run --no-save                    # 집계만
+    python trend_aggregator.py backfill --from 2026-10-01 --to 2026-10-07
+    python trend_aggregator.py windows                          # 현재 window 상위 term 출력
+"""
 import os
 import json
-import requests
+import sqlite3
+import argparse
+import threading
 from collections import Counter
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 import sys
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from generic_crawler.config import SUPABASE_URL, HEADERS
+from generic_crawler.supabase_client import sb
 
 # ENV Setup
 load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
 
-def fetch_recent_news_tags():
-    """최근 48시간 내에 수집된 뉴스 기사의 태그(brand, ingredient, fashion_style)를 모두 가져옵니다."""
-    two_days_ago = (datetime.now() - timedelta(days=2)).isoformat()
-    
-    try:
-        res = requests.get(
-            f"{SUPABASE_URL}/rest/v1/products_master",
-            headers=HEADERS,
-            params={
-                "category": "eq.News",
-                "created_at": f"gte.{two_days_ago}",
-                "select": "tags"
-            },
-            timeout=30
-        )
+TREND_BUCKET_PATH = os.getenv("TREND_BUCKET_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "trend_buckets.sqlite"))
+TREND_BUCKET_RETENTION_DAYS = int(os.getenv("TREND_BUCKET_RETENTION_DAYS", "90"))
+TREND_SETTLE_SECONDS = int(os.getenv("TREND_SETTLE_SECONDS", "60"))
+
+WINDOWS = {"24h": 24, "48h": 48, "7d": 24 * 7}
+TAG_KINDS = ("brand", "ingredient", "fashion_style")
+DOCS = ("docs", "*")  # 기사 수도 같은 bucket 테이블에 (kind, term) 으로 저장
+PAGE_SIZE = 1000
+
+_db = None
+_lock = threading.Lock()
+
+
+def _conn() -> sqlite3.Connection:
+    global _db
+    if _db is None:
+        _db = sqlite3.connect(TREND_BUCKET_PATH, timeout=30, check_same_thread=False)
+        _db.execute("PRAGMA journal_mode=WAL")
+        _db.executescript("""
+            CREATE TABLE IF NOT EXISTS term_buckets (
+                hour  INTEGER NOT NULL,      -- UTC epoch hour (unix seconds // 3600)
+                kind  TEXT NOT NULL,         -- brand | ingredient | fashion_style | docs
+                term  TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (hour, kind, term)
+            );
+            CREATE TABLE IF NOT EXISTS window_totals (
+                win    TEXT NOT NULL,        -- 24h | 48h | 7d
+                kind   TEXT NOT NULL,
+                term   TEXT NOT NULL,
+                count  INTEGER NOT NULL,
+                PRIMARY KEY (win, kind, term)
+            );
+            CREATE TABLE IF NOT EXISTS aggregator_state (
+                key   TEXT PRIMARY KEY,      -- enriched_watermark | enriched_watermark_ids | low:<window>
+                value TEXT NOT NULL
+            );
+        """)
+        _db.commit()
+    return _db
+
+
+def _get_state(db, key, default=None):
+    row = db.execute("SELECT value FROM aggregator_state WHERE key = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else default
+
+
+def _set_state(db, key, value):
+    db.execute("INSERT OR REPLACE INTO aggregator_state VALUES (?, ?)", (key, json.dumps(value)))
+
+
+def _epoch_hour(created_at: str) -> int:
+    dt = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp()) // 3600
+
+
+def _current_hour() -> int:
+    return int(datetime.now(timezone.utc).timestamp()) // 3600
+
+
+def _parse_ts(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def fetch_news_tags(since: str = None, until: str = None, enriched_since: str = None, enriched_until: str = None):
+    """분석 완료된 News 기사의 id / created_at / enrichment_updated_at / tags 를 페이지 단위 조회합니다.
+    since / until: created_at 구간 (backfill, until 미포함).
+    enriched_since / enriched_until: enrichment_updated_at 구간 (증분, since 포함 / until 미포함)."""
+    filters = []
+    if since:
+        filters.append(f"created_at.gte.{since}")
+    if until:
+        filters.append(f"created_at.lt.{until}")
+    if enriched_since:
+        filters.append(f"enrichment_updated_at.gte.{enriched_since}")
+    if enriched_until:
+        filters.append(f"enrichment_updated_at.lt.{enriched_until}")
+
+    records = []
+    offset = 0
+    while True:
+        params = {
+            "category": "eq.News",
+            "enrichment_status": "eq.done",
+            "select": "id,created_at,enrichment_updated_at,tags",
+            "order": "enrichment_updated_at.asc,id.asc",
+            "limit": PAGE_SIZE,
+            "offset": offset,
+        }
+        if filters:
+            params["and"] = f"({','.join(filters)})"
+        res = sb.get(f"{SUPABASE_URL}/rest/v1/products_master", headers=HEADERS, params=params, timeout=30)
         res.raise_for_status()
-        return res.json()
-    except Exception as e:
-        print(f"❌ DB 조회 실패: {e}")
-        return []
+        rows = res.json()
+        records.extend(rows)
+        if len(rows) < PAGE_SIZE:
+            return records
+        offset += PAGE_SIZE
+
+
+def _bucket_counts(records) -> Counter:
+    """records → Counter{(hour, kind, term): count}"""
+    counts = Counter()
+    for record in records:
+        hour = _epoch_hour(record["created_at"])
+        counts[(hour, *DOCS)] += 1
+        for kind, terms in extract_terms(record.get("tags")).items():
+            for term in terms:
+                counts[(hour, kind, term)] += 1
+    return counts
+
+
+def _add_buckets(db, counts: Counter, lows: dict):
+    """bucket 에 더하고, 각 window 의 하한(low) 이후 hour 면 window 합계에도 더함"""
+    db.executemany(
+        "INSERT INTO term_buckets VALUES (?, ?, ?, ?) "
+        "ON CONFLICT (hour, kind, term) DO UPDATE SET count = count + excluded.count",
+        [(hour, kind, term, n) for (hour, kind, term), n in counts.items()],
+    )
+    for name, low in lows.items():
+        db.executemany(
+            "INSERT INTO window_totals VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (win, kind, term) DO UPDATE SET count = count + excluded.count",
+            [(name, kind, term, n) for (hour, kind, term), n in counts.items() if hour >= low],
+        )
+
+
+def _rebuild_window(db, name: str, low: int):
+    db.execute("DELETE FROM window_totals WHERE win = ?", (name,))
+    db.execute(
+        "INSERT INTO window_totals SELECT ?, kind, term, SUM(count) FROM term_buckets WHERE hour >= ? GROUP BY kind, term",
+        (name, low),
+    )
+    _set_state(db, f"low:{name}", low)
+
+
+def _slide_windows(db, now_hour: int) -> dict:
+    """window 하한을 now 기준으로 옮기면서 밀려난 bucket 만 합계에서 뺌. 반환: {window: low}"""
+    lows = {}
+    for name, hours in WINDOWS.items():
+        new_low = now_hour - hours + 1
+        old_low = _get_state(db, f"low:{name}")
+        if old_low is None or new_low < old_low:
+            _rebuild_window(db, name, new_low)
+        elif new_low > old_low:
+            expired = db.execute(
+                "SELECT kind, term, SUM(count) FROM term_buckets WHERE hour >= ? AND hour < ? GROUP BY kind, term",
+                (old_low, new_low),
+            ).fetchall()
+            db.executemany(
+                "UPDATE window_totals SET count = count - ? WHERE win = ? AND kind = ? AND term = ?",
+                [(n, name, kind, term) for kind, term, n in expired],
+            )
+            db.execute("DELETE FROM window_totals WHERE win = ? AND count <= 0", (name,))
+            _set_state(db, f"low:{name}", new_low)
+        lows[name] = new_low
+    return lows
+
+
+def _advance_watermark(db, records):
+    """마지막 enrichment_updated_at 과, 그 시각에 이미 읽은 id 목록 (같은 timestamp 의 늦은 저장 대비).
+    migration 025 이전에 완료 처리된 기사는 enrichment_updated_at 이 없으므로 watermark 에 쓰지 않음."""
+    records = [r for r in records if r.get("enrichment_updated_at")]
+    if not records:
+        return
+    watermark = _get_state(db, "enriched_watermark")
+    seen_ids = set(_get_state(db, "enriched_watermark_ids", []))
+    last = max(records, key=lambda r: _parse_ts(r["enrichment_updated_at"]))["enrichment_updated_at"]
+    if watermark and _parse_ts(watermark) > _parse_ts(last):
+        return
+    ids = {r["id"] for r in records if r["enrichment_updated_at"] == last}
+    if last == watermark:
+        ids |= seen_ids
+    _set_state(db, "enriched_watermark", last)
+    _set_state(db, "enriched_watermark_ids", sorted(ids))
+
+
+def _within_watermark(records, watermark, seen_ids):
+    """이미 증분 집계가 지나간 기사만 (watermark 이전 완료, 또는 watermark 시각에 읽은 id)"""
+    done = []
+    for r in records:
+        ts = r.get("enrichment_updated_at")
+        if not ts or _parse_ts(ts) < _parse_ts(watermark) or (ts == watermark and r["id"] in seen_ids):
+            done.append(r)
+    return done
+
+
+def backfill(start: datetime, end: datetime, bootstrap: bool = False) -> int:
+    """created_at 이 [start, end) 인 bucket 을 DB 에서 다시 읽어 재구성하고 window 합계를 다시 계산합니다.
+    bootstrap(첫 실행)일 때만 watermark 를 옮기고, 구간 backfill 은 watermark 이후 완료된 기사를
+    다음 증분 실행에 남겨 둡니다 (구간 밖 기사를 건너뛰거나 같은 기사를 두 번 세지 않도록)."""
+    start_hour = int(start.timestamp()) // 3600
+    end_hour = int(end.timestamp()) // 3600
+    print(f"  ♻️ Backfill: {start.isoformat()} ~ {end.isoformat()}")
+    records = fetch_news_tags(start.isoformat(), end.isoformat())
+
+    with _lock:
+        db = _conn()
+        watermark = _get_state(db, "enriched_watermark")
+        if not bootstrap and watermark:
+            records = _within_watermark(records, watermark, set(_get_state(db, "enriched_watermark_ids", [])))
+        counts = _bucket_counts(records)
+        db.execute("DELETE FROM term_buckets WHERE hour >= ? AND hour < ?", (start_hour, end_hour))
+        _add_buckets(db, counts, {})
+        now_hour = _current_hour()
+        for name, hours in WINDOWS.items():
+            _rebuild_window(db, name, now_hour - hours + 1)
+        if bootstrap:
+            _advance_watermark(db, records)
+        db.commit()
+    print(f"  ✅ {len(records)}개 기사 → bucket {len(counts)}개 재구성")
+    return len(records)
+
+
+def update() -> dict:
+    """watermark 이후 분석이 끝난 기사만 읽어 bucket / window 합계에 반영합니다."""
+    with _lock:
+        watermark = _get_state(_conn(), "enriched_watermark")
+    if watermark is None:
+        # 첫 실행: 가장 긴 window 만큼 backfill 해서 시작점 확보
+        now = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        fetched = backfill(now - timedelta(hours=max(WINDOWS.values())), now, bootstrap=True)
+        return {"new_records": fetched, "bootstrap": True}
+
+    with _lock:
+        seen_ids = set(_get_state(_conn(), "enriched_watermark_ids", []))
+    settled = (datetime.now(timezone.utc) - timedelta(seconds=TREND_SETTLE_SECONDS)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    records = [r for r in fetch_news_tags(enriched_since=watermark, enriched_until=settled) if r["id"] not in seen_ids]
+    counts = _bucket_counts(records)
+
+    with _lock:
+        db = _conn()
+        lows = _slide_windows(db, _current_hour())
+        _add_buckets(db, counts, lows)
+        _advance_watermark(db, records)
+        retention_hour = _current_hour() - TREND_BUCKET_RETENTION_DAYS * 24
+        pruned = db.execute("DELETE FROM term_buckets WHERE hour < ?", (retention_hour,)).rowcount
+        db.commit()
+    return {"new_records": len(records), "buckets_touched": len(counts), "pruned": pruned, "bootstrap": False}
+
+
+def window_counters(name: str):
+    """window 합계 → (brands, ingredients, styles, analyzed_count)"""
+    with _lock:
+        rows = _conn().execute("SELECT kind, term, count FROM window_totals WHERE win = ?", (name,)).fetchall()
+    counters = {kind: Counter() for kind in TAG_KINDS}
+    docs = 0
+    for kind, term, n in rows:
+        if (kind, term) == DOCS:
+            docs = n
+        elif kind in counters:
+            counters[kind][term] = n
+    return counters["brand"], counters["ingredient"], counters["fashion_style"], docs
+
+
+def print_windows():
+    for name in WINDOWS:
+        b, i, s, docs = window_counters(name)
+        print(f"  [{name:>3}] 기사 {docs}개 | 브랜드 {dict(b.most_common(5))} | 성분 {dict(i.most_common(5))} | 스타일 {dict(s.most_common(5))}")
 
 STOPWORDS = {
     "화장품", "뷰티", "패션", "브랜드", "신제품", "출시", "프로모션", "이벤트", 
@@ -45,6 +310,16 @@ def is_valid_term(term):
         return False
     return True
 
+def extract_terms(tags):
+    """tags dict → {"brand": [...], "ingredient": [...], "fashion_style": [...]} (콤마 분리, 불용어/null 제거)"""
+    terms = {}
+    if not tags or not isinstance(tags, dict):
+        return terms
+    for kind in TAG_KINDS:
+        if kind in tags and isinstance(tags[kind], str):
+            terms[kind] = [t.strip() for t in tags[kind].split(",") if is_valid_term(t.strip().lower()) and t.strip().lower() != "null"]
+    return terms
+
 def aggregate_trends(records):
     """태그 배열을 순회하며 브랜드와 성분의 빈도수를 집계합니다."""
     brands = Counter()
@@ -52,24 +327,10 @@ def aggregate_trends(records):
     styles = Counter()
     
     for record in records:
-        tags = record.get("tags")
-        if not tags or not isinstance(tags, dict):
-            continue
-            
-        # 브랜드 집계 (콤마로 분리된 경우 처리)
-        if "brand" in tags and isinstance(tags["brand"], str):
-            b_list = [b.strip() for b in tags["brand"].split(",") if is_valid_term(b.strip().lower()) and b.strip().lower() != "null"]
-            brands.update(b_list)
-            
-        # 성분 집계
-        if "ingredient" in tags and isinstance(tags["ingredient"], str):
-            i_list = [i.strip() for i in tags["ingredient"].split(",") if is_valid_term(i.strip().lower()) and i.strip().lower() != "null"]
-            ingredients.update(i_list)
-            
-        # 패션 스타일 집계
-        if "fashion_style" in tags and isinstance(tags["fashion_style"], str):
-            s_list = [s.strip() for s in tags["fashion_style"].split(",") if is_valid_term(s.strip().lower()) and s.strip().lower() != "null"]
-            styles.update(s_list)
+        terms = extract_terms(record.get("tags"))
+        brands.update(terms.get("brand", []))
+        ingredients.update(terms.get("ingredient", []))
+        styles.update(terms.get("fashion_style", []))
             
     return brands, ingredients, styles
 
@@ -103,7 +364,7 @@ def save_daily_insight(brands, ingredients, styles, analyzed_count):
     }
     
     try:
-        requests.post(
+        sb.post(
             f"{SUPABASE_URL}/rest/v1/products_master",
             headers={**HEADERS, "Prefer": "return=representation,resolution=merge-duplicates"},
             params={"on_conflict": "source,product_id"},
@@ -115,12 +376,35 @@ def save_daily_insight(brands, ingredients, styles, analyzed_count):
         print(f"❌ 요약 저장 실패: {e}")
 
 if __name__ == "__main__":
-    print(f"[{datetime.now()}] 트렌드 종합 카운터 시작...")
-    records = fetch_recent_news_tags()
-    
-    if not records:
-        print("  ⚠️ 분석할 뉴스 태그가 없습니다.")
+    parser = argparse.ArgumentParser(description="Incremental news trend aggregator")
+    sub = parser.add_subparsers(dest="command")
+    run_p = sub.add_parser("run", help="watermark 이후 분석 완료된 기사만 집계 (기본)")
+    run_p.add_argument("--no-save", action="store_true", help="일일 인사이트 저장 생략")
+    backfill_p = sub.add_parser("backfill", help="날짜 구간 bucket 재구성 (UTC, --to 포함)")
+    backfill_p.add_argument("--from", dest="date_from", required=True, help="YYYY-MM-DD")
+    backfill_p.add_argument("--to", dest="date_to", required=True, help="YYYY-MM-DD")
+    sub.add_parser("windows", help="현재 window 상위 term 출력")
+    args = parser.parse_args()
+
+    if args.command == "backfill":
+        start = datetime.strptime(args.date_from, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+        end = datetime.strptime(args.date_to, "%Y-%m-%d").replace(tzinfo=timezone.utc) + timedelta(days=1)
+        backfill(start, end)
+        print_windows()
+    elif args.command == "windows":
+        print_windows()
     else:
-        print(f"  🔍 {len(records)}개의 뉴스 분석 데이터 발견.")
-        b, i, s = aggregate_trends(records)
-        save_daily_insight(b, i, s, len(records))
+        print(f"[{datetime.now()}] 트렌드 종합 카운터 시작...")
+        try:
+            result = update()
+        except Exception as e:
+            print(f"❌ DB 조회 실패: {e}")
+            sys.exit(1)
+        print(f"  🔍 새 뉴스 {result['new_records']}개 반영" + (" (첫 실행 backfill)" if result["bootstrap"] else ""))
+        print_windows()
+
+        b, i, s, analyzed = window_counters("48h")
+        if not analyzed:
+            print("  ⚠️ 분석할 뉴스 태그가 없습니다.")
+        elif not getattr(args, "no_save", False):
+            save_daily_insight(b, i, s, analyzed)
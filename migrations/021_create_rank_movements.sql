@@ -0,0 +1,29 @@
+-- 021_create_rank_movements.sql
+-- rank_history.py 가 daily_rankings_v2 로부터 계산한 일별 순위 변동 (대시보드 fetchTrending / 리포트용)
+
+CREATE TABLE IF NOT EXISTS public.rank_movements (
+    id BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    source TEXT NOT NULL,
+    category_code TEXT NOT NULL,
+    product_id BIGINT NOT NULL REFERENCES public.products_master(id) ON DELETE CASCADE,
+    date DATE NOT NULL,
+    rank INT,                          -- NULL = 이탈 (dropped)
+    prev_rank INT,                     -- 같은 카테고리 직전 크롤일 순위 (NULL = 신규)
+    rank_change INT NOT NULL DEFAULT 0, -- prev_rank - rank (+ = 상승)
+    status TEXT NOT NULL,              -- 'new', 'up', 'down', 'same', 'dropped'
+    streak_days INT NOT NULL DEFAULT 0, -- 연속 랭킹 등장 크롤일 수
+    velocity REAL NOT NULL DEFAULT 0,  -- 최근 7일 일평균 상승 계단 (최소제곱 기울기)
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- upsert 키 (bulk_writer.upsert_rows on_conflict)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_rank_movements_unique
+    ON public.rank_movements(source, category_code, product_id, date);
+
+-- 대시보드: 소스별 최신일 급상승 조회
+CREATE INDEX IF NOT EXISTS idx_rank_movements_source_date
+    ON public.rank_movements(source, date DESC, rank_change DESC);
+
+-- RLS
+ALTER TABLE public.rank_movements ENABLE ROW LEVEL SECURITY;
+CREATE POLICY "Allow read access to rank movements" ON public.rank_movements FOR SELECT USING (true);
@@ -0,0 +1,10 @@
+-- 022_add_product_content_hash.sql
+-- 상품 변경 감지: RankingWriter 가 updated_at 등을 제외한 상품 레코드의 sha1 을 함께 저장
+-- 크롤러는 로컬 캐시(product_hashes.sqlite)의 hash 와 같으면 products_master upsert 를 건너뜁니다.
+-- 로컬 캐시가 비어 있으면 이 컬럼으로 seed 합니다 (python generic_crawler/product_hashes.py seed <source>).
+
+ALTER TABLE public.products_master ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_products_master_source_hash
+    ON public.products_master (source)
+    WHERE content_hash IS NOT NULL;
@@ -0,0 +1,117 @@
+-- 023_embedding_pipeline.sql
+-- generic_crawler/embeddings.py 가 채우는 로컬(Ollama) 상품 임베딩 컬럼 / 인덱스 / 검색 RPC
+-- embedding 컬럼은 대시보드 검색(generate-embeddings edge function, Gemini text-embedding-004)이 쓰는
+-- 공간이라 다른 모델의 벡터를 섞지 않도록 embedding_local / match_products_local 을 따로 둡니다.
+-- embedding_model 이 현재 "<모델>:<버전>" 과 다르거나 embedding_hash(brand/name/category 의 sha1)가
+-- 바뀐 상품만 다시 임베딩합니다.
+
+ALTER TABLE public.products_master ADD COLUMN IF NOT EXISTS embedding_local vector(768);
+ALTER TABLE public.products_master ADD COLUMN IF NOT EXISTS embedding_model TEXT;
+ALTER TABLE public.products_master ADD COLUMN IF NOT EXISTS embedding_hash TEXT;
+ALTER TABLE public.products_master ADD COLUMN IF NOT EXISTS embedded_at TIMESTAMPTZ;
+
+COMMENT ON COLUMN public.products_master.embedding_local IS '로컬 Ollama 임베딩 (embedding_model 의 모델, Gemini embedding 과 별개)';
+COMMENT ON COLUMN public.products_master.embedding_model IS 'embedding_local 의 모델:버전 (예: nomic-embed-text:v1)';
+COMMENT ON COLUMN public.products_master.embedding_hash IS 'embedding_local 입력(brand/name/category) sha1';
+
+CREATE INDEX IF NOT EXISTS idx_products_embedding_local ON public.products_master
+USING hnsw (embedding_local vector_cosine_ops);
+
+-- match_products 재정의
+-- 기존 함수는 WHERE 1 - (embedding <=> q) > threshold / ORDER BY similarity 라서 HNSW 인덱스를 타지 못하고
+-- (price numeric → bigint 반환 타입 불일치도 있음) 전체 테이블을 훑었습니다.
+-- ORDER BY embedding <=> q LIMIT 으로 인덱스에서 후보를 먼저 뽑은 뒤 threshold 를 적용합니다.
+DROP FUNCTION IF EXISTS match_products(vector, float, int);
+
+CREATE OR REPLACE FUNCTION match_products (
+  query_embedding vector(768),
+  match_threshold float,
+  match_count int
+)
+RETURNS TABLE (
+  id bigint,
+  source text,
+  name text,
+  brand text,
+  category text,
+  price bigint,
+  image_url text,
+  product_url text,
+  vi_name text,
+  ai_summary jsonb,
+  similarity float
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT c.id, c.source, c.name, c.brand, c.category, c.price, c.image_url, c.product_url,
+         c.vi_name, c.ai_summary, 1 - c.distance AS similarity
+  FROM (
+    SELECT
+      pm.id,
+      pm.source,
+      pm.name,
+      pm.brand,
+      pm.category,
+      pm.price::bigint AS price,
+      pm.image_url,
+      pm.url AS product_url,
+      pm.vi_name,
+      pm.ai_summary,
+      (pm.embedding <=> query_embedding)::float AS distance
+    FROM public.products_master pm
+    WHERE pm.embedding IS NOT NULL
+    ORDER BY pm.embedding <=> query_embedding
+    LIMIT match_count
+  ) c
+  WHERE 1 - c.distance > match_threshold
+  ORDER BY c.distance;
+$$;
+
+COMMENT ON FUNCTION match_products IS '벡터 유사도 기반 상품 검색 함수 (Gemini embedding, HNSW 인덱스 사용, AI 스마트 검색용)';
+
+-- match_products 와 같은 형태, embedding_local 대상 (embeddings.embed_query 로 만든 query 벡터용)
+CREATE OR REPLACE FUNCTION match_products_local (
+  query_embedding vector(768),
+  match_threshold float,
+  match_count int
+)
+RETURNS TABLE (
+  id bigint,
+  source text,
+  name text,
+  brand text,
+  category text,
+  price bigint,
+  image_url text,
+  product_url text,
+  vi_name text,
+  ai_summary jsonb,
+  similarity float
+)
+LANGUAGE sql STABLE
+AS $$
+  SELECT c.id, c.source, c.name, c.brand, c.category, c.price, c.image_url, c.product_url,
+         c.vi_name, c.ai_summary, 1 - c.distance AS similarity
+  FROM (
+    SELECT
+      pm.id,
+      pm.source,
+      pm.name,
+      pm.brand,
+      pm.category,
+      pm.price::bigint AS price,
+      pm.image_url,
+      pm.url AS product_url,
+      pm.vi_name,
+      pm.ai_summary,
+      (pm.embedding_local <=> query_embedding)::float AS distance
+    FROM public.products_master pm
+    WHERE pm.embedding_local IS NOT NULL
+    ORDER BY pm.embedding_local <=> query_embedding
+    LIMIT match_count
+  ) c
+  WHERE 1 - c.distance > match_threshold
+  ORDER BY c.distance;
+$$;
+
+COMMENT ON FUNCTION match_products_local IS '로컬 Ollama 임베딩(embedding_local) 기반 상품 검색 (트렌드 매칭용)';
@@ -0,0 +1,13 @@
+-- 024_daily_specials_unique.sql
+-- oliveyoung_hotdeal_crawler.save_hotdeals 가 daily_specials_v2 를 (product_id, date) 기준 배열 upsert 로 저장합니다.
+-- (기존: 상품마다 GET 후 PATCH/POST) on_conflict 에 쓰려면 unique 제약이 필요하므로,
+-- 같은 날 중복 저장된 row 를 가장 최근 것만 남기고 정리한 뒤 unique index 를 만듭니다.
+
+DELETE FROM public.daily_specials_v2 d
+USING public.daily_specials_v2 newer
+WHERE d.product_id = newer.product_id
+  AND d.date = newer.date
+  AND (d.created_at, d.id::text) < (newer.created_at, newer.id::text);
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_daily_specials_v2_product_date
+    ON public.daily_specials_v2 (product_id, date);
@@ -0,0 +1,24 @@
+-- 025_news_enrichment_queue.sql
+-- 뉴스 스크래핑과 LLM 분석(태그 추출 + 요약) 분리
+-- news_trend_crawler.py 는 기사 원문을 enrichment_status = 'pending' 으로 바로 저장하고,
+-- generic_crawler/news_enricher.py 가 pending row 를 가져가(claim → 'processing') 분석 후 'done' / 'failed' 로 갱신합니다.
+-- 상품 row 는 enrichment_status 가 NULL (큐 대상 아님).
+
+ALTER TABLE public.products_master ADD COLUMN IF NOT EXISTS article_content TEXT;
+ALTER TABLE public.products_master ADD COLUMN IF NOT EXISTS enrichment_status TEXT;
+ALTER TABLE public.products_master ADD COLUMN IF NOT EXISTS enrichment_attempts INT NOT NULL DEFAULT 0;
+ALTER TABLE public.products_master ADD COLUMN IF NOT EXISTS enrichment_error TEXT;
+ALTER TABLE public.products_master ADD COLUMN IF NOT EXISTS enrichment_updated_at TIMESTAMPTZ;
+
+COMMENT ON COLUMN public.products_master.article_content IS '뉴스 기사 본문 (LLM 분석 입력, 최대 3000자)';
+COMMENT ON COLUMN public.products_master.enrichment_status IS 'pending | processing | done | failed (뉴스만, 상품은 NULL)';
+
+-- 이전 방식으로 이미 분석까지 저장된 뉴스는 완료 처리
+UPDATE public.products_master
+SET enrichment_status = 'done'
+WHERE category = 'News' AND enrichment_status IS NULL AND ai_summary IS NOT NULL;
+
+-- worker 가 오래된 순으로 꺼내 가는 큐 인덱스 (완료된 row 는 제외)
+CREATE INDEX IF NOT EXISTS idx_products_master_enrichment_queue
+    ON public.products_master (enrichment_status, created_at)
+    WHERE enrichment_status IN ('pending', 'processing', 'failed');
@@ -0,0 +1,36 @@
+-- 026_product_last_seen.sql
+-- 상품 변경 감지(022) 이후 내용이 그대로인 상품은 products_master 를 다시 쓰지 않으므로
+-- updated_at 이 더 이상 "마지막으로 랭킹에 나온 시각"이 아닙니다.
+-- daily_rankings_v2 에 랭킹이 저장될 때 trigger 가 해당 상품의 last_seen_at 을 갱신합니다
+-- (크롤러 요청은 늘지 않고 updated_at 은 그대로).
+-- 리뷰 수집 큐(review_collector.py, update_*_reviews.py, oliveyoung_crawler.py)는 last_seen_at 순으로 가져갑니다.
+
+ALTER TABLE public.products_master ADD COLUMN IF NOT EXISTS last_seen_at TIMESTAMPTZ;
+
+COMMENT ON COLUMN public.products_master.last_seen_at IS '마지막으로 daily_rankings_v2 에 랭킹이 저장된 시각 (trigger)';
+
+-- 기존 row 는 지금까지의 updated_at 으로 시작
+UPDATE public.products_master SET last_seen_at = updated_at WHERE last_seen_at IS NULL;
+
+CREATE OR REPLACE FUNCTION public.touch_product_last_seen()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  -- upsert 요청 하나(트랜잭션)에 같은 상품이 여러 카테고리로 들어와도 한 번만 갱신
+  UPDATE public.products_master
+  SET last_seen_at = now()
+  WHERE id = NEW.product_id
+    AND (last_seen_at IS NULL OR last_seen_at < now());
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS tr_touch_product_last_seen ON public.daily_rankings_v2;
+CREATE TRIGGER tr_touch_product_last_seen
+AFTER INSERT OR UPDATE ON public.daily_rankings_v2
+FOR EACH ROW
+EXECUTE FUNCTION public.touch_product_last_seen();
+
+CREATE INDEX IF NOT EXISTS idx_products_master_source_last_seen
+    ON public.products_master (source, last_seen_at DESC);